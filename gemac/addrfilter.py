@@ -1,5 +1,6 @@
-from myhdl import Signal, intbv, block, always_seq
+from myhdl import Signal, intbv, block, always_seq, ConcatSignal, concat
 from myhdl._always_comb import always_comb
+from .crc32 import crc32_equations
 
 
 @block
@@ -13,21 +14,26 @@ def addrfilter(clk, rxdata, addr, go, match, reset):
         rxdata (8-bits Signal) - Data Bus in which the address to be matched appears.
         addr (48-bits Signal) - The Address to what the data has to be matched.
         go (1-bit Signal) - Flag to signify the start of data on the bus.
-        match (1-bit Signal) - Is Flagged High when the address match occurs
+        match (1-bit Signal) - Is Flagged High when the address match occurs,
+            already while the last address byte is on rxdata.
         reset (ResetSignal) - System Reset
 
     """
 
     curbyte = Signal(intbv(0, min=0, max=8))
+    goprev = Signal(bool(0))
 
     @always_comb
     def assign():
-        match.next = curbyte == 6
+        match.next = curbyte == 6 or (curbyte == 5 and rxdata == addr[8:])
 
     @always_seq(clk.posedge, reset)
     def filterlogic():
+        goprev.next = go
         if go and rxdata == addr[48:40]:
             curbyte.next = 1
+        elif go and not goprev:  # New address, drop the previous match
+            curbyte.next = 7
         elif curbyte == 1 and rxdata == addr[40:32]:
             curbyte.next = 2
         elif curbyte == 2 and rxdata == addr[32:24]:
@@ -42,3 +48,109 @@ def addrfilter(clk, rxdata, addr, go, match, reset):
             curbyte.next = 7
 
     return filterlogic, assign
+
+
+@block
+def addrcompare(dstaddr, addr, match):
+    """ Flags match when the 48-bit dstaddr equals addr. """
+
+    @always_comb
+    def compare():
+        match.next = dstaddr == addr
+
+    return compare
+
+
+@block
+def addrshift(clk, rxdata, dstaddr, reset):
+    """ Destination Address Shifter.
+
+    Keeps the last five bytes seen on 8-bit databus rxdata, so that a whole
+    address is available on dstaddr while its last byte is on rxdata, the
+    same clock 'addrfilter' flags its match.
+
+    Args:
+        clk (1-bit Signal) - System clock.
+        rxdata (8-bits Signal) - Data Bus in which the address appears.
+        dstaddr (48-bits Signal) - Address in Big-endian format, valid
+            while its last byte is on rxdata.
+        reset (ResetSignal) - System Reset
+
+    """
+
+    shift = Signal(intbv(0)[40:])
+
+    @always_comb
+    def assign():
+        dstaddr.next = concat(shift, rxdata)
+
+    @always_seq(clk.posedge, reset)
+    def shiftlogic():
+        shift.next = concat(shift[32:], rxdata)
+
+    return shiftlogic, assign
+
+
+@block
+def addrcam(dstaddr, addrtable, hit):
+    """ Address Table CAM.
+
+    Compares dstaddr against all the entries of the address table in
+    parallel, in place of one byte-serial 'addrfilter' per entry.
+
+    Args:
+        dstaddr (48-bits Signal) - Address to be looked up.
+        addrtable - List of N 48-bits wide MAC Addresses.
+        hit (1-bit Signal) - Flagged High when any entry equals dstaddr.
+
+    """
+
+    tablematch = [Signal(bool(0)) for _ in range(len(addrtable))]
+    tablehit = ConcatSignal(*reversed(tablematch))
+    cmpinsts = [addrcompare(dstaddr, addrtable[i], tablematch[i])
+                for i in range(len(addrtable))]
+
+    @always_comb
+    def assign():
+        hit.next = tablehit != 0
+
+    return cmpinsts, assign
+
+
+@block
+def addrhash(crcin, data, hashval):
+    """ Multicast Hash.
+
+    Folds the len(data)/8 remaining destination address bytes into the CRC32
+    register value crcin and gives the upper bits of the resulting CRC,
+    i.e, the upper bits of zlib.crc32 over the destination address. The
+    bits index the multicast hash table.
+
+    Args:
+        crcin (32-bits Signal) - CRC32 register (not inverted) after the
+            preceding address bytes, 0xFFFFFFFF if none.
+        data (n-bytes Signal) - Remaining address bytes, first in data[8:0].
+        hashval (m-bits Signal) - CRC32 bits [32:32-m].
+
+    """
+
+    nbytes = len(data) // 8
+    hashbits = len(hashval)
+    crccols, datacols = crc32_equations(nbytes)
+
+    @always_comb
+    def hashlogic():
+        nxt = intbv(0)[32:]
+        col = intbv(0)[32:]
+        nxt[:] = 0
+        for i in range(32):
+            col[:] = crccols[i]
+            if crcin[i]:
+                nxt[:] = nxt ^ col
+        for j in range(8 * nbytes):
+            col[:] = datacols[j]
+            if data[j]:
+                nxt[:] = nxt ^ col
+        hashval.next = ~nxt[32:32-hashbits]
+
+    return hashlogic
@@ -0,0 +1,222 @@
+from myhdl import block, always_seq, always_comb, Signal, intbv, concat
+
+mdioaddr = 0x400
+""" MDIO port, write [31:30] opcode, [25:16] PHY and register address and
+[15:0] data to start an operation, read [31] ready and [15:0] the data
+read by the last operation. """
+
+
+@block
+def axilite(axiintf, hostintf, reset, depth=4):
+    """ AXI4-Lite Host Interface.
+
+    Slave front-end of the management block on an AXI4-Lite bus of 32 or 64
+    bits. Reads and writes are taken back-to-back and put to the management
+    block one word a clock, in the order taken, while up to 'depth' write
+    responses and read data are outstanding. A 64-bit beat reads or writes
+    the two words at an 8-byte aligned address, so a 64-bit statistics
+    counter or both Address Table words go in a single beat.
+
+    Args:
+        axiintf (AXILiteInterface) - Host side.
+        hostintf (HostManagementInterface) - Management block side, its
+            'clk' driven from the host side.
+        reset (ResetSignal) - Reset
+        depth (Default=4) - Write responses and read data held at a time.
+
+    Note:
+        MDIO operations are started by writing 'mdioaddr', a write held
+        back while the one before is under way. Table words read back on
+        'rddata' by writing bit [23] are not taken onto 'rdata'.
+
+    """
+    ax = axiintf
+    hi = hostintf
+    wide = ax.width == 64
+
+    # Word put to the management block, and the one to follow it.
+    cmdvalid = Signal(bool(0))
+    cmdread = Signal(bool(0))
+    cmdmdio = Signal(bool(0))
+    cmdaddr = Signal(intbv(0)[10:])
+    cmddata = Signal(intbv(0)[32:])
+    more = Signal(bool(0))
+    moreread = Signal(bool(0))
+    moreaddr = Signal(intbv(0)[10:])
+    moredata = Signal(intbv(0)[32:])
+    lastwrite = Signal(bool(0))
+
+    # Read data, two clocks behind the word put.
+    cmdtag = Signal(bool(0))
+    cmdhigh = Signal(bool(0))
+    cmdlast = Signal(bool(0))
+    cmdlocal = Signal(bool(0))
+    tag = Signal(bool(0))
+    taghigh = Signal(bool(0))
+    taglast = Signal(bool(0))
+    taglocal = Signal(bool(0))
+    low = Signal(intbv(0)[32:])
+    rfifo = [Signal(intbv(0)[ax.width:]) for _ in range(depth)]
+    rwptr = Signal(intbv(0, min=0, max=depth))
+    rrptr = Signal(intbv(0, min=0, max=depth))
+    rcount = Signal(intbv(0, min=0, max=depth + 1))
+    rinflight = Signal(intbv(0, min=0, max=depth + 1))
+    bcount = Signal(intbv(0, min=0, max=depth + 1))
+
+    # MDIO
+    mdiobusy = Signal(bool(0))
+    miimrdyprev = Signal(bool(1))
+    mdiodata = Signal(intbv(0)[16:])
+
+    strblow = Signal(bool(0))
+    strbhigh = Signal(bool(0))
+    wsel = Signal(bool(0))
+    rsel = Signal(bool(0))
+
+    @always_comb
+    def assign():
+        hi.clk.next = ax.clk
+        hi.miimsel.next = not cmdvalid or cmdmdio
+        hi.hostreq.next = cmdvalid and cmdmdio
+        hi.regaddress.next = cmdaddr
+        hi.wrdata.next = cmddata
+        if cmdvalid and cmdmdio:
+            hi.opcode.next = cmddata[32:30]
+        elif cmdvalid and cmdread:
+            hi.opcode.next = 0b10
+        else:
+            hi.opcode.next = 0
+        ax.bvalid.next = bcount != 0
+        ax.bresp.next = 0
+        ax.rvalid.next = rcount != 0
+        ax.rdata.next = rfifo[rrptr]
+        ax.rresp.next = 0
+
+    @always_comb
+    def arbiter():
+        """ Request put next, writes and reads taking turns. """
+        wreq = ax.awvalid and ax.wvalid and bcount < depth and \
+            not (ax.awaddr[10] and (mdiobusy or cmdmdio or not hi.miimrdy))
+        # Reads held back while an MDIO read may land on 'rddata'.
+        rreq = ax.arvalid and rcount + rinflight < depth and \
+            (ax.araddr[10] or not (mdiobusy or cmdmdio))
+        wsel.next = not more and wreq and (not rreq or not lastwrite)
+        rsel.next = not more and rreq and (not wreq or lastwrite)
+
+    @always_comb
+    def handshake():
+        strblow.next = ax.wstrb[4:] != 0
+        strbhigh.next = (ax.wstrb >> 4) != 0
+        ax.awready.next = wsel
+        ax.wready.next = wsel
+        ax.arready.next = rsel
+
+    @always_seq(ax.clk.posedge, reset)
+    def issue():
+        written = bool(0)
+        cmdvalid.next = False
+        cmdread.next = False
+        cmdmdio.next = False
+        cmdtag.next = False
+        if more:
+            more.next = False
+            cmdvalid.next = True
+            cmdread.next = moreread
+            cmdaddr.next = moreaddr
+            cmddata.next = moredata
+            cmdtag.next = moreread
+            cmdhigh.next = True
+            cmdlast.next = True
+            cmdlocal.next = False
+            written = not moreread
+        elif wsel:
+            lastwrite.next = True
+            moreread.next = False
+            moreaddr.next = concat(ax.awaddr[10:3], intbv(4)[3:])
+            moredata.next = ax.wdata[ax.width:ax.width-32]
+            if ax.awaddr[10]:
+                cmdvalid.next = True
+                cmdmdio.next = True
+                cmdaddr.next = ax.wdata[26:16]
+                cmddata.next = ax.wdata[32:]
+                written = True
+            elif wide and strblow:
+                # Upper word next clock, if any of its strobes is set.
+                cmdvalid.next = True
+                cmdaddr.next = concat(ax.awaddr[10:3], intbv(0)[3:])
+                cmddata.next = ax.wdata[32:]
+                more.next = strbhigh
+                written = not strbhigh
+            elif wide:
+                cmdvalid.next = strbhigh
+                cmdaddr.next = concat(ax.awaddr[10:3], intbv(4)[3:])
+                cmddata.next = ax.wdata[ax.width:ax.width-32]
+                written = True
+            else:
+                cmdvalid.next = strblow
+                cmdaddr.next = concat(ax.awaddr[10:2], intbv(0)[2:])
+                cmddata.next = ax.wdata[32:]
+                written = True
+        elif rsel:
+            lastwrite.next = False
+            cmdvalid.next = not ax.araddr[10]
+            cmdread.next = True
+            cmdtag.next = True
+            cmdhigh.next = False
+            cmdlast.next = not wide or ax.araddr[10]
+            cmdlocal.next = ax.araddr[10]
+            moreread.next = True
+            moreaddr.next = concat(ax.araddr[10:3], intbv(4)[3:])
+            if wide:
+                cmdaddr.next = concat(ax.araddr[10:3], intbv(0)[3:])
+                more.next = not ax.araddr[10]
+            else:
+                cmdaddr.next = concat(ax.araddr[10:2], intbv(0)[2:])
+        bcount.next = bcount + written - (ax.bvalid and ax.bready)
+
+    @always_seq(ax.clk.posedge, reset)
+    def capture():
+        word = intbv(0)[32:]
+        full = intbv(0)[ax.width:]
+        push = bool(0)
+        tag.next = cmdtag
+        taghigh.next = cmdhigh
+        taglast.next = cmdlast
+        taglocal.next = cmdlocal
+        if taglocal:
+            word[:] = concat(not mdiobusy, intbv(0)[15:], mdiodata)
+        else:
+            word[:] = hi.rddata
+        if tag:
+            if not taglast:
+                low.next = word
+            else:
+                push = True
+                if wide and taghigh:
+                    full[:] = concat(word, low)[ax.width:]
+                else:
+                    full[:] = word
+                rfifo[rwptr].next = full
+                if rwptr == depth - 1:
+                    rwptr.next = 0
+                else:
+                    rwptr.next = rwptr + 1
+        if ax.rvalid and ax.rready:
+            if rrptr == depth - 1:
+                rrptr.next = 0
+            else:
+                rrptr.next = rrptr + 1
+        rcount.next = rcount + push - (ax.rvalid and ax.rready)
+        rinflight.next = rinflight + rsel - push
+
+    @always_seq(ax.clk.posedge, reset)
+    def mdiostatus():
+        """ MDIO operation under way, and the data read once done. """
+        miimrdyprev.next = hi.miimrdy
+        if cmdvalid and cmdmdio:
+            mdiobusy.next = True
+        elif mdiobusy and hi.miimrdy and not miimrdyprev:
+            mdiobusy.next = False
+            mdiodata.next = hi.rddata[16:]
+
+    return assign, arbiter, handshake, issue, capture, mdiostatus
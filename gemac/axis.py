@@ -0,0 +1,132 @@
+from myhdl import block, always_seq, always_comb, Signal, intbv, concat
+
+txuserbits = 18
+""" Transmit 'tuser', large send segment size in bits [17:2], insert TCP/UDP
+checksum in [1] and IPv4 header checksum in [0], on the first beat. """
+rxuserbits = 83
+""" Receive 'tuser', IPv4 header checksum good in bit [82], TCP/UDP checksum
+good in [81], VLAN tag stripped in [80], its tag control information in
+[79:64] and the timestamp in [63:0], on the last beat. """
+
+
+@block
+def axistx(axisintf, txlocallink_interface, reset):
+    """ AXI4-Stream Transmit Port.
+
+    Takes frames as AXI4-Stream beats of 8, 32 or 64 bits and writes them
+    a byte a clock into the Transmit FIFO, or Large Send Offload. A beat is
+    taken ('tready') as the last byte of the one before goes, so the frames
+    keep up with the line as long as the stream clock does.
+
+    Args:
+        axisintf (AXIStreamInterface) - Client side, 'txuserbits' of 'tuser'.
+            'tkeep' set from lane 0 up, partial on the last beat only.
+        txlocallink_interface (TxLocalLinkFIFOInterface) - Transmit FIFO
+            side, its 'txclk' and 'reset' driven from the client side.
+        reset (ResetSignal) - Reset
+
+    """
+    ax = axisintf
+    tl = txlocallink_interface
+    lanes = ax.width // 8
+    assert len(ax.tuser) == txuserbits
+
+    beat = Signal(intbv(0)[ax.width:])
+    count = Signal(intbv(0, min=0, max=lanes + 1))
+    last = Signal(bool(0))
+    first = Signal(bool(0))
+    inframe = Signal(bool(0))
+
+    @always_comb
+    def assign():
+        tl.txclk.next = ax.clk
+        tl.reset.next = reset
+        tl.txd.next = beat[8:]
+        tl.src_rdy.next = count != 0
+        tl.sof.next = count != 0 and first
+        tl.eof.next = count == 1 and last
+        ax.tready.next = count == 0 or (count == 1 and tl.dst_rdy)
+
+    @always_seq(ax.clk.posedge, reset)
+    def convert():
+        n = intbv(0, min=0, max=lanes + 1)
+        if tl.src_rdy and tl.dst_rdy:
+            beat.next = beat >> 8
+            count.next = count - 1
+            first.next = False
+        if ax.tvalid and ax.tready:
+            for i in range(lanes):
+                if ax.tkeep[i]:
+                    n[:] = i + 1
+            beat.next = ax.tdata
+            count.next = n
+            last.next = ax.tlast
+            first.next = not inframe
+            inframe.next = not ax.tlast
+            if not inframe:
+                tl.ipcsins.next = ax.tuser[0]
+                tl.l4csins.next = ax.tuser[1]
+                tl.mss.next = ax.tuser[18:2]
+
+    return assign, convert
+
+
+@block
+def axisrx(rxlocallink_interface, axisintf, reset):
+    """ AXI4-Stream Receive Port.
+
+    Reads frames a byte a clock from the Receive FIFO and gives them as
+    AXI4-Stream beats of 8, 32 or 64 bits, holding the FIFO back while the
+    client holds 'tready' low. The frame status comes on 'tuser' along with
+    'tlast'.
+
+    Args:
+        rxlocallink_interface (RxLocalLinkFIFOInterface) - Receive FIFO
+            side, its 'rxclk' and 'reset' driven from the client side.
+        axisintf (AXIStreamInterface) - Client side, 'rxuserbits' of 'tuser'.
+            'tkeep' set from lane 0 up, partial on the last beat only.
+        reset (ResetSignal) - Reset
+
+    """
+    rl = rxlocallink_interface
+    ax = axisintf
+    lanes = ax.width // 8
+    assert len(ax.tuser) == rxuserbits
+
+    acc = Signal(intbv(0)[ax.width:])
+    keep = Signal(intbv(0)[lanes:])
+    pos = Signal(intbv(0, min=0, max=max(lanes, 2)))
+
+    @always_comb
+    def assign():
+        rl.rxclk.next = ax.clk
+        rl.reset.next = reset
+        # Room for the byte, or for the beat it completes.
+        rl.dst_rdy.next = not ax.tvalid or ax.tready or \
+            (pos != lanes - 1 and not rl.eof)
+
+    @always_seq(ax.clk.posedge, reset)
+    def convert():
+        data = intbv(0)[ax.width:]
+        mask = intbv(0)[lanes:]
+        if ax.tvalid and ax.tready:
+            ax.tvalid.next = False
+        if rl.src_rdy and rl.dst_rdy:
+            data[:] = acc | (rl.rxd << (8 * pos))
+            mask[:] = keep | (1 << pos)
+            if pos == lanes - 1 or rl.eof:
+                ax.tdata.next = data
+                ax.tkeep.next = mask
+                ax.tlast.next = rl.eof
+                ax.tuser.next = concat(rl.ipcsok, rl.l4csok, rl.vlan,
+                                       rl.vlantag, rl.timestamp)
+                ax.tvalid.next = True
+                acc.next = 0
+                keep.next = 0
+                pos.next = 0
+            else:
+                acc.next = data
+                keep.next = mask
+                pos.next = pos + 1
+
+    return assign, convert
@@ -0,0 +1,63 @@
+from myhdl import block, always_seq, always_comb, Signal, intbv
+
+
+@block
+def cbs(clk, waiting, transmitting, enable, idleslope, sendslope, hicredit,
+        locredit, txopen, reset):
+    """ Credit-Based Shaper.
+
+    IEEE 802.1Qav shaper of a transmit queue. Credits are counted in
+    1/65536 of a byte time, 0x10000 a clock being the line rate. While a
+    frame of the queue is on the line the credit is lowered by 'sendslope'
+    a clock, down to 'locredit'. Otherwise it is raised by 'idleslope' a
+    clock while the queue has a frame waiting, up to 'hicredit', or while
+    the credit is negative, up to zero. Positive credit is dropped when
+    the queue runs empty. A frame may start while the credit is not
+    negative, which bounds the share of the line taken by the queue to
+    idleslope / (idleslope + sendslope).
+
+    Args:
+        clk (1-bit Signal) - Transmit clock, a byte time.
+        waiting (1-bit Signal) - Set while the queue offers a frame.
+        transmitting (1-bit Signal) - Set while a frame of the queue is on
+            the line, from the preamble up to the frame check sequence.
+        enable (1-bit Signal) - Shaping enabled, else the queue is always
+            open and its credit held at zero.
+        idleslope, sendslope (32-bits Signal) - Credit gained and spent a
+            clock.
+        hicredit, locredit (32-bits Signal) - Credit bounds, two's
+            complement.
+        txopen (1-bit Signal) - Set while a frame of the queue may start.
+        reset (ResetSignal) - System Reset
+
+    """
+
+    credit = Signal(intbv(0, min=-2**33, max=2**33))
+
+    @always_comb
+    def assign():
+        txopen.next = not enable or credit >= 0
+
+    @always_seq(clk.posedge, reset)
+    def creditlogic():
+        c = intbv(0, min=-2**33, max=2**33)
+        if not enable:
+            credit.next = 0
+        elif transmitting:
+            c[:] = credit - sendslope
+            if c < locredit.signed():
+                credit.next = locredit.signed()
+            else:
+                credit.next = c
+        elif waiting or credit < 0:
+            c[:] = credit + idleslope
+            if waiting and c > hicredit.signed():
+                credit.next = hicredit.signed()
+            elif not waiting and c > 0:
+                credit.next = 0
+            else:
+                credit.next = c
+        else:
+            credit.next = 0
+
+    return assign, creditlogic
@@ -0,0 +1,284 @@
+from myhdl import block, always_seq, always_comb, Signal, intbv, concat
+
+
+@block
+def rxchecksum(clk, rxdata, go, ipok, l4ok, reset):
+    """ Receive Checksum Offload.
+
+    Parses the Ethernet, VLAN and IPv4 headers of the frame appearing on
+    8-bit databus rxdata on the fly, one byte a clock, and accumulates the
+    ones' complement sums of the IPv4 header and of the TCP or UDP segment
+    along with its pseudo header. The flags are valid from the end of the
+    frame until the next one starts.
+
+    Args:
+        clk (1-bit Signal) - System clock.
+        rxdata (8-bits Signal) - Data Bus in which the frame appears,
+            destination address to frame check sequence.
+        go (1-bit Signal) - Set while the frame is on rxdata.
+        ipok (1-bit Signal) - IPv4 frame, whole datagram received and the
+            header checksum good.
+        l4ok (1-bit Signal) - 'ipok', and a TCP or UDP segment, not a
+            fragment, with a good checksum.
+        reset (ResetSignal) - System Reset
+
+    Note:
+        UDP datagrams sent without a checksum leave 'l4ok' low.
+
+    """
+
+    pos = Signal(intbv(0, min=0, max=32))
+    typehi = Signal(intbv(0)[8:])
+    ethtype = Signal(intbv(0)[16:])
+    vlan = Signal(bool(0))
+    inip = Signal(bool(0))
+    ipoff = Signal(intbv(0, min=0, max=2**17))
+    ipv4 = Signal(bool(0))
+    hdrlen = Signal(intbv(0)[6:])
+    totlen = Signal(intbv(0)[16:])
+    fragment = Signal(bool(0))
+    proto = Signal(intbv(0)[8:])
+    hdrsum = Signal(intbv(0)[32:])
+    l4sum = Signal(intbv(0)[32:])
+
+    @always_seq(clk.posedge, reset)
+    def sumlogic():
+        word = intbv(0)[16:]
+        off = intbv(0, min=0, max=2**17)
+        start = go and ethtype == 0x0800 and \
+            ((pos == 14 and not vlan) or (pos == 18 and vlan))
+        if start:
+            off[:] = 0
+        else:
+            off[:] = ipoff
+        # Bytes at even offsets are the upper halves of the 16-bit words.
+        if off[0]:
+            word[:] = rxdata
+        else:
+            word[:] = concat(rxdata, intbv(0)[8:])
+
+        if go and pos == 0:
+            # New frame
+            pos.next = 1
+            ethtype.next = 0
+            vlan.next = False
+            inip.next = False
+            ipv4.next = False
+            hdrlen.next = 0
+            totlen.next = 0
+            fragment.next = False
+            hdrsum.next = 0
+            l4sum.next = 0
+        elif go:
+            if pos != 31:
+                pos.next = pos + 1
+            if pos == 12 or pos == 16:
+                typehi.next = rxdata
+            elif pos == 13:
+                ethtype.next = concat(typehi, rxdata)
+                vlan.next = typehi == 0x81 and rxdata == 0x00
+            elif pos == 17 and vlan:
+                ethtype.next = concat(typehi, rxdata)
+
+            if start or inip:
+                inip.next = True
+                if off != 2**17 - 1:
+                    ipoff.next = off + 1
+                if off == 0:
+                    ipv4.next = rxdata[8:4] == 4
+                    hdrlen.next = concat(rxdata[4:], intbv(0)[2:])
+                elif off == 2:
+                    totlen.next = concat(rxdata, intbv(0)[8:])
+                elif off == 3:
+                    totlen.next = concat(totlen[16:8], rxdata)
+                elif off == 6:
+                    fragment.next = rxdata[6:] != 0
+                elif off == 7:
+                    fragment.next = fragment or rxdata != 0
+                elif off == 9:
+                    proto.next = rxdata
+                if off == 0 or off < hdrlen:
+                    hdrsum.next = hdrsum + word
+                # Pseudo header addresses and protocol, then the segment.
+                if (off >= 12 and off < 20) or off == 9 or \
+                        (off >= hdrlen and off < totlen):
+                    l4sum.next = l4sum + word
+        else:
+            pos.next = 0
+
+    @always_comb
+    def checklogic():
+        fold = intbv(0)[17:]
+        total = intbv(0)[32:]
+        hdrgood = False
+        fold[:] = hdrsum[16:] + hdrsum[32:16]
+        fold[:] = fold[16:] + fold[17:16]
+        hdrgood = ipv4 and hdrlen >= 20 and hdrlen <= totlen and \
+            ipoff >= totlen + 4 and fold == 0xFFFF
+        ipok.next = hdrgood
+        if hdrgood:
+            total[:] = l4sum + (totlen - hdrlen)
+        else:
+            total[:] = l4sum
+        fold[:] = total[16:] + total[32:16]
+        fold[:] = fold[16:] + fold[17:16]
+        l4ok.next = hdrgood and not fragment and \
+            (proto == 6 or proto == 17) and fold == 0xFFFF
+
+    return sumlogic, checklogic
+
+
+@block
+def txchecksum(clk, txdata, we, sof, ipcsum, l4csum, ippos, l4pos, ipok,
+               l4ok, reset):
+    """ Transmit Checksum Generator.
+
+    Parses the Ethernet, VLAN and IPv4 headers of the frame written a byte
+    at a time on 8-bit databus txdata, and sums the IPv4 header and the TCP
+    or UDP segment along with its pseudo header, leaving out the checksum
+    fields themselves. The outputs are valid from the clock after the last
+    byte is written until the next frame starts.
+
+    Args:
+        clk (1-bit Signal) - System clock.
+        txdata (8-bits Signal) - Data Bus in which the frame is written,
+            destination address first.
+        we (1-bit Signal) - Set when a byte is written on txdata.
+        sof (1-bit Signal) - Set along with 'we' on the first byte of a
+            frame.
+        ipcsum (16-bits Signal) - IPv4 header checksum.
+        l4csum (16-bits Signal) - TCP or UDP checksum.
+        ippos (n-bits Signal) - Position in the frame of the upper byte of
+            the IPv4 header checksum field, the lower one following it.
+        l4pos (n-bits Signal) - Position of the upper byte of the TCP or
+            UDP checksum field.
+        ipok (1-bit Signal) - IPv4 frame with its whole datagram written.
+        l4ok (1-bit Signal) - 'ipok', and a TCP or UDP segment, not a
+            fragment, holding its checksum field.
+        reset (ResetSignal) - System Reset
+
+    """
+
+    pos = Signal(intbv(0, min=0, max=32))
+    typehi = Signal(intbv(0)[8:])
+    ethtype = Signal(intbv(0)[16:])
+    vlan = Signal(bool(0))
+    inip = Signal(bool(0))
+    ipoff = Signal(intbv(0, min=0, max=2**17))
+    ipv4 = Signal(bool(0))
+    hdrlen = Signal(intbv(0)[6:])
+    totlen = Signal(intbv(0)[16:])
+    fragment = Signal(bool(0))
+    proto = Signal(intbv(0)[8:])
+    hdrsum = Signal(intbv(0)[32:])
+    l4sum = Signal(intbv(0)[32:])
+
+    @always_seq(clk.posedge, reset)
+    def sumlogic():
+        word = intbv(0)[16:]
+        off = intbv(0, min=0, max=2**17)
+        field = intbv(0)[7:]
+        start = ethtype == 0x0800 and \
+            ((pos == 14 and not vlan) or (pos == 18 and vlan))
+        if start:
+            off[:] = 0
+        else:
+            off[:] = ipoff
+        if off[0]:
+            word[:] = txdata
+        else:
+            word[:] = concat(txdata, intbv(0)[8:])
+        # Offset of the TCP or UDP checksum field in the datagram.
+        if proto == 6:
+            field[:] = hdrlen + 16
+        else:
+            field[:] = hdrlen + 6
+
+        if we and sof:
+            pos.next = 1
+            ethtype.next = 0
+            vlan.next = False
+            inip.next = False
+            ipv4.next = False
+            hdrlen.next = 0
+            totlen.next = 0
+            fragment.next = False
+            proto.next = 0
+            hdrsum.next = 0
+            l4sum.next = 0
+        elif we:
+            if pos != 31:
+                pos.next = pos + 1
+            if pos == 12 or pos == 16:
+                typehi.next = txdata
+            elif pos == 13:
+                ethtype.next = concat(typehi, txdata)
+                vlan.next = typehi == 0x81 and txdata == 0x00
+            elif pos == 17 and vlan:
+                ethtype.next = concat(typehi, txdata)
+
+            if start or inip:
+                inip.next = True
+                if off != 2**17 - 1:
+                    ipoff.next = off + 1
+                if off == 0:
+                    ipv4.next = txdata[8:4] == 4
+                    hdrlen.next = concat(txdata[4:], intbv(0)[2:])
+                elif off == 2:
+                    totlen.next = concat(txdata, intbv(0)[8:])
+                elif off == 3:
+                    totlen.next = concat(totlen[16:8], txdata)
+                elif off == 6:
+                    fragment.next = txdata[6:] != 0
+                elif off == 7:
+                    fragment.next = fragment or txdata != 0
+                elif off == 9:
+                    proto.next = txdata
+                if (off == 0 or off < hdrlen) and off != 10 and off != 11:
+                    hdrsum.next = hdrsum + word
+                if (off >= 12 and off < 20) or off == 9 or \
+                        (off >= hdrlen and off < totlen and off != field and
+                         off != field + 1):
+                    l4sum.next = l4sum + word
+
+    @always_comb
+    def csumlogic():
+        fold = intbv(0)[17:]
+        total = intbv(0)[32:]
+        csum = intbv(0)[16:]
+        ipstart = intbv(0)[5:]
+        hdrgood = False
+        if vlan:
+            ipstart[:] = 18
+        else:
+            ipstart[:] = 14
+        ippos.next = ipstart + 10
+        if proto == 6:
+            l4pos.next = ipstart + hdrlen + 16
+        else:
+            l4pos.next = ipstart + hdrlen + 6
+
+        hdrgood = ipv4 and hdrlen >= 20 and hdrlen <= totlen and \
+            ipoff >= totlen
+        ipok.next = hdrgood
+        fold[:] = hdrsum[16:] + hdrsum[32:16]
+        fold[:] = fold[16:] + fold[17:16]
+        ipcsum.next = ~fold[16:]
+
+        if hdrgood:
+            total[:] = l4sum + (totlen - hdrlen)
+        else:
+            total[:] = l4sum
+        fold[:] = total[16:] + total[32:16]
+        fold[:] = fold[16:] + fold[17:16]
+        csum[:] = ~fold[16:]
+        if csum == 0 and proto == 17:
+            # Zero is sent as all ones, zero meaning no UDP checksum.
+            l4csum.next = 0xFFFF
+        else:
+            l4csum.next = csum
+        l4ok.next = hdrgood and not fragment and \
+            ((proto == 6 and totlen >= hdrlen + 20) or
+             (proto == 17 and totlen >= hdrlen + 8))
+
+    return sumlogic, csumlogic
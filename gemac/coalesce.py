@@ -0,0 +1,115 @@
+from myhdl import block, always_seq, always_comb, Signal, intbv
+
+
+@block
+def rxcoalesce(rxclientintf, eventintf, coalframes, coaltime, reset):
+    """ Receive Event Coalescing.
+
+    Batches the frame completions of the Receive Engine, each 'good' or
+    'bad' pulse, into events for the host. An event is fired once the
+    frame threshold of completions is pending, or once the time threshold
+    has gone by since the first of them, giving the no. of completions it
+    stands for. Disabled, every completion fires its own event.
+
+    In adaptive mode the frame threshold follows the packet rate, being
+    the no. of completions over the last time threshold, between 1 and the
+    programmed threshold. The time threshold follows it, halved for each
+    halving of the frame threshold below the programmed one, while the rate
+    is still measured over the programmed time threshold. A trickle of
+    frames then fires an event per frame with no added latency, a moderate
+    load is held back for a fraction of the time threshold, and under full
+    load the events come about once per time threshold.
+
+    Args:
+        rxclientintf (RxFIFOClientInterface) - Receive Engine client side.
+        eventintf (RxEventInterface) - Events to the host.
+        coalframes (32-bits Signal) - Receive Coalescing Frames word,
+            enable in bit [31], adaptive mode in bit [30] and the frame
+            threshold in bits [15:0].
+        coaltime (32-bits Signal) - Receive Coalescing Time word, receive
+            clocks a microsecond in bits [31:16] and the time threshold in
+            microseconds in bits [15:0].
+        reset (ResetSignal) - System Reset
+
+    """
+
+    prescale = Signal(intbv(0)[16:])
+    tick = Signal(bool(0))
+    pending = Signal(intbv(0)[16:])
+    timer = Signal(intbv(0)[16:])
+    window = Signal(intbv(0)[16:])
+    winframes = Signal(intbv(0)[16:])
+    rate = Signal(intbv(0)[16:])
+    threshold = Signal(intbv(0)[16:])
+    timelimit = Signal(intbv(0)[16:])
+
+    @always_comb
+    def assign():
+        eventintf.clk.next = rxclientintf.clk
+        tick.next = prescale + 1 >= coaltime[32:16]
+        if not coalframes[30] or rate >= coalframes[16:]:
+            threshold.next = coalframes[16:]
+        elif rate == 0:
+            threshold.next = 1
+        else:
+            threshold.next = rate
+
+    @always_comb
+    def scaletime():
+        """ Time threshold, scaled down with the frame threshold. """
+        limit = intbv(0)[16:]
+        limit[:] = coaltime[16:]
+        if coalframes[30]:
+            for s in range(16):
+                if threshold < (coalframes[16:] >> s):
+                    limit[:] = limit >> 1
+        timelimit.next = limit
+
+    @always_seq(rxclientintf.clk.posedge, reset)
+    def timebase():
+        """ Microsecond ticks. """
+        if tick:
+            prescale.next = 0
+        else:
+            prescale.next = prescale + 1
+
+    @always_seq(rxclientintf.clk.posedge, reset)
+    def ratelogic():
+        """ Completions over each time threshold. """
+        ev = rxclientintf.good or rxclientintf.bad
+        if tick and window + 1 >= coaltime[16:]:
+            window.next = 0
+            if winframes + ev > 0xFFFF:
+                rate.next = 0xFFFF
+            else:
+                rate.next = winframes + ev
+            winframes.next = 0
+        else:
+            if tick:
+                window.next = window + 1
+            if ev and winframes != 0xFFFF:
+                winframes.next = winframes + 1
+
+    @always_seq(rxclientintf.clk.posedge, reset)
+    def eventlogic():
+        ev = rxclientintf.good or rxclientintf.bad
+        p = intbv(0)[17:]
+        p[:] = pending + ev
+        eventintf.intr.next = False
+        if not coalframes[31]:
+            eventintf.intr.next = ev
+            eventintf.events.next = 1
+            pending.next = 0
+            timer.next = 0
+        elif p != 0 and (p >= threshold or timer >= timelimit or
+                         p == 0xFFFF):
+            eventintf.intr.next = True
+            eventintf.events.next = p
+            pending.next = 0
+            timer.next = 0
+        else:
+            pending.next = p
+            if pending != 0 and tick and timer != 0xFFFF:
+                timer.next = timer + 1
+
+    return assign, scaletime, timebase, ratelogic, eventlogic
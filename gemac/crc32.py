@@ -100,3 +100,135 @@ def crc32(clk, clear, calc, data, crcout, reset):
             crcreg.next = tabvalue ^ (crcreg >> 8)
 
     return assign, crcfunc
+
+
+def crc32_equations(nbytes):
+    """ Derive the XOR-matrix equations of CRC32 for 'nbytes' input bytes.
+
+    The byte-wise table driven update is linear over GF(2) in both the
+    crc register and the data, so the register value after folding
+    'nbytes' bytes is the XOR of one column for each set input bit.
+
+    Args:
+        nbytes - No. of bytes folded in a single clock.
+
+    Returns:
+        tuple: (crccols, datacols) where crccols[i] is the contribution of
+            bit i of the crc register and datacols[j] is the contribution
+            of bit j of the data word (byte 0 in data[8:0]).
+
+    """
+    def update(crc, data):
+        for i in range(nbytes):
+            crc = crc32_tab[(crc ^ (data >> (8 * i))) & 0xFF] ^ (crc >> 8)
+        return crc
+
+    crccols = tuple(update(1 << i, 0) for i in range(32))
+    datacols = tuple(update(0, 1 << j) for j in range(8 * nbytes))
+    return crccols, datacols
+
+
+def crc32_masks(nbytes):
+    """ Rows of the 'crc32_equations' XOR-matrix, one per crc bit.
+
+    Args:
+        nbytes - No. of bytes folded in a single clock.
+
+    Returns:
+        tuple: (crcmasks, datamasks) where bit b of the crc register after
+            folding is the parity of the register bits set in crcmasks[b]
+            and the data bits set in datamasks[b].
+
+    """
+    crccols, datacols = crc32_equations(nbytes)
+    crcmasks = tuple(sum(((col >> b) & 1) << i
+                         for i, col in enumerate(crccols))
+                     for b in range(32))
+    datamasks = tuple(sum(((col >> b) & 1) << j
+                          for j, col in enumerate(datacols))
+                      for b in range(32))
+    return crcmasks, datamasks
+
+
+@block
+def crc32_xorbit(crcin, data, crcmask, datamask, crcbit):
+    """ One CRC32 equation, a fixed XOR of crc register and data bits.
+
+    Args:
+        crcin (32-bits Signal) - CRC register before folding.
+        data - Data word folded in.
+        crcmask - Constant, the crcin bits taking part.
+        datamask - Constant, the data bits taking part.
+        crcbit (1-bit Signal) - Parity of the bits taking part.
+
+    """
+    n = max(32, len(data))
+    steps = n.bit_length() - 1
+
+    @always_comb
+    def xorlogic():
+        v = intbv(0)[n:]
+        v[:] = (crcin & crcmask) ^ (data & datamask)
+        for i in range(steps):  # Parity, folding halves
+            v[:] = v ^ (v >> (n >> (i + 1)))
+        crcbit.next = v[0]
+
+    return xorlogic
+
+
+@block
+def crc32_parallel(clk, clear, calc, data, dataen, crcout, reset, width=64):
+    """ Parallel CRC32 folding width/8 bytes per clock.
+
+    Bit-identical to 'crc32' when fed the same byte sequence, but uses the
+    XOR-matrix equations from 'crc32_equations' instead of the table so
+    that a whole data word is folded every clock. The equations for each
+    no. of enabled bytes are laid down as fixed XORs and 'dataen' picks the
+    result.
+
+    Args:
+        clk -
+        clear -
+        calc -
+        data (width bits) - Data word, byte to be sent first in data[8:0].
+        dataen (width/8 bits) - Byte enables. Enabled lanes must be
+            contiguous from lane 0, i.e, only the final word of a frame may
+            be partial.
+        crcout - little endian formatted bytes, i.e, Byte to be sent first
+            is the least significant byte
+        reset -
+        width (Default=64) - Width of data in bits, one of 8, 16, 32, 64.
+
+    """
+    assert width in (8, 16, 32, 64)
+    lanes = width // 8
+
+    crcreg = Signal(intbv(0xFFFFFFFF)[32:])
+
+    # Register after folding k+1 bytes, in bits [32*k+32:32*k].
+    foldbits = [Signal(bool(0)) for _ in range(32 * lanes)]
+    xorinsts = []
+    for k in range(lanes):
+        crcmasks, datamasks = crc32_masks(k + 1)
+        for b in range(32):
+            xorinsts.append(crc32_xorbit(crcreg, data, crcmasks[b],
+                                         datamasks[b], foldbits[32 * k + b]))
+
+    @always_comb
+    def assign():
+        crcout.next = ~crcreg
+
+    @always_seq(clk.posedge, reset)
+    def crcfunc():
+        nxt = intbv(0)[32:]
+        if clear:
+            crcreg.next = 0xFFFFFFFF
+        elif calc and dataen != 0:
+            nxt[:] = 0
+            for l in range(lanes):
+                if dataen[l]:
+                    for b in range(32):
+                        nxt[b] = foldbits[32 * l + b]
+            crcreg.next = nxt
+
+    return assign, xorinsts, crcfunc
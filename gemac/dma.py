@@ -0,0 +1,333 @@
+from myhdl import block, always_seq, enum, Signal, intbv, concat
+
+dmastate = enum('IDLE', 'TXDESC', 'TXDATA', 'TXWB', 'RXDESC', 'RXDATA',
+                'RXWB')
+
+eop = 24
+""" End of packet, bit of descriptor word 1. """
+dd = 31
+""" Descriptor done, set in descriptor word 1 on write-back. """
+
+
+@block
+def dma(txlocallink_interface, rxlocallink_interface, memintf, ringintf,
+        reset):
+    """ Descriptor Ring DMA Engine.
+
+    Moves frames between host memory and the client LocalLink interfaces of
+    the Transmit and Receive FIFOs, so no byte passes through the host CPU.
+    Each direction has a ring of 'size' 16-byte descriptors at 'base' in
+    memory, owned by the engine from 'head' up to, not including, 'tail'.
+    The host hands descriptors over by advancing 'tail' and the engine
+    gives them back by advancing 'head', after writing back their status.
+    A frame may be scattered over several descriptors, the last one
+    flagged end of packet. A ring of size 0 is disabled.
+
+    Transmit descriptor:
+        word 0 - Buffer address.
+        word 1 - Buffer length in bytes in bits [15:0], end of packet in
+            [24], insert IPv4 header checksum in [25] and TCP/UDP checksum
+            in [26]. Bit [31] set on write-back.
+        word 2 - Large send segment size in bits [15:0].
+
+    Checksum and segment size are taken from the first descriptor of a
+    frame and given to the Transmit FIFO along with 'sof'.
+
+    Receive descriptor, written by the host:
+        word 0 - Buffer address.
+        word 1 - Buffer size in bytes in bits [15:0].
+
+    and written back by the engine:
+        word 0 - VLAN tag stripped in bit [16], its tag control information
+            in [15:0].
+        word 1 - Bytes in the buffer in bits [15:0], end of packet in [24],
+            IPv4 header checksum good in [25], TCP/UDP checksum good in
+            [26], and descriptor done in [31].
+        word 2, 3 - Receive timestamp, low and high words.
+
+    Words 0, 2 and 3 are only written back on the end of packet descriptor,
+    and word 1 of any descriptor last, so status is complete once its done
+    bit is seen.
+
+    Args:
+        txlocallink_interface (TxLocalLinkFIFOInterface) - Transmit FIFO, or
+            Large Send Offload, client side.
+        rxlocallink_interface (RxLocalLinkFIFOInterface) - Receive FIFO
+            client side.
+        memintf (MemoryInterface) - Memory bus, the engine the master.
+        ringintf (DMARingInterface) - Descriptor ring pointers.
+        reset (ResetSignal) - Reset, returning both heads to 0.
+
+    Note:
+        'txclk' and 'rxclk' of the LocalLink interfaces are to be the
+        memory bus clock. Buffer addresses are multiples of 4, transmit
+        buffers are not empty. Program 'base' and 'size' only while in
+        reset. One bus access is outstanding at a time, the engine serving
+        a buffer in one direction, then one in the other.
+
+    """
+    tl = txlocallink_interface
+    rl = rxlocallink_interface
+    mi = memintf
+    ri = ringintf
+
+    state = Signal(dmastate.IDLE)
+    rdbusy = Signal(bool(0))
+    word = Signal(intbv(0, min=0, max=5))
+    rword = Signal(intbv(0, min=0, max=4))
+    descaddr = Signal(intbv(0)[32:])
+    lastrx = Signal(bool(0))
+
+    # Transmit
+    txbuf = Signal(intbv(0)[32:])
+    txctl = Signal(intbv(0)[32:])
+    txleft = Signal(intbv(0)[16:])
+    txq = Signal(intbv(0)[64:])
+    txn = Signal(intbv(0, min=0, max=9))
+    txcnt = Signal(intbv(0, min=0, max=5))
+    txlast = Signal(bool(0))
+    txend = Signal(bool(0))
+    txsof = Signal(bool(0))
+    txfirst = Signal(bool(1))
+
+    # Receive
+    rxbuf = Signal(intbv(0)[32:])
+    rxleft = Signal(intbv(0)[16:])
+    rxlen = Signal(intbv(0)[16:])
+    rxacc = Signal(intbv(0)[32:])
+    rxn = Signal(intbv(0, min=0, max=4))
+    rxheld = Signal(bool(0))
+    rxholdaddr = Signal(intbv(0)[32:])
+    rxholddata = Signal(intbv(0)[32:])
+    rxeop = Signal(bool(0))
+    rxipcsok = Signal(bool(0))
+    rxl4csok = Signal(bool(0))
+    rxvlan = Signal(bool(0))
+    rxvlantag = Signal(intbv(0)[16:])
+    rxtime = Signal(intbv(0)[64:])
+
+    @always_seq(mi.clk.posedge, reset)
+    def dmalogic():
+        req = bool(0)
+        q = intbv(0)[64:]
+        n = intbv(0, min=0, max=9)
+        ended = bool(0)
+        data = intbv(0)[32:]
+        acc = intbv(0)[32:]
+        k = intbv(0, min=0, max=5)
+        left = intbv(0)[16:]
+        last = bool(0)
+        held = bool(0)
+        accept = bool(0)
+        txready = bool(0)
+        rxready = bool(0)
+
+        # Memory bus, a request held until taken.
+        req = mi.valid and not mi.ready
+        if mi.rdvalid:
+            rdbusy.next = False
+        held = bool(rxheld)
+        if held and not req:
+            req = True
+            mi.addr.next = rxholdaddr
+            mi.wr.next = True
+            mi.wrdata.next = rxholddata
+            held = False
+
+        # Bytes to the Transmit FIFO, refilled by buffer reads.
+        q[:] = txq
+        n[:] = txn
+        ended = bool(txend)
+        if tl.src_rdy and tl.dst_rdy:
+            q[:] = q >> 8
+            n[:] = n - 1
+            txsof.next = False
+            if tl.eof:
+                ended = False
+        if mi.rdvalid and state == dmastate.TXDATA:
+            data[:] = mi.rddata
+            if txcnt == 1:
+                data[32:8] = 0
+            elif txcnt == 2:
+                data[32:16] = 0
+            elif txcnt == 3:
+                data[32:24] = 0
+            q[:] = q | (data << (8 * n))
+            n[:] = n + txcnt
+            if txlast:
+                ended = True
+        txq.next = q
+        txn.next = n
+        txend.next = ended
+        tl.txd.next = q[8:]
+        tl.src_rdy.next = n != 0
+        tl.eof.next = n == 1 and ended
+        tl.sof.next = n != 0 and txsof and not (tl.src_rdy and tl.dst_rdy)
+
+        if state == dmastate.IDLE:
+            word.next = 0
+            rword.next = 0
+            rxready = ri.rxsize != 0 and ri.rxhead != ri.rxtail and \
+                rl.src_rdy
+            txready = ri.txsize != 0 and ri.txhead != ri.txtail and \
+                (not txfirst or (txn == 0 and not txend))
+            if rxready and (not lastrx or not txready):
+                lastrx.next = True
+                descaddr.next = (ri.rxbase + (ri.rxhead << 4)) % 2**32
+                state.next = dmastate.RXDESC
+            elif txready:
+                lastrx.next = False
+                descaddr.next = (ri.txbase + (ri.txhead << 4)) % 2**32
+                state.next = dmastate.TXDESC
+
+        elif state == dmastate.TXDESC:
+            if mi.rdvalid:
+                rword.next = rword + 1
+                if rword == 0:
+                    txbuf.next = mi.rddata
+                elif rword == 1:
+                    txctl.next = mi.rddata
+                    txleft.next = mi.rddata[16:]
+                else:
+                    if txfirst:
+                        tl.mss.next = mi.rddata[16:]
+                        tl.ipcsins.next = txctl[25]
+                        tl.l4csins.next = txctl[26]
+                        txsof.next = True
+                        txfirst.next = False
+                    state.next = dmastate.TXDATA
+            if word < 3 and not req and (not rdbusy or mi.rdvalid):
+                req = True
+                mi.addr.next = (descaddr + 4 * word) % 2**32
+                mi.wr.next = False
+                rdbusy.next = True
+                word.next = word + 1
+
+        elif state == dmastate.TXDATA:
+            if txleft != 0:
+                if not req and (not rdbusy or mi.rdvalid) and n <= 4:
+                    req = True
+                    mi.addr.next = txbuf
+                    mi.wr.next = False
+                    rdbusy.next = True
+                    txbuf.next = (txbuf + 4) % 2**32
+                    if txleft > 4:
+                        txcnt.next = 4
+                        txleft.next = txleft - 4
+                        txlast.next = False
+                    else:
+                        txcnt.next = txleft
+                        txleft.next = 0
+                        txlast.next = txctl[eop]
+            elif not rdbusy or mi.rdvalid:
+                word.next = 3
+                state.next = dmastate.TXWB
+
+        elif state == dmastate.TXWB:
+            if word == 3 and not req:
+                req = True
+                mi.addr.next = (descaddr + 4) % 2**32
+                mi.wr.next = True
+                mi.wrdata.next = concat(True, txctl[dd:])
+                word.next = 4
+            elif word == 4 and not req:
+                if ri.txhead == ri.txsize - 1:
+                    ri.txhead.next = 0
+                else:
+                    ri.txhead.next = ri.txhead + 1
+                if txctl[eop]:
+                    txfirst.next = True
+                state.next = dmastate.IDLE
+
+        elif state == dmastate.RXDESC:
+            if mi.rdvalid:
+                rword.next = rword + 1
+                if rword == 0:
+                    rxbuf.next = mi.rddata
+                else:
+                    rxleft.next = mi.rddata[16:]
+                    rxlen.next = 0
+                    accept = mi.rddata[16:] != 0
+                    state.next = dmastate.RXDATA
+            if word < 2 and not req and (not rdbusy or mi.rdvalid):
+                req = True
+                mi.addr.next = (descaddr + 4 * word) % 2**32
+                mi.wr.next = False
+                rdbusy.next = True
+                word.next = word + 1
+
+        elif state == dmastate.RXDATA:
+            # Bytes packed into words, written as they fill up.
+            acc[:] = rxacc
+            k[:] = rxn
+            left[:] = rxleft
+            if rl.src_rdy and rl.dst_rdy:
+                last = bool(rl.eof)
+                acc[:] = acc | (rl.rxd << (8 * k))
+                k[:] = k + 1
+                left[:] = left - 1
+                rxlen.next = rxlen + 1
+                if rl.eof:
+                    rxeop.next = True
+                    rxipcsok.next = rl.ipcsok
+                    rxl4csok.next = rl.l4csok
+                    rxvlan.next = rl.vlan
+                    rxvlantag.next = rl.vlantag
+                    rxtime.next = rl.timestamp
+                if k == 4 or rl.eof or left == 0:
+                    if req:
+                        held = True
+                        rxholdaddr.next = rxbuf
+                        rxholddata.next = acc
+                    else:
+                        req = True
+                        mi.addr.next = rxbuf
+                        mi.wr.next = True
+                        mi.wrdata.next = acc
+                    rxbuf.next = (rxbuf + 4) % 2**32
+                    acc[:] = 0
+                    k[:] = 0
+            rxacc.next = acc
+            rxn.next = k
+            rxleft.next = left
+            if left == 0 or last:
+                if last:
+                    word.next = 0
+                else:
+                    word.next = 3
+                state.next = dmastate.RXWB
+            else:
+                accept = not held
+
+        elif state == dmastate.RXWB:
+            if word < 4 and not req:
+                req = True
+                mi.wr.next = True
+                word.next = word + 1
+                if word == 0:
+                    mi.addr.next = descaddr
+                    mi.wrdata.next = concat(intbv(0)[15:], rxvlan, rxvlantag)
+                elif word == 1:
+                    mi.addr.next = (descaddr + 8) % 2**32
+                    mi.wrdata.next = rxtime[32:]
+                elif word == 2:
+                    mi.addr.next = (descaddr + 12) % 2**32
+                    mi.wrdata.next = rxtime[64:32]
+                else:
+                    mi.addr.next = (descaddr + 4) % 2**32
+                    mi.wrdata.next = concat(True, intbv(0)[4:], rxl4csok,
+                                            rxipcsok, rxeop, intbv(0)[8:],
+                                            rxlen)
+            elif word == 4 and not req:
+                if ri.rxhead == ri.rxsize - 1:
+                    ri.rxhead.next = 0
+                else:
+                    ri.rxhead.next = ri.rxhead + 1
+                rxeop.next = False
+                state.next = dmastate.IDLE
+
+        mi.valid.next = req
+        rxheld.next = held
+        rl.dst_rdy.next = accept
+
+    return dmalogic
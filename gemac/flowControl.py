@@ -1,24 +1,35 @@
 from myhdl import block, always_seq, Signal, intbv, always_comb, enum
+from .intrafaces import TxStatsInterface
 
 flowstate = enum('IDLE', 'PAUSED')
 
 
 @block
-def flowcontrol(flowintf, txflowintf, rxflowintf, flowconfig, reset):
+def flowcontrol(flowintf, txflowintf, rxflowintf, flowconfig, reset,
+                datawidth=8, txstatsintf=None):
 
     """
     *Flow Control*
 
+    datawidth (Default=8) - Bits transferred per transmit clock, sets the
+        no. of clocks per pause quanta (512 bit times).
+    txstatsintf (Default=None) - TxStatsInterface, 'paused' set every
+        clock the transmitter is held off (PAUSED state).
+
     """
+    if txstatsintf is None:
+        txstatsintf = TxStatsInterface()
+    quantaclks = 512 // datawidth
     pausereq = Signal(bool(0))
     pausetime = Signal(intbv(0)[16:])
     curtime = Signal(intbv(0)[16:])
-    index = Signal(intbv(0, min=0, max=64))
+    index = Signal(intbv(0, min=0, max=quantaclks))
     state = Signal(flowstate.IDLE)
 
     @always_comb
     def assign():
         rxflowintf.rxflowen.next = flowconfig[29]
+        txstatsintf.paused.next = state == flowstate.PAUSED
 
     @always_seq(txflowintf.clk.posedge, reset)
     def samplepauseval():
@@ -42,20 +53,20 @@ def flowcontrol(flowintf, txflowintf, rxflowintf, flowconfig, reset):
     def applypause():
         if state == flowstate.IDLE:
             if pausereq:
-                txflowintf.pauseapply = True
+                txflowintf.pauseapply.next = True
                 state.next = flowstate.PAUSED
                 curtime.next = 0
                 index.next = 0
 
         elif state == flowstate.PAUSED:
             if(curtime < pausetime):
-                if index == 63:
+                if index == quantaclks - 1:
                     index.next = 0
                     curtime.next = curtime + 1
                 else:
                     index.next = index + 1
             elif curtime == pausetime:
-                txflowintf.pauseapply = False
+                txflowintf.pauseapply.next = False
                 state.next = flowstate.IDLE
 
     return assign, samplepauseval, pauseapplyreq, applypause
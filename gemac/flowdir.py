@@ -0,0 +1,171 @@
+from myhdl import block, always_seq, always_comb, Signal, intbv, concat
+
+flowkeybits = 176
+""" Flow key, from the most significant bits: destination address (48),
+VLAN tag (16, bit 15 set for a tagged frame, VLAN ID in bits [11:0]),
+IPv4 source and destination addresses (32 each), TCP/UDP source and
+destination ports (16 each) and EtherType (16)."""
+
+flowentrybits = flowkeybits + 8
+""" Flow Director Table entry, the flow key in bits [175:0], the receive
+queue in bits [181:176], drop in bit 182 and valid in bit 183."""
+
+
+@block
+def flowkey(clk, rxdata, go, key, reset):
+    """ Flow Key Extractor.
+
+    Parses the Ethernet, VLAN and IPv4 headers of the frame appearing on
+    8-bit databus rxdata on the fly, a byte a clock, and gathers the fields
+    matched by the Flow Director Table. Fields not found in the frame are
+    left zero. The key is valid from the end of the headers until the next
+    frame starts.
+
+    Args:
+        clk (1-bit Signal) - System clock.
+        rxdata (8-bits Signal) - Data Bus in which the frame appears,
+            destination address first.
+        go (1-bit Signal) - Set while the frame is on rxdata.
+        key (176-bits Signal) - Flow key, laid out as 'flowkeybits'.
+        reset (ResetSignal) - System Reset
+
+    Note:
+        The EtherType is the one following the VLAN tag, if any. Ports are
+        left zero for IPv4 fragments and protocols other than TCP and UDP.
+
+    """
+
+    pos = Signal(intbv(0, min=0, max=32))
+    dstaddr = Signal(intbv(0)[48:])
+    typehi = Signal(intbv(0)[8:])
+    ethtype = Signal(intbv(0)[16:])
+    vlan = Signal(bool(0))
+    vlantag = Signal(intbv(0)[16:])
+    inip = Signal(bool(0))
+    ipoff = Signal(intbv(0, min=0, max=128))
+    hdrlen = Signal(intbv(0)[7:])
+    fragment = Signal(bool(0))
+    l4 = Signal(bool(0))
+    ipaddrs = Signal(intbv(0)[64:])
+    ports = Signal(intbv(0)[32:])
+
+    @always_comb
+    def assign():
+        key.next = concat(dstaddr, vlantag, ipaddrs, ports, ethtype)
+
+    @always_seq(clk.posedge, reset)
+    def keylogic():
+        off = intbv(0, min=0, max=128)
+        start = go and ethtype == 0x0800 and \
+            ((pos == 14 and not vlan) or (pos == 18 and vlan))
+        if start:
+            off[:] = 0
+        else:
+            off[:] = ipoff
+
+        if go and pos == 0:
+            # New frame
+            pos.next = 1
+            dstaddr.next = concat(intbv(0)[40:], rxdata)
+            ethtype.next = 0
+            vlan.next = False
+            vlantag.next = 0
+            inip.next = False
+            ipaddrs.next = 0
+            ports.next = 0
+        elif go:
+            if pos != 31:
+                pos.next = pos + 1
+            if pos < 6:
+                dstaddr.next = concat(dstaddr[40:], rxdata)
+            if pos == 12 or pos == 16:
+                typehi.next = rxdata
+            elif pos == 13:
+                ethtype.next = concat(typehi, rxdata)
+                vlan.next = typehi == 0x81 and rxdata == 0x00
+            elif pos == 14 and vlan:
+                vlantag.next = concat(True, intbv(0)[3:], rxdata[4:],
+                                      intbv(0)[8:])
+            elif pos == 15 and vlan:
+                vlantag.next = concat(vlantag[16:8], rxdata)
+            elif pos == 17 and vlan:
+                ethtype.next = concat(typehi, rxdata)
+
+            if start:
+                hdrlen.next = 127
+                l4.next = False
+                fragment.next = False
+            if start or inip:
+                inip.next = True
+                if off != 127:
+                    ipoff.next = off + 1
+                if off == 0:
+                    if rxdata[8:4] == 4:
+                        hdrlen.next = concat(rxdata[4:], intbv(0)[2:])
+                    else:
+                        inip.next = False
+                elif off == 6:
+                    fragment.next = rxdata[6:] != 0
+                elif off == 7:
+                    fragment.next = fragment or rxdata != 0
+                elif off == 9:
+                    l4.next = rxdata == 6 or rxdata == 17
+
+                if off >= 12 and off < 20:
+                    ipaddrs.next = concat(ipaddrs[56:], rxdata)
+                if l4 and not fragment and off >= hdrlen and \
+                        off < hdrlen + 4:
+                    ports.next = concat(ports[24:], rxdata)
+        else:
+            pos.next = 0
+
+    return assign, keylogic
+
+
+@block
+def flowcompare(key, entry, hitin, actionin, hitout, actionout):
+    """ Flags a hit on a valid entry matching key, passing on the action of
+    the entry, or else the hit and action of the following entries. """
+
+    @always_comb
+    def compare():
+        if entry[flowentrybits - 1] and entry[flowkeybits:] == key:
+            hitout.next = True
+            actionout.next = entry[flowentrybits:flowkeybits]
+        else:
+            hitout.next = hitin
+            actionout.next = actionin
+
+    return compare
+
+
+@block
+def flowcam(key, flowtable, hit, action):
+    """ Flow Director Table CAM.
+
+    Compares key against all the entries of the table in parallel.
+
+    Args:
+        key (176-bits Signal) - Flow key to be looked up.
+        flowtable - List of N 184-bits wide entries, laid out as
+            'flowentrybits'.
+        hit (1-bit Signal) - Flagged High when any valid entry matches.
+        action (8-bits Signal) - Bits [183:176] of the lowest matching
+            entry, valid with 'hit'.
+
+    """
+
+    n = len(flowtable)
+    hits = [Signal(bool(0)) for _ in range(n + 1)]
+    actions = [Signal(intbv(0)[8:]) for _ in range(n + 1)]
+    cmpinsts = [flowcompare(key, flowtable[i], hits[i + 1], actions[i + 1],
+                            hits[i], actions[i]) for i in range(n)]
+    firsthit = hits[0]
+    firstaction = actions[0]
+
+    @always_comb
+    def assign():
+        hit.next = firsthit
+        action.next = firstaction
+
+    return cmpinsts, assign
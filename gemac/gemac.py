@@ -1,40 +1,193 @@
-from myhdl import block, Signal, intbv
+from myhdl import block, always_comb, Signal, intbv
 from gemac.txEngine import txengine
 from gemac.rxEngine import rxengine
+from gemac.txEngine64 import txengine64
+from gemac.rxEngine64 import rxengine64
 from .gmii import gmii
+from .xgmii import xgmii
 from .flowControl import flowcontrol
 from .management import management
+from .statistics import statistics
+from .rss import rssentries
+from .flowdir import flowentrybits
+from .txsched import txscheduler, txqueues
+from .cbs import cbs
+from .tas import gatecontrol, tasgate, guardband
+from .ptpclock import ptpclock
+from .timestamp import txtsfifo
+from .coalesce import rxcoalesce
 from .intrafaces import RxGMII_Interface, TxFlowInterface, TxGMII_Interface
-from gemac.intrafaces import RxFlowInterface
+from gemac.intrafaces import RxFlowInterface, RxXGMII_Interface, \
+    TxXGMII_Interface, TxStatsInterface, RxStatsInterface, StatsInterface
 
 rx0, rx1, tx, flow, managementreg, ucast0, \
-    ucast1, addrtable0, addrtable1, addrfiltermode, reserved = range(11)
-""" Indexing of configuration Registers"""
+    ucast1, addrtable0, addrtable1, addrfiltermode, txfifo, \
+    mcasthash = range(12)
+rsskey = mcasthash + 16
+rssctrl = rsskey + 10
+rssindir = rssctrl + 1
+fdirkey = rssindir + 1
+fdirctrl = fdirkey + 5
+txsched = fdirctrl + 1
+txweight = txsched + 1
+cbsvalue = txweight + 1
+cbsctrl = cbsvalue + 1
+tasvalue = cbsctrl + 1
+tasctrl = tasvalue + 1
+ptpincr = tasctrl + 1
+ptpoffset = ptpincr + 1
+coalframes = ptpoffset + 1
+coaltime = coalframes + 1
+reserved = coaltime + 1
+""" Indexing of configuration Registers, 'mcasthash' being the first of
+the 16 Multicast Hash Table words, 'rsskey' the first of the 10 Receive Side
+Scaling key words and 'fdirkey' the first of the 5 Flow Director key
+words."""
 
 
 @block
-def gemac(clientintf, phyintf, flowintf, hostintf, mdiointf, reset):
-    txgmii_intf = TxGMII_Interface()
-    rxgmii_intf = RxGMII_Interface()
+def gemac(clientintf, phyintf, flowintf, hostintf, mdiointf, reset,
+          speed=1000, addrtablesize=4, hashbins=64, flowtablesize=8,
+          txclientintfs=None, gclsize=8, fifoconfig=None):
+    """ GEMAC top-level.
+
+    Args:
+        speed (Default=1000) - 1000 for 1-Gigabit build over GMII with 8-bit
+            client interfaces, 10000 for 10-Gigabit build over XGMII with
+            64-bit client interfaces (ClientInterface(width=64)) and
+            'phyintf' an instance of XGMIIPHYInterface.
+        addrtablesize (Default=4) - No. of Address Table entries matched
+            by the Address Filter, a power of 2 from 2 to 64.
+        hashbins (Default=64) - No. of Multicast Hash Table bins, 64 or
+            512.
+        flowtablesize (Default=8) - No. of Flow Director Table entries, a
+            power of 2 from 2 to 64.
+        txclientintfs (Default=None) - List of 2 to 8
+            'TxFIFOClientInterface', transmit queues scheduled onto the
+            Transmit Engine by the 'txscheduler', 1-Gigabit build only.
+            'clientintf.tx' then only gives the transmit clock. Else the
+            client frames are shaped by the Credit-Based Shaper of queue 0.
+        gclsize (Default=8) - No. of Time-Aware Shaper gate control list
+            entries, a power of 2 from 2 to 64.
+        fifoconfig (Default=None) - 32-bits Signal driven with the
+            Transmit FIFO Configuration Register, to be given to the
+            'txFIFO' in front of 'clientintf.tx' as its 'fifoconfig'.
+
+    In the 1-Gigabit build the SFD of every frame is timestamped, the
+    receive timestamp given along with 'good' of 'clientintf.rx' and the
+    transmit timestamps queued for 'clientintf.txts'. Frame completions
+    are coalesced into events on 'clientintf.rxevent'.
+
+    """
+    assert speed in (1000, 10000)
     txflowintf = TxFlowInterface()
     rxflowintf = RxFlowInterface()
+    txstatsintf = TxStatsInterface()
+    rxstatsintf = RxStatsInterface()
+    statsintf = StatsInterface()
 
-    configregs = [Signal(intbv(0)[32:]) for _ in range(10)]
-    addrtable = [Signal(intbv(0)[48:]) for _ in range(4)]
+    configregs = [Signal(intbv(0)[32:]) for _ in range(reserved)]
+    addrtable = [Signal(intbv(0)[48:]) for _ in range(addrtablesize)]
+    hashtable = configregs[mcasthash:mcasthash + hashbins // 32]
+    rsstable = [Signal(intbv(0)[6:]) for _ in range(rssentries)]
+    flowtable = [Signal(intbv(0)[flowentrybits:])
+                 for _ in range(flowtablesize)]
+    txweights = [Signal(intbv(0)[16:]) for _ in range(txqueues)]
+    shaper = [Signal(intbv(0)[32:]) for _ in range(4 * txqueues)]
+    gcl = [Signal(intbv(0)[32:]) for _ in range(gclsize)]
+    tasparams = [Signal(intbv(0)[32:]) for _ in range(guardband + 1)]
+    txfifoconfig = configregs[txfifo]
+    gates = Signal(intbv(0xFF)[8:])
+    time = Signal(intbv(0)[64:])
+    ptpadjust = Signal(bool(0))
+    txgate = Signal(bool(0))
+    shaperopen = Signal(bool(0))
+    txbusy = Signal(bool(0))
+    schedinst = []
+    tasinst = []
+    fifoconfiginst = []
 
-    txengineinst = txengine(clientintf.tx, txgmii_intf, txflowintf,
-                            configregs[tx], reset)
+    if fifoconfig is not None:
+        @always_comb
+        def fifoconfigassign():
+            fifoconfig.next = txfifoconfig
 
-    rxengineinst = rxengine(clientintf.rx, rxgmii_intf, rxflowintf, configregs[rx0],
-                            configregs[rx1], configregs[addrfiltermode],
-                            addrtable, reset)
+        fifoconfiginst = fifoconfigassign
 
-    flowcntrlinst = flowcontrol(flowintf, txflowintf, rxflowintf,
-                                configregs[flow], reset)
+    if speed == 10000:
+        txxgmii_intf = TxXGMII_Interface()
+        rxxgmii_intf = RxXGMII_Interface()
+
+        txengineinst = txengine64(clientintf.tx, txxgmii_intf, txflowintf,
+                                  configregs[tx], reset,
+                                  txstatsintf=txstatsintf)
+
+        rxengineinst = rxengine64(clientintf.rx, rxxgmii_intf, rxflowintf,
+                                  configregs[rx0], configregs[rx1],
+                                  configregs[addrfiltermode], addrtable,
+                                  reset, hashtable=hashtable,
+                                  hashbins=hashbins, rxstatsintf=rxstatsintf)
+
+        gmiiInst = xgmii(txxgmii_intf, rxxgmii_intf, phyintf, reset)
+    else:
+        txgmii_intf = TxGMII_Interface()
+        rxgmii_intf = RxGMII_Interface()
 
-    gmiiInst = gmii(txgmii_intf, rxgmii_intf, phyintf, reset)
+        tasinst = [ptpclock(clientintf.tx.clk, configregs[ptpincr], time,
+                            reset, offset=configregs[ptpoffset],
+                            adjust=ptpadjust),
+                   txtsfifo(txstatsintf, clientintf.txts, reset),
+                   gatecontrol(clientintf.tx.clk, time, gcl, tasparams,
+                               gates, reset)]
+        if txclientintfs is not None:
+            txgate = Signal(bool(1))
+            schedinst = txscheduler(txclientintfs, clientintf.tx,
+                                    configregs[txsched], txweights, reset,
+                                    txbusy=txbusy, shaper=shaper,
+                                    gates=gates, time=time)
+        else:
+            schedinst = [cbs(clientintf.tx.clk, clientintf.tx.dv, txbusy,
+                             configregs[txsched](0), shaper[0],
+                             shaper[txqueues], shaper[2 * txqueues],
+                             shaper[3 * txqueues], shaperopen, reset),
+                         tasgate(gates, 0, clientintf.tx.launchtime, time,
+                                 shaperopen, txgate)]
+
+        txengineinst = txengine(clientintf.tx, txgmii_intf, txflowintf,
+                                configregs[tx], reset,
+                                txstatsintf=txstatsintf, txgate=txgate,
+                                txbusy=txbusy, time=time)
+
+        rxengineinst = rxengine(clientintf.rx, rxgmii_intf, rxflowintf,
+                                configregs[rx0], configregs[rx1],
+                                configregs[addrfiltermode], addrtable, reset,
+                                hashtable=hashtable, hashbins=hashbins,
+                                rxstatsintf=rxstatsintf,
+                                rsskey=configregs[rsskey:rssctrl],
+                                rsstable=rsstable,
+                                rssconfig=configregs[rssctrl],
+                                flowtable=flowtable, time=time)
+
+        gmiiInst = gmii(txgmii_intf, rxgmii_intf, phyintf, reset)
+
+    flowcntrlinst = flowcontrol(flowintf, txflowintf, rxflowintf,
+                                configregs[flow], reset,
+                                datawidth=8 if speed == 1000 else 64,
+                                txstatsintf=txstatsintf)
 
     managementinst = management(hostintf, mdiointf, configregs,
-                                addrtable, reset)
+                                addrtable, reset, statsintf=statsintf,
+                                rsstable=rsstable, flowtable=flowtable,
+                                txweights=txweights, shaper=shaper,
+                                gcl=gcl, tasparams=tasparams,
+                                ptpadjust=ptpadjust)
+
+    statsinst = statistics(txstatsintf, rxstatsintf, statsintf, reset)
+
+    coalesceinst = rxcoalesce(clientintf.rx, clientintf.rxevent,
+                              configregs[coalframes], configregs[coaltime],
+                              reset)
 
-    return txengineinst, rxengineinst, flowcntrlinst, gmiiInst, managementinst
+    return txengineinst, rxengineinst, flowcntrlinst, gmiiInst, \
+        managementinst, statsinst, schedinst, tasinst, coalesceinst, \
+        fifoconfiginst
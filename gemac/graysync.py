@@ -0,0 +1,37 @@
+from myhdl import block, always_seq, always_comb, Signal, intbv, downrange
+
+
+@block
+def graysync(clk, gray, binary, reset):
+    """ Gray Code Synchronizer.
+
+    Brings a gray coded pointer from another clock domain into the 'clk'
+    domain through two flip-flops and converts it back to binary. Only one
+    bit of a gray coded pointer changes per increment, so the synchronized
+    value is always either the old or the new pointer.
+
+    Args:
+        clk (1-bit Signal) - Destination domain clock.
+        gray (n-bits Signal) - Gray coded pointer from the source domain.
+        binary (n-bits Signal) - Synchronized pointer in binary.
+        reset (ResetSignal) - Destination domain reset.
+
+    """
+    width = len(gray)
+    meta = Signal(intbv(0)[width:])
+    sync = Signal(intbv(0)[width:])
+
+    @always_seq(clk.posedge, reset)
+    def synclogic():
+        meta.next = gray
+        sync.next = meta
+
+    @always_comb
+    def convert():
+        b = intbv(0)[width:]
+        b[width-1] = sync[width-1]
+        for i in downrange(width-1):
+            b[i] = b[i+1] ^ sync[i]
+        binary.next = b
+
+    return synclogic, convert
@@ -92,13 +92,13 @@ class HostManagementInterface():
         which shall be used by address filter.
 
         Args:
-            loc (2 bits) - index of Address table in the range 0-3.
+            loc (6 bits) - index of Address table in the range 0-63.
             addr(48 bits) - the MAC address to be written.
 
         """
         yield self.writeconfig(0x388, intbv(addr)[32:])
         yield self.writeconfig(0x38C,
-                               ((intbv(loc)[2:] << 16) | intbv(addr)[48:32]))
+                               ((intbv(loc)[6:] << 16) | intbv(addr)[48:32]))
 
     def readaddrtable(self, loc):
         """ Transactor for accessomg an MAC address in the address table.
@@ -109,13 +109,199 @@ class HostManagementInterface():
         'rddata2' are value at rddata at 1st and 2nd cycle respectively.
 
         Args:
-            loc (2 bits) - index of Address table in the range 0-3.
-            addr (48 bits) - the MAC address to be written.
+            loc (6 bits) - index of Address table in the range 0-63.
 
         """
-        yield self.writeconfig(0x38C, ((1 << 23) | (intbv(loc)[2:] << 16)))
+        yield self.writeconfig(0x38C, ((1 << 23) | (intbv(loc)[6:] << 16)))
         yield self.clk.posedge
 
+    def writersstable(self, entry, queue):
+        """ Transactor for steering flows to a receive queue.
+
+        Writes the given queue at the given entry of the Receive Side
+        Scaling Indirection Table, used for flows with hash bits [6:0]
+        equal to the entry.
+
+        Args:
+            entry (7 bits) - index of Indirection Table in the range 0-127.
+            queue (6 bits) - the receive queue.
+
+        """
+        yield self.writeconfig(0x304,
+                               ((intbv(entry)[7:] << 16) | intbv(queue)[6:]))
+
+    def readrsstable(self, entry):
+        """ Transactor for accessing an entry of the Indirection Table.
+
+        The queue appears on 'rddata' bits [5:0] once returned.
+
+        Args:
+            entry (7 bits) - index of Indirection Table in the range 0-127.
+
+        """
+        yield self.writeconfig(0x304, ((1 << 23) | (intbv(entry)[7:] << 16)))
+        yield self.clk.posedge
+
+    def writeflowtable(self, loc, key, queue, drop=False, valid=True):
+        """ Transactor for adding/editing a Flow Director Table entry.
+
+        Writes the given flow key at the given location of the table, frames
+        of the flow being steered to the given queue or dropped.
+
+        Args:
+            loc (6 bits) - index of Flow Director Table in the range 0-63.
+            key (176 bits) - the flow key, laid out as
+                'gemac.flowdir.flowkeybits'.
+            queue (6 bits) - the receive queue.
+            drop (Optional[boolean]) - Drop the frames of the flow.
+            valid (Optional[boolean]) - Entry in use, False to remove it.
+
+        """
+        key = intbv(key)[176:]
+        for i in range(5):
+            yield self.writeconfig(0x308 + 4 * i,
+                                   key[176 - 32 * i:144 - 32 * i])
+        yield self.writeconfig(0x31C, ((int(valid) << 31) |
+                                       (int(drop) << 30) |
+                                       (intbv(queue)[6:] << 24) |
+                                       (intbv(loc)[6:] << 16) | key[16:]))
+
+    def readflowtable(self, loc):
+        """ Transactor for accessing a Flow Director Table entry.
+
+        The 5 key words appear on 'rddata' over consecutive cycles once
+        returned, followed by the control word.
+
+        Args:
+            loc (6 bits) - index of Flow Director Table in the range 0-63.
+
+        """
+        yield self.writeconfig(0x31C, ((1 << 23) | (intbv(loc)[6:] << 16)))
+        yield self.clk.posedge
+
+    def writetxweight(self, queue, weight):
+        """ Transactor for setting the weight of a transmit queue.
+
+        Writes the share of the bytes, in bytes per round, given to the
+        transmit queue by weighted round robin scheduling.
+
+        Args:
+            queue (3 bits) - the transmit queue in the range 0-7.
+            weight (16 bits) - the weight in bytes.
+
+        """
+        yield self.writeconfig(0x324,
+                               ((intbv(queue)[3:] << 16) | intbv(weight)[16:]))
+
+    def readtxweight(self, queue):
+        """ Transactor for accessing the weight of a transmit queue.
+
+        The weight appears on 'rddata' bits [15:0] once returned.
+
+        Args:
+            queue (3 bits) - the transmit queue in the range 0-7.
+
+        """
+        yield self.writeconfig(0x324, ((1 << 23) | (intbv(queue)[3:] << 16)))
+        yield self.clk.posedge
+
+    def writeshaper(self, queue, idleslope, sendslope, hicredit, locredit):
+        """ Transactor for setting the Credit-Based Shaper of a queue.
+
+        Credits are counted in 1/65536 of a byte time, 0x10000 a clock
+        being the line rate.
+
+        Args:
+            queue (3 bits) - the transmit queue in the range 0-7.
+            idleslope (32 bits) - credit gained a clock while waiting.
+            sendslope (32 bits) - credit spent a clock while transmitting.
+            hicredit (32 bits) - upper bound of the credit.
+            locredit (32 bits) - lower bound of the credit, two's
+                complement.
+
+        """
+        for param, value in enumerate([idleslope, sendslope, hicredit,
+                                       locredit]):
+            yield self.writeconfig(0x328, value)
+            yield self.writeconfig(0x32C, ((intbv(param)[2:] << 19) |
+                                           (intbv(queue)[3:] << 16)))
+
+    def readshaper(self, queue, param):
+        """ Transactor for accessing a Credit-Based Shaper parameter.
+
+        The value appears on 'rddata' once returned.
+
+        Args:
+            queue (3 bits) - the transmit queue in the range 0-7.
+            param (2 bits) - 0 for idleSlope, 1 sendSlope, 2 hiCredit and
+                3 loCredit.
+
+        """
+        yield self.writeconfig(0x32C, ((1 << 23) | (intbv(param)[2:] << 19) |
+                                       (intbv(queue)[3:] << 16)))
+        yield self.clk.posedge
+
+    def writegcl(self, entry, gates, interval):
+        """ Transactor for writing a gate control list entry.
+
+        Args:
+            entry (6 bits) - index of the gate control list in the range
+                0-63.
+            gates (8 bits) - transmit queues open, queue 0 in bit 0.
+            interval (24 bits) - time interval of the entry in nanoseconds.
+
+        """
+        yield self.writeconfig(0x330, ((intbv(gates)[8:] << 24) |
+                                       intbv(interval)[24:]))
+        yield self.writeconfig(0x334, intbv(entry)[6:] << 16)
+
+    def readgcl(self, entry):
+        """ Transactor for accessing a gate control list entry.
+
+        The entry appears on 'rddata' once returned.
+
+        Args:
+            entry (6 bits) - index of the gate control list in the range
+                0-63.
+
+        """
+        yield self.writeconfig(0x334, ((1 << 23) | (intbv(entry)[6:] << 16)))
+        yield self.clk.posedge
+
+    def writetasparam(self, param, value):
+        """ Transactor for writing a Time-Aware Shaper parameter.
+
+        Args:
+            param (3 bits) - the parameter, indexed as in 'gemac.tas'.
+            value (32 bits) - the value of the parameter.
+
+        """
+        yield self.writeconfig(0x330, value)
+        yield self.writeconfig(0x334, ((1 << 22) | (intbv(param)[3:] << 16)))
+
+    def readtasparam(self, param):
+        """ Transactor for accessing a Time-Aware Shaper parameter.
+
+        The value appears on 'rddata' once returned.
+
+        Args:
+            param (3 bits) - the parameter, indexed as in 'gemac.tas'.
+
+        """
+        yield self.writeconfig(0x334, ((1 << 23) | (1 << 22) |
+                                       (intbv(param)[3:] << 16)))
+        yield self.clk.posedge
+
+    def adjusttime(self, offset):
+        """ Transactor for stepping the time counter.
+
+        Args:
+            offset (32 bits) - nanoseconds added to the time, negative to
+                step it back.
+
+        """
+        yield self.writeconfig(0x33C, intbv(offset & 0xFFFFFFFF)[32:])
+
     def mdiowriteop(self, opcode, regaddress, data, block=True):
         """Transactor for initiating an MDIO Write Operation.
 
@@ -177,6 +363,127 @@ class HostManagementInterface():
             yield self.miimrdy.posedge
 
 
+class AXILiteInterface:
+    """ Host - AXI4-Lite Interface
+
+    Attributes:
+        clk (1 bit) - Host clock.
+        awaddr (12 bits) - Write address, management address map in bits
+            [9:0], the MDIO port at 0x400.
+        awvalid, awready (1 bit) - Write address handshake.
+        wdata (width bits) - Write data, lower addressed word in the least
+            significant bits.
+        wstrb (width/8 bits) - Byte strobes, a word written if any of its
+            strobes is set.
+        wvalid, wready (1 bit) - Write data handshake.
+        bresp (2 bits) - Write response, always OKAY.
+        bvalid, bready (1 bit) - Write response handshake.
+        araddr (12 bits) - Read address.
+        arvalid, arready (1 bit) - Read address handshake.
+        rdata (width bits) - Read data.
+        rresp (2 bits) - Read response, always OKAY.
+        rvalid, rready (1 bit) - Read data handshake.
+    """
+    def __init__(self, width=32):
+        assert width in (32, 64)
+        self.width = width
+        self.clk = Signal(bool(0))
+        self.awaddr = Signal(intbv(0)[12:])
+        self.awvalid = Signal(bool(0))
+        self.awready = Signal(bool(0))
+        self.wdata = Signal(intbv(0)[width:])
+        self.wstrb = Signal(intbv(0)[width//8:])
+        self.wvalid = Signal(bool(0))
+        self.wready = Signal(bool(0))
+        self.bresp = Signal(intbv(0)[2:])
+        self.bvalid = Signal(bool(0))
+        self.bready = Signal(bool(0))
+        self.araddr = Signal(intbv(0)[12:])
+        self.arvalid = Signal(bool(0))
+        self.arready = Signal(bool(0))
+        self.rdata = Signal(intbv(0)[width:])
+        self.rresp = Signal(intbv(0)[2:])
+        self.rvalid = Signal(bool(0))
+        self.rready = Signal(bool(0))
+
+    def write(self, accesses):
+        """ Write Operation
+
+        Issues the writes back-to-back, not waiting for the responses, and
+        returns once all of them are in.
+
+        Args:
+            accesses - list of (address, data) to be written, all strobes
+                set.
+
+        """
+        issued = 0
+        done = 0
+        self.bready.next = True
+        while done < len(accesses):
+            if issued < len(accesses):
+                self.awaddr.next = accesses[issued][0]
+                self.wdata.next = accesses[issued][1]
+                self.wstrb.next = 2**(self.width // 8) - 1
+            self.awvalid.next = issued < len(accesses)
+            self.wvalid.next = issued < len(accesses)
+            yield self.clk.posedge
+            if self.awvalid and self.awready and self.wvalid and \
+                    self.wready:
+                issued += 1
+            if self.bvalid and self.bready:
+                done += 1
+        self.awvalid.next = False
+        self.wvalid.next = False
+        self.bready.next = False
+
+    def read(self, addrs, values):
+        """ Read Operation
+
+        Issues the reads back-to-back, not waiting for the data, and
+        returns once all of it is in.
+
+        Args:
+            addrs - list of addresses to be read.
+            values - list the data read is appended to, in order.
+
+        """
+        issued = 0
+        done = 0
+        self.rready.next = True
+        while done < len(addrs):
+            if issued < len(addrs):
+                self.araddr.next = addrs[issued]
+            self.arvalid.next = issued < len(addrs)
+            yield self.clk.posedge
+            if self.arvalid and self.arready:
+                issued += 1
+            if self.rvalid and self.rready:
+                values.append(int(self.rdata))
+                done += 1
+        self.arvalid.next = False
+        self.rready.next = False
+
+    def writeaddrtable(self, loc, addr):
+        """ Transactor for adding/editing an MAC address in the address table.
+
+        A single beat on a 64-bit interface, writing both Address Table
+        words.
+
+        Args:
+            loc (6 bits) - index of Address table in the range 0-63.
+            addr(48 bits) - the MAC address to be written.
+
+        """
+        upper = (intbv(loc)[6:] << 16) | intbv(addr)[48:32]
+        if self.width == 64:
+            yield self.write([(0x388, (int(upper) << 32) |
+                               int(intbv(addr)[32:]))])
+        else:
+            yield self.write([(0x388, int(intbv(addr)[32:])),
+                              (0x38C, int(upper))])
+
+
 class MDIOInterface:
     """ Management Data Input-Output Interface.
 
@@ -210,16 +517,84 @@ class PHYInterface:
         self.rxer = Signal(bool(0))  # Receive Error
 
 
-class RxFIFOClientInterface:
+class XGMIIPHYInterface:
     def __init__(self):
+        # XGMII PHY Transmitter Interface
+        self.txd = Signal(intbv(0x0707070707070707)[64:])  # Transmit Data
+        self.txc = Signal(intbv(0xFF)[8:])  # Transmit Control
+        # XGMII PHY Receiver Interface
+        self.rxclk = Signal(bool(0))  # Receive Clock
+        self.rxd = Signal(intbv(0x0707070707070707)[64:])  # Receive Data
+        self.rxc = Signal(intbv(0xFF)[8:])  # Receive Control
+
+
+class RxFIFOClientInterface:
+    """ Receive Engine - Client FIFO Interface
+
+    Attributes:
+        clk (1 bit) - Clock from receive engine.
+        data (width bits) - Receive Data, first byte in data[8:0].
+        keep (width/8 bits) - Byte enables of data, all set but on the
+            last word of a frame.
+        dv (1 bit) - Data valid bit
+        good (1 bit) - Pulsed at the end of a good frame.
+        bad (1 bit) - Pulsed at the end of a bad frame.
+        filtered (1 bit) - Pulsed for a frame rejected by the address
+            filter or consumed as a pause frame, instead of 'good' or 'bad'.
+        ipcsok (1 bit) - Set along with 'good' for an IPv4 frame with a good
+            header checksum.
+        l4csok (1 bit) - Set along with 'good' for an IPv4 frame carrying a
+            TCP or UDP segment with a good checksum.
+        rsshash (32 bits) - Toeplitz hash of the IPv4 or IPv6 flow, given
+            along with 'good'.
+        queue (6 bits) - Receive queue the frame is steered to, given along
+            with 'good'.
+        timestamp (64 bits) - Time of the SFD of the frame in nanoseconds,
+            given along with 'good'.
+        vlan (1 bit) - Set along with 'good' for a frame whose 802.1Q tag
+            was stripped by the Receive Engine.
+        vlantag (16 bits) - Tag control information of the stripped tag,
+            PCP in bits [15:13], DEI in [12] and VLAN ID in [11:0].
+        overflow (1 bit) - Pulsed by the Receive FIFO on dropping a frame
+            for lack of room.
+    """
+    def __init__(self, width=8):
+        self.width = width
         self.clk = Signal(bool(0))
-        self.data = Signal(intbv(0)[8:])  # Receive Data
+        self.data = Signal(intbv(0)[width:])  # Receive Data
+        self.keep = Signal(intbv(0)[width//8:])  # Receive Byte Enables
         self.dv = Signal(bool(0))  # Receive Data Valid
         self.good = Signal(bool(0))  # Receive Good Frame
         self.bad = Signal(bool(0))  # Receive Bad Frame
+        self.filtered = Signal(bool(0))  # Receive Filtered Frame
+        self.ipcsok = Signal(bool(0))  # IPv4 Header Checksum Good
+        self.l4csok = Signal(bool(0))  # TCP/UDP Checksum Good
+        self.rsshash = Signal(intbv(0)[32:])  # Receive Side Scaling Hash
+        self.queue = Signal(intbv(0)[6:])  # Receive Queue
+        self.timestamp = Signal(intbv(0)[64:])  # Receive Timestamp
+        self.vlan = Signal(bool(0))  # VLAN Tag Stripped
+        self.vlantag = Signal(intbv(0)[16:])  # VLAN Tag Control Information
         self.overflow = Signal(bool(0))
 
 
+class RxDropCountInterface:
+    """ Receive FIFO - Dropped Frame Counters
+
+    Frames not delivered to the client by reason, counted in the Receive
+    Engine clock domain and wrapping around at 2**32.
+
+    Attributes:
+        bad (32 bits) - Frames found bad by the Receive Engine.
+        filtered (32 bits) - Frames rejected by the address filter or
+            consumed as pause frames.
+        overflow (32 bits) - Frames dropped for lack of room in the FIFO.
+    """
+    def __init__(self):
+        self.bad = Signal(intbv(0)[32:])
+        self.filtered = Signal(intbv(0)[32:])
+        self.overflow = Signal(intbv(0)[32:])
+
+
 class RxLocalLinkFIFOInterface:
     def __init__(self):
         self.rxclk = Signal(bool(0))
@@ -229,7 +604,31 @@ class RxLocalLinkFIFOInterface:
         self.eof = Signal(bool(0))
         self.src_rdy = Signal(bool(0))  # Source Ready
         self.dst_rdy = Signal(bool(0))  # Destination Ready
-        self.fifostatus = Signal(bool(0))
+        self.fifostatus = Signal(intbv(0)[4:])
+        # Frame status, from 'sof' through 'eof'
+        self.ipcsok = Signal(bool(0))  # IPv4 Header Checksum Good
+        self.l4csok = Signal(bool(0))  # TCP/UDP Checksum Good
+        self.vlan = Signal(bool(0))  # VLAN Tag Stripped
+        self.vlantag = Signal(intbv(0)[16:])  # VLAN Tag Control Information
+        self.timestamp = Signal(intbv(0)[64:])  # Receive Timestamp
+
+    def rx(self, datastream):
+        """ Receive Operation
+
+        Reads a frame from the receive FIFO, up to and including 'eof'.
+
+        Args:
+            datastream - list the received 8-bit values are appended to.
+
+        """
+        self.dst_rdy.next = True
+        yield self.rxclk.posedge
+        while not (self.src_rdy and self.eof):
+            if self.src_rdy:
+                datastream.append(int(self.rxd))
+            yield self.rxclk.posedge
+        datastream.append(int(self.rxd))
+        self.dst_rdy.next = False
 
 
 class TxFIFOClientInterface:
@@ -237,7 +636,9 @@ class TxFIFOClientInterface:
 
     Attributes:
         clk (1 bit) - Clock from client used for all transmit operations.
-        data (8 bits) - Transmit Data
+        data (width bits) - Transmit Data, first byte in data[8:0].
+        keep (width/8 bits) - Byte enables of data, all set but on the
+            last word of a frame.
         dv (1 bit) - Data valid bit
         ifgdelay (16 bits) - InterFrameGap Delay between two Transmit Frames.
         ack (1 bit) - Acknowledge bit driven by engine to indicate start
@@ -245,33 +646,62 @@ class TxFIFOClientInterface:
         underrun (1 bit) - Driven by Client to stop transmitting current frame.
         collision (1 bit) -
         retrasmit (1 bit) -
+        launchtime (64 bits) - Time in nanoseconds before which the frame
+            on 'dv' is held by the 'txscheduler', zero to send it at once.
+            Not carried by the Transmit FIFO.
+        vlanins (1 bit) - Set along with 'dv' for an 802.1Q tag to be
+            inserted in the frame by the Transmit Engine. Not carried by
+            the Transmit FIFO.
+        vlantag (16 bits) - Tag control information inserted, PCP in bits
+            [15:13], DEI in [12] and VLAN ID in [11:0].
     """
-    def __init__(self):
+    def __init__(self, width=8):
         # Client Transmitter Interface
+        self.width = width
         self.clk = Signal(bool(0))
-        self.data = Signal(intbv(0)[8:])  # Transmit Data
+        self.data = Signal(intbv(0)[width:])  # Transmit Data
+        self.keep = Signal(intbv(0)[width//8:])  # Transmit Byte Enables
         self.dv = Signal(bool(0))  # Transmit Data Valid
         self.ifgdelay = Signal(intbv(0)[16:])  # Transmit InterFrameGap Delay
         self.ack = Signal(bool(0))  # Transmit Acknowledge
         self.underrun = Signal(bool(0))  # Transmit Underrun
         self.collision = Signal(bool(0))
         self.retransmit = Signal(bool(0))
+        self.launchtime = Signal(intbv(0)[64:])  # Transmit Launch Time
+        self.vlanins = Signal(bool(0))  # Insert VLAN Tag
+        self.vlantag = Signal(intbv(0)[16:])  # VLAN Tag Control Information
 
-    def tx(self, datastream):
+    def tx(self, datastream, launchtime=0, vlantag=None):
         """ Transmit Operation
 
         Perform transmit operation over client interface.
 
         Args:
-            datastream - list of 8-bit values to be transmitted.
+            datastream - list of 8-bit values to be transmitted. Packed into
+                words of 'width' bits, first byte in the least significant
+                lane, when the interface is wider than a byte.
+            launchtime (Default=0) - Time in nanoseconds at which the frame
+                is to be sent.
+            vlantag (Default=None) - Tag control information of the 802.1Q
+                tag to be inserted, None for no tag.
 
         """
-        self.data.next = datastream[0]
+        lanes = self.width // 8
+        words = []
+        for i in range(0, len(datastream), lanes):
+            word = 0
+            for lane, d in enumerate(datastream[i:i+lanes]):
+                word |= d << (8 * lane)
+            words.append((word, (1 << len(datastream[i:i+lanes])) - 1))
+        self.data.next, self.keep.next = words[0]
+        self.launchtime.next = launchtime
+        self.vlanins.next = vlantag is not None
+        self.vlantag.next = 0 if vlantag is None else vlantag
         self.dv.next = True
         yield self.ack.posedge
-        for i in range(1, len(datastream)):
+        for i in range(1, len(words)):
             yield self.clk.posedge
-            self.data.next = datastream[i]
+            self.data.next, self.keep.next = words[i]
         yield self.clk.posedge
         self.dv.next = False
         yield self.clk.posedge
@@ -286,11 +716,263 @@ class TxLocalLinkFIFOInterface:
         self.eof = Signal(bool(0))
         self.src_rdy = Signal(bool(0))  # Source Ready
         self.dst_rdy = Signal(bool(0))  # Destination Ready
+        self.ipcsins = Signal(bool(0))  # Insert IPv4 Header Checksum
+        self.l4csins = Signal(bool(0))  # Insert TCP/UDP Checksum
+        self.mss = Signal(intbv(0)[16:])  # Large Send Segment Size
         self.fifostatus = Signal(intbv(0)[4:])
         self.overflow = Signal(bool(0))
 
+    def tx(self, datastream, ipcsins=False, l4csins=False, mss=0):
+        """ Transmit Operation
 
-class ClientInterface:
+        Writes a frame into the transmit FIFO, holding each byte until it is
+        accepted ('dst_rdy').
+
+        Args:
+            datastream - list of 8-bit values to be transmitted.
+            ipcsins (Default=False) - Insert the IPv4 header checksum.
+            l4csins (Default=False) - Insert the TCP or UDP checksum.
+            mss (Default=0) - Payload bytes per frame the Large Send Offload
+                cuts datastream into, 0 to send it as one frame.
+
+        """
+        self.ipcsins.next = ipcsins
+        self.l4csins.next = l4csins
+        self.mss.next = mss
+        for i, d in enumerate(datastream):
+            self.txd.next = d
+            self.sof.next = i == 0
+            self.eof.next = i == len(datastream) - 1
+            self.src_rdy.next = True
+            yield self.txclk.posedge
+            while not self.dst_rdy:
+                yield self.txclk.posedge
+        self.src_rdy.next = False
+        self.sof.next = False
+        self.eof.next = False
+
+
+class TxTimestampInterface:
+    """ Transmit Timestamp Completion FIFO - Client Interface
+
+    Attributes:
+        clk (1 bit) - Transmit clock.
+        timestamp (64 bits) - Time of the SFD in nanoseconds of the oldest
+            client frame sent and not yet read.
+        valid (1 bit) - Set while 'timestamp' holds a timestamp.
+        rd (1 bit) - Driven by Client to take the timestamp on 'timestamp'.
+        overflow (1 bit) - Pulsed on losing a timestamp to a full FIFO.
+    """
+    def __init__(self):
+        self.clk = Signal(bool(0))
+        self.timestamp = Signal(intbv(0)[64:])  # Transmit Timestamp
+        self.valid = Signal(bool(0))  # Timestamp Valid
+        self.rd = Signal(bool(0))  # Timestamp Read
+        self.overflow = Signal(bool(0))
+
+    def read(self, timestamps):
+        """ Read Operation
+
+        Waits for a timestamp and takes it from the FIFO.
+
+        Args:
+            timestamps - list the timestamp is appended to.
+
+        """
+        while not self.valid:
+            yield self.clk.posedge
+        timestamps.append(int(self.timestamp))
+        self.rd.next = True
+        yield self.clk.posedge
+        self.rd.next = False
+        # The FIFO moves on to the next timestamp along with this edge.
+        yield self.clk.posedge
+
+
+class RxEventInterface:
+    """ Receive Event Coalescing - Host Interface
+
+    Attributes:
+        clk (1 bit) - Receive clock.
+        intr (1 bit) - Pulsed for an event.
+        events (16 bits) - No. of frames completed, good or bad, since the
+            last event, given along with 'intr'.
+    """
     def __init__(self):
-        self.rx = RxFIFOClientInterface()
-        self.tx = TxFIFOClientInterface()
+        self.clk = Signal(bool(0))
+        self.intr = Signal(bool(0))  # Receive Event
+        self.events = Signal(intbv(0)[16:])  # Frames Completed
+
+    def wait(self, events):
+        """ Waits for an event.
+
+        Args:
+            events - list the no. of frames completed is appended to.
+
+        """
+        yield self.clk.posedge
+        while not self.intr:
+            yield self.clk.posedge
+        events.append(int(self.events))
+
+
+class AXIStreamInterface:
+    """ AXI4-Stream Client Interface
+
+    Attributes:
+        clk (1 bit) - Stream clock.
+        tdata (width bits) - Data, first byte in tdata[8:0].
+        tkeep (width/8 bits) - Byte enables of tdata, set from lane 0 up.
+        tvalid (1 bit) - Driven by the master for a beat.
+        tready (1 bit) - Driven by the slave to take the beat.
+        tlast (1 bit) - Set on the last beat of a frame.
+        tuser (userwidth bits) - Frame sideband, laid out as in
+            'gemac.axis'.
+    """
+    def __init__(self, width=8, userwidth=1):
+        assert width in (8, 32, 64)
+        self.width = width
+        self.clk = Signal(bool(0))
+        self.tdata = Signal(intbv(0)[width:])  # Data
+        self.tkeep = Signal(intbv(0)[width//8:])  # Byte Enables
+        self.tvalid = Signal(bool(0))  # Beat Valid
+        self.tready = Signal(bool(0))  # Beat Ready
+        self.tlast = Signal(bool(0))  # Last Beat
+        self.tuser = Signal(intbv(0)[userwidth:])  # Sideband
+
+    def send(self, datastream, user=0):
+        """ Transmit Operation
+
+        Sends a frame, holding each beat until it is taken ('tready').
+
+        Args:
+            datastream - list of 8-bit values to be sent, packed into beats
+                of 'width' bits, first byte in the least significant lane.
+            user (Default=0) - 'tuser' of the frame.
+
+        """
+        lanes = self.width // 8
+        for i in range(0, len(datastream), lanes):
+            word = 0
+            for lane, d in enumerate(datastream[i:i+lanes]):
+                word |= d << (8 * lane)
+            self.tdata.next = word
+            self.tkeep.next = (1 << len(datastream[i:i+lanes])) - 1
+            self.tlast.next = i + lanes >= len(datastream)
+            self.tuser.next = user
+            self.tvalid.next = True
+            yield self.clk.posedge
+            while not self.tready:
+                yield self.clk.posedge
+        self.tvalid.next = False
+        self.tlast.next = False
+
+    def receive(self, datastream, users=None):
+        """ Receive Operation
+
+        Takes a frame, up to and including 'tlast'.
+
+        Args:
+            datastream - list the received 8-bit values are appended to.
+            users (Default=None) - list the 'tuser' of the last beat is
+                appended to.
+
+        """
+        self.tready.next = True
+        while True:
+            yield self.clk.posedge
+            if self.tvalid and self.tready:
+                for lane in range(self.width // 8):
+                    if self.tkeep[lane]:
+                        datastream.append(int(self.tdata[8*lane+8:8*lane]))
+                if self.tlast:
+                    break
+        if users is not None:
+            users.append(int(self.tuser))
+        self.tready.next = False
+
+
+class MemoryInterface:
+    """ Memory Bus
+
+    Single-beat 32-bit accesses, one taking place on each clock with both
+    'valid' and 'ready' set. Read data comes back in order on 'rdvalid'.
+
+    Attributes:
+        clk (1 bit) - Memory bus clock.
+        addr (32 bits) - Byte address, a multiple of 4.
+        wr (1 bit) - Write access, read otherwise.
+        wrdata (32 bits) - Write data, lowest addressed byte in [8:0].
+        valid (1 bit) - Driven by the master for an access.
+        ready (1 bit) - Driven by the memory to take the access.
+        rddata (32 bits) - Read data, lowest addressed byte in [8:0].
+        rdvalid (1 bit) - Pulsed by the memory along with 'rddata'.
+    """
+    def __init__(self):
+        self.clk = Signal(bool(0))
+        self.addr = Signal(intbv(0)[32:])  # Address
+        self.wr = Signal(bool(0))  # Write
+        self.wrdata = Signal(intbv(0)[32:])  # Write Data
+        self.valid = Signal(bool(0))  # Access Valid
+        self.ready = Signal(bool(0))  # Access Ready
+        self.rddata = Signal(intbv(0)[32:])  # Read Data
+        self.rdvalid = Signal(bool(0))  # Read Data Valid
+
+    def serve(self, mem, wait=0):
+        """ Memory Operation
+
+        Serves the accesses of the master from 'mem', forever.
+
+        Args:
+            mem - dict of the 32-bit word at each address, words not in it
+                read as 0.
+            wait (Default=0) - clocks 'ready' is held low after each access.
+
+        """
+        stall = 0
+        self.ready.next = True
+        while True:
+            yield self.clk.posedge
+            self.rdvalid.next = False
+            if self.valid and self.ready:
+                if self.wr:
+                    mem[int(self.addr)] = int(self.wrdata)
+                else:
+                    self.rddata.next = mem.get(int(self.addr), 0)
+                    self.rdvalid.next = True
+                stall = wait
+            elif stall:
+                stall -= 1
+            self.ready.next = stall == 0
+
+
+class DMARingInterface:
+    """ DMA Engine - Descriptor Rings
+
+    Pointers are descriptor indexes in the range 0 to size-1.
+
+    Attributes:
+        txbase (32 bits) - Address of the transmit ring.
+        txsize (16 bits) - No. of descriptors of the transmit ring.
+        txtail (16 bits) - Driven by the host past the last descriptor
+            given to the engine.
+        txhead (16 bits) - Next descriptor the engine gives back.
+        rxbase, rxsize, rxtail, rxhead - As above, for the receive ring.
+    """
+    def __init__(self):
+        self.txbase = Signal(intbv(0)[32:])
+        self.txsize = Signal(intbv(0)[16:])
+        self.txtail = Signal(intbv(0)[16:])
+        self.txhead = Signal(intbv(0)[16:])
+        self.rxbase = Signal(intbv(0)[32:])
+        self.rxsize = Signal(intbv(0)[16:])
+        self.rxtail = Signal(intbv(0)[16:])
+        self.rxhead = Signal(intbv(0)[16:])
+
+
+class ClientInterface:
+    def __init__(self, width=8):
+        self.rx = RxFIFOClientInterface(width)
+        self.tx = TxFIFOClientInterface(width)
+        self.txts = TxTimestampInterface()
+        self.rxevent = RxEventInterface()
@@ -17,6 +17,20 @@ class RxGMII_Interface:
         self.err = Signal(bool(0))
 
 
+class TxXGMII_Interface:
+    def __init__(self):
+        self.clk = Signal(bool(0))
+        self.data = Signal(intbv(0x0707070707070707)[64:])
+        self.ctrl = Signal(intbv(0xFF)[8:])
+
+
+class RxXGMII_Interface:
+    def __init__(self):
+        self.clk = Signal(bool(0))
+        self.data = Signal(intbv(0x0707070707070707)[64:])
+        self.ctrl = Signal(intbv(0xFF)[8:])
+
+
 class TxFlowInterface:
     def __init__(self):
         self.clk = Signal(bool(0))
@@ -34,3 +48,34 @@ class RxFlowInterface:
         self.macaddr = Signal(intbv(0)[48:])
         self.pausereq = Signal(bool(0))
         self.pauseval = Signal(intbv(0)[16:])
+
+
+class TxStatsInterface:
+    def __init__(self):
+        self.clk = Signal(bool(0))
+        self.valid = Signal(bool(0))  # Statistics Vector Valid, end of frame
+        self.good = Signal(bool(0))  # Frame sent without error
+        self.pause = Signal(bool(0))  # Pause frame
+        self.length = Signal(intbv(0)[16:])  # Frame bytes, FCS included
+        self.paused = Signal(bool(0))  # Held off by a received pause
+        self.timestamp = Signal(intbv(0)[64:])  # Time of the SFD
+
+
+class RxStatsInterface:
+    def __init__(self):
+        self.clk = Signal(bool(0))
+        self.valid = Signal(bool(0))  # Statistics Vector Valid, end of frame
+        self.good = Signal(bool(0))  # Frame received without error
+        self.fcserr = Signal(bool(0))  # Bad frame, FCS mismatch
+        self.lenerr = Signal(bool(0))  # Bad frame, length/size check failed
+        self.pause = Signal(bool(0))  # Good pause frame consumed
+        self.filtered = Signal(bool(0))  # Rejected by the address filter
+        self.length = Signal(intbv(0)[16:])  # Frame bytes, FCS included
+
+
+class StatsInterface:
+    def __init__(self):
+        self.clk = Signal(bool(0))
+        self.snapshot = Signal(bool(0))  # Toggled for a snapshot-and-clear
+        self.index = Signal(intbv(0)[7:])  # Statistics word read
+        self.data = Signal(intbv(0)[32:])
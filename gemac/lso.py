@@ -0,0 +1,244 @@
+from myhdl import block, always_seq, always_comb, always, enum, Signal, \
+    intbv, concat
+
+lsostate = enum('IDLE', 'PASS', 'HEADER', 'REPLAY', 'PAYLOAD', 'DRAIN')
+
+
+@block
+def lso(txlocallink_in, txlocallink_out):
+    """ Large Send Offload.
+
+    Sits between the client and the Transmit FIFO, both sides LocalLink. A
+    frame written with a non-zero 'mss' is a header template, Ethernet with
+    an optional VLAN tag, IPv4 and TCP, followed by the TCP payload of any
+    size, the IPv4 total length counting the whole payload. The template is
+    kept and the payload cut into back-to-back frames of 'mss' bytes, each
+    sent behind a copy of the template with the IPv4 total length and
+    identification, and the TCP sequence number updated. FIN and PSH are
+    kept on the last frame only, CWR on the first only. Every frame asks
+    the Transmit FIFO to insert both checksums. Frames written with 'mss'
+    zero pass through as they are.
+
+    Args:
+        txlocallink_in (TxLocalLinkFIFOInterface) - Client side.
+        txlocallink_out (TxLocalLinkFIFOInterface) - Transmit FIFO side, its
+            'txclk' and 'reset' driven from the client side.
+
+    Note:
+        Templates which are not IPv4 and TCP, or not complete within 255
+        bytes, are sent as a single frame unchanged. Payload bytes past the
+        IPv4 total length are dropped.
+
+    """
+    li = txlocallink_in
+    lo = txlocallink_out
+
+    state = Signal(lsostate.IDLE)
+    hdrmem = [Signal(intbv(0)[8:]) for _ in range(256)]
+    memwe = Signal(bool(0))
+    pos = Signal(intbv(0, min=0, max=256))
+    rpos = Signal(intbv(0, min=0, max=256))
+    hdrlast = Signal(intbv(0, min=0, max=256))
+    typehi = Signal(intbv(0)[8:])
+    ipstart = Signal(intbv(14, min=0, max=256))
+    tcpstart = Signal(intbv(255, min=0, max=256))
+    hdrend = Signal(intbv(0, min=0, max=512))
+    ipv4 = Signal(bool(0))
+    istcp = Signal(bool(0))
+    hdrknown = Signal(bool(0))
+    segment = Signal(bool(0))
+    ended = Signal(bool(0))
+    first = Signal(bool(0))
+    last = Signal(bool(0))
+    mss = Signal(intbv(0)[16:])
+    totlen = Signal(intbv(0)[16:])
+    ipid = Signal(intbv(0)[16:])
+    seq = Signal(intbv(0)[32:])
+    remaining = Signal(intbv(0)[16:])
+    seglen = Signal(intbv(0)[16:])
+    segleft = Signal(intbv(0)[16:])
+
+    @always_comb
+    def assign():
+        lo.txclk.next = li.txclk
+        lo.reset.next = li.reset
+        li.fifostatus.next = lo.fifostatus
+        li.overflow.next = lo.overflow
+        memwe.next = state == lsostate.HEADER and li.src_rdy
+
+    @always_comb
+    def seglogic():
+        """ Payload bytes of the segment to be sent next. """
+        last.next = remaining <= mss
+        if remaining <= mss:
+            seglen.next = remaining
+        else:
+            seglen.next = mss
+
+    @always(li.txclk.posedge)
+    def memwrite():
+        if memwe:
+            hdrmem[pos].next = li.txd
+
+    @always_comb
+    def outmux():
+        byte = intbv(0)[8:]
+        tot = intbv(0)[16:]
+        byte[:] = hdrmem[rpos]
+        if segment:
+            tot[:] = hdrend - ipstart + seglen
+            if rpos == ipstart + 2:
+                byte[:] = tot[16:8]
+            elif rpos == ipstart + 3:
+                byte[:] = tot[8:]
+            elif rpos == ipstart + 4:
+                byte[:] = ipid[16:8]
+            elif rpos == ipstart + 5:
+                byte[:] = ipid[8:]
+            elif rpos == tcpstart + 4:
+                byte[:] = seq[32:24]
+            elif rpos == tcpstart + 5:
+                byte[:] = seq[24:16]
+            elif rpos == tcpstart + 6:
+                byte[:] = seq[16:8]
+            elif rpos == tcpstart + 7:
+                byte[:] = seq[8:]
+            elif rpos == tcpstart + 13:
+                if not last:
+                    byte[0] = 0  # FIN
+                    byte[3] = 0  # PSH
+                if not first:
+                    byte[7] = 0  # CWR
+
+        if state == lsostate.PASS:
+            lo.txd.next = li.txd
+            lo.sof.next = li.sof
+            lo.eof.next = li.eof
+            lo.src_rdy.next = li.src_rdy
+            lo.ipcsins.next = li.ipcsins
+            lo.l4csins.next = li.l4csins
+            li.dst_rdy.next = lo.dst_rdy
+        elif state == lsostate.REPLAY:
+            lo.txd.next = byte
+            lo.sof.next = rpos == 0
+            lo.eof.next = rpos == hdrlast and \
+                (ended or (segment and seglen == 0))
+            lo.src_rdy.next = True
+            lo.ipcsins.next = segment
+            lo.l4csins.next = segment
+            li.dst_rdy.next = False
+        elif state == lsostate.PAYLOAD:
+            lo.txd.next = li.txd
+            lo.sof.next = False
+            lo.eof.next = li.eof or (segment and segleft == 1)
+            lo.src_rdy.next = li.src_rdy
+            lo.ipcsins.next = segment
+            lo.l4csins.next = segment
+            li.dst_rdy.next = lo.dst_rdy
+        else:
+            lo.txd.next = 0
+            lo.sof.next = False
+            lo.eof.next = False
+            lo.src_rdy.next = False
+            lo.ipcsins.next = False
+            lo.l4csins.next = False
+            li.dst_rdy.next = state == lsostate.HEADER or \
+                state == lsostate.DRAIN
+
+    @always_seq(li.txclk.posedge, li.reset)
+    def segmenter():
+        """ Header template capture and segmentation. """
+        if state == lsostate.IDLE:
+            pos.next = 0
+            ipstart.next = 14
+            tcpstart.next = 255
+            ipv4.next = False
+            istcp.next = False
+            hdrknown.next = False
+            first.next = True
+            if li.src_rdy and li.sof:
+                if li.mss == 0:
+                    state.next = lsostate.PASS
+                else:
+                    mss.next = li.mss
+                    state.next = lsostate.HEADER
+
+        elif state == lsostate.PASS:
+            if li.src_rdy and lo.dst_rdy and li.eof:
+                state.next = lsostate.IDLE
+
+        elif state == lsostate.HEADER:
+            if li.src_rdy:
+                if pos != 255:
+                    pos.next = pos + 1
+                if pos == 12:
+                    typehi.next = li.txd
+                elif pos == 13 and typehi == 0x81 and li.txd == 0x00:
+                    ipstart.next = 18
+                if pos == ipstart:
+                    ipv4.next = li.txd[8:4] == 4
+                    tcpstart.next = ipstart + concat(li.txd[4:], intbv(0)[2:])
+                elif pos == ipstart + 2:
+                    totlen.next = concat(li.txd, totlen[8:])
+                elif pos == ipstart + 3:
+                    totlen.next = concat(totlen[16:8], li.txd)
+                elif pos == ipstart + 4:
+                    ipid.next = concat(li.txd, ipid[8:])
+                elif pos == ipstart + 5:
+                    ipid.next = concat(ipid[16:8], li.txd)
+                elif pos == ipstart + 9:
+                    istcp.next = li.txd == 6
+                if pos >= tcpstart + 4 and pos < tcpstart + 8:
+                    seq.next = concat(seq[24:], li.txd)
+                elif pos == tcpstart + 12:
+                    hdrend.next = tcpstart + \
+                        concat(li.txd[8:4], intbv(0)[2:])
+                    hdrknown.next = True
+
+                if li.eof or pos == 255 or (hdrknown and pos + 1 == hdrend):
+                    hdrlast.next = pos
+                    ended.next = li.eof
+                    rpos.next = 0
+                    state.next = lsostate.REPLAY
+                    if ipv4 and istcp and hdrknown and not li.eof and \
+                            pos + 1 == hdrend and hdrend - ipstart <= totlen:
+                        segment.next = True
+                        remaining.next = totlen - (hdrend - ipstart)
+                    else:
+                        segment.next = False
+
+        elif state == lsostate.REPLAY:
+            if lo.dst_rdy:
+                if rpos == hdrlast:
+                    segleft.next = seglen
+                    if ended:
+                        state.next = lsostate.IDLE
+                    elif segment and seglen == 0:
+                        state.next = lsostate.DRAIN
+                    else:
+                        state.next = lsostate.PAYLOAD
+                else:
+                    rpos.next = rpos + 1
+
+        elif state == lsostate.PAYLOAD:
+            if li.src_rdy and lo.dst_rdy:
+                if li.eof:
+                    state.next = lsostate.IDLE
+                elif segment and segleft == 1:
+                    remaining.next = remaining - seglen
+                    ipid.next = (ipid + 1) % 2**16
+                    seq.next = (seq + seglen) % 2**32
+                    first.next = False
+                    rpos.next = 0
+                    if last:
+                        state.next = lsostate.DRAIN
+                    else:
+                        state.next = lsostate.REPLAY
+                elif segment:
+                    segleft.next = segleft - 1
+
+        elif state == lsostate.DRAIN:
+            if li.src_rdy and li.eof:
+                state.next = lsostate.IDLE
+
+    return assign, seglogic, memwrite, outmux, segmenter
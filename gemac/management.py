@@ -1,10 +1,110 @@
 # -*- coding: utf-8 -*-
 
-from myhdl import block, Signal, intbv, always_seq, concat
+from myhdl import block, Signal, intbv, always_seq, always_comb, concat
+from .intrafaces import StatsInterface
+from .rss import rssentries
+from .flowdir import flowentrybits
+from .txsched import txqueues
+from .tas import guardband
 
 rx0, rx1, tx, flow, managementreg, ucast0, \
-    ucast1, addrtable0, addrtable1, addrfiltermode, reserved = range(11)
-""" Indexing of configuration Registers"""
+    ucast1, addrtable0, addrtable1, addrfiltermode, txfifo, \
+    mcasthash = range(12)
+rsskey = mcasthash + 16
+rssctrl = rsskey + 10
+rssindir = rssctrl + 1
+fdirkey = rssindir + 1
+fdirctrl = fdirkey + 5
+txsched = fdirctrl + 1
+txweight = txsched + 1
+cbsvalue = txweight + 1
+cbsctrl = cbsvalue + 1
+tasvalue = cbsctrl + 1
+tasctrl = tasvalue + 1
+ptpincr = tasctrl + 1
+ptpoffset = ptpincr + 1
+coalframes = ptpoffset + 1
+coaltime = coalframes + 1
+reserved = coaltime + 1
+""" Indexing of configuration Registers, 'mcasthash' being the first of
+the 16 Multicast Hash Table words, 'rsskey' the first of the 10 Receive Side
+Scaling key words and 'fdirkey' the first of the 5 Flow Director key
+words."""
+
+statistics = reserved + 1
+statsctrl = statistics + 127
+""" Indexing of the 128 Statistics words (0x000-0x1FF) following the
+configuration registers, 'statsctrl' being the Statistics Control word."""
+
+
+def getregindex(addr):
+    """Task/Function to get index of configuration registers.
+
+    Args:
+        addr (10 bits) - The register address.
+
+    Returns:
+        int: Configuration Register index.
+
+    """
+    if addr <= 0x1FF:
+        return statistics + (addr >> 2)
+    elif addr >= 0x200 and addr <= 0x23F:
+        return rx0
+    elif addr >= 0x240 and addr <= 0x27F:
+        return rx1
+    elif addr >= 0x280 and addr <= 0x2BF:
+        return tx
+    elif addr >= 0x2C0 and addr <= 0x2FF:
+        return flow
+    elif addr >= 0x300 and addr <= 0x303:
+        return txfifo
+    elif addr >= 0x304 and addr <= 0x307:
+        return rssindir
+    elif addr >= 0x308 and addr <= 0x31B:
+        return fdirkey + ((addr >> 2) - 0xC2)
+    elif addr >= 0x31C and addr <= 0x31F:
+        return fdirctrl
+    elif addr >= 0x320 and addr <= 0x323:
+        return txsched
+    elif addr >= 0x324 and addr <= 0x327:
+        return txweight
+    elif addr >= 0x328 and addr <= 0x32B:
+        return cbsvalue
+    elif addr >= 0x32C and addr <= 0x32F:
+        return cbsctrl
+    elif addr >= 0x330 and addr <= 0x333:
+        return tasvalue
+    elif addr >= 0x334 and addr <= 0x337:
+        return tasctrl
+    elif addr >= 0x338 and addr <= 0x33B:
+        return ptpincr
+    elif addr >= 0x33C and addr <= 0x33F:
+        return ptpoffset
+    elif addr >= 0x340 and addr <= 0x343:
+        return managementreg
+    elif addr >= 0x344 and addr <= 0x347:
+        return coalframes
+    elif addr >= 0x348 and addr <= 0x34B:
+        return coaltime
+    elif addr >= 0x380 and addr <= 0x383:
+        return ucast0
+    elif addr >= 0x384 and addr <= 0x387:
+        return ucast1
+    elif addr >= 0x388 and addr <= 0x38B:
+        return addrtable0
+    elif addr >= 0x38C and addr <= 0x38F:
+        return addrtable1
+    elif addr >= 0x390 and addr <= 0x393:
+        return addrfiltermode
+    elif addr >= 0x394 and addr <= 0x3BB:
+        return rsskey + ((addr >> 2) - 0xE5)
+    elif addr >= 0x3BC and addr <= 0x3BF:
+        return rssctrl
+    elif addr >= 0x3C0 and addr <= 0x3FF:
+        return mcasthash + ((addr >> 2) & 0xF)
+    else:
+        return reserved
 
 
 class mdioData:
@@ -27,7 +127,10 @@ class mdioData:
 
 
 @block
-def management(hostintf, mdiointf, configregs, addrtable, reset):
+def management(hostintf, mdiointf, configregs, addrtable, reset,
+               statsintf=None, rsstable=None, flowtable=None,
+               txweights=None, shaper=None, gcl=None, tasparams=None,
+               ptpadjust=None):
     """ Management Block.
 
     Responsible for host interaction for read/write of configuration registers,
@@ -36,10 +139,50 @@ def management(hostintf, mdiointf, configregs, addrtable, reset):
     Args:
         hostintf - Instance of 'HostManagementInterface' class in interfaces.
         mdiointf - Instance of 'MDIOInterface' class in interfaces.
-        configregs - List of 10 32-bits wide Configuration Registers.
-        addrtable - List of 4 48-bits wide MAC Addresses to be used by
-            Address Filter.
+        configregs - List of 55 32-bits wide Configuration Registers.
+        addrtable - List of N 48-bits wide MAC Addresses to be used by
+            Address Filter, N a power of 2 from 2 to 64. The location is
+            given by the low log2(N) bits of Address Table word bits
+            [21:16].
         reset: Asynchronous reset Signal from Host
+        statsintf (Default=None) - StatsInterface to the 'statistics'
+            block. Statistics words are read at 0x000-0x1FF, writing bit
+            [31] of the Statistics Control word (0x1FC) snapshots and
+            clears all the counters.
+        rsstable (Default=None) - List of 128 6-bits wide receive queues,
+            the Receive Side Scaling Indirection Table. Written through
+            the Indirection Table word (0x304), entry in bits [22:16] and
+            queue in bits [5:0], or read back on 'rddata' when bit [23] is
+            set.
+        flowtable (Default=None) - List of N 184-bits wide Flow Director
+            Table entries, N a power of 2 from 2 to 64. Written through the
+            Flow Director Control word (0x31C) from the 5 key words
+            (0x308-0x31B) and the control word bits [15:0], location in the
+            low log2(N) bits of [21:16], queue in [29:24], drop in [30] and
+            valid in [31]. Read back when bit [23] is set, the key words
+            on 'rddata' over 5 clocks followed by the control word.
+        txweights (Default=None) - List of 8 16-bits wide Transmit
+            Scheduler queue weights. Written through the Transmit Weight
+            word (0x324), queue in bits [18:16] and weight in bits [15:0],
+            or read back on 'rddata' when bit [23] is set.
+        shaper (Default=None) - List of 32 32-bits wide Credit-Based Shaper
+            parameters, the idleSlope, sendSlope, hiCredit and loCredit of
+            the 8 transmit queues in that order. Written through the Shaper
+            Control word (0x32C) from the Shaper Value word (0x328), queue in
+            bits [18:16] and parameter in bits [20:19], or read back on
+            'rddata' when bit [23] is set.
+        gcl (Default=None) - List of N 32-bits wide Time-Aware Shaper gate
+            control list entries, N a power of 2 from 2 to 64. Written
+            through the Time-Aware Shaper Control word (0x334) from the
+            Time-Aware Shaper Value word (0x330), entry in the low log2(N)
+            bits of [21:16], or read back on 'rddata' when bit [23] is set.
+        tasparams (Default=None) - List of 5 32-bits wide Time-Aware Shaper
+            parameters, indexed as in 'gemac.tas'. Written and read as the
+            gate control list with bit [22] set, parameter in bits [18:16].
+            The time counter increment is at 0x338.
+        ptpadjust (Default=None) - 1-bit Signal to the 'ptpclock', toggled
+            on each write of the Time Offset word (0x33C) to step the time
+            counter by it.
 
     Attributes:
         addrtableread - Signal used for address table read operation.
@@ -52,42 +195,45 @@ def management(hostintf, mdiointf, configregs, addrtable, reset):
         144(1-GEMAC), Pg 77-89.
 
     """
+    assert 2 <= len(addrtable) <= 64
+    assert len(addrtable) & (len(addrtable) - 1) == 0
+    lochigh = 16 + len(addrtable).bit_length() - 1
     addrtableread = Signal(bool(0))
-    addrtablelocation = Signal(intbv(0)[2:])
+    addrtablelocation = Signal(intbv(0)[lochigh-16:])
     mdiodata = mdioData()
-
-    def getregindex(addr):
-        """Task/Function to get index of configuration registers.
-
-        Args:
-            addr (10 bits) - The register address.
-
-        Returns:
-            int: Configuration Register index.
-
-        """
-        if addr >= 0x200 and addr <= 0x23F:
-            return rx0
-        elif addr >= 0x240 and addr <= 0x27F:
-            return rx1
-        elif addr >= 0x280 and addr <= 0x2BF:
-            return tx
-        elif addr >= 0x2C0 and addr <= 0x2FF:
-            return flow
-        elif addr >= 0x340 and addr <= 0x37F:
-            return managementreg
-        elif addr >= 0x380 and addr <= 0x383:
-            return ucast0
-        elif addr >= 0x384 and addr <= 0x387:
-            return ucast1
-        elif addr >= 0x388 and addr <= 0x38B:
-            return addrtable0
-        elif addr >= 0x38C and addr <= 0x38F:
-            return addrtable1
-        elif addr >= 0x390 and addr <= 0x393:
-            return addrfiltermode
-        else:
-            return reserved
+    if statsintf is None:
+        statsintf = StatsInterface()
+    if ptpadjust is None:
+        ptpadjust = Signal(bool(0))
+    if rsstable is None:
+        rsstable = [Signal(intbv(0)[6:]) for _ in range(rssentries)]
+    if flowtable is None:
+        flowtable = [Signal(intbv(0)[flowentrybits:]) for _ in range(2)]
+    if txweights is None:
+        txweights = [Signal(intbv(0)[16:]) for _ in range(txqueues)]
+    assert len(txweights) == txqueues
+    if shaper is None:
+        shaper = [Signal(intbv(0)[32:]) for _ in range(4 * txqueues)]
+    assert len(shaper) == 4 * txqueues
+    if gcl is None:
+        gcl = [Signal(intbv(0)[32:]) for _ in range(2)]
+    assert 2 <= len(gcl) <= 64
+    assert len(gcl) & (len(gcl) - 1) == 0
+    gclhigh = 16 + len(gcl).bit_length() - 1
+    if tasparams is None:
+        tasparams = [Signal(intbv(0)[32:]) for _ in range(guardband + 1)]
+    assert len(tasparams) == guardband + 1
+    assert 2 <= len(flowtable) <= 64
+    assert len(flowtable) & (len(flowtable) - 1) == 0
+    flowhigh = 16 + len(flowtable).bit_length() - 1
+    flowread = Signal(intbv(0, min=0, max=6))
+    flowlocation = Signal(intbv(0)[flowhigh-16:])
+
+    @always_comb
+    def statsport():
+        """ Statistics word addressed by the host. """
+        statsintf.clk.next = hostintf.clk
+        statsintf.index.next = hostintf.regaddress[9:2]
 
     @always_seq(hostintf.clk.posedge, reset=reset)
     def readData():
@@ -97,6 +243,7 @@ def management(hostintf, mdiointf, configregs, addrtable, reset):
         Table or on completion of MDIO Read operation.
 
         """
+        entry = intbv(0)[flowentrybits:]
         if (not hostintf.miimsel) and hostintf.regaddress[9]:
             regindex = getregindex(hostintf.regaddress)
 
@@ -105,11 +252,42 @@ def management(hostintf, mdiointf, configregs, addrtable, reset):
 
             if regindex == addrtable1 and not hostintf.opcode[1] and \
                     hostintf.wrdata[23]:  # Address Table Read 0
-                loc = hostintf.wrdata[18:16]
+                loc = hostintf.wrdata[lochigh:16]
                 addrtablelocation.next = loc
                 hostintf.rddata.next = addrtable[loc][32:0]
                 addrtableread.next = True
 
+            if regindex == rssindir and not hostintf.opcode[1] and \
+                    hostintf.wrdata[23]:  # Indirection Table Read
+                hostintf.rddata.next = rsstable[hostintf.wrdata[23:16]]
+
+            if regindex == txweight and not hostintf.opcode[1] and \
+                    hostintf.wrdata[23]:  # Transmit Weight Read
+                hostintf.rddata.next = txweights[hostintf.wrdata[19:16]]
+
+            if regindex == cbsctrl and not hostintf.opcode[1] and \
+                    hostintf.wrdata[23]:  # Shaper Parameter Read
+                hostintf.rddata.next = shaper[hostintf.wrdata[21:16]]
+
+            if regindex == tasctrl and not hostintf.opcode[1] and \
+                    hostintf.wrdata[23]:  # Time-Aware Shaper Read
+                if not hostintf.wrdata[22]:
+                    hostintf.rddata.next = gcl[hostintf.wrdata[gclhigh:16]]
+                elif hostintf.wrdata[19:16] <= guardband:
+                    hostintf.rddata.next = tasparams[hostintf.wrdata[19:16]]
+
+            if regindex == fdirctrl and not hostintf.opcode[1] and \
+                    hostintf.wrdata[23]:  # Flow Director Table Read 0
+                loc = hostintf.wrdata[flowhigh:16]
+                flowlocation.next = loc
+                entry[:] = flowtable[loc]
+                hostintf.rddata.next = entry[176:144]
+                flowread.next = 1
+
+        if (not hostintf.miimsel) and (not hostintf.regaddress[9]) and \
+                hostintf.opcode[1]:  # ReadStatistics
+            hostintf.rddata.next = statsintf.data
+
         if not hostintf.miimrdy and mdiodata.done:  # MDIO Read
             hostintf.rddata.next = mdiodata.rddata[16:]
 
@@ -117,6 +295,24 @@ def management(hostintf, mdiointf, configregs, addrtable, reset):
             addrtableread.next = False
             hostintf.rddata.next = addrtable[addrtablelocation][48:32]
 
+        if flowread != 0:  # Flow Director Table Read 1-5
+            entry[:] = flowtable[flowlocation]
+            if flowread == 1:
+                hostintf.rddata.next = entry[144:112]
+            elif flowread == 2:
+                hostintf.rddata.next = entry[112:80]
+            elif flowread == 3:
+                hostintf.rddata.next = entry[80:48]
+            elif flowread == 4:
+                hostintf.rddata.next = entry[48:16]
+            else:
+                hostintf.rddata.next = concat(entry[184:176], intbv(0)[8:],
+                                              entry[16:])
+            if flowread == 5:
+                flowread.next = 0
+            else:
+                flowread.next = flowread + 1
+
     @always_seq(hostintf.clk.posedge, reset=reset)
     def writeConfig():
         """Process to write into configuration registers and address table."""
@@ -130,15 +326,59 @@ def management(hostintf, mdiointf, configregs, addrtable, reset):
 
             # Address Table Write
             if regindex == addrtable1 and not hostintf.wrdata[23]:
-                addrtable[hostintf.wrdata[18:16]].next = \
+                addrtable[hostintf.wrdata[lochigh:16]].next = \
                     (hostintf.wrdata[16:0] << 32) | configregs[addrtable0]
 
+            # Indirection Table Write
+            if regindex == rssindir and not hostintf.wrdata[23]:
+                rsstable[hostintf.wrdata[23:16]].next = hostintf.wrdata[6:]
+
+            # Transmit Weight Write
+            if regindex == txweight and not hostintf.wrdata[23]:
+                txweights[hostintf.wrdata[19:16]].next = hostintf.wrdata[16:]
+
+            # Shaper Parameter Write
+            if regindex == cbsctrl and not hostintf.wrdata[23]:
+                shaper[hostintf.wrdata[21:16]].next = configregs[cbsvalue]
+
+            # Time-Aware Shaper Write
+            if regindex == tasctrl and not hostintf.wrdata[23]:
+                if not hostintf.wrdata[22]:
+                    gcl[hostintf.wrdata[gclhigh:16]].next = \
+                        configregs[tasvalue]
+                elif hostintf.wrdata[19:16] <= guardband:
+                    tasparams[hostintf.wrdata[19:16]].next = \
+                        configregs[tasvalue]
+
+            # Flow Director Table Write
+            if regindex == fdirctrl and not hostintf.wrdata[23]:
+                flowtable[hostintf.wrdata[flowhigh:16]].next = concat(
+                    hostintf.wrdata[32:24], configregs[fdirkey],
+                    configregs[fdirkey + 1], configregs[fdirkey + 2],
+                    configregs[fdirkey + 3], configregs[fdirkey + 4],
+                    hostintf.wrdata[16:])
+
         # Reverting resets
         if configregs[rx1][31]:
-            configregs[rx1].next = configregs[tx] & 0x7FFFFFFF
+            configregs[rx1].next = configregs[rx1] & 0x7FFFFFFF
         if configregs[tx][31]:
             configregs[tx].next = configregs[tx] & 0x7FFFFFFF
 
+    @always_seq(hostintf.clk.posedge, reset=reset)
+    def statscontrol():
+        """Process to request a statistics snapshot-and-clear."""
+        if (not hostintf.miimsel) and (not hostintf.opcode[1]) and \
+                getregindex(hostintf.regaddress) == statsctrl and \
+                hostintf.wrdata[31]:
+            statsintf.snapshot.next = not statsintf.snapshot
+
+    @always_seq(hostintf.clk.posedge, reset=reset)
+    def ptpcontrol():
+        """Process to request a step of the time counter."""
+        if (not hostintf.miimsel) and (not hostintf.opcode[1]) and \
+                hostintf.regaddress[9] and \
+                getregindex(hostintf.regaddress) == ptpoffset:
+            ptpadjust.next = not ptpadjust
 
     @always_seq(hostintf.clk.posedge, reset=reset)
     def mdcdriver():
@@ -206,4 +446,5 @@ def management(hostintf, mdiointf, configregs, addrtable, reset):
             mdiodata.wrdone.next = False
             mdiodata.done.next = False
 
-    return readData, writeConfig, mdcdriver, mdioinitiate, mdiooperation
+    return statsport, readData, writeConfig, statscontrol, ptpcontrol, \
+        mdcdriver, mdioinitiate, mdiooperation
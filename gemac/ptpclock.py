@@ -0,0 +1,56 @@
+from myhdl import block, always_seq, always_comb, Signal, intbv, concat
+from .graysync import graysync
+
+
+@block
+def ptpclock(clk, increment, time, reset, offset=None, adjust=None):
+    """ Time Counter.
+
+    Free-running PTP-style clock counting nanoseconds, advanced every clock
+    by 'increment', so that the rate follows the clock frequency. A change
+    of 'adjust' is brought into the 'clk' domain, where 'offset' is added
+    to the time once, stepping it forward or back.
+
+    Args:
+        clk (1-bit Signal) - Clock counted.
+        increment (32-bits Signal) - Nanoseconds a clock, 16 fractional
+            bits, 0x80000 for a 125 MHz clock. Zero stops the counter.
+        time (64-bits Signal) - Time in nanoseconds.
+        reset (ResetSignal) - System Reset
+        offset (Default=None) - 32-bits Signal, nanoseconds added on
+            'adjust', two's complement. Held while the change of 'adjust'
+            crosses over.
+        adjust (Default=None) - 1-bit Signal, toggled from another clock
+            domain for each step by 'offset'. No steps if None.
+
+    """
+
+    if offset is None:
+        offset = Signal(intbv(0)[32:])
+    if adjust is None:
+        adjust = Signal(bool(0))
+    frac = Signal(intbv(0)[16:])
+    req = Signal(bool(0))
+    ack = Signal(bool(0))
+    step = Signal(intbv(0)[64:])
+    reqsync = graysync(clk, adjust, req, reset)
+
+    @always_comb
+    def stepping():
+        """ Offset sign extended to the time, zero but on a change. """
+        if req == ack:
+            step.next = 0
+        elif offset[31]:
+            step.next = concat(intbv(0xFFFFFFFF)[32:], offset)
+        else:
+            step.next = offset
+
+    @always_seq(clk.posedge, reset)
+    def count():
+        t = intbv(0)[82:]
+        t[:] = concat(time, frac) + increment + concat(step, intbv(0)[16:])
+        time.next = t[80:16]
+        frac.next = t[16:]
+        ack.next = req
+
+    return reqsync, stepping, count
@@ -0,0 +1,120 @@
+from myhdl import block, always_seq, Signal, intbv, concat
+
+rsskeywords = 10
+""" 32-bit words of the 40-byte Toeplitz hash key."""
+
+rssentries = 128
+""" Entries of the indirection table, indexed by the hash bits [6:0]."""
+
+
+@block
+def rsshash(clk, rxdata, go, key, hashval, reset):
+    """ Receive Side Scaling Hash.
+
+    Parses the Ethernet, VLAN and IPv4 or IPv6 headers of the frame
+    appearing on 8-bit databus rxdata on the fly and folds the source and
+    destination addresses, followed by the source and destination ports of
+    a TCP or UDP segment, into the Toeplitz hash of 'key', a byte a clock.
+    The hash is valid from the end of the headers until the next frame
+    starts, zero for frames other than IPv4 or IPv6.
+
+    Args:
+        clk (1-bit Signal) - System clock.
+        rxdata (8-bits Signal) - Data Bus in which the frame appears,
+            destination address first.
+        go (1-bit Signal) - Set while the frame is on rxdata.
+        key (320-bits Signal) - Toeplitz key, first key byte in
+            key[320:312].
+        hashval (32-bits Signal) - Toeplitz hash.
+        reset (ResetSignal) - System Reset
+
+    Note:
+        Ports are left out for IPv4 fragments and IPv6 extension headers,
+        as though the segment were neither TCP nor UDP.
+
+    """
+
+    pos = Signal(intbv(0, min=0, max=32))
+    typehi = Signal(intbv(0)[8:])
+    ethtype = Signal(intbv(0)[16:])
+    vlan = Signal(bool(0))
+    inip = Signal(bool(0))
+    ipoff = Signal(intbv(0, min=0, max=128))
+    hdrlen = Signal(intbv(0)[7:])
+    fragment = Signal(bool(0))
+    l4 = Signal(bool(0))
+    window = Signal(intbv(0)[len(key):])
+
+    @always_seq(clk.posedge, reset)
+    def hashlogic():
+        off = intbv(0, min=0, max=128)
+        h = intbv(0)[32:]
+        w = intbv(0)[40:]
+        start = go and (ethtype == 0x0800 or ethtype == 0x86DD) and \
+            ((pos == 14 and not vlan) or (pos == 18 and vlan))
+        if start:
+            off[:] = 0
+        else:
+            off[:] = ipoff
+        ipv6 = ethtype == 0x86DD
+
+        if go and pos == 0:
+            # New frame
+            pos.next = 1
+            ethtype.next = 0
+            vlan.next = False
+            inip.next = False
+            hashval.next = 0
+            window.next = key
+        elif go:
+            if pos != 31:
+                pos.next = pos + 1
+            if pos == 12 or pos == 16:
+                typehi.next = rxdata
+            elif pos == 13:
+                ethtype.next = concat(typehi, rxdata)
+                vlan.next = typehi == 0x81 and rxdata == 0x00
+            elif pos == 17 and vlan:
+                ethtype.next = concat(typehi, rxdata)
+
+            if start:
+                # Header lengths not yet known, the ports out of reach.
+                hdrlen.next = 127
+                l4.next = False
+                fragment.next = False
+            if start or inip:
+                inip.next = True
+                if off != 127:
+                    ipoff.next = off + 1
+                if ipv6:
+                    if off == 6:
+                        l4.next = rxdata == 6 or rxdata == 17
+                        hdrlen.next = 40
+                elif off == 0:
+                    if rxdata[8:4] == 4:
+                        hdrlen.next = concat(rxdata[4:], intbv(0)[2:])
+                    else:
+                        inip.next = False
+                elif off == 6:
+                    fragment.next = rxdata[6:] != 0
+                elif off == 7:
+                    fragment.next = fragment or rxdata != 0
+                elif off == 9:
+                    l4.next = rxdata == 6 or rxdata == 17
+
+                if (ipv6 and off >= 8 and off < 40) or \
+                        (not ipv6 and off >= 12 and off < 20) or \
+                        (l4 and not fragment and off >= hdrlen and
+                         off < hdrlen + 4):
+                    h[:] = hashval
+                    w[:] = window[len(key):len(key)-40]
+                    for j in range(8):
+                        if rxdata[7 - j]:
+                            h[:] = h ^ w[40:8]
+                        w[:] = concat(w[39:], False)
+                    hashval.next = h
+                    window.next = concat(window[len(key)-8:], intbv(0)[8:])
+        else:
+            pos.next = 0
+
+    return hashlogic
@@ -1,14 +1,22 @@
-from myhdl import Signal, intbv, block, enum, always_comb, always_seq, concat, ResetSignal
+from myhdl import Signal, intbv, block, enum, always_comb, always_seq, concat, ResetSignal, \
+    ConcatSignal
 from .delayline import delayline
 from .crc32 import crc32
-from .addrfilter import addrfilter
+from .addrfilter import addrshift, addrcam, addrhash
+from .checksum import rxchecksum
+from .rss import rsshash, rsskeywords, rssentries
+from .flowdir import flowkey, flowcam, flowkeybits, flowentrybits
+from .intrafaces import RxStatsInterface
 
-rxstate = enum('IDLE', 'PREAMBLE', 'FILTER', 'PAUSE', 'PASS', 'GOODFRAME', 'BADFRAME')
+rxstate = enum('IDLE', 'PREAMBLE', 'FILTER', 'PAUSE', 'PASS', 'GOODFRAME', 'BADFRAME',
+               'DROP')
 
 
 @block
 def rxengine(rxclientintf, rxgmii_intf, rxflowintf, rxconfig0, rxconfig1,
-             filterconfig, addrtable, sysreset):
+             filterconfig, addrtable, sysreset, hashtable=None, hashbins=64,
+             rxstatsintf=None, rsskey=None, rsstable=None, rssconfig=None,
+             flowtable=None, time=None):
 
     """ Receiver Engine.
 
@@ -16,9 +24,59 @@ def rxengine(rxclientintf, rxgmii_intf, rxflowintf, rxconfig0, rxconfig1,
     at the start of the frame, removes padding bytes and Frame Check Sequence.
     It performs error detection on the received frame using information such
     as the frame check sequence field, received GMII error codes, and legal
-    frame size boundaries.
+    frame size boundaries. Frames under 64 bytes, or over 1518 bytes (1522
+    with bit [27] of the second configuration word set) without jumbo
+    frames enabled, are bad.
+
+    Multicast frames are also accepted when the bin of their destination
+    address is set in the hash table. The bin is given by the upper bits of
+    the destination address CRC, taken from the running frame CRC.
+
+    The IPv4 header and TCP/UDP checksums are checked as the frame goes by,
+    'ipcsok' and 'l4csok' given along with 'good' so the host stack can skip
+    verifying them.
+
+    With receive side scaling enabled, the Toeplitz hash of the IPv4 or IPv6
+    addresses and TCP/UDP ports picks the receive queue of the frame from
+    the indirection table, 'rsshash' and 'queue' given along with 'good'.
+    A frame matching a valid entry of the Flow Director Table goes to the
+    queue of the entry instead, or is dropped as though filtered if the
+    entry says so.
+
+    The time of the SFD is taken as it comes from the GMII and given as
+    'timestamp' along with 'good'.
+
+    The length field of an 802.1Q tagged frame is the one following the
+    tag. When bit [23] of the second configuration word is set, the tag is
+    stripped by holding 'dv' low as it goes by, and its tag control
+    information given as 'vlantag' along with 'good'. An in-band frame
+    check sequence passed on still covers the tag.
+
+    Args:
+        hashtable (Default=None) - List of 32-bits wide Multicast Hash Table
+            words, bin n in word n/32 bit n%32. No bins set if None.
+        hashbins (Default=64) - No. of bins, 64 or 512.
+        rxstatsintf (Default=None) - RxStatsInterface, statistics vector
+            given at the end of every frame.
+        rsskey (Default=None) - List of 10 32-bits wide Toeplitz key words,
+            first key byte in word 0 bits [31:24]. All zero if None.
+        rsstable (Default=None) - List of 128 6-bits wide receive queues,
+            entry n used for frames with hash bits [6:0] n. All queue 0 if
+            None.
+        rssconfig (Default=None) - 32-bits wide Receive Side Scaling
+            Control word, bit [31] enables steering, else every frame goes
+            to queue 0.
+        flowtable (Default=None) - List of 184-bits wide Flow Director
+            Table entries (see 'gemac.flowdir'). No entries if None.
+        time (Default=None) - 64-bits Signal, time in nanoseconds from the
+            'ptpclock'. Zero if None.
 
     """
+    if rxstatsintf is None:
+        rxstatsintf = RxStatsInterface()
+    if time is None:
+        time = Signal(intbv(0)[64:])
+    sfdtime = Signal(intbv(0)[64:])
 
     state = Signal(rxstate.IDLE)
     curbyte = Signal(intbv(1, min=0, max=10000))
@@ -28,46 +86,81 @@ def rxengine(rxclientintf, rxgmii_intf, rxflowintf, rxconfig0, rxconfig1,
     matchcrc = Signal(bool(0))
     crcout = Signal(intbv(0xFFFFFFFF)[32:])
     length = Signal(intbv(0)[16:])
+    tagged = Signal(bool(0))
+    vlantag = Signal(intbv(0)[16:])
     crc32inst = crc32(rxgmii_intf.clk, clearcrc, calccrc, rxgmii_intf.data,
                       crcout, reset)
 
     dlinst = delayline(rxgmii_intf.clk, rxgmii_intf.data, rxclientintf.data,
                        True, reset, delay=6)
 
-    gofilt = Signal(bool(0))
+    dstaddr = Signal(intbv(0)[48:])
     isucast = Signal(bool(0))
-    isucast1 = Signal(bool(0))
-    isucast2 = Signal(bool(0))
-    ismcast1 = Signal(bool(0))
-    ismcast2 = Signal(bool(0))
+    istable = Signal(bool(0))
+    ishash = Signal(bool(0))
     isbcast = Signal(bool(0))
     ispause = Signal(bool(0))
 
-    afinst0 = addrfilter(rxgmii_intf.clk, rxgmii_intf.data, rxflowintf.macaddr,
-                         gofilt, isucast, reset)
-    afinst1 = addrfilter(rxgmii_intf.clk, rxgmii_intf.data, addrtable[0],
-                         gofilt, isucast1, reset)
-    afinst2 = addrfilter(rxgmii_intf.clk, rxgmii_intf.data, addrtable[1],
-                         gofilt, isucast2, reset)
-    afinst3 = addrfilter(rxgmii_intf.clk, rxgmii_intf.data, addrtable[2],
-                         gofilt, ismcast1, reset)
-    afinst4 = addrfilter(rxgmii_intf.clk, rxgmii_intf.data, addrtable[3],
-                         gofilt, ismcast2, reset)
-    afinst5 = addrfilter(rxgmii_intf.clk, rxgmii_intf.data, Signal(intbv(0x111111111111)[48:]),
-                         gofilt, isbcast, reset)
-    afinst6 = addrfilter(rxgmii_intf.clk, rxgmii_intf.data, Signal(intbv(0x0180C2000001)[48:]),
-                         gofilt, ispause, reset)
+    asinst = addrshift(rxgmii_intf.clk, rxgmii_intf.data, dstaddr, reset)
+    caminst = addrcam(dstaddr, addrtable, istable)
+
+    assert hashbins in (64, 512)
+    if hashtable is None:
+        hashtable = [Signal(intbv(0)[32:]) for _ in range(hashbins // 32)]
+    hashvec = ConcatSignal(*reversed(hashtable[:hashbins // 32]))
+    hashval = Signal(intbv(0, min=0, max=hashbins))
+    crcreg = Signal(intbv(0xFFFFFFFF)[32:])
+    hashinst = addrhash(crcreg, rxgmii_intf.data, hashval)
+
+    csumgo = Signal(bool(0))
+    ipok = Signal(bool(0))
+    l4ok = Signal(bool(0))
+    csuminst = rxchecksum(rxgmii_intf.clk, rxgmii_intf.data, csumgo, ipok,
+                          l4ok, reset)
+
+    if rsskey is None:
+        rsskey = [Signal(intbv(0)[32:]) for _ in range(rsskeywords)]
+    if rsstable is None:
+        rsstable = [Signal(intbv(0)[6:]) for _ in range(rssentries)]
+    if rssconfig is None:
+        rssconfig = Signal(intbv(0)[32:])
+    keyvec = ConcatSignal(*rsskey)
+    flowhash = Signal(intbv(0)[32:])
+    rssinst = rsshash(rxgmii_intf.clk, rxgmii_intf.data, csumgo, keyvec,
+                      flowhash, reset)
+
+    if flowtable is None:
+        flowtable = [Signal(intbv(0)[flowentrybits:])]
+    framekey = Signal(intbv(0)[flowkeybits:])
+    flowhit = Signal(bool(0))
+    flowaction = Signal(intbv(0)[8:])
+    keyinst = flowkey(rxgmii_intf.clk, rxgmii_intf.data, csumgo, framekey,
+                      reset)
+    flowcaminst = flowcam(framekey, flowtable, flowhit, flowaction)
 
     @always_comb
     def assign():
         rxclientintf.clk.next = rxgmii_intf.clk.next
+        rxstatsintf.clk.next = rxgmii_intf.clk
         clearcrc.next = state == rxstate.IDLE
         calccrc.next = (state == rxstate.FILTER or state == rxstate.PAUSE or state == rxstate.PASS)
+        csumgo.next = rxgmii_intf.dv and (state == rxstate.FILTER or
+                                          state == rxstate.PAUSE or
+                                          state == rxstate.PASS)
         rxflowintf.macaddr.next = concat(rxconfig1[16:], rxconfig0)
         matchcrc.next = crcout == 0x2144DF1C
+        crcreg.next = ~crcout
         reseten = rxconfig1[31]
         reset.next = sysreset or not reseten
 
+    @always_comb
+    def addrmatch():
+        """ Fixed addresses and hash bins, valid on the last address byte. """
+        isucast.next = dstaddr == rxflowintf.macaddr
+        isbcast.next = dstaddr == 0xFFFFFFFFFFFF
+        ispause.next = dstaddr == 0x0180C2000001
+        ishash.next = dstaddr[40] and hashvec[hashval]
+
     @always_seq(rxgmii_intf.clk.posedge, reset)
     def curbyteinc():
         """ Index Incrementer """
@@ -81,11 +174,15 @@ def rxengine(rxclientintf, rxgmii_intf, rxflowintf, rxconfig0, rxconfig1,
         """ Receiver Logic """
         cntrlchecken = rxconfig1[24]
         lengthchecken = not rxconfig1[25]
-        vlanen = rxconfig1[27]
         rxen = rxconfig1[28]
         fcsen = rxconfig1[29]
         jumboen = rxconfig1[30]
+        vlanen = rxconfig1[27]
+        stripen = rxconfig1[23]
+        # Frame size limits, 'curbyte' one past the FCS once 'dv' falls.
+        sizeok = curbyte >= 65 and (jumboen or curbyte <= 1519 + 4*vlanen)
 
+        rxstatsintf.valid.next = False
         if rxgmii_intf.err:
             state.next = rxstate.BADFRAME
 
@@ -93,8 +190,19 @@ def rxengine(rxclientintf, rxgmii_intf, rxflowintf, rxconfig0, rxconfig1,
             rxclientintf.dv.next = False
             rxclientintf.bad.next = False
             rxclientintf.good.next = False
+            rxclientintf.ipcsok.next = False
+            rxclientintf.l4csok.next = False
+            rxclientintf.rsshash.next = 0
+            rxclientintf.queue.next = 0
+            rxclientintf.timestamp.next = 0
+            rxclientintf.vlan.next = False
+            rxclientintf.vlantag.next = 0
+            tagged.next = False
+            rxclientintf.filtered.next = False
             rxflowintf.pausereq.next = False
             rxflowintf.pauseval.next = 0x0000
+            rxstatsintf.fcserr.next = False
+            rxstatsintf.lenerr.next = False
             if rxgmii_intf.dv:
                 if rxgmii_intf.data == 0x55:
                     state.next = rxstate.PREAMBLE
@@ -105,23 +213,28 @@ def rxengine(rxclientintf, rxgmii_intf, rxflowintf, rxconfig0, rxconfig1,
             if not rxgmii_intf.dv:
                 state.next = rxstate.BADFRAME
             elif rxgmii_intf.data == 0xD5:
+                sfdtime.next = time
                 state.next = rxstate.FILTER
-                gofilt.next = True
             elif rxgmii_intf.data != 0x55:
                 state.next = rxstate.BADFRAME
 
         elif state == rxstate.FILTER:
-            gofilt.next = False
             if curbyte == 6:
-                if isucast or isucast1 or isucast2 or ismcast1 or ismcast2 or isbcast \
-                        or ispause or filterconfig[31]:
+                if isucast or istable or ishash or isbcast or ispause or \
+                        filterconfig[31]:
                     rxclientintf.dv.next = True
                     if ispause and rxflowintf.rxflowen:
                         state.next = rxstate.PAUSE
                     else:
                         state.next = rxstate.PASS
                 else:
-                    state.next = rxstate.IDLE
+                    rxclientintf.filtered.next = True
+                    rxstatsintf.valid.next = True
+                    rxstatsintf.good.next = False
+                    rxstatsintf.pause.next = False
+                    rxstatsintf.filtered.next = True
+                    rxstatsintf.length.next = 0
+                    state.next = rxstate.DROP
 
         elif state == rxstate.PAUSE:
             length.next = 46
@@ -138,38 +251,106 @@ def rxengine(rxclientintf, rxgmii_intf, rxflowintf, rxconfig0, rxconfig1,
             elif curbyte == 18:
                 rxflowintf.pauseval.next = concat(rxflowintf.pauseval[16:8], rxgmii_intf.data)
             elif not rxgmii_intf.dv:
-                state.next = rxstate.BADFRAME
-                if matchcrc and (not lengthchecken or curbyte == 65):
+                if matchcrc and sizeok and \
+                        (not lengthchecken or curbyte == 65):
+                    # Consumed, rolled back like a filtered frame.
                     rxflowintf.pausereq.next = True
+                    rxclientintf.dv.next = False
+                    rxclientintf.filtered.next = True
+                    rxstatsintf.valid.next = True
+                    rxstatsintf.good.next = True
+                    rxstatsintf.pause.next = True
+                    rxstatsintf.filtered.next = False
+                    rxstatsintf.length.next = curbyte - 1
+                    state.next = rxstate.DROP
+                else:
+                    rxstatsintf.fcserr.next = not matchcrc
+                    rxstatsintf.lenerr.next = matchcrc
+                    state.next = rxstate.BADFRAME
 
         elif state == rxstate.PASS:
             if curbyte == 13:
                 length.next = rxgmii_intf.data << 8
             elif curbyte == 14:
                 length.next = concat(length[16:8], rxgmii_intf.data)
-            elif length < (46 - 4*vlanen):
-                if curbyte == (length + 14 + 4*vlanen):
-                    if not fcsen:
-                        rxclientintf.dv.next = False
-                    length.next = 46 - 4*vlanen
+                tagged.next = length[16:8] == 0x81 and rxgmii_intf.data == 0
+            elif curbyte == 17 and tagged and rxgmii_intf.dv:
+                length.next = rxgmii_intf.data << 8
+            elif curbyte == 18 and tagged and rxgmii_intf.dv:
+                length.next = concat(length[16:8], rxgmii_intf.data)
             elif not rxgmii_intf.dv:
-                if matchcrc and (not lengthchecken or curbyte == (length + 14 + 4*vlanen + 4 + 1)):
+                istype = length >= 0x0600
+                ispadded = length < (46 - 4*tagged)
+                if matchcrc and sizeok and \
+                        (not lengthchecken or istype or
+                         (ispadded and curbyte == 65) or
+                         curbyte == (length + 14 + 4*tagged + 4 + 1)):
+                    length.next = curbyte - (14 + 4*tagged + 4 + 1)
                     state.next = rxstate.GOODFRAME
                 else:
+                    rxstatsintf.fcserr.next = not matchcrc
+                    rxstatsintf.lenerr.next = matchcrc
                     state.next = rxstate.BADFRAME
+            if curbyte == 15 and tagged:
+                vlantag.next = rxgmii_intf.data << 8
+            elif curbyte == 16 and tagged:
+                vlantag.next = concat(vlantag[16:8], rxgmii_intf.data)
+            # Tag stripping and padding removal, data lags the GMII by the
+            # delayline.
+            if curbyte == 18 and tagged and stripen:
+                rxclientintf.dv.next = False
+            elif curbyte == 22 and tagged and stripen:
+                rxclientintf.dv.next = True
+            if curbyte > 18 and length < (46 - 4*tagged) and \
+                    curbyte == (length + 14 + 4*tagged + 6) and not fcsen:
+                rxclientintf.dv.next = False
 
         elif state == rxstate.GOODFRAME:
-            if not fcsen and curbyte == (length + 14 + 4*vlanen + 6) or \
-                    fcsen and curbyte == (length + 14 + 4*vlanen + 4 + 6):
+            if not fcsen and curbyte == (length + 14 + 4*tagged + 6) or \
+                    fcsen and curbyte == (length + 14 + 4*tagged + 4 + 6):
                 rxclientintf.dv.next = False
-                rxclientintf.good.next = True
+                rxstatsintf.valid.next = True
+                rxstatsintf.pause.next = False
+                if flowhit and flowaction[6]:
+                    # Dropped by the Flow Director, rolled back.
+                    rxclientintf.filtered.next = True
+                    rxstatsintf.good.next = False
+                    rxstatsintf.filtered.next = True
+                    rxstatsintf.length.next = 0
+                else:
+                    rxclientintf.good.next = True
+                    rxclientintf.ipcsok.next = ipok
+                    rxclientintf.l4csok.next = l4ok
+                    rxclientintf.rsshash.next = flowhash
+                    rxclientintf.timestamp.next = sfdtime
+                    rxclientintf.vlan.next = tagged and stripen
+                    rxclientintf.vlantag.next = vlantag
+                    if flowhit:
+                        rxclientintf.queue.next = flowaction[6:]
+                    elif rssconfig[31]:
+                        rxclientintf.queue.next = rsstable[flowhash[7:]]
+                    rxstatsintf.good.next = True
+                    rxstatsintf.filtered.next = False
+                    rxstatsintf.length.next = length + 18 + 4*tagged
                 state.next = rxstate.IDLE
 
         elif state == rxstate.BADFRAME:
             rxclientintf.dv.next = False
             rxclientintf.bad.next = True
-            state.next = rxstate.IDLE
+            rxflowintf.pausereq.next = False
+            rxstatsintf.valid.next = True
+            rxstatsintf.good.next = False
+            rxstatsintf.pause.next = False
+            rxstatsintf.filtered.next = False
+            rxstatsintf.length.next = 0
+            state.next = rxstate.DROP
 
+        elif state == rxstate.DROP:
+            rxclientintf.bad.next = False
+            rxclientintf.filtered.next = False
+            rxflowintf.pausereq.next = False
+            if not rxgmii_intf.dv:
+                state.next = rxstate.IDLE
 
-    return assign, curbyteinc, receiver, crc32inst, dlinst, afinst1,\
-        afinst2, afinst3, afinst4, afinst5, afinst6, afinst0
+    return assign, addrmatch, curbyteinc, receiver, crc32inst, dlinst, \
+        asinst, caminst, hashinst, csuminst, rssinst, keyinst, flowcaminst
@@ -0,0 +1,287 @@
+from myhdl import Signal, intbv, block, enum, always_comb, always_seq, concat, \
+    ResetSignal, ConcatSignal
+from .crc32 import crc32_parallel
+from .addrfilter import addrcam, addrhash
+from .xgmii import termchar, startword
+from .intrafaces import RxStatsInterface
+
+rx64state = enum('IDLE', 'FILTER', 'PASS', 'DROP')
+
+
+@block
+def rxengine64(rxclientintf, rxxgmii_intf, rxflowintf, rxconfig0, rxconfig1,
+               filterconfig, addrtable, sysreset, hashtable=None, hashbins=64,
+               rxstatsintf=None):
+
+    """ Receiver Engine for 64-bit XGMII datapath.
+
+    10-Gigabit variant of 'rxengine'. Accepts 64-bit words from the XGMII
+    Block, checks the start word (start character in lane 0 followed by
+    preamble and SFD), matches the destination address of the first data
+    word against all filter addresses in parallel, and passes the frame to
+    the client one word behind the XGMII so that the Frame Check Sequence
+    can be removed once the terminate character is seen. Padding is removed
+    from frames whose length field is below the minimum. Error detection
+    uses the frame check sequence, XGMII error characters and legal frame
+    size boundaries.
+
+    Multicast frames are also accepted through the hash table as in
+    'rxengine', the destination address CRC being folded from the first
+    data word in one go.
+
+    Args:
+        hashtable (Default=None) - List of 32-bits wide Multicast Hash Table
+            words, bin n in word n/32 bit n%32. No bins set if None.
+        hashbins (Default=64) - No. of bins, 64 or 512.
+        rxstatsintf (Default=None) - RxStatsInterface, statistics vector
+            given at the end of every frame.
+
+    """
+    if rxstatsintf is None:
+        rxstatsintf = RxStatsInterface()
+
+    state = Signal(rx64state.IDLE)
+    count = Signal(intbv(0)[16:])
+    reset = ResetSignal(0, active=0, async=True)
+    clearcrc = Signal(bool(0))
+    calccrc = Signal(bool(0))
+    crcen = Signal(intbv(0)[8:])
+    matchcrc = Signal(bool(0))
+    crcout = Signal(intbv(0xFFFFFFFF)[32:])
+    crc32inst = crc32_parallel(rxxgmii_intf.clk, clearcrc, calccrc,
+                               rxxgmii_intf.data, crcen, crcout, reset,
+                               width=64)
+
+    datalanes = Signal(intbv(0, min=0, max=9))
+    dstaddr = Signal(intbv(0)[48:])
+    tablehit = Signal(bool(0))
+    caminst = addrcam(dstaddr, addrtable, tablehit)
+
+    assert hashbins in (64, 512)
+    if hashtable is None:
+        hashtable = [Signal(intbv(0)[32:]) for _ in range(hashbins // 32)]
+    hashvec = ConcatSignal(*reversed(hashtable[:hashbins // 32]))
+    hashval = Signal(intbv(0, min=0, max=hashbins))
+    hashinst = addrhash(Signal(intbv(0xFFFFFFFF)[32:]),
+                        rxxgmii_intf.data(48, 0), hashval)
+    ispause = Signal(bool(0))
+    typefield = Signal(intbv(0)[16:])
+    opcode = Signal(intbv(0)[16:])
+    pauseval = Signal(intbv(0)[16:])
+    hold = Signal(intbv(0)[64:])
+    rest = Signal(intbv(0)[64:])
+    restkeep = Signal(intbv(0)[8:])
+    restvalid = Signal(bool(0))
+    endpend = Signal(bool(0))
+    endlen = Signal(intbv(0)[16:])
+    endok = Signal(bool(0))
+    statuspend = Signal(bool(0))
+    holdmask = Signal(intbv(0)[8:])
+    restmask = Signal(intbv(0)[8:])
+
+    @always_comb
+    def assign():
+        rxclientintf.clk.next = rxxgmii_intf.clk
+        rxstatsintf.clk.next = rxxgmii_intf.clk
+        clearcrc.next = state == rx64state.IDLE
+        calccrc.next = state == rx64state.FILTER or state == rx64state.PASS
+        rxflowintf.macaddr.next = concat(rxconfig1[16:], rxconfig0)
+        matchcrc.next = crcout == 0x2144DF1C
+        reseten = rxconfig1[31]
+        reset.next = sysreset or not reseten
+
+    @always_comb
+    def lanedecode():
+        """ No. of data lanes before the first control character."""
+        nb = intbv(8, min=0, max=9)
+        en = intbv(0)[8:]
+        found = bool(0)
+        nb[:] = 8
+        en[:] = 0
+        found = False
+        for l in range(8):
+            if rxxgmii_intf.ctrl[l] and not found:
+                nb[:] = l
+                found = True
+            if not found:
+                en[l] = 1
+        datalanes.next = nb
+        crcen.next = en
+        dstaddr.next = concat(rxxgmii_intf.data[8:],
+                              rxxgmii_intf.data[16:8],
+                              rxxgmii_intf.data[24:16],
+                              rxxgmii_intf.data[32:24],
+                              rxxgmii_intf.data[40:32],
+                              rxxgmii_intf.data[48:40])
+
+    @always_comb
+    def padmask():
+        """ Lanes of hold and rest words lying before the padding. """
+        fcsen = rxconfig1[29]
+        limit = intbv(0)[16:]
+        hm = intbv(0)[8:]
+        rm = intbv(0)[8:]
+        hm[:] = 0
+        rm[:] = 0
+        if typefield < 46 and not fcsen:
+            limit[:] = typefield + 14
+        else:
+            limit[:] = 0xFFFF
+        for l in range(8):
+            if count + l < limit + 8:
+                hm[l] = 1
+            if count + l < limit:
+                rm[l] = 1
+        holdmask.next = hm
+        restmask.next = rm
+
+    @always_seq(rxxgmii_intf.clk.posedge, reset)
+    def receiver():
+        """ Receiver Logic """
+        lengthchecken = not rxconfig1[25]
+        vlanen = rxconfig1[27]
+        rxen = rxconfig1[28]
+        fcsen = rxconfig1[29]
+        jumboen = rxconfig1[30]
+        data = rxxgmii_intf.data
+        match = bool(0)
+        total = intbv(0)[16:]
+        isterm = bool(0)
+        iserr = bool(0)
+        lenok = bool(0)
+
+        rxclientintf.dv.next = False
+        rxclientintf.good.next = False
+        rxclientintf.bad.next = False
+        rxclientintf.filtered.next = False
+        rxflowintf.pausereq.next = False
+        rxstatsintf.valid.next = False
+        rxstatsintf.good.next = False
+        rxstatsintf.fcserr.next = False
+        rxstatsintf.lenerr.next = False
+        rxstatsintf.pause.next = False
+        rxstatsintf.filtered.next = False
+        rxstatsintf.length.next = 0
+
+        isterm = False
+        iserr = False
+        if datalanes < 8:
+            if ((data >> (8 * datalanes)) & 0xFF) == termchar:
+                isterm = True
+            else:
+                iserr = True
+
+        # Frame completion, one and two clocks behind the terminate word.
+        if endpend:
+            endpend.next = False
+            lenok = endlen >= 64 and \
+                (jumboen or endlen <= 1518 + 4*vlanen)
+            if lengthchecken and typefield < 0x0600:
+                if typefield < 46:
+                    lenok = lenok and endlen == 64
+                else:
+                    lenok = lenok and endlen == typefield + 18
+            endok.next = matchcrc and lenok
+            # A frame cut short by an error character has no length.
+            rxstatsintf.valid.next = True
+            rxstatsintf.good.next = matchcrc and lenok
+            rxstatsintf.fcserr.next = endlen != 0 and not matchcrc
+            rxstatsintf.lenerr.next = endlen != 0 and matchcrc and not lenok
+            rxstatsintf.pause.next = matchcrc and lenok and ispause
+            rxstatsintf.length.next = endlen
+            if ispause and matchcrc and lenok and typefield == 0x8808 \
+                    and opcode == 0x0001:
+                rxflowintf.pausereq.next = True
+                rxflowintf.pauseval.next = pauseval
+            if restvalid:
+                rxclientintf.data.next = rest
+                rxclientintf.keep.next = restkeep
+                rxclientintf.dv.next = True
+                restvalid.next = False
+                statuspend.next = True
+            else:
+                rxclientintf.good.next = matchcrc and lenok and not ispause
+                rxclientintf.bad.next = not (matchcrc and lenok)
+                rxclientintf.filtered.next = matchcrc and lenok and ispause
+        elif statuspend:
+            statuspend.next = False
+            rxclientintf.good.next = endok and not ispause
+            rxclientintf.bad.next = not endok
+            rxclientintf.filtered.next = endok and ispause
+
+        if state == rx64state.IDLE:
+            if rxen and rxxgmii_intf.ctrl[0] and data[8:] == 0xFB:
+                if rxxgmii_intf.ctrl == 0x01 and data == startword:
+                    state.next = rx64state.FILTER
+                else:
+                    rxclientintf.bad.next = True
+                    rxstatsintf.valid.next = True
+                    state.next = rx64state.DROP
+
+        elif state == rx64state.FILTER:
+            match = dstaddr == rxflowintf.macaddr or \
+                dstaddr == 0xFFFFFFFFFFFF or dstaddr == 0x0180C2000001 or \
+                tablehit or (dstaddr[40] and hashvec[hashval]) or \
+                filterconfig[31]
+            ispause.next = dstaddr == 0x0180C2000001 and rxflowintf.rxflowen
+            hold.next = data
+            count.next = 8
+            if datalanes < 8:
+                rxclientintf.bad.next = True
+                rxstatsintf.valid.next = True
+                state.next = rx64state.IDLE
+            elif match:
+                state.next = rx64state.PASS
+            else:
+                rxclientintf.filtered.next = True
+                rxstatsintf.valid.next = True
+                rxstatsintf.filtered.next = True
+                state.next = rx64state.DROP
+
+        elif state == rx64state.PASS:
+            if iserr:
+                rxclientintf.data.next = hold
+                rxclientintf.keep.next = 0xFF
+                rxclientintf.dv.next = True
+                endlen.next = 0
+                endpend.next = True
+                state.next = rx64state.IDLE
+            elif not isterm:
+                rxclientintf.data.next = hold
+                rxclientintf.keep.next = holdmask
+                rxclientintf.dv.next = holdmask != 0
+                hold.next = data
+                if count < 0xFFF0:
+                    count.next = count + 8
+                if count == 8:
+                    typefield.next = concat(data[40:32], data[48:40])
+                    opcode.next = concat(data[56:48], data[64:56])
+                elif count == 16:
+                    pauseval.next = concat(data[8:], data[16:8])
+            else:
+                total[:] = count + datalanes
+                endlen.next = total
+                endpend.next = True
+                rxclientintf.data.next = hold
+                rxclientintf.dv.next = holdmask != 0
+                rest.next = data
+                if fcsen:
+                    rxclientintf.keep.next = 0xFF
+                    restkeep.next = (1 << datalanes) - 1
+                    restvalid.next = datalanes > 0
+                elif datalanes >= 4:
+                    rxclientintf.keep.next = holdmask
+                    restkeep.next = ((1 << (datalanes - 4)) - 1) & restmask
+                    restvalid.next = datalanes > 4 and restmask[0]
+                else:
+                    rxclientintf.keep.next = ((1 << (datalanes + 4)) - 1) & \
+                        holdmask
+                    restvalid.next = False
+                state.next = rx64state.IDLE
+
+        elif state == rx64state.DROP:
+            if isterm or iserr:
+                state.next = rx64state.IDLE
+
+    return assign, lanedecode, padmask, receiver, crc32inst, caminst, \
+        hashinst
@@ -1,14 +1,450 @@
-from myhdl import block, instances
+import copy
+from myhdl import block, always_seq, always_comb, always, Signal, intbv, \
+    concat, ConcatSignal
+from .graysync import graysync
+from .interfaces import RxDropCountInterface, FlowControlInterface
 
 
 @block
 def rxFIFO(rxlocallink_interface, rxclient_interface, flow_interface,
-           highthres=0.75, lowthres=0.66, size=20):
+           highthres=0.75, lowthres=0.66, size=20, depth=4096,
+           pausequanta=0xFFFF, dropcount_interface=None, queue=None,
+           txclk=None):
+    """ Receive FIFO.
+
+    Dual-clock frame FIFO between the Receive Engine, written on the client
+    interface 'clk', and the client LocalLink interface, read on 'rxclk'.
+    Bytes of a frame are written as they arrive and the frame is committed
+    on 'good' or rolled back on 'bad' and 'filtered', so only good frames
+    reach the client and a dropped frame gives its room back at once.
+    Frames rejected by the address filter never take any room, the
+    Receive Engine does not raise 'dv' for them. Frames arriving while the
+    FIFO is full are dropped and flagged on 'overflow'. The checksum flags,
+    stripped VLAN tag and timestamp given with 'good' are kept alongside
+    the frame and given to the client from 'sof' through 'eof'.
+
+    Generates a pause request when 'highthres' of the capacity is filled
+    and a resume request (zero pause value) when the occupancy falls back
+    to 'lowthres'. The pause request is repeated every half pause time
+    while above 'lowthres' so the link partner stays paused.
+
+    Args:
+        rxlocallink_interface (RxLocalLinkFIFOInterface) - Client side.
+        rxclient_interface (RxFIFOClientInterface) - 8 bit interface from
+            the Receive Engine.
+        flow_interface (FlowControlInterface) - Pause requests, pulsed in
+            the 'txclk' domain, the Receive Engine one if None.
+        highthres (Default=0.75) - Pause watermark, fraction of capacity.
+        lowthres (Default=0.66) - Resume watermark, fraction of capacity.
+        size (Default=20) - Maximum no. of frames held at a time.
+        depth (Default=4096) - FIFO size in bytes, power of 2 not below 16.
+        pausequanta (Default=0xFFFF) - Pause value of the pause requests.
+        dropcount_interface (Default=None) - RxDropCountInterface counting
+            the dropped frames by reason.
+        queue (Default=None) - Receive queue served, only good frames
+            steered to it ('queue' of the client interface) are committed,
+            others rolled back without being counted. Overflows are then
+            flagged and counted at the end of the frame, and bad and
+            filtered frames counted by queue 0 only. All frames if None.
+        txclk (Default=None) - Transmit clock sampling 'flow_interface',
+            the requests brought across by 'pausesync'. To be given unless
+            the Receive Engine clock is the same.
+
+    Note:
+        Capacity is both bytes and frames, the watermarks apply to either.
+        'fifostatus' gives the occupancy in sixteenths of 'depth' as seen
+        from the Receive Engine clock domain.
+
+    """
+    assert rxclient_interface.width == 8
+    assert depth >= 16 and depth & (depth - 1) == 0
+    assert 0 < lowthres < highthres <= 1
+    addrbits = depth.bit_length() - 1
+    ptrmax = 2 * depth
+    fptrmax = 1 << (size.bit_length() + 1)
+    fbits = size.bit_length()
+    highmark = int(highthres * depth)
+    lowmark = int(lowthres * depth)
+    highframes = int(highthres * size)
+    lowframes = int(lowthres * size)
+    # 512 bit times per quanta at 8 bits per clock, refreshed at half.
+    refreshclks = max(pausequanta * 32, 1)
+
+    ll = rxlocallink_interface
+    rc = rxclient_interface
+    dc = dropcount_interface
+    if dc is None:
+        dc = RxDropCountInterface()
+    mem = [Signal(intbv(0)[9:]) for _ in range(depth)]
+    # ipcsok, l4csok, vlan, vlantag and timestamp of each frame held
+    smem = [Signal(intbv(0)[83:]) for _ in range(fptrmax // 2)]
+    anyqueue = queue is None
+    qnum = 0 if queue is None else queue
+    countall = queue is None or queue == 0
+    pauseintf = flow_interface
+    pausesyncinst = []
+    if txclk is not None:
+        pauseintf = FlowControlInterface()
+        pausesyncinst = pausesync(rc.clk, txclk, pauseintf, flow_interface,
+                                  ll.reset)
+
+    # Write domain
+    wptr = Signal(intbv(0, min=0, max=ptrmax))
+    wlast = Signal(intbv(0, min=0, max=ptrmax))
+    wstart = Signal(intbv(0, min=0, max=ptrmax))
+    lastbyte = Signal(intbv(0)[8:])
+    inframe = Signal(bool(0))
+    dropping = Signal(bool(0))
+    used = Signal(intbv(0, min=0, max=ptrmax))
+    held = Signal(intbv(0, min=0, max=fptrmax))
+    accept = Signal(bool(0))
+    fwptr = Signal(intbv(0, min=0, max=fptrmax))
+    fwgray = Signal(intbv(0, min=0, max=fptrmax))
+    rsync = Signal(intbv(0, min=0, max=ptrmax))
+    frsync = Signal(intbv(0, min=0, max=fptrmax))
+    memwe = Signal(bool(0))
+    memaddr = Signal(intbv(0, min=0, max=depth))
+    memdata = Signal(intbv(0)[9:])
+    paused = Signal(bool(0))
+    refresh = Signal(intbv(0, min=0, max=refreshclks))
+    mine = Signal(bool(0))
+
+    # Read domain
+    rptr = Signal(intbv(0, min=0, max=ptrmax))
+    rgray = Signal(intbv(0, min=0, max=ptrmax))
+    frptr = Signal(intbv(0, min=0, max=fptrmax))
+    frgray = Signal(intbv(0, min=0, max=fptrmax))
+    fwsync = Signal(intbv(0, min=0, max=fptrmax))
+
+    rsyncinst = graysync(rc.clk, rgray, rsync, ll.reset)
+    frsyncinst = graysync(rc.clk, frgray, frsync, ll.reset)
+    fwsyncinst = graysync(ll.rxclk, fwgray, fwsync, ll.reset)
+
+    @always_comb
+    def occupancy():
+        """ Occupancy as seen from the write domain. """
+        if wptr >= rsync:
+            used.next = wptr - rsync
+        else:
+            used.next = wptr + ptrmax - rsync
+        if fwptr >= frsync:
+            held.next = fwptr - frsync
+        else:
+            held.next = fwptr + fptrmax - frsync
+
+    @always_comb
+    def writestatus():
+        mine.next = anyqueue or rc.queue == qnum
+        accept.next = not dropping and used < depth and \
+            (inframe or held < size)
+        if used >= depth:
+            ll.fifostatus.next = 15
+        else:
+            ll.fifostatus.next = used >> (addrbits - 4)
+
+    @always_comb
+    def memport():
+        """ Bytes as they arrive, end of frame flag set once found good. """
+        if rc.good:
+            memwe.next = inframe and mine
+            memaddr.next = wlast[addrbits:]
+            memdata.next = concat(True, lastbyte)
+        else:
+            memwe.next = rc.dv and accept
+            memaddr.next = wptr[addrbits:]
+            memdata.next = concat(False, rc.data)
+
+    @always(rc.clk.posedge)
+    def memwrite():
+        if memwe:
+            mem[memaddr].next = memdata
+
+    @always(rc.clk.posedge)
+    def statuswrite():
+        if rc.good and mine and inframe:
+            smem[fwptr[fbits:]].next = concat(rc.ipcsok, rc.l4csok, rc.vlan,
+                                              rc.vlantag, rc.timestamp)
+
+    @always_seq(rc.clk.posedge, ll.reset)
+    def writelogic():
+        """ Write pointers and frame accounting. """
+        fnext = intbv(0, min=0, max=fptrmax)
+        rc.overflow.next = False
+        if rc.dv:
+            if accept:
+                if wptr == ptrmax - 1:
+                    wptr.next = 0
+                else:
+                    wptr.next = wptr + 1
+                wlast.next = wptr
+                lastbyte.next = rc.data
+                inframe.next = True
+            elif not dropping:
+                # No room left, drop the frame.
+                wptr.next = wstart
+                inframe.next = False
+                dropping.next = True
+                rc.overflow.next = anyqueue
+        elif rc.good or rc.bad or rc.filtered:
+            if rc.good and mine and dropping and not anyqueue:
+                rc.overflow.next = True
+            if rc.good and mine and inframe:
+                wstart.next = wptr
+                if fwptr == fptrmax - 1:
+                    fnext[:] = 0
+                else:
+                    fnext[:] = fwptr + 1
+                fwptr.next = fnext
+                fwgray.next = fnext ^ (fnext >> 1)
+            else:
+                wptr.next = wstart
+            inframe.next = False
+            dropping.next = False
+
+    @always_seq(rc.clk.posedge, ll.reset)
+    def dropcount():
+        """ Dropped frames by reason. """
+        if rc.bad and countall and not (anyqueue and dropping):
+            dc.bad.next = (dc.bad + 1) % 2**32
+        if rc.filtered and countall and not (anyqueue and dropping):
+            dc.filtered.next = (dc.filtered + 1) % 2**32
+        if (anyqueue and rc.dv and not accept and not dropping) or \
+                (not anyqueue and rc.good and mine and dropping):
+            dc.overflow.next = (dc.overflow + 1) % 2**32
+
+    @always_seq(rc.clk.posedge, ll.reset)
+    def pauselogic():
+        """ Pause and resume requests on crossing the watermarks. """
+        pauseintf.pausereq.next = False
+        if not paused:
+            if used >= highmark or held >= highframes:
+                paused.next = True
+                refresh.next = 0
+                pauseintf.pausereq.next = True
+                pauseintf.pauseval.next = pausequanta
+        elif used <= lowmark and held <= lowframes:
+            paused.next = False
+            pauseintf.pausereq.next = True
+            pauseintf.pauseval.next = 0
+        elif refresh == refreshclks - 1:
+            refresh.next = 0
+            pauseintf.pausereq.next = True
+            pauseintf.pauseval.next = pausequanta
+        else:
+            refresh.next = refresh + 1
+
+    @always_seq(ll.rxclk.posedge, ll.reset)
+    def readlogic():
+        """ Streams complete frames to the client. """
+        raddr = intbv(0, min=0, max=ptrmax)
+        fnext = intbv(0, min=0, max=fptrmax)
+        word = intbv(0)[9:]
+        status = intbv(0)[83:]
+        if ll.src_rdy and ll.dst_rdy:
+            if rptr == ptrmax - 1:
+                raddr[:] = 0
+            else:
+                raddr[:] = rptr + 1
+            rptr.next = raddr
+            rgray.next = raddr ^ (raddr >> 1)
+            ll.sof.next = False
+            if ll.eof:
+                ll.src_rdy.next = False
+                ll.eof.next = False
+                if frptr == fptrmax - 1:
+                    fnext[:] = 0
+                else:
+                    fnext[:] = frptr + 1
+                frptr.next = fnext
+                frgray.next = fnext ^ (fnext >> 1)
+            else:
+                word[:] = mem[raddr[addrbits:]]
+                ll.rxd.next = word[8:]
+                ll.eof.next = word[8]
+        elif not ll.src_rdy and frptr != fwsync:
+            word[:] = mem[rptr[addrbits:]]
+            ll.rxd.next = word[8:]
+            ll.eof.next = word[8]
+            ll.sof.next = True
+            ll.src_rdy.next = True
+            status[:] = smem[frptr[fbits:]]
+            ll.ipcsok.next = status[82]
+            ll.l4csok.next = status[81]
+            ll.vlan.next = status[80]
+            ll.vlantag.next = status[80:64]
+            ll.timestamp.next = status[64:]
+
+    return occupancy, writestatus, memport, memwrite, statuswrite, \
+        writelogic, dropcount, pauselogic, readlogic, rsyncinst, frsyncinst, \
+        fwsyncinst, pausesyncinst
+
+
+@block
+def pausesync(clk, txclk, rxflow_interface, flow_interface, reset):
+    """ Pause Request Synchronizer.
+
+    Brings the pause requests pulsed on 'clk' into the 'txclk' domain. A
+    request toggles 'req', brought across by 'graysync', with its pause
+    value held until the toggle comes back as the acknowledge. A request
+    made meanwhile is kept, the latest one sent once acknowledged, so a
+    resume is never lost whatever the two clocks are.
+
+    Args:
+        clk (1-bit Signal) - Receive Engine clock.
+        txclk (1-bit Signal) - Transmit clock.
+        rxflow_interface (FlowControlInterface) - Requests on 'clk'.
+        flow_interface (FlowControlInterface) - Requests on 'txclk'.
+        reset (ResetSignal) - Reset
+
     """
-       Generates pause request when highthres% of the capacity is filled
-       and resume request when the lowthres% of capacity is obtained again.
+    ri = rxflow_interface
+    req = Signal(bool(0))
+    reqsync = Signal(bool(0))
+    ack = Signal(bool(0))
+    acksync = Signal(bool(0))
+    pending = Signal(bool(0))
+    pendval = Signal(intbv(0)[16:])
+    holdval = Signal(intbv(0)[16:])
+
+    reqsyncinst = graysync(txclk, req, reqsync, reset)
+    acksyncinst = graysync(clk, ack, acksync, reset)
+
+    @always_seq(clk.posedge, reset)
+    def requestlogic():
+        if req == acksync and (ri.pausereq or pending):
+            req.next = not req
+            pending.next = False
+            if ri.pausereq:
+                holdval.next = ri.pauseval
+            else:
+                holdval.next = pendval
+        elif ri.pausereq:
+            pending.next = True
+            pendval.next = ri.pauseval
+
+    @always_seq(txclk.posedge, reset)
+    def sendlogic():
+        flow_interface.pausereq.next = reqsync != ack
+        if reqsync != ack:
+            flow_interface.pauseval.next = holdval
+        ack.next = reqsync
+
+    return reqsyncinst, acksyncinst, requestlogic, sendlogic
+
+
+@block
+def pausemerge(clk, flow_interfaces, flow_interface, reset,
+               pausequanta=0xFFFF):
+    """ Pause Request Merger.
+
+    Merges the pause requests of several Receive FIFOs, each keeping the
+    link partner paused above its own watermark. Pause requests are passed
+    on as they come, a resume request only once no FIFO is left paused.
+
+    Args:
+        clk (1-bit Signal) - Receive Engine clock.
+        flow_interfaces - List of FlowControlInterface, one per FIFO.
+        flow_interface (FlowControlInterface) - Merged pause requests.
+        reset (ResetSignal) - Reset
+        pausequanta (Default=0xFFFF) - Pause value of the pause requests.
 
-       Default Size is in frames.
     """
+    n = len(flow_interfaces)
+    pausebits = [Signal(bool(0)) for _ in range(n)]
+    resumebits = [Signal(bool(0)) for _ in range(n)]
+    pausevec = ConcatSignal(*reversed(pausebits))
+    resumevec = ConcatSignal(*reversed(resumebits))
+    paused = Signal(intbv(0)[n:])
+
+    @block
+    def requestbits(fi, pausebit, resumebit):
+        @always_comb
+        def decode():
+            pausebit.next = fi.pausereq and fi.pauseval != 0
+            resumebit.next = fi.pausereq and fi.pauseval == 0
+
+        return decode
+
+    bitinsts = [requestbits(fi, p, r) for fi, p, r in
+                zip(flow_interfaces, pausebits, resumebits)]
+
+    @always_seq(clk.posedge, reset)
+    def merge():
+        left = intbv(0)[n:]
+        left[:] = (paused | pausevec) & ~resumevec
+        paused.next = left
+        flow_interface.pausereq.next = False
+        if pausevec != 0:
+            flow_interface.pausereq.next = True
+            flow_interface.pauseval.next = pausequanta
+        elif paused != 0 and left == 0:
+            flow_interface.pausereq.next = True
+            flow_interface.pauseval.next = 0
+
+    return bitinsts, merge
+
+
+@block
+def rxqueues(rxlocallink_interfaces, rxclient_interface, flow_interface,
+             highthres=0.75, lowthres=0.66, size=20, depth=4096,
+             pausequanta=0xFFFF, dropcount_interfaces=None, txclk=None):
+    """ Multi-queue Receive FIFO.
+
+    One Receive FIFO per receive queue, all written from the Receive
+    Engine, each committing the good frames steered to its own queue by
+    receive side scaling and read by the client on its own LocalLink
+    interface. 'overflow' is pulsed for a frame dropped by any of them and
+    the pause requests merged so the link partner stays paused while any
+    queue is above its high watermark.
+
+    Args:
+        rxlocallink_interfaces - List of RxLocalLinkFIFOInterface, client
+            side of queue 0 onwards. Queue 0 'reset' resets the merger.
+        rxclient_interface (RxFIFOClientInterface) - 8 bit interface from
+            the Receive Engine.
+        flow_interface (FlowControlInterface) - Merged pause requests,
+            pulsed in the 'txclk' domain, the Receive Engine one if None.
+        dropcount_interfaces (Default=None) - List of RxDropCountInterface,
+            one per queue.
+        txclk (Default=None) - Transmit clock sampling 'flow_interface',
+            the merged requests brought across by 'pausesync'.
+
+    Note:
+        Remaining arguments are given to every 'rxFIFO'.
+
+    """
+    n = len(rxlocallink_interfaces)
+    rc = rxclient_interface
+    if dropcount_interfaces is None:
+        dropcount_interfaces = [RxDropCountInterface() for _ in range(n)]
+    flowintfs = [FlowControlInterface() for _ in range(n)]
+    # Copies sharing the Receive Engine signals, each with its own overflow.
+    clientintfs = []
+    for _ in range(n):
+        qc = copy.copy(rc)
+        qc.overflow = Signal(bool(0))
+        clientintfs.append(qc)
+    overflows = [qc.overflow for qc in clientintfs]
+    overflowvec = ConcatSignal(*reversed(overflows))
+
+    fifoinsts = [rxFIFO(ll, qc, fi, highthres=highthres, lowthres=lowthres,
+                        size=size, depth=depth, pausequanta=pausequanta,
+                        dropcount_interface=dc, queue=q)
+                 for q, (ll, qc, fi, dc) in
+                 enumerate(zip(rxlocallink_interfaces, clientintfs, flowintfs,
+                               dropcount_interfaces))]
+    mergeintf = flow_interface
+    pausesyncinst = []
+    if txclk is not None:
+        mergeintf = FlowControlInterface()
+        pausesyncinst = pausesync(rc.clk, txclk, mergeintf, flow_interface,
+                                  rxlocallink_interfaces[0].reset)
+    mergeinst = pausemerge(rc.clk, flowintfs, mergeintf,
+                           rxlocallink_interfaces[0].reset,
+                           pausequanta=pausequanta)
+
+    @always_comb
+    def overflowlogic():
+        rc.overflow.next = overflowvec != 0
 
-    return instances()
+    return fifoinsts, mergeinst, pausesyncinst, overflowlogic
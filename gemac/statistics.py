@@ -0,0 +1,180 @@
+from myhdl import block, always_seq, always_comb, Signal, intbv, concat
+from .graysync import graysync
+
+rxbytes, txbytes, rxframes, txframes, rxfcserr, rxlenerr, rxbad, rxpause, \
+    rxfiltered, txpause, txbad, rx64, rx127, rx255, rx511, rx1023, rx1518, \
+    rxmax, tx64, tx127, tx255, tx511, tx1023, tx1518, txmax, \
+    txpaused = range(26)
+counters = 26
+""" Indexing of the 64-bit Statistics Counters, counter n being read at
+Statistics words 2n (bits [31:0]) and 2n+1 (bits [63:32]). 'rx64' to
+'rxmax' and 'tx64' to 'txmax' are the frame size histograms, 'txpaused'
+the transmit clocks held off by received pause frames."""
+
+histbounds = (65, 128, 256, 512, 1024, 1519)
+""" Frame sizes starting the histogram bins following 'rx64'/'tx64'."""
+
+rxcounters = (rxbytes, rxframes, rxfcserr, rxlenerr, rxbad, rxpause,
+              rxfiltered, rx64, rx127, rx255, rx511, rx1023, rx1518, rxmax)
+txcounters = (txbytes, txframes, txpause, txbad, tx64, tx127, tx255, tx511,
+              tx1023, tx1518, txmax, txpaused)
+""" Counters of the receive and transmit clock domains."""
+
+
+@block
+def statscounter(clk, inc, snap, word, reset):
+    """ 64-bit Statistics Counter.
+
+    Adds 'inc' every clock. On 'snap' the count is copied to 'word' and
+    restarts from 'inc', so no event is lost to the clear.
+
+    Args:
+        clk (1-bit Signal) - Clock of the counted events.
+        inc (n-bits Signal) - Increment.
+        snap (1-bit Signal) - Snapshot-and-clear.
+        word (64-bits Signal) - Snapshot.
+        reset (ResetSignal) - System Reset
+
+    """
+    count = Signal(intbv(0)[64:])
+
+    @always_seq(clk.posedge, reset)
+    def countlogic():
+        if snap:
+            word.next = count
+            count.next = inc
+        else:
+            count.next = (count + inc) % 2**64
+
+    return countlogic
+
+
+@block
+def statistics(txstatsintf, rxstatsintf, statsintf, reset):
+    """ Statistics Block.
+
+    Counts the statistics vectors given by the Transmit and Receive Engines
+    at the end of every frame in 64-bit counters, each in the clock domain
+    of its engine. A change of 'statsintf.snapshot' is brought into both
+    domains, where all the counters are copied to their snapshots and
+    cleared in the same clock. The snapshots stay put until the next
+    change, so the host reads them from its own clock domain.
+
+    Statistics words, 'statsintf.index':
+        2n, 2n+1 - Snapshot of counter n, bits [31:0] and [63:32].
+        127 - Statistics Control, bit [31] set while a snapshot is pending.
+
+    Args:
+        txstatsintf (TxStatsInterface) - Transmit statistics vector.
+        rxstatsintf (RxStatsInterface) - Receive statistics vector.
+        statsintf (StatsInterface) - Snapshot request and read port from
+            the management block.
+        reset (ResetSignal) - System Reset
+
+    Note:
+        'rxbytes' and 'txbytes' count the bytes of good frames, destination
+        address to frame check sequence. Only good frames are put in the
+        histograms, by the same size.
+
+    """
+    snapshots = [Signal(intbv(0)[64:]) for _ in range(counters)]
+    incs = [Signal(intbv(0)[16:]) for _ in range(counters)]
+
+    txreq = Signal(bool(0))
+    txack = Signal(bool(0))
+    txsnap = Signal(bool(0))
+    rxreq = Signal(bool(0))
+    rxack = Signal(bool(0))
+    rxsnap = Signal(bool(0))
+    txdone = Signal(bool(0))
+    rxdone = Signal(bool(0))
+
+    txreqsync = graysync(txstatsintf.clk, statsintf.snapshot, txreq, reset)
+    rxreqsync = graysync(rxstatsintf.clk, statsintf.snapshot, rxreq, reset)
+    txacksync = graysync(statsintf.clk, txack, txdone, reset)
+    rxacksync = graysync(statsintf.clk, rxack, rxdone, reset)
+
+    txinsts = [statscounter(txstatsintf.clk, incs[i], txsnap, snapshots[i],
+                            reset) for i in txcounters]
+    rxinsts = [statscounter(rxstatsintf.clk, incs[i], rxsnap, snapshots[i],
+                            reset) for i in rxcounters]
+
+    @always_comb
+    def snapdetect():
+        txsnap.next = txreq != txack
+        rxsnap.next = rxreq != rxack
+
+    @always_seq(txstatsintf.clk.posedge, reset)
+    def txacklogic():
+        txack.next = txreq
+
+    @always_seq(rxstatsintf.clk.posedge, reset)
+    def rxacklogic():
+        rxack.next = rxreq
+
+    @always_comb
+    def txevents():
+        """ Counter increments from the transmit statistics vector. """
+        valid = txstatsintf.valid
+        ok = txstatsintf.valid and txstatsintf.good
+        length = txstatsintf.length
+        if ok:
+            incs[txbytes].next = txstatsintf.length
+        else:
+            incs[txbytes].next = 0
+        incs[txframes].next = ok
+        incs[txpause].next = ok and txstatsintf.pause
+        incs[txbad].next = valid and not txstatsintf.good
+        incs[tx64].next = ok and length < 65
+        incs[tx127].next = ok and length >= 65 and length < 128
+        incs[tx255].next = ok and length >= 128 and length < 256
+        incs[tx511].next = ok and length >= 256 and length < 512
+        incs[tx1023].next = ok and length >= 512 and length < 1024
+        incs[tx1518].next = ok and length >= 1024 and length < 1519
+        incs[txmax].next = ok and length >= 1519
+        incs[txpaused].next = txstatsintf.paused
+
+    @always_comb
+    def rxevents():
+        """ Counter increments from the receive statistics vector. """
+        valid = rxstatsintf.valid
+        ok = rxstatsintf.valid and rxstatsintf.good
+        length = rxstatsintf.length
+        if ok:
+            incs[rxbytes].next = rxstatsintf.length
+        else:
+            incs[rxbytes].next = 0
+        incs[rxframes].next = ok
+        incs[rxfcserr].next = valid and rxstatsintf.fcserr
+        incs[rxlenerr].next = valid and rxstatsintf.lenerr
+        incs[rxbad].next = valid and not rxstatsintf.good and \
+            not rxstatsintf.filtered
+        incs[rxpause].next = ok and rxstatsintf.pause
+        incs[rxfiltered].next = valid and rxstatsintf.filtered
+        incs[rx64].next = ok and length < 65
+        incs[rx127].next = ok and length >= 65 and length < 128
+        incs[rx255].next = ok and length >= 128 and length < 256
+        incs[rx511].next = ok and length >= 256 and length < 512
+        incs[rx1023].next = ok and length >= 512 and length < 1024
+        incs[rx1518].next = ok and length >= 1024 and length < 1519
+        incs[rxmax].next = ok and length >= 1519
+
+    @always_comb
+    def readmux():
+        """ Statistics word at 'statsintf.index'. """
+        word = intbv(0)[64:]
+        pending = statsintf.snapshot != txdone or \
+            statsintf.snapshot != rxdone
+        if statsintf.index == 127:
+            statsintf.data.next = concat(pending, intbv(0)[31:])
+        elif statsintf.index[7:1] < counters:
+            word[:] = snapshots[statsintf.index[7:1]]
+            if statsintf.index[0]:
+                statsintf.data.next = word[64:32]
+            else:
+                statsintf.data.next = word[32:]
+        else:
+            statsintf.data.next = 0
+
+    return txreqsync, rxreqsync, txacksync, rxacksync, txinsts, rxinsts, \
+        snapdetect, txacklogic, rxacklogic, txevents, rxevents, readmux
@@ -0,0 +1,153 @@
+from myhdl import block, always_seq, always_comb, Signal, intbv, concat
+
+tascontrol, cycletime, basetimelo, basetimehi, guardband = range(5)
+""" Indexing of the Time-Aware Shaper parameter words."""
+
+
+@block
+def gatecontrol(clk, time, gcl, tasparams, gates, reset):
+    """ Time-Aware Shaper Gate Control.
+
+    IEEE 802.1Qbv gate control list. Once enabled, each cycle starts at the
+    base time plus a whole number of cycle times and steps through the list
+    from entry 0, each entry holding the gate states of the 8 transmit
+    queues for its time interval. The last entry in use holds its gates up
+    to the end of the cycle. A base time already past starts the cycles
+    right away, catching up a cycle a clock.
+
+    A frame length is not known before it is sent, so the guard band shuts
+    the gate of a queue from the guard band time before it closes. Frames
+    lasting no longer than the guard band thus end in time. The entries
+    ahead are scanned a clock an entry, so the guard band is to allow for
+    a clock per entry starting within it, and two more.
+
+    Args:
+        clk (1-bit Signal) - Transmit clock.
+        time (64-bits Signal) - Time in nanoseconds, from the 'ptpclock'.
+        gcl - List of N 32-bits wide gate control list entries, N a power
+            of 2 from 2 to 64. The gate states of queues 7 to 0 in bits
+            [31:24], set for open, and the time interval in nanoseconds in
+            bits [23:0].
+        tasparams - List of 5 32-bits wide Time-Aware Shaper parameters,
+            indexed as 'tascontrol' (enable in bit [31], last entry in use
+            in bits [5:0]), 'cycletime', 'basetimelo', 'basetimehi' and
+            'guardband', times in nanoseconds.
+        gates (8-bits Signal) - Queues open, all while not enabled.
+        reset (ResetSignal) - System Reset
+
+    """
+
+    n = len(gcl)
+    assert 2 <= n <= 64
+    assert n & (n - 1) == 0
+    control = tasparams[tascontrol]
+    cycle = tasparams[cycletime]
+    baselo = tasparams[basetimelo]
+    basehi = tasparams[basetimehi]
+    guard = tasparams[guardband]
+    last = Signal(intbv(0, min=0, max=n))
+    running = Signal(bool(0))
+    entry = Signal(intbv(0, min=0, max=n))
+    cyclestart = Signal(intbv(0)[64:])
+    entryend = Signal(intbv(0)[64:])
+    scan = Signal(intbv(0, min=0, max=n))
+    scanend = Signal(intbv(0)[66:])
+    scancycleend = Signal(intbv(0)[66:])
+    scansteps = Signal(intbv(0, min=0, max=2 * n + 1))
+    scanning = Signal(bool(0))
+    closed = Signal(intbv(0)[8:])
+    closing = Signal(intbv(0)[8:])
+
+    @always_comb
+    def assign():
+        last.next = control[len(last):]
+
+    @always_seq(clk.posedge, reset)
+    def gatelogic():
+        nxt = intbv(0, min=0, max=n)
+        cycleend = intbv(0)[65:]
+        if entry >= last:
+            nxt[:] = 0
+        else:
+            nxt[:] = entry + 1
+        cycleend[:] = cyclestart + cycle
+
+        if not control[31]:
+            running.next = False
+        elif not running:
+            if time >= concat(basehi, baselo):
+                running.next = True
+                cyclestart.next = concat(basehi, baselo)
+                entry.next = 0
+                entryend.next = concat(basehi, baselo) + gcl[0][24:]
+        elif time >= cycleend:
+            # Next cycle
+            cyclestart.next = cycleend
+            entry.next = 0
+            entryend.next = cycleend + gcl[0][24:]
+        elif time >= entryend and entry < last:
+            entry.next = nxt
+            entryend.next = entryend + gcl[nxt][24:]
+
+        if not running:
+            gates.next = 0xFF
+        else:
+            gates.next = gcl[entry][32:24] & ~closing
+
+    @always_seq(clk.posedge, reset)
+    def guardlogic():
+        """ Scans the entries starting within the guard band for the gates
+        they close, a clock an entry. """
+        nxt = intbv(0, min=0, max=n)
+        nxtend = intbv(0)[66:]
+        nxtcycleend = intbv(0)[66:]
+        cycleend = intbv(0)[66:]
+        cycleend[:] = cyclestart + cycle
+
+        if not running:
+            closing.next = 0
+            scanning.next = False
+        elif not scanning:
+            # From the current entry
+            scanning.next = True
+            scan.next = entry
+            scansteps.next = 0
+            closed.next = 0
+            scancycleend.next = cycleend
+            if entry >= last or entryend > cycleend:
+                scanend.next = cycleend
+            else:
+                scanend.next = entryend
+        elif scanend <= time + guard and scansteps != 2 * n:
+            # Next entry starting within the guard band
+            if scan >= last or scanend >= scancycleend:
+                nxt[:] = 0
+                nxtcycleend[:] = scancycleend + cycle
+            else:
+                nxt[:] = scan + 1
+                nxtcycleend[:] = scancycleend
+            nxtend[:] = scanend + gcl[nxt][24:]
+            if nxt >= last or nxtend > nxtcycleend:
+                nxtend[:] = nxtcycleend
+            scan.next = nxt
+            scanend.next = nxtend
+            scancycleend.next = nxtcycleend
+            scansteps.next = scansteps + 1
+            closed.next = closed | ~gcl[nxt][32:24]
+        else:
+            closing.next = closed
+            scanning.next = False
+
+    return assign, gatelogic, guardlogic
+
+
+@block
+def tasgate(gates, index, launchtime, time, shaperopen, txopen):
+    """ Opens transmit queue 'index' while its gate is open, its shaper
+    lets a frame through and the launch time of its frame has come. """
+
+    @always_comb
+    def assign():
+        txopen.next = gates[index] and shaperopen and launchtime <= time
+
+    return assign
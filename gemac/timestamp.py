@@ -0,0 +1,56 @@
+from myhdl import block, always_seq, always_comb, Signal, intbv
+
+
+@block
+def txtsfifo(txstatsintf, tsintf, reset, depth=8):
+    """ Transmit Timestamp Completion FIFO.
+
+    Queues the SFD timestamp of each client frame sent, taken from the
+    statistics vector of the Transmit Engine, for the client to read in
+    the order the frames went out. Pause frames and bad frames leave no
+    timestamp. A timestamp finding the FIFO full is lost and flagged on
+    'overflow'.
+
+    Args:
+        txstatsintf (TxStatsInterface) - Transmit statistics vector.
+        tsintf (TxTimestampInterface) - Read port of the client.
+        reset (ResetSignal) - System Reset
+        depth (Default=8) - No. of timestamps held, a power of 2 from 2 to
+            64.
+
+    """
+
+    assert 2 <= depth <= 64
+    assert depth & (depth - 1) == 0
+    mem = [Signal(intbv(0)[64:]) for _ in range(depth)]
+    wrptr = Signal(intbv(0, min=0, max=2 * depth))
+    rdptr = Signal(intbv(0, min=0, max=2 * depth))
+    empty = Signal(bool(1))
+    full = Signal(bool(0))
+
+    @always_comb
+    def assign():
+        tsintf.clk.next = txstatsintf.clk
+        empty.next = wrptr == rdptr
+        full.next = wrptr[len(wrptr)-1] != rdptr[len(rdptr)-1] and \
+            wrptr[len(wrptr)-1:] == rdptr[len(rdptr)-1:]
+
+    @always_comb
+    def readport():
+        tsintf.valid.next = not empty
+        tsintf.timestamp.next = mem[rdptr[len(rdptr)-1:]]
+
+    @always_seq(txstatsintf.clk.posedge, reset)
+    def fifologic():
+        tsintf.overflow.next = False
+        if txstatsintf.valid and txstatsintf.good and \
+                not txstatsintf.pause:
+            if full:
+                tsintf.overflow.next = True
+            else:
+                mem[wrptr[len(wrptr)-1:]].next = txstatsintf.timestamp
+                wrptr.next = (wrptr + 1) % (2 * depth)
+        if tsintf.rd and not empty:
+            rdptr.next = (rdptr + 1) % (2 * depth)
+
+    return assign, readport, fifologic
@@ -0,0 +1,649 @@
+""" Transaction-level model of GEMAC.
+
+Frame-in, frame-out model of the 'gemac' hierarchy for system simulations
+where the cycle accurate blocks are too slow. Frames are whole 'bytes'
+objects, the frame check sequence is computed by zlib in one call and the
+configuration follows the same register map as the 'management' block.
+
+"""
+import zlib
+from bisect import bisect_right
+from .management import rx0, rx1, tx, flow, addrtable0, addrtable1, \
+    addrfiltermode, mcasthash, reserved, getregindex, statistics, statsctrl, \
+    rsskey, rssctrl, rssindir, fdirkey, fdirctrl, txsched, txweight, \
+    cbsvalue, cbsctrl, tasvalue, tasctrl
+from .rss import rsskeywords, rssentries
+from .flowdir import flowkeybits
+from .txsched import txqueues
+from .tas import guardband
+from .statistics import rxbytes, txbytes, rxframes, txframes, rxfcserr, \
+    rxlenerr, rxbad, rxpause, rxfiltered, txpause, txbad, rx64, tx64, \
+    counters, histbounds
+
+preamble = bytes([0x55] * 7 + [0xD5])
+""" Preamble and Start Frame Delimiter."""
+
+pauseaddr = 0x0180C2000001
+bcastaddr = 0xFFFFFFFFFFFF
+""" Reserved MAC Control and Broadcast destination addresses."""
+
+crcresidue = 0x2144DF1C
+""" zlib crc32 over a frame followed by its frame check sequence."""
+
+
+def fcs(frame):
+    """ Frame check sequence of 'frame', least significant byte first. """
+    return zlib.crc32(frame).to_bytes(4, 'little')
+
+
+def inetsum(data):
+    """ Ones' complement sum of 'data' taken as big-endian 16-bit words, an
+    odd last byte padded with zero. """
+    data = bytes(data) + bytes(len(data) % 2)
+    total = sum(int.from_bytes(data[i:i+2], 'big')
+                for i in range(0, len(data), 2))
+    while total >> 16:
+        total = (total & 0xFFFF) + (total >> 16)
+    return total
+
+
+def checksumflags(frame):
+    """ IPv4 header and TCP/UDP checksums of 'frame' (destination address
+    to frame check sequence) checked as by the Receive Engine.
+
+    Returns:
+        tuple: ('ipcsok', 'l4csok') flags.
+
+    """
+    offset = 18 if frame[12:14] == b'\x81\x00' else 14
+    if frame[offset - 2:offset] != b'\x08\x00' or len(frame) <= offset:
+        return False, False
+    ip = frame[offset:]
+    hdrlen = (ip[0] & 0xF) * 4
+    totlen = int.from_bytes(ip[2:4], 'big')
+    ipok = ip[0] >> 4 == 4 and 20 <= hdrlen <= totlen and \
+        totlen + 4 <= len(ip) and inetsum(ip[:hdrlen]) == 0xFFFF
+    if not ipok:
+        return False, False
+    proto = ip[9]
+    fragment = ip[6] & 0x3F or ip[7]
+    pseudo = ip[12:20] + bytes([0, proto]) + \
+        (totlen - hdrlen).to_bytes(2, 'big')
+    l4ok = proto in (6, 17) and not fragment and \
+        inetsum(pseudo + ip[hdrlen:totlen]) == 0xFFFF
+    return True, bool(l4ok)
+
+
+def toeplitz(key, data):
+    """ Toeplitz hash of 'data' under 'key', both 'bytes', the key being
+    extended with zeros when shorter than 'data' and 4 bytes. """
+    key = bytes(key) + bytes(max(0, len(data) + 4 - len(key)))
+    keybits = int.from_bytes(key, 'big')
+    width = 8 * len(key)
+    result = 0
+    for i in range(8 * len(data)):
+        if data[i // 8] >> (7 - i % 8) & 1:
+            result ^= keybits >> (width - 32 - i) & 0xFFFFFFFF
+    return result
+
+
+def flowbytes(frame):
+    """ Bytes of 'frame' (destination address onwards) hashed by Receive
+    Side Scaling, the IPv4 or IPv6 addresses followed by the TCP or UDP
+    ports, empty for other frames. """
+    offset = 18 if frame[12:14] == b'\x81\x00' else 14
+    ethtype = frame[offset - 2:offset]
+    ip = frame[offset:]
+    if ethtype == b'\x86\xdd':
+        l4 = len(ip) > 6 and ip[6] in (6, 17)
+        return ip[8:40] + (ip[40:44] if l4 else b'')
+    if ethtype != b'\x08\x00' or not ip or ip[0] >> 4 != 4:
+        return b''
+    hdrlen = (ip[0] & 0xF) * 4
+    l4 = len(ip) > 9 and ip[9] in (6, 17) and \
+        not (ip[6] & 0x3F or ip[7])
+    return bytes(ip[o] for o in range(min(len(ip), 127))
+                 if 12 <= o < 20 or
+                 (l4 and o >= 10 and hdrlen <= o < hdrlen + 4))
+
+
+def flowkey(frame):
+    """ Flow key of 'frame' (destination address onwards) looked up in the
+    Flow Director Table, laid out as 'gemac.flowdir.flowkeybits'. """
+    offset = 18 if frame[12:14] == b'\x81\x00' else 14
+    vlantag = 0x8000 | int.from_bytes(frame[14:16], 'big') & 0xFFF \
+        if offset == 18 else 0
+    ethtype = int.from_bytes(frame[offset - 2:offset], 'big')
+    ip = frame[offset:]
+    ipaddrs = ports = 0
+    if ethtype == 0x0800 and ip and ip[0] >> 4 == 4:
+        hdrlen = (ip[0] & 0xF) * 4
+        l4 = len(ip) > 9 and ip[9] in (6, 17) and \
+            not (ip[6] & 0x3F or ip[7])
+        ipaddrs = int.from_bytes(ip[12:20], 'big')
+        ports = bytes(ip[o] for o in range(min(len(ip), 127))
+                      if l4 and o >= 10 and hdrlen <= o < hdrlen + 4)
+        ports = int.from_bytes(ports, 'big')
+    return int.from_bytes(frame[:6], 'big') << 128 | vlantag << 112 | \
+        ipaddrs << 48 | ports << 16 | ethtype
+
+
+def insertchecksums(frame, ipcsins=True, l4csins=True):
+    """ Client frame 'frame' with its IPv4 header and TCP/UDP checksum
+    fields filled in as by the Transmit FIFO. """
+    frame = bytearray(frame)
+    ip = 18 if frame[12:14] == b'\x81\x00' else 14
+    if frame[ip - 2:ip] != b'\x08\x00' or len(frame) <= ip:
+        return bytes(frame)
+    hdrlen = (frame[ip] & 0xF) * 4
+    totlen = int.from_bytes(frame[ip + 2:ip + 4], 'big')
+    if frame[ip] >> 4 != 4 or not 20 <= hdrlen <= totlen or \
+            ip + totlen > len(frame):
+        return bytes(frame)
+    if ipcsins:
+        frame[ip + 10:ip + 12] = bytes(2)
+        csum = ~inetsum(frame[ip:ip + hdrlen]) & 0xFFFF
+        frame[ip + 10:ip + 12] = csum.to_bytes(2, 'big')
+    proto = frame[ip + 9]
+    field, minlen = {6: (16, 20), 17: (6, 8)}.get(proto, (0, 0))
+    fragment = frame[ip + 6] & 0x3F or frame[ip + 7]
+    if l4csins and minlen and not fragment and totlen >= hdrlen + minlen:
+        field += ip + hdrlen
+        frame[field:field + 2] = bytes(2)
+        pseudo = frame[ip + 12:ip + 20] + bytes([0, proto]) + \
+            (totlen - hdrlen).to_bytes(2, 'big')
+        csum = ~inetsum(pseudo + frame[ip + hdrlen:ip + totlen]) & 0xFFFF
+        if csum == 0 and proto == 17:
+            csum = 0xFFFF
+        frame[field:field + 2] = csum.to_bytes(2, 'big')
+    return bytes(frame)
+
+
+def largesend(frame, mss):
+    """ Client frames the Large Send Offload block cuts 'frame', a header
+    template followed by TCP payload, into, with the checksums inserted by
+    the Transmit FIFO. """
+    frame = bytes(frame)
+    ip = 18 if frame[12:14] == b'\x81\x00' else 14
+    if len(frame) <= ip + 12 or frame[ip] >> 4 != 4 or frame[ip + 9] != 6:
+        return [frame]
+    tcp = ip + (frame[ip] & 0xF) * 4
+    if tcp + 12 >= min(len(frame), 255):
+        return [frame]
+    hdrend = tcp + (frame[tcp + 12] >> 4) * 4
+    totlen = int.from_bytes(frame[ip + 2:ip + 4], 'big')
+    if not tcp + 12 < hdrend <= min(len(frame) - 1, 256) or \
+            totlen < hdrend - ip:
+        return [frame]
+    payload = frame[hdrend:ip + totlen]
+    ipid = int.from_bytes(frame[ip + 4:ip + 6], 'big')
+    seq = int.from_bytes(frame[tcp + 4:tcp + 8], 'big')
+    count = max(1, -(-len(payload) // mss))
+    frames = []
+    for k in range(count):
+        chunk = payload[k * mss:(k + 1) * mss]
+        header = bytearray(frame[:hdrend])
+        header[ip + 2:ip + 4] = (hdrend - ip + len(chunk)).to_bytes(2, 'big')
+        header[ip + 4:ip + 6] = ((ipid + k) % 2**16).to_bytes(2, 'big')
+        header[tcp + 4:tcp + 8] = ((seq + k * mss) % 2**32).to_bytes(4, 'big')
+        if k < count - 1:
+            header[tcp + 13] &= ~0x09  # FIN, PSH
+        if k:
+            header[tcp + 13] &= ~0x80  # CWR
+        frames.append(insertchecksums(header + chunk))
+    return frames
+
+
+class GEMACModel(object):
+    """ Transaction-level model of GEMAC.
+
+    Takes client frames (destination address up to end of data) and wire
+    frames (preamble up to frame check sequence) as 'bytes'. Configuration
+    is done through 'writeconfig' and 'writeaddrtable' using the register
+    addresses of Xilinx UG144, Table 8.2, the same as the
+    'HostManagementInterface' transactors.
+
+    Attributes:
+        configregs - List of 'reserved' 32-bits wide Configuration
+            Registers, indexed as in the 'management' block.
+        addrtable - List of 'addrtablesize' 48-bits wide MAC Addresses to
+            be used by Address Filter.
+        pauseval - Pause value of the last pause frame received while
+            receive flow control is enabled, None if none received.
+        hashbins - No. of Multicast Hash Table bins, 64 or 512.
+        statistics - List of the 64-bit Statistics Counters, indexed as in
+            the 'statistics' block. 'txpaused' is not counted, the model
+            has no notion of time.
+        snapshots - Statistics Counters as of the last snapshot-and-clear.
+        ipcsok, l4csok - Checksum flags of the last frame received, set
+            only for a good frame passed to the client.
+        rsstable - List of the 128 receive queues of the Receive Side
+            Scaling Indirection Table.
+        rsshash, queue - Toeplitz hash and receive queue of the last frame
+            received, set only for a good frame passed to the client.
+        vlantag - Tag control information of the 802.1Q tag stripped from
+            the last frame received, None if none was stripped.
+        flowtable - List of 'flowtablesize' Flow Director Table entries,
+            laid out as 'gemac.flowdir.flowentrybits'.
+        txweights - List of the 8 Transmit Scheduler queue weights.
+        shaper - List of the idleSlope, sendSlope, hiCredit and loCredit of
+            the Credit-Based Shapers of the 8 transmit queues, in that
+            order, 8 words each. Shaping is not modelled, the model has no
+            notion of time.
+        gcl - List of 'gclsize' Time-Aware Shaper gate control list
+            entries.
+        tasparams - List of the Time-Aware Shaper parameters, indexed as
+            in 'gemac.tas'. Gate control is not modelled either.
+
+    """
+
+    def __init__(self, addrtablesize=4, hashbins=64, flowtablesize=8,
+                 gclsize=8):
+        self.configregs = [0] * reserved
+        self.addrtable = [0] * addrtablesize
+        self.pauseval = None
+        self.hashbins = hashbins
+        self.statistics = [0] * counters
+        self.snapshots = [0] * counters
+        self.ipcsok = False
+        self.l4csok = False
+        self.rsstable = [0] * rssentries
+        self.rsshash = 0
+        self.queue = 0
+        self.vlantag = None
+        self.flowtable = [0] * flowtablesize
+        self.txweights = [0] * txqueues
+        self.shaper = [0] * (4 * txqueues)
+        self.gcl = [0] * gclsize
+        self.tasparams = [0] * (guardband + 1)
+
+    @property
+    def macaddr(self):
+        """ Unicast MAC address from receiver configuration words. """
+        return ((self.configregs[rx1] & 0xFFFF) << 32) | \
+            self.configregs[rx0]
+
+    def writeconfig(self, addr, data):
+        """ Writes configuration register at 'addr' (10 bits).
+
+        Returns:
+            list: 'rddata' words produced, [addr[32:], addr[48:32]] in case
+            of address table read, [queue] in case of indirection table
+            read, the 5 key words and the control word in case of flow
+            director table read, [weight] in case of transmit weight read,
+            [value] in case of shaper parameter or time-aware shaper read,
+            else empty.
+
+        """
+        data &= 0xFFFFFFFF
+        regindex = getregindex(addr)
+        rddata = []
+        if regindex == statsctrl and data >> 31 & 1:
+            self.snapshots = self.statistics
+            self.statistics = [0] * counters
+        if regindex == reserved or regindex >= statistics:
+            return rddata
+        self.configregs[regindex] = data
+        if regindex == addrtable1:
+            loc = (data >> 16) & (len(self.addrtable) - 1)
+            if data & (1 << 23):
+                rddata = [self.addrtable[loc] & 0xFFFFFFFF,
+                          self.addrtable[loc] >> 32]
+            else:
+                self.addrtable[loc] = ((data & 0xFFFF) << 32) | \
+                    self.configregs[addrtable0]
+        if regindex == rssindir:
+            entry = (data >> 16) & (rssentries - 1)
+            if data & (1 << 23):
+                rddata = [self.rsstable[entry]]
+            else:
+                self.rsstable[entry] = data & 0x3F
+        if regindex == fdirctrl:
+            loc = (data >> 16) & (len(self.flowtable) - 1)
+            if data & (1 << 23):
+                entry = self.flowtable[loc]
+                rddata = [entry >> (flowkeybits - 32 * (i + 1)) & 0xFFFFFFFF
+                          for i in range(5)]
+                rddata.append((entry >> flowkeybits) << 24 | entry & 0xFFFF)
+            else:
+                entry = (data >> 24) << flowkeybits | data & 0xFFFF
+                for i in range(5):
+                    entry |= self.configregs[fdirkey + i] << \
+                        (flowkeybits - 32 * (i + 1))
+                self.flowtable[loc] = entry
+        if regindex == txweight:
+            queue = (data >> 16) & (txqueues - 1)
+            if data & (1 << 23):
+                rddata = [self.txweights[queue]]
+            else:
+                self.txweights[queue] = data & 0xFFFF
+        if regindex == cbsctrl:
+            param = (data >> 16) & (4 * txqueues - 1)
+            if data & (1 << 23):
+                rddata = [self.shaper[param]]
+            else:
+                self.shaper[param] = self.configregs[cbsvalue]
+        if regindex == tasctrl:
+            if data & (1 << 22):
+                table, index = self.tasparams, (data >> 16) & 0x7
+            else:
+                table, index = self.gcl, (data >> 16) & (len(self.gcl) - 1)
+            if index < len(table) and data & (1 << 23):
+                rddata = [table[index]]
+            elif index < len(table):
+                table[index] = self.configregs[tasvalue]
+        # Resets revert by themselves.
+        self.configregs[rx1] &= 0x7FFFFFFF
+        self.configregs[tx] &= 0x7FFFFFFF
+        return rddata
+
+    def readconfig(self, addr):
+        """ Returns the configuration register at 'addr', None if reserved. """
+        regindex = getregindex(addr)
+        if regindex == reserved:
+            return None
+        if regindex >= statistics:
+            word = regindex - statistics
+            if word // 2 >= counters:
+                return 0
+            return self.snapshots[word // 2] >> (32 * (word % 2)) & \
+                0xFFFFFFFF
+        return self.configregs[regindex]
+
+    @property
+    def rsskey(self):
+        """ Toeplitz key from Receive Side Scaling key words. """
+        return b''.join(word.to_bytes(4, 'big') for word in
+                        self.configregs[rsskey:rsskey + rsskeywords])
+
+    def count(self, counter, inc=1):
+        """ Adds 'inc' to Statistics Counter 'counter'. """
+        self.statistics[counter] = (self.statistics[counter] + inc) % 2**64
+
+    def writeaddrtable(self, loc, addr):
+        """ Writes MAC address 'addr' at location 'loc' of the table. """
+        self.writeconfig(0x388, addr & 0xFFFFFFFF)
+        self.writeconfig(0x38C, ((loc & 0x3F) << 16) | (addr >> 32))
+
+    def readaddrtable(self, loc):
+        """ Returns MAC address at location 'loc' of the table. """
+        low, high = self.writeconfig(0x38C, (1 << 23) | ((loc & 0x3F) << 16))
+        return (high << 32) | low
+
+    def writersstable(self, entry, queue):
+        """ Steers flows with hash bits [6:0] 'entry' to 'queue'. """
+        self.writeconfig(0x304, ((entry & 0x7F) << 16) | (queue & 0x3F))
+
+    def readrsstable(self, entry):
+        """ Returns the queue at entry 'entry' of the indirection table. """
+        return self.writeconfig(0x304, (1 << 23) | ((entry & 0x7F) << 16))[0]
+
+    def writeflowtable(self, loc, key, queue, drop=False, valid=True):
+        """ Writes flow key 'key' at location 'loc' of the Flow Director
+        Table, steering the flow to 'queue' or dropping it. """
+        for i in range(5):
+            self.writeconfig(0x308 + 4 * i,
+                             key >> (flowkeybits - 32 * (i + 1)) & 0xFFFFFFFF)
+        self.writeconfig(0x31C, valid << 31 | drop << 30 |
+                         (queue & 0x3F) << 24 | (loc & 0x3F) << 16 |
+                         key & 0xFFFF)
+
+    def readflowtable(self, loc):
+        """ Returns entry at location 'loc' of the Flow Director Table. """
+        words = self.writeconfig(0x31C, (1 << 23) | ((loc & 0x3F) << 16))
+        entry = words[5] >> 24 << flowkeybits | words[5] & 0xFFFF
+        for i in range(5):
+            entry |= words[i] << (flowkeybits - 32 * (i + 1))
+        return entry
+
+    def writetxweight(self, queue, weight):
+        """ Gives transmit queue 'queue' 'weight' bytes per round. """
+        self.writeconfig(0x324, ((queue & 0x7) << 16) | (weight & 0xFFFF))
+
+    def readtxweight(self, queue):
+        """ Returns the weight of transmit queue 'queue'. """
+        return self.writeconfig(0x324, (1 << 23) | ((queue & 0x7) << 16))[0]
+
+    def writeshaper(self, queue, idleslope, sendslope, hicredit, locredit):
+        """ Writes the Credit-Based Shaper parameters of transmit queue
+        'queue', credits in 1/65536 of a byte time. """
+        for param, value in enumerate([idleslope, sendslope, hicredit,
+                                       locredit]):
+            self.writeconfig(0x328, value)
+            self.writeconfig(0x32C, (param << 19) | ((queue & 0x7) << 16))
+
+    def readshaper(self, queue):
+        """ Returns the idleSlope, sendSlope, hiCredit and loCredit of
+        transmit queue 'queue'. """
+        return tuple(self.writeconfig(0x32C, (1 << 23) | (param << 19) |
+                                      ((queue & 0x7) << 16))[0]
+                     for param in range(4))
+
+    def writegcl(self, entry, gates, interval):
+        """ Writes entry 'entry' of the gate control list, opening queues
+        set in 'gates' for 'interval' nanoseconds. """
+        self.writeconfig(0x330, (gates & 0xFF) << 24 | interval & 0xFFFFFF)
+        self.writeconfig(0x334, (entry & 0x3F) << 16)
+
+    def readgcl(self, entry):
+        """ Returns entry 'entry' of the gate control list. """
+        return self.writeconfig(0x334, (1 << 23) | (entry & 0x3F) << 16)[0]
+
+    def writetasparam(self, param, value):
+        """ Writes Time-Aware Shaper parameter 'param'. """
+        self.writeconfig(0x330, value)
+        self.writeconfig(0x334, (1 << 22) | (param & 0x7) << 16)
+
+    def readtasparam(self, param):
+        """ Returns Time-Aware Shaper parameter 'param'. """
+        return self.writeconfig(0x334, (1 << 23) | (1 << 22) |
+                                (param & 0x7) << 16)[0]
+
+    def schedule(self, queues):
+        """ Transmit Scheduler.
+
+        Args:
+            queues - List of N lists of client frames, the frames waiting
+                on each transmit queue, all of them queued up at once.
+
+        Returns:
+            list: (queue, frame) pairs in the order the frames are handed
+            to the Transmit Engine by the 'txscheduler'. Frames left on
+            queues of weight 0 under weighted round robin are not sent.
+
+        """
+        queues = [list(frames) for frames in queues]
+        wrr = self.configregs[txsched] >> 31 & 1
+        deficits = [0] * len(queues)
+        rr = 0
+        order = []
+        while any(queues):
+            if not wrr:
+                queue = max(q for q, frames in enumerate(queues) if frames)
+            elif queues[rr] and deficits[rr] > 0:
+                queue = rr
+            elif not any(self.txweights[q] for q, frames in enumerate(queues)
+                         if frames):
+                break
+            else:
+                if not queues[rr]:
+                    deficits[rr] = 0
+                rr = (rr + 1) % len(queues)
+                deficits[rr] += self.txweights[rr]
+                continue
+            frame = queues[queue].pop(0)
+            if wrr:
+                deficits[queue] -= len(frame)
+            order.append((queue, frame))
+        return order
+
+    def transmit(self, frame, vlantag=None):
+        """ Transmit Engine.
+
+        Inserts an 802.1Q tag after the source address, adds preamble, pads
+        to minimum size and appends the frame check sequence unless in-band
+        FCS is enabled, in which case no tag is inserted either.
+
+        Args:
+            frame (bytes) - Client frame.
+            vlantag (Default=None) - Tag control information of the tag
+                inserted, None for the default one of the configuration
+                word if enabled.
+
+        Returns:
+            bytes: frame as seen on the wire, None if the transmitter is
+            disabled or the frame exceeds the maximum size.
+
+        """
+        txconfig = self.configregs[tx]
+        txen = txconfig >> 28 & 1
+        fcsen = txconfig >> 29 & 1
+        jumboen = txconfig >> 30 & 1
+        vlanen = txconfig >> 27 & 1
+        if vlantag is None and txconfig >> 23 & 1:
+            vlantag = txconfig & 0xFFFF
+        tagging = vlantag is not None and not fcsen
+        frame = bytes(frame)
+        if not txen:
+            return None
+        if tagging:
+            frame = frame[:12] + bytes([0x81, 0x00]) + \
+                (vlantag & 0xFFFF).to_bytes(2, 'big') + frame[12:]
+        if len(frame) > 1514 + 4*vlanen + 4*tagging + 4*fcsen and \
+                not jumboen:
+            self.count(txbad)
+            return None
+        if not fcsen:
+            frame = frame.ljust(60, b'\x00')
+            frame = frame + fcs(frame)
+        self.count(txframes)
+        self.count(txbytes, len(frame))
+        self.count(tx64 + bisect_right(histbounds, len(frame)))
+        return preamble + frame
+
+    def transmitpause(self, pauseval):
+        """ Pause frame transmitted on a client pause request.
+
+        Returns:
+            bytes: pause frame as seen on the wire, None if transmit flow
+            control or the transmitter is disabled.
+
+        """
+        if not self.configregs[flow] >> 30 & 1 or \
+                not self.configregs[tx] >> 28 & 1:
+            return None
+        frame = pauseaddr.to_bytes(6, 'big') + \
+            self.macaddr.to_bytes(6, 'big') + \
+            bytes([0x88, 0x08, 0x00, 0x01]) + \
+            (pauseval & 0xFFFF).to_bytes(2, 'big')
+        frame = frame.ljust(60, b'\x00')
+        self.count(txframes)
+        self.count(txpause)
+        self.count(txbytes, len(frame) + 4)
+        self.count(tx64 + bisect_right(histbounds, len(frame) + 4))
+        return preamble + frame + fcs(frame)
+
+    def hashbin(self, dstaddr):
+        """ Multicast Hash Table bin of 'dstaddr'. """
+        hashbits = self.hashbins.bit_length() - 1
+        return zlib.crc32(dstaddr.to_bytes(6, 'big')) >> (32 - hashbits)
+
+    def match(self, dstaddr):
+        """ Address Filter, True if frame to 'dstaddr' is accepted. """
+        ismcast = dstaddr >> 40 & 1
+        if ismcast:
+            hashbin = self.hashbin(dstaddr)
+            if self.configregs[mcasthash + hashbin // 32] >> \
+                    (hashbin % 32) & 1:
+                return True
+        return dstaddr == self.macaddr or dstaddr == bcastaddr or \
+            dstaddr == pauseaddr or dstaddr in self.addrtable or \
+            bool(self.configregs[addrfiltermode] >> 31 & 1)
+
+    def receive(self, wire):
+        """ Receiver Engine.
+
+        Checks preamble, destination address, frame check sequence and
+        frame size, then removes preamble, padding and frame check sequence
+        (the latter two are kept if in-band FCS is enabled), and the 802.1Q
+        tag into 'vlantag' if stripping is enabled. Pause frames
+        are consumed when receive flow control is enabled, updating
+        'pauseval'. IPv4 header and TCP/UDP checksums are checked into
+        'ipcsok' and 'l4csok', the flow hashed into 'rsshash' and 'queue'.
+        Frames hitting a Flow Director Table entry go to its queue or are
+        dropped as though filtered.
+
+        Args:
+            wire (bytes) - Frame as seen on the wire.
+
+        Returns:
+            bytes: received client frame, None if the frame was filtered
+            out or found bad.
+
+        """
+        rxconfig1 = self.configregs[rx1]
+        lengthchecken = not rxconfig1 >> 25 & 1
+        vlanen = rxconfig1 >> 27 & 1
+        rxen = rxconfig1 >> 28 & 1
+        fcsen = rxconfig1 >> 29 & 1
+        jumboen = rxconfig1 >> 30 & 1
+        stripen = rxconfig1 >> 23 & 1
+        rxflowen = self.configregs[flow] >> 29 & 1
+        wire = bytes(wire)
+        self.ipcsok = self.l4csok = False
+        self.rsshash = self.queue = 0
+        self.vlantag = None
+        if not rxen:
+            return None
+        if wire[:len(preamble)] != preamble:
+            self.count(rxbad)
+            return None
+        frame = wire[len(preamble):]
+        dstaddr = int.from_bytes(frame[:6], 'big')
+        if not self.match(dstaddr):
+            self.count(rxfiltered)
+            return None
+        tagged = frame[12:14] == b'\x81\x00'
+        typefield = int.from_bytes(frame[12 + 4*tagged:14 + 4*tagged],
+                                   'big')
+        crcok = zlib.crc32(frame) == crcresidue
+        good = len(frame) >= 64 and \
+            (jumboen or len(frame) <= 1518 + 4*vlanen)
+        if lengthchecken and typefield < 0x0600:
+            good = good and len(frame) == \
+                max(typefield, 46 - 4*tagged) + 18 + 4*tagged
+        if not crcok or not good:
+            self.count(rxbad)
+            self.count(rxlenerr if crcok else rxfcserr)
+            return None
+        ispause = dstaddr == pauseaddr and rxflowen
+        key = flowkey(frame)
+        hits = [entry >> flowkeybits for entry in self.flowtable
+                if entry >> (flowkeybits + 7) and
+                entry & ((1 << flowkeybits) - 1) == key]
+        if hits and hits[0] >> 6 & 1 and not ispause:
+            self.count(rxfiltered)
+            return None
+        self.count(rxframes)
+        self.count(rxbytes, len(frame))
+        self.count(rx64 + bisect_right(histbounds, len(frame)))
+        if ispause:
+            if frame[12:16] == b'\x88\x08\x00\x01':
+                self.pauseval = int.from_bytes(frame[16:18], 'big')
+                self.count(rxpause)
+            return None
+        self.ipcsok, self.l4csok = checksumflags(frame)
+        self.rsshash = toeplitz(self.rsskey, flowbytes(frame))
+        if hits:
+            self.queue = hits[0] & 0x3F
+        elif self.configregs[rssctrl] >> 31 & 1:
+            self.queue = self.rsstable[self.rsshash % rssentries]
+        if tagged and stripen:
+            self.vlantag = int.from_bytes(frame[14:16], 'big')
+        if not fcsen and typefield < 46 - 4*tagged:
+            frame = frame[:14 + 4*tagged + typefield]
+        elif not fcsen:
+            frame = frame[:-4]
+        if tagged and stripen:
+            frame = frame[:12] + frame[16:]
+        return frame
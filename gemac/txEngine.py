@@ -1,13 +1,15 @@
 from myhdl import block, always_seq, always_comb, Signal, intbv, enum, \
-    ResetSignal
+    ResetSignal, concat
 from gemac.crc32 import crc32
+from gemac.intrafaces import TxStatsInterface
 
 txstate = enum('IDLE', 'PREAMBLE', 'SFD', 'FIRSTBYTE', 'INFRAME', 'PADDING',
                'ERROR', 'CRC1', 'CRC2', 'CRC3', 'CRC4', 'SENDPAUSE')
 
 
 @block
-def txengine(txclientintf, txgmii_intf, txflowintf, txconfig, sysreset):
+def txengine(txclientintf, txgmii_intf, txflowintf, txconfig, sysreset,
+             txstatsintf=None, txgate=None, txbusy=None, time=None):
     """Transmit Engine.
 
     Accepts Ethernet frame data from the Client Transmitter interface,
@@ -16,6 +18,15 @@ def txengine(txclientintf, txgmii_intf, txflowintf, txconfig, sysreset):
     frames is at least the minimum specified. The frame is then converted
     into a format that is compatible with the GMII and sent to the GMII Block.
 
+    An 802.1Q tag is inserted after the source address of a client frame
+    when the client asks for it on 'vlanins', with the tag control
+    information on 'vlantag', or else when bit [23] of the configuration
+    word is set, with the default tag control information in bits [15:0].
+    The client bytes from the tag on are held back four clocks in a
+    shift register, as the client cannot be stalled. The tagged frame is
+    padded to the minimum size and may be four bytes longer. No tag is
+    inserted with in-band FCS.
+
     Args:
         txclientintf (TxClientFIFO) - transmit streaming data interface from transmit FIFO.
         txgmii_intf (TxGMII_Interface) - transmit streaming data interface to GMII.
@@ -23,15 +34,36 @@ def txengine(txclientintf, txgmii_intf, txflowintf, txconfig, sysreset):
         txconfig (Signal/intbv)(32 bit) - configregisters - Transmitter configuration word.
             See Xilinx_UG144 pdf, Table 8.5, Pg-80 for detailed description.
         reset - System reset
+        txstatsintf (Default=None) - TxStatsInterface, statistics vector
+            given at the end of every frame.
+        txgate (Default=None) - 1-bit Signal, client frames start only
+            while set, as by a credit-based shaper. Pause frames are not held.
+        txbusy (Default=None) - 1-bit Signal, set from the preamble up to
+            the frame check sequence of a client frame.
+        time (Default=None) - 64-bits Signal, time in nanoseconds from the
+            'ptpclock', taken as the SFD is sent and given on
+            'txstatsintf.timestamp' with the statistics vector.
     """
+    if txstatsintf is None:
+        txstatsintf = TxStatsInterface()
+    if txgate is None:
+        txgate = Signal(bool(1))
+    if txbusy is None:
+        txbusy = Signal(bool(0))
+    if time is None:
+        time = Signal(intbv(0)[64:])
 
     state = Signal(txstate.IDLE)
     curbyte = Signal(intbv(1, min=0, max=10000))
     pausereq = Signal(bool(0))
+    pauseframe = Signal(bool(0))
     reset = ResetSignal(0, active=0, async=True)
     ifgwait = Signal(intbv(0)[16:])
     data = Signal(intbv(0)[8:])
     dv = Signal(bool(0))
+    tagging = Signal(bool(0))
+    tag = Signal(intbv(0)[16:])
+    held = [Signal(intbv(0)[9:]) for _ in range(4)]
 
     clearcrc = Signal(bool(0))
     calccrc = Signal(bool(0))
@@ -43,14 +75,20 @@ def txengine(txclientintf, txgmii_intf, txflowintf, txconfig, sysreset):
     def assign():
         txgmii_intf.clk.next = txclientintf.clk
         txflowintf.clk.next = txclientintf.clk
+        txstatsintf.clk.next = txclientintf.clk
         txclientintf.ack.next = state == txstate.FIRSTBYTE
         txgmii_intf.err.next = state == txstate.ERROR
         txflowintf.ispaused.next = state == txstate.IDLE
+        txbusy.next = state != txstate.IDLE and \
+            state != txstate.SENDPAUSE and not pauseframe and \
+            not (pausereq and (state == txstate.PREAMBLE or
+                               state == txstate.SFD))
         clearcrc.next = state == txstate.IDLE
         fcsen = txconfig[29]
         calccrc.next = ((state == txstate.INFRAME or
                         state == txstate.PADDING) and
-                        not fcsen) or state == txstate.SENDPAUSE
+                        not fcsen) or (state == txstate.SENDPAUSE and
+                                       curbyte > 9)
         reseten = txconfig[31]
         reset.next = sysreset or not reseten
 
@@ -62,6 +100,13 @@ def txengine(txclientintf, txgmii_intf, txflowintf, txconfig, sysreset):
         else:
             curbyte.next = curbyte + 1
 
+    @always_seq(txclientintf.clk.posedge, reset)
+    def tagbuffer():
+        """ Client bytes and 'dv' of the last four clocks. """
+        held[0].next = concat(txclientintf.dv, txclientintf.data)
+        for i in range(3):
+            held[i+1].next = held[i]
+
     @always_seq(txclientintf.clk.posedge, reset)
     def pausecntrl():
         """ Pause request sampler. """
@@ -74,6 +119,7 @@ def txengine(txclientintf, txgmii_intf, txflowintf, txconfig, sysreset):
     def transmitter():
         """ Transmitter logic """
         txen = txconfig[28]
+        txstatsintf.valid.next = False
         if txclientintf.underrun:
             state.next = txstate.ERROR
 
@@ -82,9 +128,11 @@ def txengine(txclientintf, txgmii_intf, txflowintf, txconfig, sysreset):
             dv.next = False
             txgmii_intf.data.next = 0x00
             txgmii_intf.dv.next = False
+            pauseframe.next = False
             if ifgwait > 0:
                 ifgwait.next = ifgwait - 1
-            elif pausereq or (not txflowintf.pauseapply and txclientintf.dv):
+            elif pausereq or (not txflowintf.pauseapply and txgate and
+                              txclientintf.dv):
                 state.next = txstate.PREAMBLE
 
         elif state == txstate.PREAMBLE:
@@ -98,6 +146,8 @@ def txengine(txclientintf, txgmii_intf, txflowintf, txconfig, sysreset):
         elif state == txstate.SFD:
             data.next = 0xD5
             txgmii_intf.data.next = data
+            txstatsintf.timestamp.next = time
+            pauseframe.next = pausereq
             if pausereq:
                 state.next = txstate.SENDPAUSE
             else:
@@ -106,28 +156,62 @@ def txengine(txclientintf, txgmii_intf, txflowintf, txconfig, sysreset):
         elif state == txstate.FIRSTBYTE:
             ifgen = txconfig[25]
             ifgwait.next = txclientintf.ifgdelay if ifgen else 12
+            tagging.next = (txclientintf.vlanins or txconfig[23]) and \
+                not txconfig[29]
+            if txclientintf.vlanins:
+                tag.next = txclientintf.vlantag
+            else:
+                tag.next = txconfig[16:]
             data.next = txclientintf.data
             txgmii_intf.data.next = data
             state.next = txstate.INFRAME
 
         elif state == txstate.INFRAME:
-            data.next = txclientintf.data
+            # Client byte n is read at curbyte n + 9, the tag taking the
+            # place of bytes 12-15, which come out four clocks late.
+            more = bool(0)
+            if tagging and curbyte > 24:
+                data.next = held[3][8:]
+                more = held[3][8]
+            elif tagging and curbyte == 21:
+                data.next = 0x81
+                more = True
+            elif tagging and curbyte == 22:
+                data.next = 0x00
+                more = True
+            elif tagging and curbyte == 23:
+                data.next = tag[16:8]
+                more = True
+            elif tagging and curbyte == 24:
+                data.next = tag[8:]
+                more = True
+            else:
+                data.next = txclientintf.data
+                more = bool(txclientintf.dv)
             txgmii_intf.data.next = data
-            if not txclientintf.dv:
+            if not more:
                 jumboen = txconfig[30]
                 fcsen = txconfig[29]
                 vlanen = txconfig[27]
-                if curbyte > (1526 + vlanen * 4) and not jumboen:
+                if curbyte > (1523 + vlanen * 4 + tagging * 4 +
+                              fcsen * 4) and not jumboen:
                     state.next = txstate.ERROR
                 elif fcsen:
+                    txstatsintf.valid.next = True
+                    txstatsintf.good.next = True
+                    txstatsintf.pause.next = False
+                    txstatsintf.length.next = curbyte - 9
                     state.next = txstate.IDLE
-                elif curbyte < 68:
+                elif curbyte < 69:
+                    data.next = 0x00
                     state.next = txstate.PADDING
                 else:
                     state.next = txstate.CRC1
 
         elif state == txstate.PADDING:
-            if curbyte == 68:
+            data.next = 0x00
+            txgmii_intf.data.next = data
+            if curbyte == 69:
                 state.next = txstate.CRC1
 
         elif state == txstate.CRC1:
@@ -144,26 +228,33 @@ def txengine(txclientintf, txgmii_intf, txflowintf, txconfig, sysreset):
 
         elif state == txstate.CRC4:
             txgmii_intf.data.next = crcout[32:24]
+            txstatsintf.valid.next = True
+            txstatsintf.good.next = True
+            txstatsintf.pause.next = pauseframe
+            txstatsintf.length.next = curbyte - 9
             state.next = txstate.IDLE
 
         elif state == txstate.ERROR:
+            txstatsintf.valid.next = True
+            txstatsintf.good.next = False
+            txstatsintf.pause.next = False
+            txstatsintf.length.next = 0
             state.next = txstate.IDLE
 
         elif state == txstate.SENDPAUSE:
-            mcastaddr = 0x0180C2000001
             txgmii_intf.data.next = data
-            if curbyte == 9:
-                data.next = mcastaddr[48:40]
+            if curbyte == 9:  # Multicast address 01-80-C2-00-00-01
+                data.next = 0x01
             elif curbyte == 10:
-                data.next = mcastaddr[40:32]
+                data.next = 0x80
             elif curbyte == 11:
-                data.next = mcastaddr[32:24]
+                data.next = 0xC2
             elif curbyte == 12:
-                data.next = mcastaddr[24:16]
+                data.next = 0x00
             elif curbyte == 13:
-                data.next = mcastaddr[16:8]
+                data.next = 0x00
             elif curbyte == 14:
-                data.next = mcastaddr[8:]
+                data.next = 0x01
             elif curbyte == 15:
                 data.next = txflowintf.macaddr[48:40]
             elif curbyte == 16:
@@ -189,6 +280,8 @@ def txengine(txclientintf, txgmii_intf, txflowintf, txconfig, sysreset):
             elif curbyte == 26:
                 data.next = txflowintf.pauseval[8:]
             else:
+                data.next = 0x00
                 state.next = txstate.PADDING
 
-    return assign, pausecntrl, curbyteinc, transmitter, crc32inst
+    return assign, tagbuffer, pausecntrl, curbyteinc, transmitter, \
+        crc32inst
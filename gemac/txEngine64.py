@@ -0,0 +1,354 @@
+from myhdl import block, always_seq, always_comb, Signal, intbv, enum, \
+    ResetSignal, concat
+from gemac.crc32 import crc32_parallel
+from gemac.xgmii import idlechar, termchar, idleword, startword, errorword
+from gemac.intrafaces import TxStatsInterface
+
+tx64state = enum('IDLE', 'FIRST', 'DATA', 'PAD', 'SENDPAUSE', 'ERROR')
+
+
+@block
+def txengine64(txclientintf, txxgmii_intf, txflowintf, txconfig, sysreset,
+               txstatsintf=None):
+    """Transmit Engine for 64-bit XGMII datapath.
+
+    10-Gigabit variant of 'txengine'. Accepts 64-bit words from the Client
+    Transmitter interface, pads the frame to minimum size, appends the frame
+    check sequence computed by 'crc32_parallel' and frames it with XGMII
+    start (always in lane 0) and terminate control characters. Inter-frame
+    gap is kept using a deficit idle count, so the gap may be shortened by
+    up to 3 bytes on one frame as long as it is made up on the next.
+
+    Words move from the client through two stages, s1 (folded into the crc)
+    and s2 (sent out), giving the crc the one clock it needs to cover the
+    last word before the frame check sequence is merged behind it.
+
+    Args:
+        txclientintf (TxClientFIFO) - 64 bit transmit streaming data interface
+            from transmit FIFO.
+        txxgmii_intf (TxXGMII_Interface) - transmit streaming data interface
+            to XGMII.
+        txflowintf (TxFlowInterface) - transmit flow control interface.
+        txconfig (Signal/intbv)(32 bit) - configregisters - Transmitter
+            configuration word. See Xilinx_UG144 pdf, Table 8.5, Pg-80 for
+            detailed description.
+        reset - System reset
+        txstatsintf (Default=None) - TxStatsInterface, statistics vector
+            given at the end of every frame.
+    """
+    if txstatsintf is None:
+        txstatsintf = TxStatsInterface()
+
+    state = Signal(tx64state.IDLE)
+    count = Signal(intbv(0)[16:])
+    pidx = Signal(intbv(0, min=0, max=8))
+    pausereq = Signal(bool(0))
+    reset = ResetSignal(0, active=0, async=True)
+    ifgwait = Signal(intbv(0)[16:])
+    deficit = Signal(intbv(0, min=0, max=4))
+
+    s1word = Signal(intbv(0)[64:])
+    s1keep = Signal(intbv(0)[8:])
+    s1valid = Signal(bool(0))
+    s1first = Signal(bool(0))
+    s1last = Signal(bool(0))
+    s1err = Signal(bool(0))
+    s2word = Signal(intbv(0)[64:])
+    s2keep = Signal(intbv(0)[8:])
+    s2valid = Signal(bool(0))
+    s2last = Signal(bool(0))
+    s2err = Signal(bool(0))
+    spill = Signal(intbv(idleword)[64:])
+    spillctrl = Signal(intbv(0xFF)[8:])
+    spillvalid = Signal(bool(0))
+
+    clearcrc = Signal(bool(0))
+    calccrc = Signal(bool(0))
+    crcout = Signal(intbv(0xFFFFFFFF)[32:])
+
+    crc32inst = crc32_parallel(txclientintf.clk, clearcrc, calccrc, s1word,
+                               s1keep, crcout, reset, width=64)
+
+    @always_comb
+    def assign():
+        txxgmii_intf.clk.next = txclientintf.clk
+        txflowintf.clk.next = txclientintf.clk
+        txstatsintf.clk.next = txclientintf.clk
+        txclientintf.ack.next = state == tx64state.FIRST
+        txflowintf.ispaused.next = state == tx64state.IDLE
+        clearcrc.next = state == tx64state.FIRST or \
+            (state == tx64state.SENDPAUSE and pidx == 0)
+        fcsen = txconfig[29]
+        calccrc.next = s1valid and not s1err and not fcsen
+        reseten = txconfig[31]
+        reset.next = sysreset or not reseten
+
+    @always_seq(txclientintf.clk.posedge, reset)
+    def pausecntrl():
+        """ Pause request sampler. """
+        if txflowintf.pausereq:
+            pausereq.next = 1
+        elif state == tx64state.SENDPAUSE:
+            pausereq.next = 0
+
+    @always_seq(txclientintf.clk.posedge, reset)
+    def ingest():
+        """ Client side logic, fills s1 and keeps the inter-frame gap. """
+        txen = txconfig[28]
+        fcsen = txconfig[29]
+        jumboen = txconfig[30]
+        vlanen = txconfig[27]
+        ifgen = txconfig[25]
+        nb = intbv(0, min=0, max=9)
+        endbytes = intbv(0, min=0, max=9)
+        mask = intbv(0)[64:]
+        keep = intbv(0)[8:]
+        fcslen = intbv(0, min=0, max=5)
+        t = intbv(0, min=0, max=13)
+        avail = intbv(0, min=0, max=9)
+        ifg = intbv(0)[16:]
+        rem = intbv(0, min=-8, max=1 << 16)
+        words = intbv(0)[16:]
+        extra = intbv(0, min=0, max=2)
+        maxlen = intbv(0, min=0, max=1530)
+        framelen = intbv(0)[16:]
+        isend = bool(0)
+
+        s2word.next = s1word
+        s2keep.next = s1keep
+        s2valid.next = s1valid
+        s2last.next = s1last
+        s2err.next = s1err
+        s1first.next = False
+        s1err.next = False
+        txstatsintf.valid.next = False
+        isend = False
+        endbytes[:] = 0
+        extra[:] = 0
+        framelen[:] = 64
+
+        if state == tx64state.IDLE:
+            s1valid.next = False
+            s1last.next = False
+            count.next = 0
+            if ifgwait > 1:
+                ifgwait.next = ifgwait - 1
+            elif txen:
+                if pausereq:
+                    state.next = tx64state.SENDPAUSE
+                    pidx.next = 0
+                elif not txflowintf.pauseapply and txclientintf.dv:
+                    state.next = tx64state.FIRST
+
+        elif state == tx64state.FIRST or state == tx64state.DATA:
+            maxlen[:] = 1514 + 4*vlanen + 4*fcsen
+            if state == tx64state.DATA and txclientintf.underrun:
+                s1valid.next = True
+                s1last.next = False
+                s1err.next = True
+                state.next = tx64state.ERROR
+            elif state == tx64state.FIRST or txclientintf.dv:
+                nb[:] = 0
+                for l in range(8):
+                    if txclientintf.keep[l]:
+                        nb[:] = l + 1
+                if not fcsen and count < 56:
+                    nb[:] = 8
+                elif not fcsen and count == 56 and nb < 4:
+                    nb[:] = 4
+                mask[:] = 0
+                keep[:] = 0
+                for l in range(8):
+                    if l < nb:
+                        mask[:] = mask | (0xFF << (8 * l))
+                        keep[l] = 1
+                s1word.next = txclientintf.data & mask
+                s1keep.next = keep
+                s1valid.next = True
+                s1first.next = state == tx64state.FIRST
+                s1last.next = False
+                if count < 0xFFF8:
+                    count.next = count + nb
+                if count + nb > maxlen and not jumboen:
+                    s1err.next = True
+                    state.next = tx64state.ERROR
+                else:
+                    state.next = tx64state.DATA
+            elif fcsen or count >= 60:
+                s1valid.next = False
+                s1last.next = False
+                s2last.next = True
+                for l in range(8):
+                    if s1keep[l]:
+                        endbytes[:] = l + 1
+                if fcsen:
+                    framelen[:] = count
+                else:
+                    framelen[:] = count + 4
+                isend = True
+                state.next = tx64state.IDLE
+            else:
+                s1word.next = 0
+                s1valid.next = True
+                s1last.next = False
+                if count < 56:
+                    s1keep.next = 0xFF
+                    count.next = count + 8
+                    state.next = tx64state.PAD
+                else:
+                    s1keep.next = 0x0F
+                    s1last.next = True
+                    endbytes[:] = 4
+                    extra[:] = 1
+                    isend = True
+                    state.next = tx64state.IDLE
+
+        elif state == tx64state.PAD:
+            s1word.next = 0
+            s1valid.next = True
+            if count < 56:
+                s1keep.next = 0xFF
+                count.next = count + 8
+            else:
+                s1keep.next = 0x0F
+                s1last.next = True
+                endbytes[:] = 4
+                extra[:] = 1
+                isend = True
+                state.next = tx64state.IDLE
+
+        elif state == tx64state.SENDPAUSE:
+            mcastaddr = 0x0180C2000001
+            s1valid.next = True
+            s1first.next = pidx == 0
+            s1keep.next = 0xFF
+            if pidx == 0:
+                s1word.next = concat(txflowintf.macaddr[40:32],
+                                     txflowintf.macaddr[48:40],
+                                     intbv(mcastaddr)[8:],
+                                     intbv(mcastaddr)[16:8],
+                                     intbv(mcastaddr)[24:16],
+                                     intbv(mcastaddr)[32:24],
+                                     intbv(mcastaddr)[40:32],
+                                     intbv(mcastaddr)[48:40])
+            elif pidx == 1:
+                s1word.next = concat(intbv(0x01)[8:], intbv(0x00)[8:],
+                                     intbv(0x08)[8:], intbv(0x88)[8:],
+                                     txflowintf.macaddr[8:],
+                                     txflowintf.macaddr[16:8],
+                                     txflowintf.macaddr[24:16],
+                                     txflowintf.macaddr[32:24])
+            elif pidx == 2:
+                s1word.next = concat(intbv(0)[48:], txflowintf.pauseval[8:],
+                                     txflowintf.pauseval[16:8])
+            else:
+                s1word.next = 0
+            if pidx == 7:
+                s1keep.next = 0x0F
+                s1last.next = True
+                endbytes[:] = 4
+                extra[:] = 1
+                isend = True
+                state.next = tx64state.IDLE
+            else:
+                pidx.next = pidx + 1
+
+        elif state == tx64state.ERROR:
+            s1valid.next = False
+            s1last.next = False
+            if not txclientintf.dv:
+                txstatsintf.valid.next = True
+                txstatsintf.good.next = False
+                txstatsintf.pause.next = False
+                txstatsintf.length.next = 0
+                ifgwait.next = 2
+                state.next = tx64state.IDLE
+
+        if isend:
+            txstatsintf.valid.next = True
+            txstatsintf.good.next = True
+            txstatsintf.pause.next = state == tx64state.SENDPAUSE
+            txstatsintf.length.next = framelen
+            # Deficit idle count: the start character only goes in lane 0, so
+            # round the idle words down while the deficit stays within 3
+            # bytes and up otherwise, paying the deficit back.
+            fcslen[:] = 0 if fcsen else 4
+            t[:] = endbytes + fcslen
+            avail[:] = 16 - t if t >= 8 else 8 - t
+            ifg[:] = txclientintf.ifgdelay if ifgen else 12
+            rem[:] = ifg - avail if ifg > avail else 0
+            words[:] = rem >> 3
+            if rem == 0:
+                if deficit > avail - ifg:
+                    deficit.next = deficit - (avail - ifg)
+                else:
+                    deficit.next = 0
+            elif rem[3:] != 0:
+                if deficit + rem[3:] <= 3:
+                    deficit.next = deficit + rem[3:]
+                else:
+                    words[:] = words + 1
+                    if deficit > 8 - rem[3:]:
+                        deficit.next = deficit - (8 - rem[3:])
+                    else:
+                        deficit.next = 0
+            if t >= 8:
+                words[:] = words + 1
+            ifgwait.next = words + extra
+
+    @always_seq(txclientintf.clk.posedge, reset)
+    def transmitter():
+        """ Drives XGMII from s2, merging the frame check sequence. """
+        fcsen = txconfig[29]
+        nb = intbv(0, min=0, max=9)
+        t = intbv(0, min=0, max=13)
+        byte = intbv(0)[8:]
+        tail = intbv(0)[128:]
+        tailctrl = intbv(0)[16:]
+
+        if s1valid and s1first:
+            txxgmii_intf.data.next = startword
+            txxgmii_intf.ctrl.next = 0x01
+        elif s2valid and s2err:
+            txxgmii_intf.data.next = errorword
+            txxgmii_intf.ctrl.next = 0xFF
+            spill.next = concat(intbv(idleword)[56:], intbv(termchar)[8:])
+            spillctrl.next = 0xFF
+            spillvalid.next = True
+        elif s2valid and s2last:
+            nb[:] = 0
+            for l in range(8):
+                if s2keep[l]:
+                    nb[:] = l + 1
+            t[:] = nb if fcsen else nb + 4
+            tail[:] = 0
+            tailctrl[:] = 0
+            for l in range(16):
+                if l < nb:
+                    byte[:] = (s2word >> (8 * l)) & 0xFF
+                elif l < t:
+                    byte[:] = (crcout >> (8 * (l - nb))) & 0xFF
+                elif l == t:
+                    byte[:] = termchar
+                    tailctrl[l] = 1
+                else:
+                    byte[:] = idlechar
+                    tailctrl[l] = 1
+                tail[:] = tail | (byte << (8 * l))
+            txxgmii_intf.data.next = tail[64:]
+            txxgmii_intf.ctrl.next = tailctrl[8:]
+            spill.next = tail[128:64]
+            spillctrl.next = tailctrl[16:8]
+            spillvalid.next = t >= 8
+        elif s2valid:
+            txxgmii_intf.data.next = s2word
+            txxgmii_intf.ctrl.next = 0x00
+        elif spillvalid:
+            txxgmii_intf.data.next = spill
+            txxgmii_intf.ctrl.next = spillctrl
+            spillvalid.next = False
+        else:
+            txxgmii_intf.data.next = idleword
+            txxgmii_intf.ctrl.next = 0xFF
+
+    return assign, pausecntrl, ingest, transmitter, crc32inst
@@ -1,13 +1,328 @@
-from myhdl import block, instances
+from myhdl import block, always_seq, always_comb, always, Signal, intbv, \
+    concat
+from .graysync import graysync
+from .checksum import txchecksum
 
 
 @block
-def txFIFO(txlocallink_interface, txclient_interface,
-           fifosize=20, framesize=160):
+def txFIFO(txlocallink_interface, txclient_interface, depth=4096, frames=16,
+           fifoconfig=None):
+    """ Transmit FIFO.
+
+    Dual-clock frame FIFO between the client LocalLink interface, written on
+    'txclk', and the Transmit Engine, read on the client interface 'clk'.
+    Pointers crossing the clock domains are gray coded and brought across by
+    'graysync'. In store-and-forward mode a frame is offered to the engine
+    only once its last byte is written, so the engine never underruns and
+    the frames queued behind it go out back-to-back however bursty the
+    client is.
+
+    In cut-through mode a frame is offered as soon as the start threshold
+    of bytes is buffered, making the latency independent of the frame size.
+    Should the FIFO then run dry, 'underrun' is raised so the engine ends
+    the frame in error and the rest of the frame is discarded.
+
+    In store-and-forward mode the IPv4 header and TCP/UDP checksums are
+    summed as the frame is written, and inserted into the frame in memory
+    after its last byte, before it is offered to the engine. The client asks
+    for them on 'ipcsins' and 'l4csins' along with 'sof'.
+
+    Args:
+        txlocallink_interface (TxLocalLinkFIFOInterface) - Client side,
+            'fifostatus' gives the occupancy in sixteenths of 'depth'.
+        txclient_interface (TxFIFOClientInterface) - 8 bit interface to the
+            Transmit Engine.
+        depth (Default=4096) - FIFO size in bytes, power of 2 not below 16.
+            Frames longer than this are dropped and flagged on 'overflow'.
+        frames (Default=16) - Maximum no. of frames held at a time.
+        fifoconfig (Default=None) - 32-bits wide Transmit FIFO Configuration
+            Register, bits [15:0] the cut-through start threshold in bytes,
+            0 for store-and-forward. Store-and-forward if None.
+
+    Note:
+        'sof' while a frame is still being written drops the partial frame,
+        in cut-through mode by stalling a clock and aborting it with an
+        underrun. Frames longer than 'depth' are not dropped in cut-through
+        mode. Change the mode only while the FIFO is empty. Checksums are
+        not inserted in cut-through mode.
 
     """
-        FIFO Size - Default - 20 (Temporary) - N0. of frames.
-        Frame Size - Default = 160 (Temporary) - No. of bytes.
-    """
+    assert txclient_interface.width == 8
+    assert depth >= 16 and depth & (depth - 1) == 0
+    addrbits = depth.bit_length() - 1
+    ptrmax = 2 * depth
+    fptrmax = 1 << (frames.bit_length() + 1)
+
+    ll = txlocallink_interface
+    cl = txclient_interface
+    if fifoconfig is None:
+        fifoconfig = Signal(intbv(0)[32:])
+    mem = [Signal(intbv(0)[10:]) for _ in range(depth)]
+
+    # Write domain
+    wptr = Signal(intbv(0, min=0, max=ptrmax))
+    wstart = Signal(intbv(0, min=0, max=ptrmax))
+    framelen = Signal(intbv(0, min=0, max=depth + 1))
+    inframe = Signal(bool(0))
+    dropping = Signal(bool(0))
+    fwptr = Signal(intbv(0, min=0, max=fptrmax))
+    fwgray = Signal(intbv(0, min=0, max=fptrmax))
+    wgray = Signal(intbv(0, min=0, max=ptrmax))
+    rsync = Signal(intbv(0, min=0, max=ptrmax))
+    used = Signal(intbv(0, min=0, max=ptrmax))
+    held = Signal(intbv(0, min=0, max=fptrmax))
+    cutthrough = Signal(bool(0))
+    abort = Signal(bool(0))
+    memwe = Signal(bool(0))
+    memaddr = Signal(intbv(0, min=0, max=depth))
+    memdata = Signal(intbv(0)[10:])
+    frsync = Signal(intbv(0, min=0, max=fptrmax))
+    csumwe = Signal(bool(0))
+    insip = Signal(bool(0))
+    insl4 = Signal(bool(0))
+    patch = Signal(intbv(0, min=0, max=5))
+    lastpos = Signal(intbv(0, min=0, max=depth + 1))
+    ipcsum = Signal(intbv(0)[16:])
+    l4csum = Signal(intbv(0)[16:])
+    ippos = Signal(intbv(0, min=0, max=128))
+    l4pos = Signal(intbv(0, min=0, max=128))
+    ipok = Signal(bool(0))
+    l4ok = Signal(bool(0))
+
+    # Read domain
+    rptr = Signal(intbv(0, min=0, max=ptrmax))
+    rgray = Signal(intbv(0, min=0, max=ptrmax))
+    rlast = Signal(bool(0))
+    busy = Signal(bool(0))
+    flushing = Signal(bool(0))
+    committed = Signal(bool(0))
+    avail = Signal(intbv(0, min=0, max=ptrmax))
+    wsync = Signal(intbv(0, min=0, max=ptrmax))
+    frptr = Signal(intbv(0, min=0, max=fptrmax))
+    frgray = Signal(intbv(0, min=0, max=fptrmax))
+    fwsync = Signal(intbv(0, min=0, max=fptrmax))
+
+    rsyncinst = graysync(ll.txclk, rgray, rsync, ll.reset)
+    frsyncinst = graysync(ll.txclk, frgray, frsync, ll.reset)
+    fwsyncinst = graysync(cl.clk, fwgray, fwsync, ll.reset)
+    wsyncinst = graysync(cl.clk, wgray, wsync, ll.reset)
+    csuminst = txchecksum(ll.txclk, ll.txd, csumwe, ll.sof, ipcsum, l4csum,
+                          ippos, l4pos, ipok, l4ok, ll.reset)
+
+    @always_comb
+    def occupancy():
+        """ Occupancy as seen from the write domain. """
+        if wptr >= rsync:
+            used.next = wptr - rsync
+        else:
+            used.next = wptr + ptrmax - rsync
+        if fwptr >= frsync:
+            held.next = fwptr - frsync
+        else:
+            held.next = fwptr + fptrmax - frsync
+
+    @always_comb
+    def writestatus():
+        cutthrough.next = fifoconfig[16:] != 0
+        abort.next = fifoconfig[16:] != 0 and ll.sof and inframe
+        if fifoconfig[16:] != 0 and ll.sof and inframe or patch != 0:
+            # Aborting the partial frame, or inserting checksums.
+            ll.dst_rdy.next = False
+        else:
+            ll.dst_rdy.next = dropping or (used < depth and held < frames)
+        if used >= depth:
+            ll.fifostatus.next = 15
+        else:
+            ll.fifostatus.next = used >> (addrbits - 4)
+
+    @always_comb
+    def memport():
+        """ Byte along with an end of frame flag to memory. """
+        pos = intbv(0, min=0, max=128)
+        byte = intbv(0)[8:]
+        csumwe.next = ll.src_rdy and ll.dst_rdy and not dropping
+        if patch == 1:
+            pos[:] = ippos
+            byte[:] = ipcsum[16:8]
+        elif patch == 2:
+            pos[:] = ippos + 1
+            byte[:] = ipcsum[8:]
+        elif patch == 3:
+            pos[:] = l4pos
+            byte[:] = l4csum[16:8]
+        else:
+            pos[:] = l4pos + 1
+            byte[:] = l4csum[8:]
+        if patch != 0:
+            # Checksum field of the frame just written.
+            if patch < 3:
+                memwe.next = insip and ipok
+            else:
+                memwe.next = insl4 and l4ok
+            memaddr.next = (wstart + pos) % depth
+            memdata.next = concat(False, pos == lastpos, byte)
+        elif abort:
+            memwe.next = ll.src_rdy and used < depth
+            memaddr.next = wptr[addrbits:]
+            memdata.next = concat(True, True, ll.txd)
+        else:
+            memwe.next = ll.src_rdy and ll.dst_rdy and not dropping and \
+                (framelen != depth or cutthrough)
+            if ll.sof and inframe:
+                memaddr.next = wstart[addrbits:]
+            else:
+                memaddr.next = wptr[addrbits:]
+            memdata.next = concat(False, ll.eof, ll.txd)
+
+    @always(ll.txclk.posedge)
+    def memwrite():
+        if memwe:
+            mem[memaddr].next = memdata
+
+    @always_seq(ll.txclk.posedge, ll.reset)
+    def writelogic():
+        """ Write pointers and frame accounting. """
+        wnext = intbv(0, min=0, max=ptrmax)
+        fnext = intbv(0, min=0, max=fptrmax)
+        ll.overflow.next = False
+        if patch != 0:
+            if patch == 4:
+                patch.next = 0
+                wstart.next = wptr
+                if fwptr == fptrmax - 1:
+                    fnext[:] = 0
+                else:
+                    fnext[:] = fwptr + 1
+                fwptr.next = fnext
+                fwgray.next = fnext ^ (fnext >> 1)
+            else:
+                patch.next = patch + 1
+        elif abort and ll.src_rdy and used < depth:
+            if wptr == ptrmax - 1:
+                wnext[:] = 0
+            else:
+                wnext[:] = wptr + 1
+            wptr.next = wnext
+            wgray.next = wnext ^ (wnext >> 1)
+            wstart.next = wnext
+            framelen.next = 0
+            inframe.next = False
+            if fwptr == fptrmax - 1:
+                fnext[:] = 0
+            else:
+                fnext[:] = fwptr + 1
+            fwptr.next = fnext
+            fwgray.next = fnext ^ (fnext >> 1)
+        elif ll.src_rdy and ll.dst_rdy:
+            if ll.sof:
+                insip.next = ll.ipcsins
+                insl4.next = ll.l4csins
+            if ll.sof and inframe:
+                # Restarted frame, rewind to its start.
+                wnext[:] = wstart
+                framelen.next = 0
+            else:
+                wnext[:] = wptr
+            if dropping:
+                dropping.next = not ll.eof
+            elif framelen == depth and not cutthrough:
+                wptr.next = wstart
+                wgray.next = wstart ^ (wstart >> 1)
+                framelen.next = 0
+                inframe.next = False
+                dropping.next = not ll.eof
+                ll.overflow.next = True
+            else:
+                if wnext == ptrmax - 1:
+                    wnext[:] = 0
+                else:
+                    wnext[:] = wnext + 1
+                wptr.next = wnext
+                wgray.next = wnext ^ (wnext >> 1)
+                if ll.eof and (insip or insl4) and not cutthrough and \
+                        not ll.sof:
+                    # Held back until its checksums are inserted.
+                    patch.next = 1
+                    lastpos.next = framelen
+                    framelen.next = 0
+                    inframe.next = False
+                elif ll.eof:
+                    wstart.next = wnext
+                    framelen.next = 0
+                    inframe.next = False
+                    if fwptr == fptrmax - 1:
+                        fnext[:] = 0
+                    else:
+                        fnext[:] = fwptr + 1
+                    fwptr.next = fnext
+                    fwgray.next = fnext ^ (fnext >> 1)
+                else:
+                    if ll.sof and inframe:
+                        framelen.next = 1
+                    elif framelen != depth:
+                        framelen.next = framelen + 1
+                    inframe.next = True
+
+    @always_comb
+    def readstatus():
+        """ Bytes written from the current read position on. """
+        committed.next = frptr != fwsync
+        if wsync >= rptr:
+            avail.next = wsync - rptr
+        else:
+            avail.next = wsync + ptrmax - rptr
+
+    @always_seq(cl.clk.posedge, ll.reset)
+    def readlogic():
+        """ Streams frames to the Transmit Engine. """
+        raddr = intbv(0, min=0, max=ptrmax)
+        fnext = intbv(0, min=0, max=fptrmax)
+        word = intbv(0)[10:]
+        threshold = fifoconfig[16:]
+        if rptr == ptrmax - 1:
+            raddr[:] = 0
+        else:
+            raddr[:] = rptr + 1
+        if frptr == fptrmax - 1:
+            fnext[:] = 0
+        else:
+            fnext[:] = frptr + 1
+        cl.underrun.next = False
+        if flushing:
+            # Discarding the rest of an underrun frame as it is written.
+            if committed or avail != 0:
+                word[:] = mem[rptr[addrbits:]]
+                rptr.next = raddr
+                rgray.next = raddr ^ (raddr >> 1)
+                if word[8]:
+                    flushing.next = False
+                    frptr.next = fnext
+                    frgray.next = fnext ^ (fnext >> 1)
+        elif cl.dv and (busy or cl.ack):
+            rptr.next = raddr
+            rgray.next = raddr ^ (raddr >> 1)
+            word[:] = mem[raddr[addrbits:]]
+            if rlast:
+                cl.dv.next = False
+                busy.next = False
+                frptr.next = fnext
+                frgray.next = fnext ^ (fnext >> 1)
+            elif (not committed and avail < 2) or word[9]:
+                # Ran dry or aborted by the client.
+                cl.underrun.next = True
+                cl.dv.next = False
+                busy.next = False
+                flushing.next = True
+            else:
+                cl.data.next = word[8:]
+                rlast.next = word[8]
+                busy.next = True
+        elif not cl.dv and (committed or threshold != 0 and
+                            (avail >= threshold or avail == depth)):
+            word[:] = mem[rptr[addrbits:]]
+            cl.data.next = word[8:]
+            rlast.next = word[8]
+            cl.dv.next = True
 
-    return instances()
+    return occupancy, writestatus, memport, memwrite, writelogic, readstatus, \
+        readlogic, rsyncinst, frsyncinst, fwsyncinst, wsyncinst, csuminst
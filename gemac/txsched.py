@@ -0,0 +1,205 @@
+from myhdl import block, always_seq, always_comb, Signal, intbv, \
+    ConcatSignal
+from .cbs import cbs
+from .tas import tasgate
+
+txqueues = 8
+""" Most transmit queues scheduled, the number of weights."""
+
+
+@block
+def txqueueport(txclientintf, queueintf, sel, locked, txbusy, transmitting,
+                index):
+    """ Hands the engine clock to queue 'index' and the acknowledge of the
+    engine to the queue when it is the selected one, flagging the frames of
+    the queue on the line. """
+
+    @always_comb
+    def assign():
+        queueintf.clk.next = txclientintf.clk
+        queueintf.ack.next = txclientintf.ack and sel == index and not locked
+        transmitting.next = txbusy and sel == index
+
+    return assign
+
+
+@block
+def txscheduler(txclientintfs, txclientintf, schedconfig, weights, reset,
+                txbusy=None, shaper=None, gates=None, time=None):
+    """ Transmit Scheduler.
+
+    Sits in front of the Transmit Engine and picks, frame by frame, the
+    queue whose frame is handed to the engine, by strict priority or by
+    weighted round robin. A choice stands once offered to the engine, as
+    long as the queue stays eligible, and once the engine starts on the
+    frame it is held until the client drops 'dv' at the end of it, so a
+    frame arriving on a higher priority queue while the engine sends the
+    preamble waits for the next choice.
+
+    Strict priority serves the highest numbered queue offering a frame.
+    Weighted round robin visits the queues in turn, topping up the deficit
+    of a queue by its weight in bytes on each visit and serving its frames
+    while the deficit is positive. Frame lengths are not known up front,
+    the bytes of a frame are taken off the deficit once it has been sent,
+    overdrawing it, and the overdraft is carried over to the next visit,
+    so each queue gets a share of the bytes proportional to its weight. A
+    queue with no frame on its visit loses its deficit.
+
+    Each queue may be held back by a credit-based shaper ('cbs'), a queue
+    out of credit being passed over as though it had no frame. Likewise
+    for a queue whose gate is closed by the Time-Aware Shaper
+    ('gatecontrol') or whose frame is to be launched later on, as given by
+    'launchtime' of the queue.
+
+    Args:
+        txclientintfs - List of N 'TxFIFOClientInterface', the queues, N
+            from 2 to 8. Each queue is clocked by 'txclientintf.clk' and
+            keeps its frame on 'dv' until acknowledged, as the Transmit
+            FIFO does.
+        txclientintf - 'TxFIFOClientInterface' to the Transmit Engine, its
+            'clk' driven by the engine side.
+        schedconfig (32-bits Signal) - Transmit Scheduler word, weighted
+            round robin if bit [31] is set, else strict priority. Bits
+            [7:0] enable the shaper of each queue.
+        weights - List of N or more 16-bits Signals, the weight of each
+            queue in bytes. A queue of weight 0 is never served by
+            weighted round robin.
+        reset (ResetSignal) - System Reset
+        txbusy (Default=None) - 'txbusy' of the Transmit Engine. The choice
+            is held while the engine is busy with a frame, which is
+            charged to the shaper of the chosen queue.
+        shaper (Default=None) - List of 32 32-bits Signals, the idleSlope,
+            sendSlope, hiCredit and loCredit of the shapers of the 8
+            queues, in that order, 8 words each. None for no shaping.
+        gates (Default=None) - 8-bits Signal, queues whose gate is open,
+            from the 'gatecontrol'. None for all open.
+        time (Default=None) - 64-bits Signal, time in nanoseconds from the
+            'ptpclock', to which 'launchtime' is compared.
+
+    """
+
+    n = len(txclientintfs)
+    assert 2 <= n <= txqueues
+    assert len(weights) >= n
+    if txbusy is None:
+        txbusy = Signal(bool(0))
+    if gates is None:
+        gates = Signal(intbv(0xFF)[8:])
+    if time is None:
+        time = Signal(intbv(0)[64:])
+    lanes = len(txclientintf.data)
+    dvs = ConcatSignal(*reversed([q.dv for q in txclientintfs]))
+    underruns = ConcatSignal(*reversed([q.underrun for q in txclientintfs]))
+    datas = ConcatSignal(*reversed([q.data for q in txclientintfs]))
+    keeps = ConcatSignal(*reversed([q.keep for q in txclientintfs]))
+    ifgdelays = ConcatSignal(*reversed([q.ifgdelay for q in txclientintfs]))
+    vlaninss = ConcatSignal(*reversed([q.vlanins for q in txclientintfs]))
+    vlantags = ConcatSignal(*reversed([q.vlantag for q in txclientintfs]))
+    sel = Signal(intbv(0, min=0, max=n))
+    rr = Signal(intbv(0, min=0, max=n))
+    ready = Signal(bool(0))
+    locked = Signal(bool(0))
+    hold = Signal(intbv(0, min=0, max=4))
+    sent = Signal(intbv(0, min=0, max=2**16))
+    deficits = [Signal(intbv(0, min=-2**17, max=2**17)) for _ in range(n)]
+    transmitting = [Signal(bool(0)) for _ in range(n)]
+    portinsts = [txqueueport(txclientintf, txclientintfs[i], sel, locked,
+                             txbusy, transmitting[i], i) for i in range(n)]
+    if shaper is None:
+        shaperopens = [Signal(bool(1)) for _ in range(n)]
+        shaperinsts = []
+    else:
+        assert len(shaper) == 4 * txqueues
+        shaperopens = [Signal(bool(0)) for _ in range(n)]
+        shaperinsts = [cbs(txclientintf.clk, txclientintfs[i].dv,
+                           transmitting[i], schedconfig(i), shaper[i],
+                           shaper[txqueues + i], shaper[2 * txqueues + i],
+                           shaper[3 * txqueues + i], shaperopens[i], reset)
+                       for i in range(n)]
+    opens = [Signal(bool(0)) for _ in range(n)]
+    gateinsts = [tasgate(gates, i, txclientintfs[i].launchtime, time,
+                         shaperopens[i], opens[i]) for i in range(n)]
+    txopen = ConcatSignal(*reversed(opens))
+    cands = Signal(intbv(0)[n:])
+
+    @always_comb
+    def eligible():
+        cands.next = dvs & txopen
+
+    @always_comb
+    def mux():
+        d = intbv(0)[len(datas):]
+        k = intbv(0)[len(keeps):]
+        g = intbv(0)[len(ifgdelays):]
+        v = intbv(0)[len(vlantags):]
+        d[:] = datas
+        k[:] = keeps
+        g[:] = ifgdelays
+        v[:] = vlantags
+        txclientintf.data.next = 0
+        txclientintf.keep.next = 0
+        txclientintf.ifgdelay.next = 0
+        txclientintf.vlantag.next = 0
+        for i in range(n):
+            if i == sel:
+                txclientintf.data.next = d[lanes:]
+                txclientintf.keep.next = k[len(txclientintf.keep):]
+                txclientintf.ifgdelay.next = g[16:]
+                txclientintf.vlantag.next = v[16:]
+            d[:] = d >> lanes
+            k[:] = k >> len(txclientintf.keep)
+            g[:] = g >> 16
+            v[:] = v >> 16
+        txclientintf.vlanins.next = vlaninss[sel]
+        # Offered only while the queue is eligible, its gate open.
+        txclientintf.dv.next = (locked and dvs[sel]) or \
+            (ready and cands[sel])
+        txclientintf.underrun.next = locked and underruns[sel]
+
+    @always_seq(txclientintf.clk.posedge, reset)
+    def schedule():
+        choice = intbv(0, min=0, max=n)
+        nxt = intbv(0, min=0, max=n)
+        if rr == n - 1:
+            nxt[:] = 0
+        else:
+            nxt[:] = rr + 1
+
+        if locked:
+            if dvs[sel]:
+                if sent != 2**16 - 1:
+                    sent.next = sent + 1
+            else:
+                # End of frame, the queue gets a couple of clocks to offer
+                # its next frame before the next choice.
+                locked.next = False
+                hold.next = 2
+                if schedconfig[31]:
+                    deficits[sel].next = deficits[sel] - sent
+        elif hold != 0:
+            hold.next = hold - 1
+        elif txclientintf.ack:
+            locked.next = True
+            ready.next = False
+            sent.next = 1
+        elif txbusy or txclientintf.dv:
+            # Frame of the chosen queue offered to, or on its way to, the
+            # engine, which may start on it along with this edge.
+            pass
+        elif not schedconfig[31]:
+            for i in range(n):
+                if cands[i]:
+                    choice[:] = i
+            sel.next = choice
+            ready.next = cands != 0
+        elif cands[rr] and deficits[rr] > 0:
+            sel.next = rr
+            ready.next = True
+        else:
+            ready.next = False
+            if not cands[rr]:
+                deficits[rr].next = 0
+            rr.next = nxt
+            deficits[nxt].next = deficits[nxt] + weights[nxt]
+
+    return portinsts, shaperinsts, gateinsts, eligible, mux, schedule
@@ -0,0 +1,41 @@
+from myhdl import block, always_comb
+
+idlechar = 0x07
+startchar = 0xFB
+termchar = 0xFD
+errorchar = 0xFE
+""" XGMII Control Characters (IEEE 802.3 Clause 46, Table 46-3)."""
+
+idleword = 0x0707070707070707
+startword = 0xD5555555555555FB
+errorword = 0xFEFEFEFEFEFEFEFE
+""" XGMII words, lane 0 in the least significant byte."""
+
+
+@block
+def xgmii(txxgmii_intf, rxxgmii_intf, phyintf, reset):
+
+    """
+    *XGMII - PHY Interface for 10 - Gigabit Ethernet operation*
+
+    txd - 64 bits transmit data to PHY, lane 0 in txd[8:0].
+    txc - transmit control to PHY, txc[i] flags lane i as control character.
+
+    rxclk - Reference Clk for receive operations from PHY
+    rxd - 64 bits receive data from PHY, lane 0 in rxd[8:0].
+    rxc - receive control from PHY, rxc[i] flags lane i as control character.
+
+    """
+
+    @always_comb
+    def transmit():
+        phyintf.txd.next = txxgmii_intf.data
+        phyintf.txc.next = txxgmii_intf.ctrl
+
+    @always_comb
+    def receive():
+        rxxgmii_intf.clk.next = phyintf.rxclk
+        rxxgmii_intf.data.next = phyintf.rxd
+        rxxgmii_intf.ctrl.next = phyintf.rxc
+
+    return transmit, receive
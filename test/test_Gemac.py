@@ -1,7 +1,11 @@
 from gemac.gemac import gemac
+from gemac.txFIFO import txFIFO
 from gemac.interfaces import PHYInterface, FlowControlInterface,\
-    HostManagementInterface, MDIOInterface, ClientInterface
-from myhdl import ResetSignal, block
+    HostManagementInterface, MDIOInterface, ClientInterface, \
+    XGMIIPHYInterface, TxLocalLinkFIFOInterface
+from myhdl import ResetSignal, block, instance, delay, now, Signal, intbv, \
+    StopSimulation
+from random import randrange
 import pytest
 
 
@@ -33,3 +37,91 @@ def test_nothing(setuptb):
     tbinst = setuptb()
     print("Testing Nothing %s" % tbinst)
     assert True
+
+
+def test_tengigabit():
+    clientintf = ClientInterface(width=64)
+    phyintf = XGMIIPHYInterface()
+    flowintf = FlowControlInterface()
+    hostintf = HostManagementInterface()
+    mdiointf = MDIOInterface()
+    reset = ResetSignal(0, active=0, async=True)
+
+    @block
+    def testbench():
+        gemacinst = gemac(clientintf, phyintf, flowintf, hostintf,
+                          mdiointf, reset, speed=10000)
+        return gemacinst
+
+    tbinst = testbench()
+    print("Testing 10-Gigabit Build %s" % tbinst)
+    assert tbinst
+
+
+@pytest.mark.parametrize('threshold', [0, 32])
+def test_txfifoconfig(threshold):
+    clientintf = ClientInterface()
+    phyintf = PHYInterface()
+    flowintf = FlowControlInterface()
+    hostintf = HostManagementInterface()
+    mdiointf = MDIOInterface()
+    txlocallink = TxLocalLinkFIFOInterface()
+    fifoconfig = Signal(intbv(0)[32:])
+    reset = ResetSignal(0, active=0, async=True)
+    stream = [randrange(256) for _ in range(500)]
+    starts = []
+
+    @block
+    def test():
+        gemacinst = gemac(clientintf, phyintf, flowintf, hostintf,
+                          mdiointf, reset, fifoconfig=fifoconfig)
+        fifoinst = txFIFO(txlocallink, clientintf.tx, fifoconfig=fifoconfig)
+        print("Testing Transmit FIFO Configuration %s" % gemacinst)
+
+        @instance
+        def hostclkdriver():
+            while True:
+                hostintf.clk.next = not hostintf.clk
+                yield delay(4)
+
+        @instance
+        def clientclkdriver():
+            while True:
+                txlocallink.txclk.next = not txlocallink.txclk
+                yield delay(3)
+
+        @instance
+        def gtxclkdriver():
+            while True:
+                clientintf.tx.clk.next = not clientintf.tx.clk
+                yield delay(5)
+
+        @instance
+        def startmonitor():
+            while True:
+                yield clientintf.tx.ack.posedge
+                starts.append(now())
+
+        @instance
+        def tbstim():
+            yield clkwait(hostintf.clk, count=2)
+            reset.next = 1
+            txlocallink.reset.next = 1
+            yield hostintf.writeconfig(0x280, 0x10000000)
+            yield hostintf.writeconfig(0x300, threshold)
+            yield clkwait(hostintf.clk, count=4)
+            assert fifoconfig == threshold
+            yield txlocallink.tx(stream)
+            # Cut-through sends the frame before the client is done.
+            assert bool(starts) == (threshold != 0)
+            yield clkwait(txlocallink.txclk, count=200)
+            assert len(starts) == 1
+            raise StopSimulation
+
+        return gemacinst, fifoinst, hostclkdriver, clientclkdriver, \
+            gtxclkdriver, startmonitor, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=20000)
+    testInst.quit_sim()
@@ -1,7 +1,9 @@
 from myhdl import block, instance, delay, ResetSignal, Signal, intbv,\
     StopSimulation, now
 from myhdl.conversion import verify
-from gemac.addrfilter import addrfilter
+from gemac.addrfilter import addrfilter, addrshift, addrcam, addrhash
+from random import randrange, sample
+import zlib
 import pytest
 
 
@@ -76,6 +78,124 @@ def test_match(setuptb):
     testInst.quit_sim()
 
 
+def test_matchtiming(setuptb):
+    tb, clk, rxdata, addr, go, match = setuptb
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Address Filter Match Timing %s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(clk, count=10)
+            go.next = True
+            for i in range(5):
+                rxdata.next = addr[48-8*i:40-8*i]
+                yield clk.posedge
+            # Flagged while the last address byte is on the bus.
+            rxdata.next = addr[8:]
+            yield clk.negedge
+            assert match
+            yield clk.posedge
+            go.next = False
+            rxdata.next = 0
+            yield clkwait(clk, count=4)
+            assert match
+            # Dropped as the next address starts.
+            go.next = True
+            rxdata.next = addr[48:40] ^ 0xFF
+            yield clk.posedge
+            yield clk.negedge
+            assert not match
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=400)
+    testInst.quit_sim()
+
+
+@pytest.mark.parametrize('size', [16, 32, 64])
+def test_cam(size):
+    clk = Signal(bool(0))
+    rxdata = Signal(intbv(0)[8:])
+    dstaddr = Signal(intbv(0)[48:])
+    hit = Signal(bool(0))
+    reset = ResetSignal(1, active=0, async=True)
+    addrs = [randrange(1 << 48) for _ in range(2 * size)]
+    addrtable = [Signal(intbv(addr)[48:]) for addr in addrs[:size]]
+
+    @block
+    def test():
+        asinst = addrshift(clk, rxdata, dstaddr, reset)
+        caminst = addrcam(dstaddr, addrtable, hit)
+        print("Testing Address Table CAM %s" % caminst)
+
+        @instance
+        def hostclkdriver():
+            while True:
+                clk.next = not clk
+                yield delay(5)
+
+        @instance
+        def tbstim():
+            reset.next = 0
+            yield clkwait(clk, count=2)
+            reset.next = 1
+            for addr in sample(addrs, len(addrs)):
+                for i in range(6):
+                    rxdata.next = (addr >> (40 - 8 * i)) & 0xFF
+                    yield clk.posedge
+                    # Looked up while the last byte is on the bus.
+                    if i < 5:
+                        assert not hit
+                assert hit == (addr in addrs[:size])
+                rxdata.next = 0
+                yield clkwait(clk, count=randrange(1, 4))
+            raise StopSimulation
+
+        return asinst, caminst, hostclkdriver, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=100000)
+    testInst.quit_sim()
+
+
+@pytest.mark.parametrize('nbytes, hashbits', [(1, 6), (1, 9), (6, 6), (6, 9)])
+def test_hash(nbytes, hashbits):
+    crcin = Signal(intbv(0)[32:])
+    data = Signal(intbv(0)[8 * nbytes:])
+    hashval = Signal(intbv(0)[hashbits:])
+    addrs = [randrange(1 << 48) for _ in range(50)]
+
+    @block
+    def test():
+        hashinst = addrhash(crcin, data, hashval)
+        print("Testing Multicast Hash %s" % hashinst)
+
+        @instance
+        def tbstim():
+            for addr in addrs:
+                wire = addr.to_bytes(6, 'big')
+                # Register after the leading bytes, as kept by 'crc32'.
+                crcin.next = zlib.crc32(wire[:6 - nbytes]) ^ 0xFFFFFFFF
+                data.next = int.from_bytes(wire[6 - nbytes:], 'little')
+                yield delay(1)
+                assert hashval == zlib.crc32(wire) >> (32 - hashbits)
+            raise StopSimulation
+
+        return hashinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=1000)
+    testInst.quit_sim()
+
+
 def test_convertible():
 
     @block
@@ -0,0 +1,169 @@
+from myhdl import block, instance, delay, ResetSignal, Signal, intbv, \
+    StopSimulation, now
+from myhdl.conversion import verify
+from gemac.interfaces import HostManagementInterface, MDIOInterface, \
+    AXILiteInterface
+from gemac.management import management, reserved
+from gemac.axilite import axilite, mdioaddr
+from random import randrange
+import pytest
+
+
+def clkwait(clk, count=1):
+    while count:
+        yield clk.posedge
+        count -= 1
+
+
+def setuptb(width):
+    axiintf = AXILiteInterface(width)
+    hostintf = HostManagementInterface()
+    mdiointf = MDIOInterface()
+    configregs = [Signal(intbv(0)[32:]) for _ in range(reserved)]
+    addrtable = [Signal(intbv(0)[48:]) for _ in range(4)]
+    reset = ResetSignal(1, active=0, async=True)
+
+    @block
+    def testbench():
+        axiinst = axilite(axiintf, hostintf, reset)
+        dutinst = management(hostintf, mdiointf, configregs, addrtable, reset)
+
+        @instance
+        def clkdriver():
+            while True:
+                axiintf.clk.next = not axiintf.clk
+                yield delay(5)
+
+        @instance
+        def resetonstart():
+            reset.next = 0
+            yield clkwait(axiintf.clk, count=2)
+            reset.next = 1
+
+        return axiinst, dutinst, clkdriver, resetonstart
+
+    return testbench, axiintf, mdiointf, addrtable
+
+
+@pytest.mark.parametrize('width', [32, 64])
+def test_rwconfig(width):
+    tb, axiintf, _, _ = setuptb(width)
+    # Multicast Hash Table words, a beat covering 'width' bits of them.
+    addrs = [0x3C0 + (width // 8) * i for i in range(512 // width)]
+    values = [randrange(2**width) for _ in addrs]
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Pipelined Read/Write Configuration Register %s" %
+              tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(axiintf.clk, count=10)
+            yield axiintf.write(list(zip(addrs, values)))
+            readback = []
+            start = now()
+            yield axiintf.read(addrs, readback)
+            # A word a clock once the pipeline fills.
+            assert now() - start <= 10 * (512 // 32 + 8)
+            assert readback == values
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=10000)
+    testInst.quit_sim()
+
+
+@pytest.mark.parametrize('width', [32, 64])
+def test_writeaddrtable(width):
+    tb, axiintf, _, addrtable = setuptb(width)
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Write Address Table %s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(axiintf.clk, count=10)
+            yield axiintf.writeaddrtable(1, 0xAA22BB55FF22)
+            yield axiintf.writeaddrtable(2, 0x0123456789AB)
+            yield clkwait(axiintf.clk, count=2)
+            assert addrtable[1] == 0xAA22BB55FF22
+            assert addrtable[2] == 0x0123456789AB
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=1000)
+    testInst.quit_sim()
+
+
+@pytest.mark.parametrize('width', [32, 64])
+def test_mdioread(width):
+    tb, axiintf, mdiointf, _ = setuptb(width)
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing MDIO Read Operation %s" % tbinst)
+
+        @instance
+        def tbstim():
+            mdiointf.inn.next = 1
+            yield clkwait(axiintf.clk, count=10)
+            # mdio enable, clkdiv =2+1*2=6
+            yield axiintf.write([(0x340, 0x00000022)])
+            yield axiintf.write([(mdioaddr, (0b10 << 30) |
+                                  (0b1001100000 << 16))])
+            status = [0]
+            while not status[-1] & (1 << 31):
+                yield axiintf.read([mdioaddr], status)
+            assert status[-1] & 0xFFFF == 0xFFFF
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=30000)
+    testInst.quit_sim()
+
+
+def test_convertible():
+
+    @block
+    def test():
+        axiintf = AXILiteInterface(64)
+        hostintf = HostManagementInterface()
+        reset = ResetSignal(1, active=0, async=True)
+        dutinst = axilite(axiintf, hostintf, reset)
+        print("Testing Convertibility %s" % dutinst)
+
+        @instance
+        def clkdriver():
+            axiintf.clk.next = 0
+            while True:
+                yield delay(5)
+                axiintf.clk.next = not axiintf.clk
+
+        @instance
+        def testlogic():
+            reset.next = 0
+            yield delay(15)
+            reset.next = 1
+            yield delay(20)
+            print("Converted! %d" % now())
+            raise StopSimulation
+
+        return dutinst, testlogic, clkdriver
+
+    testInst = test()
+    verify.simulator = 'iverilog'
+    assert testInst.verify_convert() == 0
@@ -0,0 +1,194 @@
+from myhdl import block, instance, delay, ResetSignal, StopSimulation, now
+from myhdl.conversion import verify
+from gemac.interfaces import TxLocalLinkFIFOInterface, \
+    RxLocalLinkFIFOInterface, AXIStreamInterface
+from gemac.axis import axistx, axisrx, txuserbits, rxuserbits
+from random import randrange
+import pytest
+
+
+def clkwait(clk, count=1):
+    while count:
+        yield clk.posedge
+        count -= 1
+
+
+def randframe():
+    return [randrange(256) for _ in range(randrange(60, 200))]
+
+
+@pytest.mark.parametrize('width', [8, 32, 64])
+@pytest.mark.parametrize('stall', [False, True])
+def test_tx(width, stall):
+    axisintf = AXIStreamInterface(width, txuserbits)
+    txlocallink = TxLocalLinkFIFOInterface()
+    reset = ResetSignal(1, active=0, async=True)
+    frames = [(randframe(), randrange(2**txuserbits)) for _ in range(8)]
+    sent = []
+
+    @block
+    def test():
+        dutinst = axistx(axisintf, txlocallink, reset)
+        print("Testing AXI4-Stream Transmit %s" % dutinst)
+
+        @instance
+        def clkdriver():
+            while True:
+                axisintf.clk.next = not axisintf.clk
+                yield delay(5)
+
+        @instance
+        def fifo():
+            """ Transmit FIFO, stalling at random if 'stall'. """
+            frame = []
+            gaps = 0
+            while True:
+                txlocallink.dst_rdy.next = not stall or randrange(4) != 0
+                yield axisintf.clk.posedge
+                if frame and not txlocallink.src_rdy:
+                    gaps += 1
+                if txlocallink.src_rdy and txlocallink.dst_rdy:
+                    if txlocallink.sof:
+                        assert frame == []
+                        gaps = 0
+                        user = int(txlocallink.ipcsins) | \
+                            (int(txlocallink.l4csins) << 1) | \
+                            (int(txlocallink.mss) << 2)
+                    frame.append(int(txlocallink.txd))
+                    if txlocallink.eof:
+                        sent.append((frame, user))
+                        # A byte a clock unless held back.
+                        assert stall or gaps == 0
+                        frame = []
+
+        @instance
+        def tbstim():
+            reset.next = 0
+            yield clkwait(axisintf.clk, count=2)
+            reset.next = 1
+            yield clkwait(axisintf.clk, count=2)
+            for frame, user in frames:
+                yield axisintf.send(frame, user)
+            yield clkwait(axisintf.clk, count=2 * width)
+            assert sent == frames
+            raise StopSimulation
+
+        return dutinst, clkdriver, fifo, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=1000000)
+    testInst.quit_sim()
+
+
+@pytest.mark.parametrize('width', [8, 32, 64])
+@pytest.mark.parametrize('stall', [False, True])
+def test_rx(width, stall):
+    rxlocallink = RxLocalLinkFIFOInterface()
+    axisintf = AXIStreamInterface(width, rxuserbits)
+    reset = ResetSignal(1, active=0, async=True)
+    frames = [(randframe(), randrange(2**rxuserbits)) for _ in range(8)]
+    received = []
+
+    @block
+    def test():
+        dutinst = axisrx(rxlocallink, axisintf, reset)
+        print("Testing AXI4-Stream Receive %s" % dutinst)
+
+        @instance
+        def clkdriver():
+            while True:
+                axisintf.clk.next = not axisintf.clk
+                yield delay(5)
+
+        @instance
+        def client():
+            """ Takes the beats, stalling at random if 'stall'. """
+            frame = []
+            while True:
+                axisintf.tready.next = not stall or randrange(4) != 0
+                yield axisintf.clk.posedge
+                if axisintf.tvalid and axisintf.tready:
+                    for lane in range(width // 8):
+                        if axisintf.tkeep[lane]:
+                            frame.append(
+                                int(axisintf.tdata[8*lane+8:8*lane]))
+                    if axisintf.tlast:
+                        received.append((frame, int(axisintf.tuser)))
+                        frame = []
+
+        @instance
+        def tbstim():
+            reset.next = 0
+            yield clkwait(axisintf.clk, count=2)
+            reset.next = 1
+            yield clkwait(axisintf.clk, count=2)
+            for frame, user in frames:
+                rxlocallink.ipcsok.next = user >> 82
+                rxlocallink.l4csok.next = (user >> 81) & 1
+                rxlocallink.vlan.next = (user >> 80) & 1
+                rxlocallink.vlantag.next = (user >> 64) & 0xFFFF
+                rxlocallink.timestamp.next = user & (2**64 - 1)
+                start = now()
+                for i, d in enumerate(frame):
+                    rxlocallink.rxd.next = d
+                    rxlocallink.sof.next = i == 0
+                    rxlocallink.eof.next = i == len(frame) - 1
+                    rxlocallink.src_rdy.next = True
+                    # On the stream clock, 'rxclk' lags it by a delta.
+                    yield axisintf.clk.posedge
+                    while not rxlocallink.dst_rdy:
+                        yield axisintf.clk.posedge
+                rxlocallink.src_rdy.next = False
+                rxlocallink.sof.next = False
+                rxlocallink.eof.next = False
+                # A byte a clock unless held back.
+                assert stall or now() - start == 10 * len(frame)
+            yield clkwait(axisintf.clk, count=20)
+            assert received == frames
+            raise StopSimulation
+
+        return dutinst, clkdriver, client, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=1000000)
+    testInst.quit_sim()
+
+
+def test_convertible():
+
+    @block
+    def test():
+        txaxis = AXIStreamInterface(64, txuserbits)
+        rxaxis = AXIStreamInterface(64, rxuserbits)
+        txlocallink = TxLocalLinkFIFOInterface()
+        rxlocallink = RxLocalLinkFIFOInterface()
+        reset = ResetSignal(1, active=0, async=True)
+        txinst = axistx(txaxis, txlocallink, reset)
+        rxinst = axisrx(rxlocallink, rxaxis, reset)
+        print("Testing Convertibility %s %s" % (txinst, rxinst))
+
+        @instance
+        def clkdriver():
+            txaxis.clk.next = 0
+            rxaxis.clk.next = 0
+            while True:
+                yield delay(5)
+                txaxis.clk.next = not txaxis.clk
+                rxaxis.clk.next = not rxaxis.clk
+
+        @instance
+        def testlogic():
+            reset.next = 0
+            yield delay(15)
+            reset.next = 1
+            yield delay(20)
+            print("Converted! %d" % now())
+            raise StopSimulation
+
+        return txinst, rxinst, testlogic, clkdriver
+
+    testInst = test()
+    verify.simulator = 'iverilog'
+    assert testInst.verify_convert() == 0
@@ -0,0 +1,183 @@
+from myhdl import block, instance, delay, ResetSignal, Signal, intbv, \
+    StopSimulation, now
+from myhdl.conversion import verify
+from gemac.intrafaces import TxGMII_Interface, TxFlowInterface
+from gemac.interfaces import TxFIFOClientInterface
+from gemac.txEngine import txengine
+from gemac.txsched import txscheduler, txqueues
+from gemac.cbs import cbs
+from random import randrange
+import pytest
+
+idleslope = 0x4000
+sendslope = 0x10000 - idleslope
+""" A quarter of the line rate."""
+
+
+def clkwait(clk, count=1):
+    while count:
+        yield clk.posedge
+        count -= 1
+
+
+def taggedframe(tag, length):
+    return [tag] + [randrange(256) for _ in range(length - 1)]
+
+
+@pytest.fixture()
+def setuptb():
+    txclientintfs = [TxFIFOClientInterface() for _ in range(2)]
+    txclientintf = TxFIFOClientInterface()
+    txgmii_intf = TxGMII_Interface()
+    txflowintf = TxFlowInterface()
+    txconfig = Signal(intbv(0x10000000)[32:])
+    schedconfig = Signal(intbv(0x00000002)[32:])
+    weights = [Signal(intbv(0)[16:]) for _ in range(txqueues)]
+    shaper = [Signal(intbv(0)[32:]) for _ in range(4 * txqueues)]
+    txgate = Signal(bool(0))
+    txbusy = Signal(bool(0))
+    reset = ResetSignal(1, active=0, async=True)
+    sent = []
+
+    @block
+    def testbench(backlog, scheduled):
+        if scheduled:
+            clients = txclientintfs
+            shapeinst = txscheduler(txclientintfs, txclientintf, schedconfig,
+                                    weights, reset, txbusy=txbusy,
+                                    shaper=shaper)
+            gate = Signal(bool(1))
+        else:
+            clients = [txclientintf]
+            shapeinst = cbs(txclientintf.clk, txclientintf.dv, txbusy,
+                            schedconfig(1), shaper[1], shaper[txqueues + 1],
+                            shaper[2 * txqueues + 1],
+                            shaper[3 * txqueues + 1], txgate, reset)
+            gate = txgate
+        engineinst = txengine(txclientintf, txgmii_intf, txflowintf,
+                              txconfig, reset, txgate=gate, txbusy=txbusy)
+
+        @instance
+        def gtxclkdriver():
+            while True:
+                txclientintf.clk.next = not txclientintf.clk
+                yield delay(5)
+
+        @instance
+        def resetonstart():
+            shaper[1].next = idleslope
+            shaper[txqueues + 1].next = sendslope
+            shaper[2 * txqueues + 1].next = 1600 << 16
+            shaper[3 * txqueues + 1].next = intbv(-1600 << 16)[32:]
+            reset.next = 0
+            yield clkwait(txclientintf.clk, count=2)
+            reset.next = 1
+
+        @instance
+        def monitor():
+            frame = []
+            cycle = 0
+            while True:
+                yield txclientintf.clk.posedge
+                cycle += 1
+                if txgmii_intf.dv:
+                    if not frame:
+                        start = cycle
+                    frame.append(int(txgmii_intf.data))
+                elif frame:
+                    # Tag is the first byte after the preamble.
+                    sent.append((frame[8], start, len(frame)))
+                    frame = []
+
+        @block
+        def sender(q, frames):
+            @instance
+            def sendqueue():
+                for frame in frames:
+                    yield clients[q].tx(frame)
+
+            return sendqueue
+
+        senders = [sender(q, frames) for q, frames in enumerate(backlog)
+                   if q < len(clients)]
+
+        return shapeinst, engineinst, gtxclkdriver, resetonstart, monitor, \
+            senders
+
+    return testbench, txclientintf, sent
+
+
+@pytest.mark.parametrize('scheduled', [False, True])
+def test_shapedrate(setuptb, scheduled):
+    tb, txclientintf, sent = setuptb
+    count = 60 if scheduled else 40
+    bulk = [taggedframe(0x02, randrange(60, 200)) for _ in range(800)]
+    shaped = [taggedframe(0x01, 300) for _ in range(count)]
+    backlog = [bulk, shaped] if scheduled else [shaped]
+
+    @block
+    def test():
+        tbinst = tb(backlog, scheduled)
+        print("Testing Credit-Based Shaper %s" % tbinst)
+
+        @instance
+        def tbstim():
+            while sum(1 for tag, _, _ in sent if tag == 0x01) < count:
+                yield txclientintf.clk.posedge
+            frames = [(start, length) for tag, start, length in sent
+                      if tag == 0x01]
+            window = frames[-1][0] - frames[0][0]
+            rate = sum(length for _, length in frames[:-1]) / window
+            assert abs(rate * 0x10000 / idleslope - 1) < 0.01
+            if scheduled:
+                # Bulk fills the rest of the line.
+                rest = sum(length for tag, start, length in sent
+                           if tag == 0x02 and frames[0][0] < start and
+                           start < frames[-1][0]) / window
+                assert rest > 0.6
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=2000000)
+    testInst.quit_sim()
+
+
+def test_convertible():
+
+    @block
+    def test():
+        clk = Signal(bool(0))
+        waiting = Signal(bool(0))
+        transmitting = Signal(bool(0))
+        enable = Signal(bool(1))
+        params = [Signal(intbv(0)[32:]) for _ in range(4)]
+        txopen = Signal(bool(0))
+        reset = ResetSignal(1, active=0, async=True)
+        dutinst = cbs(clk, waiting, transmitting, enable, *params, txopen,
+                      reset)
+        print("Testing Convertibility %s" % dutinst)
+
+        @instance
+        def hostclkdriver():
+            clk.next = 0
+            while True:
+                yield delay(5)
+                clk.next = not clk
+
+        @instance
+        def testlogic():
+            reset.next = 0
+            yield delay(15)
+            reset.next = 1
+            yield delay(20)
+            print("Converted! %d" % now())
+            raise StopSimulation
+
+        return dutinst, testlogic, hostclkdriver
+
+    testInst = test()
+    verify.simulator = 'iverilog'
+    assert testInst.verify_convert() == 0
@@ -0,0 +1,200 @@
+from myhdl import block, instance, delay, ResetSignal, Signal, intbv, \
+    StopSimulation, now
+from myhdl.conversion import verify
+from gemac.intrafaces import RxGMII_Interface, RxFlowInterface
+from gemac.interfaces import RxFIFOClientInterface
+from gemac.rxEngine import rxengine
+from gemac.checksum import rxchecksum
+from gemac.tlm import GEMACModel, preamble, fcs, inetsum
+from random import randrange
+import pytest
+
+srcip = bytes([192, 168, 1, 10])
+dstip = bytes([10, 0, 0, 254])
+
+
+def clkwait(clk, count=1):
+    while count:
+        yield clk.posedge
+        count -= 1
+
+
+def ipframe(proto=6, paylen=100, vlan=False, options=0, fragment=False,
+            corrupt=None, nocsum=False):
+    """ Wire frame carrying an IPv4 datagram with good checksums, but for
+    the one named in 'corrupt'. """
+    payload = bytes(randrange(256) for _ in range(paylen))
+    if proto == 6:
+        segment = bytearray(bytes(20) + payload)
+        segment[12] = 0x50
+        csumoff = 16
+    elif proto == 17:
+        segment = bytearray(bytes(8) + payload)
+        segment[4:6] = len(segment).to_bytes(2, 'big')
+        csumoff = 6
+    else:
+        segment = bytearray(payload)
+    segment[0:4] = bytes([0x12, 0x34, 0x00, 0x50])
+    hdrlen = 20 + 4 * options
+    header = bytearray(hdrlen)
+    header[0] = 0x40 | (hdrlen // 4)
+    header[2:4] = (hdrlen + len(segment)).to_bytes(2, 'big')
+    header[6] = 0x20 if fragment else 0x40
+    header[8] = 64
+    header[9] = proto
+    header[12:20] = srcip + dstip
+    header[20:] = bytes(randrange(256) for _ in range(4 * options))
+    header[10:12] = (~inetsum(header) & 0xFFFF).to_bytes(2, 'big')
+    if proto in (6, 17) and not nocsum:
+        pseudo = srcip + dstip + bytes([0, proto]) + \
+            len(segment).to_bytes(2, 'big')
+        csum = ~inetsum(pseudo + segment) & 0xFFFF
+        segment[csumoff:csumoff + 2] = csum.to_bytes(2, 'big')
+    if corrupt == 'ip':
+        header[8] ^= 0x01
+    elif corrupt == 'l4':
+        segment[-1] ^= 0x80
+    frame = bytes([0xAB, 0xCD, 0x12, 0x34, 0x56, 0xEF]) + \
+        bytes([0x45, 0x6E, 0xFA, 0xBC, 0xD1, 0x23])
+    if vlan:
+        frame += bytes([0x81, 0x00, 0x00, 0x05])
+    frame = (frame + b'\x08\x00' + header + segment).ljust(60, b'\x00')
+    return preamble + frame + fcs(frame)
+
+
+def sendgmii(rxgmii_intf, wire):
+    """ Drives wire frame on GMII followed by inter-frame gap. """
+    for byte in wire:
+        rxgmii_intf.data.next = byte
+        rxgmii_intf.dv.next = True
+        yield rxgmii_intf.clk.posedge
+    rxgmii_intf.dv.next = False
+    rxgmii_intf.data.next = 0
+    yield clkwait(rxgmii_intf.clk, count=12)
+
+
+@pytest.fixture()
+def setuptb():
+    rxclientintf = RxFIFOClientInterface()
+    rxgmii_intf = RxGMII_Interface()
+    rxflowintf = RxFlowInterface()
+    rxconfig0 = Signal(intbv(0)[32:])
+    rxconfig1 = Signal(intbv(0x10000000)[32:])
+    filterconfig = Signal(intbv(0x80000000)[32:])
+    addrtable = [Signal(intbv(0)[48:]) for _ in range(4)]
+    reset = ResetSignal(1, active=0, async=True)
+    flags = []
+
+    @block
+    def testbench():
+        dutinst = rxengine(rxclientintf, rxgmii_intf, rxflowintf, rxconfig0,
+                           rxconfig1, filterconfig, addrtable, reset)
+
+        @instance
+        def hostclkdriver():
+            while True:
+                rxgmii_intf.clk.next = not rxgmii_intf.clk
+                yield delay(5)
+
+        @instance
+        def resetonstart():
+            reset.next = 0
+            yield clkwait(rxgmii_intf.clk, count=2)
+            reset.next = 1
+
+        @instance
+        def monitor():
+            while True:
+                yield rxgmii_intf.clk.posedge
+                if rxclientintf.good:
+                    flags.append((bool(rxclientintf.ipcsok),
+                                  bool(rxclientintf.l4csok)))
+
+        return dutinst, hostclkdriver, resetonstart, monitor
+
+    return testbench, rxgmii_intf, flags
+
+
+def test_rxchecksum(setuptb):
+    tb, rxgmii_intf, flags = setuptb
+    cases = [
+        (ipframe(proto=6), (True, True)),
+        (ipframe(proto=17, paylen=333), (True, True)),
+        (ipframe(proto=17, paylen=3), (True, True)),
+        (ipframe(proto=6, paylen=1001, vlan=True, options=3), (True, True)),
+        (ipframe(proto=6, corrupt='ip'), (False, False)),
+        (ipframe(proto=17, vlan=True, corrupt='ip'), (False, False)),
+        (ipframe(proto=6, paylen=77, corrupt='l4'), (True, False)),
+        (ipframe(proto=17, paylen=8, corrupt='l4'), (True, False)),
+        (ipframe(proto=17, nocsum=True), (True, False)),
+        (ipframe(proto=6, fragment=True), (True, False)),
+        (ipframe(proto=1), (True, False)),
+    ]
+    # Neither IPv4 nor checked.
+    wire = bytearray(ipframe(proto=6)[:-4])
+    wire[8 + 12:8 + 14] = b'\x86\xdd'
+    cases.append((bytes(wire) + fcs(wire[8:]), (False, False)))
+    model = GEMACModel()
+    model.writeconfig(0x240, 0x10000000)
+    model.writeconfig(0x390, 0x80000000)
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Receive Checksum Offload %s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(rxgmii_intf.clk, count=10)
+            for wire, expected in cases:
+                yield sendgmii(rxgmii_intf, wire)
+            expected = []
+            for wire, caseflags in cases:
+                assert model.receive(wire) is not None
+                assert (model.ipcsok, model.l4csok) == caseflags
+                expected.append(caseflags)
+            assert flags == expected
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=200000)
+    testInst.quit_sim()
+
+
+def test_convertible():
+
+    @block
+    def test():
+        clk = Signal(bool(0))
+        rxdata = Signal(intbv(0)[8:])
+        go = Signal(bool(0))
+        ipok = Signal(bool(0))
+        l4ok = Signal(bool(0))
+        reset = ResetSignal(1, active=0, async=True)
+        dutinst = rxchecksum(clk, rxdata, go, ipok, l4ok, reset)
+        print("Testing Convertibility %s" % dutinst)
+
+        @instance
+        def hostclkdriver():
+            clk.next = 0
+            while True:
+                yield delay(5)
+                clk.next = not clk
+
+        @instance
+        def testlogic():
+            reset.next = 0
+            yield delay(15)
+            reset.next = 1
+            yield delay(20)
+            print("Converted! %d" % now())
+            raise StopSimulation
+
+        return dutinst, testlogic, hostclkdriver
+
+    testInst = test()
+    verify.simulator = 'iverilog'
+    assert testInst.verify_convert() == 0
@@ -0,0 +1,200 @@
+from myhdl import block, instance, delay, ResetSignal, Signal, intbv, \
+    StopSimulation, now
+from myhdl.conversion import verify
+from gemac.interfaces import RxFIFOClientInterface, RxEventInterface
+from gemac.coalesce import rxcoalesce
+
+usclocks = 10
+""" Receive clocks a microsecond. """
+
+
+def clkwait(clk, count=1):
+    while count:
+        yield clk.posedge
+        count -= 1
+
+
+def setuptb(frames, time):
+    rxclientintf = RxFIFOClientInterface()
+    eventintf = RxEventInterface()
+    coalframes = Signal(intbv(frames)[32:])
+    coaltime = Signal(intbv(usclocks << 16 | time)[32:])
+    reset = ResetSignal(1, active=0, async=True)
+    events = []
+
+    @block
+    def testbench():
+        dutinst = rxcoalesce(rxclientintf, eventintf, coalframes, coaltime,
+                             reset)
+
+        @instance
+        def clkdriver():
+            while True:
+                rxclientintf.clk.next = not rxclientintf.clk
+                yield delay(5)
+
+        @instance
+        def monitor():
+            while True:
+                yield eventintf.wait(events)
+
+        @instance
+        def resetonstart():
+            reset.next = 0
+            yield clkwait(rxclientintf.clk, count=2)
+            reset.next = 1
+
+        return dutinst, clkdriver, monitor, resetonstart
+
+    return testbench, rxclientintf, events
+
+
+def complete(rxclientintf, count, gap, bad=False):
+    """ 'count' frame completions 'gap' clocks apart. """
+    for i in range(count):
+        if bad and i % 2:
+            rxclientintf.bad.next = True
+        else:
+            rxclientintf.good.next = True
+        yield rxclientintf.clk.posedge
+        rxclientintf.good.next = False
+        rxclientintf.bad.next = False
+        yield clkwait(rxclientintf.clk, count=gap - 1)
+
+
+def runtest(name, tb, stim):
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing %s %s" % (name, tbinst))
+
+        @instance
+        def tbstim():
+            yield stim()
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=100000)
+    testInst.quit_sim()
+
+
+def test_disabled():
+    tb, rxclientintf, events = setuptb(8, 10)
+
+    def stim():
+        yield clkwait(rxclientintf.clk, count=5)
+        yield complete(rxclientintf, 6, 3, bad=True)
+        yield clkwait(rxclientintf.clk, count=5)
+        assert events == [1] * 6
+
+    runtest("Coalescing Disabled", tb, stim)
+
+
+def test_framethreshold():
+    tb, rxclientintf, events = setuptb(1 << 31 | 8, 1000)
+
+    def stim():
+        yield clkwait(rxclientintf.clk, count=5)
+        yield complete(rxclientintf, 20, 5, bad=True)
+        yield clkwait(rxclientintf.clk, count=5)
+        assert events == [8, 8]
+
+    runtest("Frame Threshold", tb, stim)
+
+
+def test_timethreshold():
+    time = 5
+    tb, rxclientintf, events = setuptb(1 << 31 | 64, time)
+
+    def stim():
+        yield clkwait(rxclientintf.clk, count=5)
+        yield complete(rxclientintf, 3, 4)
+        # Held back until the time threshold goes by.
+        yield clkwait(rxclientintf.clk, count=(time - 3) * usclocks)
+        assert events == []
+        yield clkwait(rxclientintf.clk, count=4 * usclocks)
+        assert events == [3]
+
+    runtest("Time Threshold", tb, stim)
+
+
+def test_adaptive():
+    time = 20
+    tb, rxclientintf, events = setuptb(3 << 30 | 32, time)
+
+    def stim():
+        yield clkwait(rxclientintf.clk, count=5)
+        # A trickle, an event a frame.
+        yield complete(rxclientintf, 4, 3 * time * usclocks)
+        assert events == [1] * 4
+        del events[:]
+        # Under load, the threshold follows the rate up to 32.
+        yield complete(rxclientintf, 200, 4)
+        assert events[0] == 1
+        assert max(events) == 32
+        yield clkwait(rxclientintf.clk, count=2 * time * usclocks)
+        assert sum(events) == 200
+
+    runtest("Adaptive Threshold", tb, stim)
+
+
+def test_adaptivestep():
+    time = 20
+    tb, rxclientintf, events = setuptb(3 << 30 | 32, time)
+
+    def stim():
+        yield clkwait(rxclientintf.clk, count=5)
+        # Full load, an event of 32 about once per time threshold.
+        yield complete(rxclientintf, 400, 4)
+        assert events[-6:] == [32] * 6
+        yield clkwait(rxclientintf.clk, count=2 * time * usclocks)
+        assert sum(events) == 400
+        del events[:]
+        # Stepped down to 8 a time threshold, held back a quarter of it.
+        yield complete(rxclientintf, 80, time * usclocks // 8)
+        assert max(events[-16:]) <= 3
+        assert len(events) > 80 // 3
+        yield clkwait(rxclientintf.clk, count=2 * time * usclocks)
+        assert sum(events) == 80
+
+    runtest("Adaptive Step in Load", tb, stim)
+
+
+def test_convertible():
+
+    @block
+    def test():
+        rxclientintf = RxFIFOClientInterface()
+        eventintf = RxEventInterface()
+        coalframes = Signal(intbv(1 << 31 | 4)[32:])
+        coaltime = Signal(intbv(usclocks << 16 | 2)[32:])
+        reset = ResetSignal(1, active=0, async=True)
+        dutinst = rxcoalesce(rxclientintf, eventintf, coalframes, coaltime,
+                             reset)
+        print("Testing Convertibility %s" % dutinst)
+
+        @instance
+        def clkdriver():
+            rxclientintf.clk.next = 0
+            while True:
+                yield delay(5)
+                rxclientintf.clk.next = not rxclientintf.clk
+
+        @instance
+        def testlogic():
+            reset.next = 0
+            yield delay(15)
+            reset.next = 1
+            yield delay(20)
+            print("Converted! %d" % now())
+            raise StopSimulation
+
+        return dutinst, testlogic, clkdriver
+
+    testInst = test()
+    verify.simulator = 'iverilog'
+    assert testInst.verify_convert() == 0
@@ -1,9 +1,10 @@
 from myhdl import block, instance, delay, ResetSignal, Signal, intbv, \
     StopSimulation, now
 from myhdl.conversion import verify
-from gemac.crc32 import crc32
+from gemac.crc32 import crc32, crc32_parallel
 from random import randrange
 import pytest
+import zlib
 
 datastream = [0x12, 0x34, 0x56, 0x78, 0x9A, 0xBC, 0xDE, 0xF0,
               0x12, 0x34, 0x56, 0x78, 0x9A, 0xBC, 0xDE, 0xF0,
@@ -139,3 +140,113 @@ def test_matchcrc32(setuptb):
     testInst.config_sim(trace=True)
     testInst.run_sim(duration=2000)
     testInst.quit_sim()
+
+
+def wordstream(stream, lanes):
+    """ Pack bytes into (word, byte enable) pairs, first byte in lane 0."""
+    for i in range(0, len(stream), lanes):
+        chunk = stream[i:i+lanes]
+        word = 0
+        for lane, d in enumerate(chunk):
+            word |= d << (8 * lane)
+        yield word, (1 << len(chunk)) - 1
+
+
+@pytest.mark.parametrize('width', [8, 16, 32, 64])
+@pytest.mark.parametrize('length', [len(datastream), 61, 63])
+def test_parallelcrc32(width, length):
+    lanes = width // 8
+    stream = (datastream * 2)[:length]
+    fcs = zlib.crc32(bytes(stream))
+    clk = Signal(bool(0))
+    clear = Signal(bool(0))
+    calc = Signal(bool(0))
+    data = Signal(intbv(0)[width:])
+    dataen = Signal(intbv(0)[lanes:])
+    crcout = Signal(intbv(0)[32:])
+    reset = ResetSignal(1, active=0, async=True)
+
+    @block
+    def test():
+        dutinst = crc32_parallel(clk, clear, calc, data, dataen, crcout,
+                                 reset, width=width)
+        print("Testing Parallel CRC-32 Calculation %s" % dutinst)
+
+        @instance
+        def hostclkdriver():
+            while True:
+                clk.next = not clk
+                yield delay(5)
+
+        @instance
+        def tbstim():
+            yield clkwait(clk, count=2)
+            clear.next = True
+            yield clk.posedge
+            clear.next = False
+            yield clk.posedge
+            assert crcout == 0x00000000
+            calc.next = True
+            for word, en in wordstream(stream, lanes):
+                data.next = word
+                dataen.next = en
+                yield clk.posedge
+            calc.next = False
+            yield clk.posedge
+            assert crcout == fcs
+            calc.next = True
+            for word, en in wordstream([(fcs >> (8 * i)) & 0xFF
+                                        for i in range(4)], lanes):
+                data.next = word
+                dataen.next = en
+                yield clk.posedge
+            calc.next = False
+            yield clk.posedge
+            assert crcout == 0x2144DF1C
+            raise StopSimulation
+
+        return dutinst, hostclkdriver, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=2000)
+    testInst.quit_sim()
+
+
+@pytest.mark.parametrize('width', [8, 16, 32, 64])
+def test_parallelconvertible(width):
+
+    @block
+    def test():
+        clk = Signal(bool(0))
+        clear = Signal(bool(0))
+        calc = Signal(bool(0))
+        data = Signal(intbv(0)[width:])
+        dataen = Signal(intbv(0)[width//8:])
+        crcout = Signal(intbv(0)[32:])
+        reset = ResetSignal(1, active=0, async=True)
+        dutinst = crc32_parallel(clk, clear, calc, data, dataen, crcout,
+                                 reset, width=width)
+        print("Testing Convertibility %s" % dutinst)
+
+        @instance
+        def hostclkdriver():
+            clk.next = 0
+            while True:
+                yield delay(5)
+                clk.next = not clk
+
+        @instance
+        def testlogic():
+            reset.next = 0
+            yield delay(15)
+            reset.next = 1
+            yield delay(20)
+            print("Converted! %d" % now())
+            raise StopSimulation
+
+        return dutinst, testlogic, hostclkdriver
+
+    testInst = test()
+    verify.simulator = 'iverilog'
+    assert testInst.verify_convert() == 0
@@ -0,0 +1,275 @@
+from myhdl import block, instance, delay, ResetSignal, Signal, intbv, \
+    StopSimulation, now
+from myhdl.conversion import verify
+from gemac.interfaces import TxLocalLinkFIFOInterface, \
+    RxLocalLinkFIFOInterface, MemoryInterface, DMARingInterface
+from gemac.dma import dma
+from random import randrange
+import pytest
+
+ringsize = 8
+txring = 0x1000
+rxring = 0x2000
+buffers = 0x10000
+bufsize = 0x800
+
+
+def clkwait(clk, count=1):
+    while count:
+        yield clk.posedge
+        count -= 1
+
+
+def store(mem, addr, data):
+    """ Bytes to memory words, first byte in the least significant lane. """
+    for i in range(0, len(data), 4):
+        mem[addr + i] = int.from_bytes(bytes(data[i:i+4]), 'little')
+
+
+def load(mem, addr, length):
+    data = b''
+    for i in range(0, length, 4):
+        data += mem.get(addr + i, 0).to_bytes(4, 'little')
+    return list(data[:length])
+
+
+def setuptb(wait):
+    memintf = MemoryInterface()
+    ringintf = DMARingInterface()
+    txlocallink = TxLocalLinkFIFOInterface()
+    rxlocallink = RxLocalLinkFIFOInterface()
+    reset = ResetSignal(1, active=0, async=True)
+    mem = {}
+
+    @block
+    def testbench():
+        dutinst = dma(txlocallink, rxlocallink, memintf, ringintf, reset)
+
+        @instance
+        def clkdriver():
+            while True:
+                memintf.clk.next = not memintf.clk
+                txlocallink.txclk.next = not txlocallink.txclk
+                rxlocallink.rxclk.next = not rxlocallink.rxclk
+                yield delay(5)
+
+        @instance
+        def memory():
+            yield memintf.serve(mem, wait=wait)
+
+        @instance
+        def resetonstart():
+            reset.next = 0
+            ringintf.txbase.next = txring
+            ringintf.txsize.next = ringsize
+            ringintf.rxbase.next = rxring
+            ringintf.rxsize.next = ringsize
+            yield clkwait(memintf.clk, count=2)
+            reset.next = 1
+
+        return dutinst, clkdriver, memory, resetonstart
+
+    return testbench, memintf, ringintf, txlocallink, rxlocallink, mem
+
+
+@pytest.mark.parametrize('wait', [0, 2])
+def test_tx(wait):
+    tb, memintf, ringintf, txlocallink, _, mem = setuptb(wait)
+    count = 12
+    frames = []
+    for _ in range(count):
+        frame = [randrange(256) for _ in range(randrange(60, 300))]
+        cuts = sorted(randrange(1, len(frame)) for _ in range(randrange(3)))
+        pieces = [frame[i:j] for i, j in
+                  zip([0] + cuts, cuts + [len(frame)]) if j > i]
+        mss = randrange(2) and randrange(64, 1500)
+        frames.append((frame, pieces, randrange(2), randrange(2), mss))
+    sent = []
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Transmit Ring %s" % tbinst)
+
+        @instance
+        def host():
+            """ Posts the frames, checking the descriptors given back. """
+            slot = 0
+            posted = {}
+            yield clkwait(memintf.clk, count=5)
+            for frame, pieces, ipcsins, l4csins, mss in frames:
+                for i, piece in enumerate(pieces):
+                    while (ringintf.txtail + 1) % ringsize == ringintf.txhead:
+                        yield memintf.clk.posedge
+                    desc = txring + 16 * int(ringintf.txtail)
+                    if desc in posted:
+                        assert mem[desc + 4] == posted[desc] | (1 << 31)
+                    buf = buffers + bufsize * slot
+                    slot = (slot + 1) % ringsize
+                    store(mem, buf, piece)
+                    ctl = len(piece) | ((i == len(pieces) - 1) << 24) | \
+                        (ipcsins << 25) | (l4csins << 26)
+                    mem[desc] = buf
+                    mem[desc + 4] = ctl
+                    mem[desc + 8] = mss
+                    posted[desc] = ctl
+                    ringintf.txtail.next = (ringintf.txtail + 1) % ringsize
+                    yield memintf.clk.posedge
+            while ringintf.txhead != ringintf.txtail or len(sent) < count:
+                yield memintf.clk.posedge
+            for desc, ctl in posted.items():
+                assert mem[desc + 4] == ctl | (1 << 31)
+            assert sent == [(frame, ipcsins, l4csins, mss) for
+                            frame, _, ipcsins, l4csins, mss in frames]
+            raise StopSimulation
+
+        @instance
+        def fifo():
+            """ Transmit FIFO taking the bytes at random. """
+            frame = []
+            while True:
+                txlocallink.dst_rdy.next = randrange(4) != 0
+                yield txlocallink.txclk.posedge
+                if txlocallink.src_rdy and txlocallink.dst_rdy:
+                    if txlocallink.sof:
+                        assert frame == []
+                        flags = (int(txlocallink.ipcsins),
+                                 int(txlocallink.l4csins),
+                                 int(txlocallink.mss))
+                    frame.append(int(txlocallink.txd))
+                    if txlocallink.eof:
+                        sent.append((frame,) + flags)
+                        frame = []
+
+        return tbinst, host, fifo
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=1000000)
+    testInst.quit_sim()
+
+
+@pytest.mark.parametrize('wait', [0, 2])
+def test_rx(wait):
+    tb, memintf, ringintf, _, rxlocallink, mem = setuptb(wait)
+    count = 12
+    bufbytes = 128
+    frames = []
+    for _ in range(count):
+        frame = [randrange(256) for _ in range(randrange(60, 400))]
+        frames.append((frame, randrange(2), randrange(2), randrange(2),
+                       randrange(2**16), randrange(2**64)))
+    received = []
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Receive Ring %s" % tbinst)
+
+        @instance
+        def host():
+            """ Hands over buffers, few at first, gathering the frames. """
+            frame = []
+            yield clkwait(memintf.clk, count=5)
+            for i in range(ringsize - 1):
+                mem[rxring + 16 * i] = buffers + bufsize * i
+                mem[rxring + 16 * i + 4] = bufbytes
+            ringintf.rxtail.next = 2
+            yield clkwait(memintf.clk, count=200)
+            ringintf.rxtail.next = ringsize - 1
+            head = 0
+            while len(received) < count:
+                yield memintf.clk.posedge
+                while head != ringintf.rxhead:
+                    desc = rxring + 16 * head
+                    status = mem[desc + 4]
+                    assert status & (1 << 31)
+                    frame += load(mem, buffers + bufsize * head,
+                                  status & 0xFFFF)
+                    if status & (1 << 24):
+                        assert status & 0xFFFF <= bufbytes
+                        received.append((frame, (status >> 25) & 1,
+                                         (status >> 26) & 1,
+                                         (mem[desc] >> 16) & 1,
+                                         mem[desc] & 0xFFFF,
+                                         mem[desc + 8] |
+                                         (mem[desc + 12] << 32)))
+                        frame = []
+                    else:
+                        assert status & 0xFFFF == bufbytes
+                    # Give the buffer back at the tail.
+                    tail = int(ringintf.rxtail)
+                    mem[rxring + 16 * tail] = buffers + bufsize * tail
+                    mem[rxring + 16 * tail + 4] = bufbytes
+                    ringintf.rxtail.next = (tail + 1) % ringsize
+                    head = (head + 1) % ringsize
+                    yield memintf.clk.posedge
+            assert received == frames
+            raise StopSimulation
+
+        @instance
+        def fifo():
+            """ Receive FIFO giving the frames at random. """
+            for frame, ipcsok, l4csok, vlan, tag, ts in frames:
+                rxlocallink.ipcsok.next = ipcsok
+                rxlocallink.l4csok.next = l4csok
+                rxlocallink.vlan.next = vlan
+                rxlocallink.vlantag.next = tag
+                rxlocallink.timestamp.next = ts
+                for i, d in enumerate(frame):
+                    rxlocallink.rxd.next = d
+                    rxlocallink.sof.next = i == 0
+                    rxlocallink.eof.next = i == len(frame) - 1
+                    rxlocallink.src_rdy.next = True
+                    yield rxlocallink.rxclk.posedge
+                    while not rxlocallink.dst_rdy:
+                        yield rxlocallink.rxclk.posedge
+                    if randrange(4) == 0:
+                        rxlocallink.src_rdy.next = False
+                        yield rxlocallink.rxclk.posedge
+                rxlocallink.src_rdy.next = False
+                rxlocallink.sof.next = False
+                rxlocallink.eof.next = False
+                yield clkwait(rxlocallink.rxclk, count=randrange(1, 20))
+
+        return tbinst, host, fifo
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=1000000)
+    testInst.quit_sim()
+
+
+def test_convertible():
+
+    @block
+    def test():
+        memintf = MemoryInterface()
+        ringintf = DMARingInterface()
+        txlocallink = TxLocalLinkFIFOInterface()
+        rxlocallink = RxLocalLinkFIFOInterface()
+        reset = ResetSignal(1, active=0, async=True)
+        dutinst = dma(txlocallink, rxlocallink, memintf, ringintf, reset)
+        print("Testing Convertibility %s" % dutinst)
+
+        @instance
+        def clkdriver():
+            memintf.clk.next = 0
+            while True:
+                yield delay(5)
+                memintf.clk.next = not memintf.clk
+
+        @instance
+        def testlogic():
+            reset.next = 0
+            yield delay(15)
+            reset.next = 1
+            yield delay(20)
+            print("Converted! %d" % now())
+            raise StopSimulation
+
+        return dutinst, testlogic, clkdriver
+
+    testInst = test()
+    verify.simulator = 'iverilog'
+    assert testInst.verify_convert() == 0
@@ -0,0 +1,199 @@
+from myhdl import block, instance, delay, ResetSignal, Signal, intbv, \
+    StopSimulation, now
+from myhdl.conversion import verify
+from gemac.intrafaces import RxGMII_Interface, RxFlowInterface
+from gemac.interfaces import RxFIFOClientInterface
+from gemac.rxEngine import rxengine
+from gemac.flowdir import flowkey, flowkeybits, flowentrybits
+from gemac.rss import rsskeywords, rssentries
+from gemac.tlm import GEMACModel, preamble, fcs, flowkey as modelflowkey
+from random import randrange
+import pytest
+
+
+def clkwait(clk, count=1):
+    while count:
+        yield clk.posedge
+        count -= 1
+
+
+def flowframe(src, dst, sport, dport, proto=6, vlan=None, fragment=False,
+              ethtype=b'\x08\x00', paylen=40):
+    """ Wire frame carrying an IPv4 datagram from 'src':'sport' to
+    'dst':'dport', tagged with VLAN ID 'vlan' unless None. """
+    segment = sport.to_bytes(2, 'big') + dport.to_bytes(2, 'big') + \
+        bytes(randrange(256) for _ in range(paylen))
+    header = bytes([0x45, 0]) + (20 + len(segment)).to_bytes(2, 'big') + \
+        bytes([0, 0, 0x20 if fragment else 0x40, 0, 64, proto, 0, 0]) + \
+        bytes(src) + bytes(dst)
+    frame = bytes([0xAB, 0xCD, 0x12, 0x34, 0x56, 0xEF]) + \
+        bytes([0x45, 0x6E, 0xFA, 0xBC, 0xD1, 0x23])
+    if vlan is not None:
+        frame += bytes([0x81, 0x00, 0xA0 | vlan >> 8, vlan & 0xFF])
+    frame = (frame + ethtype + header + segment).ljust(60, b'\x00')
+    return preamble + frame + fcs(frame)
+
+
+def sendgmii(rxgmii_intf, wire):
+    """ Drives wire frame on GMII followed by inter-frame gap. """
+    for byte in wire:
+        rxgmii_intf.data.next = byte
+        rxgmii_intf.dv.next = True
+        yield rxgmii_intf.clk.posedge
+    rxgmii_intf.dv.next = False
+    rxgmii_intf.data.next = 0
+    yield clkwait(rxgmii_intf.clk, count=12)
+
+
+@pytest.fixture()
+def setuptb():
+    rxclientintf = RxFIFOClientInterface()
+    rxgmii_intf = RxGMII_Interface()
+    rxflowintf = RxFlowInterface()
+    rxconfig0 = Signal(intbv(0)[32:])
+    rxconfig1 = Signal(intbv(0x10000000)[32:])
+    filterconfig = Signal(intbv(0x80000000)[32:])
+    addrtable = [Signal(intbv(0)[48:]) for _ in range(4)]
+    keywords = [Signal(intbv(randrange(1 << 32))[32:])
+                for _ in range(rsskeywords)]
+    rsstable = [Signal(intbv(randrange(64))[6:]) for _ in range(rssentries)]
+    rssconfig = Signal(intbv(0x80000000)[32:])
+    flowtable = [Signal(intbv(0)[flowentrybits:]) for _ in range(8)]
+    reset = ResetSignal(1, active=0, async=True)
+    steered = []
+
+    @block
+    def testbench():
+        dutinst = rxengine(rxclientintf, rxgmii_intf, rxflowintf, rxconfig0,
+                           rxconfig1, filterconfig, addrtable, reset,
+                           rsskey=keywords, rsstable=rsstable,
+                           rssconfig=rssconfig, flowtable=flowtable)
+
+        @instance
+        def hostclkdriver():
+            while True:
+                rxgmii_intf.clk.next = not rxgmii_intf.clk
+                yield delay(5)
+
+        @instance
+        def resetonstart():
+            reset.next = 0
+            yield clkwait(rxgmii_intf.clk, count=2)
+            reset.next = 1
+
+        @instance
+        def monitor():
+            while True:
+                yield rxgmii_intf.clk.posedge
+                if rxclientintf.good:
+                    steered.append(int(rxclientintf.queue))
+                elif rxclientintf.filtered:
+                    steered.append(None)
+
+        return dutinst, hostclkdriver, resetonstart, monitor
+
+    return testbench, rxgmii_intf, keywords, rsstable, flowtable, steered
+
+
+def test_flowdirector(setuptb):
+    tb, rxgmii_intf, keywords, rsstable, flowtable, steered = setuptb
+    hosta, hostb = [10, 0, 0, 1], [10, 0, 0, 2]
+    feed = flowframe(hosta, hostb, 1000, 2000)
+    tagged = flowframe(hostb, hosta, 53, 5353, proto=17, vlan=5)
+    bulk = flowframe(hostb, hosta, 4000, 80)
+    other = flowframe(hosta, hostb, 1, 2, ethtype=b'\x88\xb5')
+    model = GEMACModel()
+    model.writeconfig(0x240, 0x10000000)
+    model.writeconfig(0x390, 0x80000000)
+    for i, word in enumerate(keywords):
+        model.writeconfig(0x394 + 4 * i, int(word))
+    for entry, queue in enumerate(rsstable):
+        model.writersstable(entry, int(queue))
+    model.writeconfig(0x3BC, 0x80000000)
+    model.writeflowtable(0, modelflowkey(feed[8:]), 5)
+    model.writeflowtable(1, modelflowkey(tagged[8:]), 9)
+    model.writeflowtable(2, modelflowkey(bulk[8:]), 0, drop=True)
+    model.writeflowtable(3, modelflowkey(other[8:]), 33)
+    # Shadowed by entry 0.
+    model.writeflowtable(4, modelflowkey(feed[8:]), 7)
+    # Not in use.
+    model.writeflowtable(5, modelflowkey(
+        flowframe(hosta, hostb, 1000, 2001)[8:]), 11, valid=False)
+    cases = [
+        (feed, 5),
+        (tagged, 9),
+        (bulk, None),
+        (other, 33),
+        (flowframe(hosta, hostb, 1000, 2001), None),
+        (flowframe(hosta, hostb, 1000, 2000, fragment=True), None),
+        (flowframe(hostb, hosta, 53, 5353, proto=17), None),
+        (flowframe(hostb, hosta, 53, 5353, proto=17, vlan=6), None),
+        (feed, 5),
+    ]
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Flow Director %s" % tbinst)
+
+        @instance
+        def tbstim():
+            for loc in range(len(flowtable)):
+                flowtable[loc].next = model.readflowtable(loc)
+            yield clkwait(rxgmii_intf.clk, count=10)
+            for wire, queue in cases:
+                yield sendgmii(rxgmii_intf, wire)
+            expected = []
+            for wire, queue in cases:
+                frame = model.receive(wire)
+                if queue is not None:
+                    assert model.queue == queue
+                if wire is bulk:
+                    assert frame is None
+                    expected.append(None)
+                else:
+                    expected.append(model.queue)
+            assert steered == expected
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=200000)
+    testInst.quit_sim()
+
+
+def test_convertible():
+
+    @block
+    def test():
+        clk = Signal(bool(0))
+        rxdata = Signal(intbv(0)[8:])
+        go = Signal(bool(0))
+        key = Signal(intbv(0)[flowkeybits:])
+        reset = ResetSignal(1, active=0, async=True)
+        dutinst = flowkey(clk, rxdata, go, key, reset)
+        print("Testing Convertibility %s" % dutinst)
+
+        @instance
+        def hostclkdriver():
+            clk.next = 0
+            while True:
+                yield delay(5)
+                clk.next = not clk
+
+        @instance
+        def testlogic():
+            reset.next = 0
+            yield delay(15)
+            reset.next = 1
+            yield delay(20)
+            print("Converted! %d" % now())
+            raise StopSimulation
+
+        return dutinst, testlogic, hostclkdriver
+
+    testInst = test()
+    verify.simulator = 'iverilog'
+    assert testInst.verify_convert() == 0
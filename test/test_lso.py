@@ -0,0 +1,176 @@
+from myhdl import block, instance, delay, ResetSignal, Signal, intbv, \
+    StopSimulation, now
+from myhdl.conversion import verify
+from gemac.intrafaces import TxGMII_Interface, TxFlowInterface
+from gemac.interfaces import TxFIFOClientInterface, TxLocalLinkFIFOInterface
+from gemac.lso import lso
+from gemac.txEngine import txengine
+from gemac.txFIFO import txFIFO
+from gemac.tlm import GEMACModel, checksumflags, largesend
+from random import randrange
+import pytest
+
+
+def clkwait(clk, count=1):
+    while count:
+        yield clk.posedge
+        count -= 1
+
+
+def randframe(length):
+    return [randrange(256) for _ in range(length)]
+
+
+def tcpbuffer(paylen, vlan=False, options=0, tcpoptions=0, flags=0x19):
+    """ Header template, IPv4 total length counting all of the 'paylen'
+    payload bytes, followed by the payload. """
+    totlen = 20 + 4 * options + 20 + 4 * tcpoptions + paylen
+    header = [0x45 + options, 0x00] + list(totlen.to_bytes(2, 'big')) + \
+        randframe(2) + [0x40, 0x00, 64, 6] + randframe(2) + \
+        [192, 168, 1, 10, 10, 0, 0, 254] + randframe(4 * options)
+    segment = [0x12, 0x34, 0x00, 0x50] + randframe(8) + \
+        [0x50 + 16 * tcpoptions, flags, 0x01, 0x00] + randframe(4) + \
+        randframe(4 * tcpoptions)
+    tag = [0x81, 0x00, 0x00, 0x05] if vlan else []
+    return [0xAB, 0xCD, 0x12, 0x34, 0x56, 0xEF] + \
+        [0x45, 0x6E, 0xFA, 0xBC, 0xD1, 0x23] + tag + [0x08, 0x00] + \
+        header + segment + randframe(paylen)
+
+
+@pytest.fixture()
+def setuptb():
+    txlocallink = TxLocalLinkFIFOInterface()
+    fifolocallink = TxLocalLinkFIFOInterface()
+    txclientintf = TxFIFOClientInterface()
+    txgmii_intf = TxGMII_Interface()
+    txflowintf = TxFlowInterface()
+    txconfig = Signal(intbv(0x10000000)[32:])
+    reset = ResetSignal(1, active=0, async=True)
+    sent = []
+
+    @block
+    def testbench():
+        lsoinst = lso(txlocallink, fifolocallink)
+        fifoinst = txFIFO(fifolocallink, txclientintf)
+        engineinst = txengine(txclientintf, txgmii_intf, txflowintf,
+                              txconfig, reset)
+
+        @instance
+        def clientclkdriver():
+            while True:
+                txlocallink.txclk.next = not txlocallink.txclk
+                yield delay(3)
+
+        @instance
+        def gtxclkdriver():
+            while True:
+                txclientintf.clk.next = not txclientintf.clk
+                yield delay(5)
+
+        @instance
+        def resetonstart():
+            txlocallink.reset.next = 0
+            reset.next = 0
+            yield clkwait(txclientintf.clk, count=2)
+            txlocallink.reset.next = 1
+            reset.next = 1
+
+        @instance
+        def monitor():
+            frame = []
+            while True:
+                yield txclientintf.clk.posedge
+                if txgmii_intf.dv:
+                    frame.append(int(txgmii_intf.data))
+                elif frame:
+                    sent.append(bytes(frame))
+                    frame = []
+
+        return lsoinst, fifoinst, engineinst, clientclkdriver, \
+            gtxclkdriver, resetonstart, monitor
+
+    return testbench, txlocallink, sent
+
+
+def test_segmentation(setuptb):
+    tb, txlocallink, sent = setuptb
+    buffers = [
+        (tcpbuffer(4000), 1460),
+        (tcpbuffer(2001, vlan=True, options=1, tcpoptions=3,
+                   flags=0x99), 536),
+        (tcpbuffer(1000), 1000),
+        (tcpbuffer(10), 536),
+        (tcpbuffer(0), 536),
+        (randframe(100), 0),
+        (tcpbuffer(300), 64),
+    ]
+    # Trailing bytes beyond the IPv4 total length are dropped.
+    buffers[2] = (buffers[2][0] + randframe(5), 1000)
+    model = GEMACModel()
+    model.writeconfig(0x280, 0x10000000)
+    expected = []
+    for buf, mss in buffers:
+        if mss:
+            expected += [model.transmit(frame)
+                         for frame in largesend(buf, mss)]
+        else:
+            expected.append(model.transmit(bytes(buf)))
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Large Send Offload %s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(txlocallink.txclk, count=10)
+            for buf, mss in buffers:
+                yield txlocallink.tx(buf, mss=mss)
+            while len(sent) < len(expected):
+                yield txlocallink.txclk.posedge
+            yield clkwait(txlocallink.txclk, count=100)
+            assert len(sent) == len(expected)
+            assert len(largesend(buffers[0][0], 1460)) == 3
+            assert sent == expected
+            for wire in sent[:9]:
+                assert checksumflags(wire[8:]) == (True, True)
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=1000000)
+    testInst.quit_sim()
+
+
+def test_convertible():
+
+    @block
+    def test():
+        txlocallink = TxLocalLinkFIFOInterface()
+        fifolocallink = TxLocalLinkFIFOInterface()
+        dutinst = lso(txlocallink, fifolocallink)
+        print("Testing Convertibility %s" % dutinst)
+
+        @instance
+        def hostclkdriver():
+            txlocallink.txclk.next = 0
+            while True:
+                yield delay(5)
+                txlocallink.txclk.next = not txlocallink.txclk
+
+        @instance
+        def testlogic():
+            txlocallink.reset.next = 0
+            yield delay(15)
+            txlocallink.reset.next = 1
+            yield delay(20)
+            print("Converted! %d" % now())
+            raise StopSimulation
+
+        return dutinst, testlogic, hostclkdriver
+
+    testInst = test()
+    verify.simulator = 'iverilog'
+    assert testInst.verify_convert() == 0
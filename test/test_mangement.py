@@ -1,5 +1,5 @@
 from gemac.interfaces import HostManagementInterface, MDIOInterface
-from gemac.management import management
+from gemac.management import management, reserved
 from myhdl import instance, delay, block, intbv, now, StopSimulation, \
     ResetSignal, Signal
 from myhdl.conversion import verify
@@ -16,7 +16,7 @@ def clkwait(clk, count=1):
 def setuptb():
     hostintf = HostManagementInterface()
     mdiointf = MDIOInterface()
-    configregs = [Signal(intbv(0)[32:]) for _ in range(10)]
+    configregs = [Signal(intbv(0)[32:]) for _ in range(reserved)]
     addrtable = [Signal(intbv(0)[48:]) for _ in range(4)]
     reset = ResetSignal(1, active=0, async=True)
 
@@ -67,6 +67,34 @@ def test_rwconfig(setuptb):
     testInst.quit_sim()
 
 
+def test_resetrevert(setuptb):
+    tb, hostintf, mdiointf = setuptb
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Reset Bit Reverting %s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(hostintf.clk, count=10)
+            yield hostintf.writeconfig(0x280, 0x10000000)
+            yield hostintf.writeconfig(0x240, 0x90001234)
+            yield clkwait(hostintf.clk, count=4)
+            # Reset bit cleared, the rest of the word kept.
+            yield hostintf.readconfig(0x240)
+            assert hostintf.rddata[32:] == 0x10001234
+            yield hostintf.readconfig(0x280)
+            assert hostintf.rddata[32:] == 0x10000000
+
+        return tbstim, tbinst
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=500)
+    testInst.quit_sim()
+
+
 def test_rwaddrtable(setuptb):
     tb, hostintf, mdiointf = setuptb
 
@@ -94,6 +122,147 @@ def test_rwaddrtable(setuptb):
     testInst.quit_sim()
 
 
+def test_rwrsstable(setuptb):
+    tb, hostintf, mdiointf = setuptb
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Read/Write Indirection Table%s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(hostintf.clk, count=10)
+            yield hostintf.writersstable(100, 0x2A)
+            yield hostintf.writersstable(3, 0x15)
+            yield clkwait(hostintf.clk, count=4)
+            yield hostintf.readrsstable(100)
+            assert hostintf.rddata[6:] == 0x2A
+            yield hostintf.readrsstable(3)
+            assert hostintf.rddata[6:] == 0x15
+
+        return tbstim, tbinst
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=500)
+    testInst.quit_sim()
+
+
+def test_rwflowtable(setuptb):
+    tb, hostintf, mdiointf = setuptb
+    # Destination address, VLAN tag, IPv4 addresses, ports and EtherType.
+    key = (0xABCD123456EF << 128) | (0x8005 << 112) | (0x0A000001 << 80) | \
+        (0x0A000002 << 48) | (1000 << 32) | (2000 << 16) | 0x0800
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Read/Write Flow Director Table%s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(hostintf.clk, count=10)
+            yield hostintf.writeflowtable(1, key, 0x2A, drop=True)
+            yield clkwait(hostintf.clk, count=4)
+            yield hostintf.readflowtable(1)
+            words = []
+            for _ in range(6):
+                words.append(int(hostintf.rddata))
+                yield hostintf.clk.posedge
+            assert words == [0xABCD1234, 0x56EF8005, 0x0A000001, 0x0A000002,
+                             0x03E807D0, 0xEA000800]
+
+        return tbstim, tbinst
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=1000)
+    testInst.quit_sim()
+
+
+def test_rwtxweight(setuptb):
+    tb, hostintf, mdiointf = setuptb
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Read/Write Transmit Weights%s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(hostintf.clk, count=10)
+            yield hostintf.writetxweight(6, 0x2EE0)
+            yield hostintf.writetxweight(1, 0x05DC)
+            yield clkwait(hostintf.clk, count=4)
+            yield hostintf.readtxweight(6)
+            assert hostintf.rddata[16:] == 0x2EE0
+            yield hostintf.readtxweight(1)
+            assert hostintf.rddata[16:] == 0x05DC
+
+        return tbstim, tbinst
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=500)
+    testInst.quit_sim()
+
+
+def test_rwshaper(setuptb):
+    tb, hostintf, mdiointf = setuptb
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Read/Write Shaper Parameters%s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(hostintf.clk, count=10)
+            yield hostintf.writeshaper(5, 0x4000, 0xC000, 0x06400000,
+                                       -0x06400000)
+            yield clkwait(hostintf.clk, count=4)
+            values = []
+            for param in range(4):
+                yield hostintf.readshaper(5, param)
+                values.append(int(hostintf.rddata))
+            assert values == [0x4000, 0xC000, 0x06400000, 0xF9C00000]
+
+        return tbstim, tbinst
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=1000)
+    testInst.quit_sim()
+
+
+def test_rwgcl(setuptb):
+    tb, hostintf, mdiointf = setuptb
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Read/Write Gate Control List%s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(hostintf.clk, count=10)
+            yield hostintf.writegcl(3, 0x81, 20000)
+            yield hostintf.writetasparam(4, 5180)
+            yield clkwait(hostintf.clk, count=4)
+            yield hostintf.readgcl(3)
+            assert hostintf.rddata == 0x81004E20
+            yield hostintf.readtasparam(4)
+            assert hostintf.rddata == 5180
+
+        return tbstim, tbinst
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=1000)
+    testInst.quit_sim()
+
+
 def test_mdioclkgen(setuptb):
     tb, hostintf, mdiointf = setuptb
 
@@ -204,7 +373,7 @@ def test_convertible():
     def test():
         hostintf = HostManagementInterface()
         mdiointf = MDIOInterface()
-        configregs = [Signal(intbv(0)[32:]) for _ in range(10)]
+        configregs = [Signal(intbv(0)[32:]) for _ in range(reserved)]
         addrtable = [Signal(intbv(0)[48:]) for _ in range(4)]
         reset = ResetSignal(1, active=0, async=True)
         dutInst = management(hostintf, mdiointf, configregs, addrtable, reset)
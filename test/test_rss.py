@@ -0,0 +1,322 @@
+from myhdl import block, instance, delay, ResetSignal, Signal, intbv, \
+    StopSimulation, now
+from myhdl.conversion import verify
+from gemac.intrafaces import RxGMII_Interface, RxFlowInterface
+from gemac.interfaces import RxFIFOClientInterface, FlowControlInterface, \
+    RxLocalLinkFIFOInterface
+from gemac.rxEngine import rxengine
+from gemac.rxFIFO import rxqueues
+from gemac.rss import rsshash, rsskeywords, rssentries
+from gemac.tlm import GEMACModel, preamble, fcs
+from random import randrange
+import pytest
+
+rsskey = bytes.fromhex('6d5a56da255b0ec24167253d43a38fb0d0ca2bcb'
+                       'ae7b30b477cb2da38030f20c6a42b73bbeac01fa')
+""" Verification key of the Microsoft Receive Side Scaling specification."""
+
+
+def clkwait(clk, count=1):
+    while count:
+        yield clk.posedge
+        count -= 1
+
+
+def randframe(length):
+    return [randrange(256) for _ in range(length)]
+
+
+def flowframe(src, dst, sport, dport, proto=6, vlan=False, fragment=False,
+              paylen=40):
+    """ Wire frame carrying an IPv4 datagram, or IPv6 for 16-byte
+    addresses, from 'src':'sport' to 'dst':'dport'. """
+    ports = sport.to_bytes(2, 'big') + dport.to_bytes(2, 'big')
+    segment = ports + bytes(randframe(paylen))
+    if len(src) == 16:
+        ethtype = b'\x86\xdd'
+        header = bytes([0x60, 0, 0, 0]) + len(segment).to_bytes(2, 'big') + \
+            bytes([proto, 64]) + src + dst
+    else:
+        ethtype = b'\x08\x00'
+        header = bytes([0x45, 0]) + (20 + len(segment)).to_bytes(2, 'big') + \
+            bytes([0, 0, 0x20 if fragment else 0x40, 0, 64, proto, 0, 0]) + \
+            src + dst
+    frame = bytes([0xAB, 0xCD, 0x12, 0x34, 0x56, 0xEF]) + \
+        bytes([0x45, 0x6E, 0xFA, 0xBC, 0xD1, 0x23])
+    if vlan:
+        frame += bytes([0x81, 0x00, 0x00, 0x05])
+    frame = (frame + ethtype + header + segment).ljust(60, b'\x00')
+    return preamble + frame + fcs(frame)
+
+
+def send(rxclientintf, datastream, status='good', queue=0):
+    """ Drives a frame as the Receive Engine does, ending in 'status'. """
+    for d in datastream:
+        rxclientintf.data.next = d
+        rxclientintf.dv.next = True
+        yield rxclientintf.clk.posedge
+    rxclientintf.dv.next = False
+    rxclientintf.good.next = status == 'good'
+    rxclientintf.bad.next = status == 'bad'
+    rxclientintf.queue.next = queue
+    yield rxclientintf.clk.posedge
+    rxclientintf.good.next = False
+    rxclientintf.bad.next = False
+    rxclientintf.queue.next = 0
+    yield clkwait(rxclientintf.clk, count=12)
+
+
+def sendgmii(rxgmii_intf, wire):
+    """ Drives wire frame on GMII followed by inter-frame gap. """
+    for byte in wire:
+        rxgmii_intf.data.next = byte
+        rxgmii_intf.dv.next = True
+        yield rxgmii_intf.clk.posedge
+    rxgmii_intf.dv.next = False
+    rxgmii_intf.data.next = 0
+    yield clkwait(rxgmii_intf.clk, count=12)
+
+
+@pytest.fixture()
+def setuptb():
+    rxclientintf = RxFIFOClientInterface()
+    rxgmii_intf = RxGMII_Interface()
+    rxflowintf = RxFlowInterface()
+    rxconfig0 = Signal(intbv(0)[32:])
+    rxconfig1 = Signal(intbv(0x10000000)[32:])
+    filterconfig = Signal(intbv(0x80000000)[32:])
+    addrtable = [Signal(intbv(0)[48:]) for _ in range(4)]
+    keywords = [Signal(intbv(int.from_bytes(rsskey[4*i:4*i+4], 'big'))[32:])
+                for i in range(rsskeywords)]
+    rsstable = [Signal(intbv(randrange(64))[6:]) for _ in range(rssentries)]
+    rssconfig = Signal(intbv(0x80000000)[32:])
+    reset = ResetSignal(1, active=0, async=True)
+    steered = []
+
+    @block
+    def testbench():
+        dutinst = rxengine(rxclientintf, rxgmii_intf, rxflowintf, rxconfig0,
+                           rxconfig1, filterconfig, addrtable, reset,
+                           rsskey=keywords, rsstable=rsstable,
+                           rssconfig=rssconfig)
+
+        @instance
+        def hostclkdriver():
+            while True:
+                rxgmii_intf.clk.next = not rxgmii_intf.clk
+                yield delay(5)
+
+        @instance
+        def resetonstart():
+            reset.next = 0
+            yield clkwait(rxgmii_intf.clk, count=2)
+            reset.next = 1
+
+        @instance
+        def monitor():
+            while True:
+                yield rxgmii_intf.clk.posedge
+                if rxclientintf.good:
+                    steered.append((int(rxclientintf.rsshash),
+                                    int(rxclientintf.queue)))
+
+        return dutinst, hostclkdriver, resetonstart, monitor
+
+    return testbench, rxgmii_intf, rsstable, rssconfig, steered
+
+
+def test_rsshash(setuptb):
+    tb, rxgmii_intf, rsstable, rssconfig, steered = setuptb
+    ipv4src, ipv4dst = bytes([66, 9, 149, 187]), bytes([161, 142, 100, 80])
+    ipv6src = bytes.fromhex('3ffe250102001fff0000000000000007')
+    ipv6dst = bytes.fromhex('3ffe2501020000030000000000000001')
+    cases = [
+        (flowframe(ipv4src, ipv4dst, 2794, 1766), 0x51ccc178),
+        (flowframe(ipv4src, ipv4dst, 2794, 1766, proto=1), 0x323e8fc2),
+        (flowframe(ipv4src, ipv4dst, 2794, 1766, proto=17, vlan=True),
+         0x51ccc178),
+        (flowframe(ipv4src, ipv4dst, 2794, 1766, fragment=True), 0x323e8fc2),
+        (flowframe(ipv6src, ipv6dst, 2794, 1766), 0x40207d3d),
+        (flowframe(ipv6src, ipv6dst, 2794, 1766, proto=58, vlan=True),
+         0x2cc18cd5),
+    ]
+    cases += [(flowframe(bytes(randframe(4)), bytes(randframe(4)),
+                         randrange(1 << 16), randrange(1 << 16),
+                         proto=17, paylen=randrange(100)), None)
+              for _ in range(8)]
+    # Neither IPv4 nor IPv6.
+    wire = bytearray(cases[0][0][:-4])
+    wire[8 + 12:8 + 14] = b'\x88\xb5'
+    cases.append((bytes(wire) + fcs(wire[8:]), 0))
+    model = GEMACModel()
+    model.writeconfig(0x240, 0x10000000)
+    model.writeconfig(0x390, 0x80000000)
+    for i in range(rsskeywords):
+        model.writeconfig(0x394 + 4 * i,
+                          int.from_bytes(rsskey[4*i:4*i+4], 'big'))
+    for entry in range(rssentries):
+        model.writeconfig(0x304, (entry << 16) | int(rsstable[entry]))
+    model.writeconfig(0x3BC, 0x80000000)
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Receive Side Scaling Hash %s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(rxgmii_intf.clk, count=10)
+            for wire, rsshashval in cases:
+                yield sendgmii(rxgmii_intf, wire)
+            rssconfig.next = 0
+            yield sendgmii(rxgmii_intf, cases[0][0])
+            expected = []
+            for wire, rsshashval in cases:
+                assert model.receive(wire) is not None
+                if rsshashval is not None:
+                    assert model.rsshash == rsshashval
+                assert model.queue == rsstable[model.rsshash % rssentries]
+                expected.append((model.rsshash, model.queue))
+            assert model.readrsstable(5) == rsstable[5]
+            model.writeconfig(0x3BC, 0)
+            model.receive(cases[0][0])
+            assert model.queue == 0
+            expected.append((model.rsshash, 0))
+            assert steered == expected
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=200000)
+    testInst.quit_sim()
+
+
+def test_rxqueues():
+    queues = 4
+    rxlocallinks = [RxLocalLinkFIFOInterface() for _ in range(queues)]
+    rxclientintf = RxFIFOClientInterface()
+    flowintf = FlowControlInterface()
+    streams = [(randframe(randrange(60, 120)), randrange(queues - 1))
+               for _ in range(30)]
+    # Queue 3 is read only once paused, being filled past its watermark.
+    streams += [(randframe(120), 3) for _ in range(7)]
+    received = [[] for _ in range(queues)]
+    pauses = []
+
+    @block
+    def test():
+        dutinst = rxqueues(rxlocallinks, rxclientintf, flowintf, size=8,
+                           depth=1024, pausequanta=0x40)
+        print("Testing Receive Queues %s" % dutinst)
+
+        @instance
+        def engineclkdriver():
+            while True:
+                rxclientintf.clk.next = not rxclientintf.clk
+                yield delay(4)
+
+        @instance
+        def clientclkdriver():
+            while True:
+                for ll in rxlocallinks:
+                    ll.rxclk.next = not ll.rxclk
+                yield delay(5)
+
+        @instance
+        def resetonstart():
+            for ll in rxlocallinks:
+                ll.reset.next = 0
+            yield clkwait(rxlocallinks[0].rxclk, count=2)
+            for ll in rxlocallinks:
+                ll.reset.next = 1
+
+        @instance
+        def monitor():
+            while True:
+                yield rxclientintf.clk.posedge
+                if flowintf.pausereq:
+                    pauses.append(int(flowintf.pauseval))
+                assert not rxclientintf.overflow
+
+        @block
+        def reader(q, count):
+            @instance
+            def readqueue():
+                yield clkwait(rxlocallinks[q].rxclk, count=10)
+                if q == 3:
+                    while not pauses:
+                        yield rxlocallinks[q].rxclk.posedge
+                while len(received[q]) < count:
+                    frame = []
+                    yield rxlocallinks[q].rx(frame)
+                    received[q].append(frame)
+
+            return readqueue
+
+        readers = [reader(q, sum(1 for _, sq in streams if sq == q))
+                   for q in range(queues)]
+
+        @instance
+        def tbstim():
+            yield clkwait(rxclientintf.clk, count=20)
+            for i, (data, q) in enumerate(streams):
+                if i == 10:
+                    # Committed by none of the queues.
+                    yield send(rxclientintf, randframe(100), status='bad',
+                               queue=1)
+                yield send(rxclientintf, data, queue=q)
+            while sum(len(r) for r in received) < len(streams):
+                yield rxclientintf.clk.posedge
+            yield clkwait(rxclientintf.clk, count=20)
+            for q in range(queues):
+                assert received[q] == [data for data, sq in streams
+                                       if sq == q]
+            assert pauses[0] == 0x40 and pauses[-1] == 0
+            assert pauses.count(0) == 1
+            raise StopSimulation
+
+        return dutinst, engineclkdriver, clientclkdriver, resetonstart, \
+            monitor, readers, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=1000000)
+    testInst.quit_sim()
+
+
+def test_convertible():
+
+    @block
+    def test():
+        clk = Signal(bool(0))
+        rxdata = Signal(intbv(0)[8:])
+        go = Signal(bool(0))
+        key = Signal(intbv(int.from_bytes(rsskey, 'big'))[320:])
+        hashval = Signal(intbv(0)[32:])
+        reset = ResetSignal(1, active=0, async=True)
+        dutinst = rsshash(clk, rxdata, go, key, hashval, reset)
+        print("Testing Convertibility %s" % dutinst)
+
+        @instance
+        def hostclkdriver():
+            clk.next = 0
+            while True:
+                yield delay(5)
+                clk.next = not clk
+
+        @instance
+        def testlogic():
+            reset.next = 0
+            yield delay(15)
+            reset.next = 1
+            yield delay(20)
+            print("Converted! %d" % now())
+            raise StopSimulation
+
+        return dutinst, testlogic, hostclkdriver
+
+    testInst = test()
+    verify.simulator = 'iverilog'
+    assert testInst.verify_convert() == 0
@@ -0,0 +1,323 @@
+from myhdl import block, instance, delay, StopSimulation, now, Signal, intbv
+from myhdl.conversion import verify
+from gemac.interfaces import FlowControlInterface, RxFIFOClientInterface, \
+    RxLocalLinkFIFOInterface, RxDropCountInterface
+from gemac.intrafaces import TxFlowInterface, RxFlowInterface
+from gemac.rxFIFO import rxFIFO
+from gemac.flowControl import flowcontrol
+from random import randrange, choice
+import pytest
+
+
+def clkwait(clk, count=1):
+    while count:
+        yield clk.posedge
+        count -= 1
+
+
+def randframe(length):
+    return [randrange(256) for _ in range(length)]
+
+
+def send(rxclientintf, datastream, status='good'):
+    """ Drives a frame as the Receive Engine does, ending in 'status'. """
+    for d in datastream:
+        rxclientintf.data.next = d
+        rxclientintf.dv.next = True
+        yield rxclientintf.clk.posedge
+    rxclientintf.dv.next = False
+    rxclientintf.good.next = status == 'good'
+    rxclientintf.bad.next = status == 'bad'
+    rxclientintf.filtered.next = status == 'filtered'
+    yield rxclientintf.clk.posedge
+    rxclientintf.good.next = False
+    rxclientintf.bad.next = False
+    rxclientintf.filtered.next = False
+    yield clkwait(rxclientintf.clk, count=12)
+
+
+@pytest.fixture(params=[(4096, 20), (256, 4)])
+def setuptb(request):
+    depth, size = request.param
+    rxlocallink = RxLocalLinkFIFOInterface()
+    rxclientintf = RxFIFOClientInterface()
+    flowintf = FlowControlInterface()
+    dropcountintf = RxDropCountInterface()
+    pauses = []
+    overflows = []
+
+    @block
+    def testbench():
+        fifoinst = rxFIFO(rxlocallink, rxclientintf, flowintf, size=size,
+                          depth=depth, pausequanta=0x40,
+                          dropcount_interface=dropcountintf)
+
+        @instance
+        def engineclkdriver():
+            while True:
+                rxclientintf.clk.next = not rxclientintf.clk
+                yield delay(4)
+
+        @instance
+        def clientclkdriver():
+            while True:
+                rxlocallink.rxclk.next = not rxlocallink.rxclk
+                yield delay(5)
+
+        @instance
+        def resetonstart():
+            rxlocallink.reset.next = 0
+            yield clkwait(rxlocallink.rxclk, count=2)
+            rxlocallink.reset.next = 1
+
+        @instance
+        def monitor():
+            while True:
+                yield rxclientintf.clk.posedge
+                if flowintf.pausereq:
+                    pauses.append((now(), int(flowintf.pauseval)))
+                if rxclientintf.overflow:
+                    overflows.append(now())
+
+        return fifoinst, engineclkdriver, clientclkdriver, resetonstart, \
+            monitor
+
+    return testbench, rxlocallink, rxclientintf, dropcountintf, depth, size, \
+        pauses, overflows
+
+
+def test_goodbad(setuptb):
+    tb, rxlocallink, rxclientintf, dropcountintf, depth, size, pauses, \
+        overflows = setuptb
+    streams = [(randframe(randrange(60, depth // 4)),
+                choice(['good', 'good', 'bad', 'filtered']))
+               for _ in range(20)]
+    received = []
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Good and Bad Frames %s" % tbinst)
+
+        @instance
+        def reader():
+            while True:
+                frame = []
+                yield rxlocallink.rx(frame)
+                received.append(frame)
+                yield clkwait(rxlocallink.rxclk, count=randrange(5))
+
+        @instance
+        def tbstim():
+            yield clkwait(rxclientintf.clk, count=10)
+            for stream, status in streams:
+                yield send(rxclientintf, stream, status)
+            yield clkwait(rxlocallink.rxclk, count=depth)
+            statuses = [status for stream, status in streams]
+            assert received == [stream for stream, status in streams
+                                if status == 'good']
+            assert dropcountintf.bad == statuses.count('bad')
+            assert dropcountintf.filtered == statuses.count('filtered')
+            assert not overflows and dropcountintf.overflow == 0
+            raise StopSimulation
+
+        return tbinst, reader, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=1000000)
+    testInst.quit_sim()
+
+
+def test_pause(setuptb):
+    tb, rxlocallink, rxclientintf, dropcountintf, depth, size, pauses, \
+        overflows = setuptb
+    streams = [randframe(depth // 16) for _ in range(size)]
+    received = []
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Watermark Pause %s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(rxclientintf.clk, count=10)
+            # Client stalled, fills until the link partner would pause.
+            for stream in streams:
+                if pauses:
+                    break
+                yield send(rxclientintf, stream)
+            assert pauses and pauses[0][1] == 0x40
+            # Pause repeated at half the pause time while still filled.
+            yield clkwait(rxclientintf.clk, count=0x40 * 64)
+            assert len(pauses) >= 2
+            assert all(val == 0x40 for t, val in pauses)
+            while pauses[-1][1]:
+                frame = []
+                yield rxlocallink.rx(frame)
+                received.append(frame)
+            assert rxlocallink.fifostatus <= 11
+            assert received == streams[:len(received)]
+            assert not overflows
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=2000000)
+    testInst.quit_sim()
+
+
+def test_overflow(setuptb):
+    tb, rxlocallink, rxclientintf, dropcountintf, depth, size, pauses, \
+        overflows = setuptb
+    streams = [randframe(depth // 4 + 10) for _ in range(6)]
+    received = []
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Overflow %s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(rxclientintf.clk, count=10)
+            for stream in streams[:4]:
+                yield send(rxclientintf, stream)
+            # Dropped for lack of room, counted once whatever its end.
+            yield send(rxclientintf, streams[3], 'bad')
+            assert len(overflows) == 2
+            assert dropcountintf.overflow == 2
+            assert dropcountintf.bad == 0
+            assert rxlocallink.fifostatus >= 12
+            for _ in range(3):
+                frame = []
+                yield rxlocallink.rx(frame)
+                received.append(frame)
+            for stream in streams[4:]:
+                yield send(rxclientintf, stream)
+            for _ in range(2):
+                frame = []
+                yield rxlocallink.rx(frame)
+                received.append(frame)
+            assert len(overflows) == 2
+            assert received == streams[:3] + streams[4:]
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=2000000)
+    testInst.quit_sim()
+
+
+def test_pausecrossing():
+    rxlocallink = RxLocalLinkFIFOInterface()
+    rxclientintf = RxFIFOClientInterface()
+    flowintf = FlowControlInterface()
+    txflowintf = TxFlowInterface()
+    rxflowintf = RxFlowInterface()
+    # Transmit flow control enabled.
+    flowconfig = Signal(intbv(1 << 30)[32:])
+    streams = [randframe(16) for _ in range(12)]
+    requests = []
+
+    @block
+    def test():
+        fifoinst = rxFIFO(rxlocallink, rxclientintf, flowintf, size=4,
+                          depth=256, pausequanta=0x100,
+                          txclk=txflowintf.clk)
+        flowinst = flowcontrol(flowintf, txflowintf, rxflowintf, flowconfig,
+                               rxlocallink.reset)
+        print("Testing Pause Requests across Clocks %s" % fifoinst)
+
+        @instance
+        def engineclkdriver():
+            while True:
+                rxclientintf.clk.next = not rxclientintf.clk
+                yield delay(4)
+
+        @instance
+        def clientclkdriver():
+            while True:
+                rxlocallink.rxclk.next = not rxlocallink.rxclk
+                yield delay(5)
+
+        @instance
+        def txclkdriver():
+            # Slower than the Receive Engine clock and unrelated to it.
+            while True:
+                txflowintf.clk.next = not txflowintf.clk
+                yield delay(13)
+
+        @instance
+        def monitor():
+            while True:
+                yield txflowintf.clk.posedge
+                if txflowintf.pausereq:
+                    requests.append(int(txflowintf.pauseval))
+
+        @instance
+        def tbstim():
+            rxlocallink.reset.next = 0
+            yield clkwait(rxlocallink.rxclk, count=2)
+            rxlocallink.reset.next = 1
+            yield clkwait(rxclientintf.clk, count=10)
+            # Two frames held, each frame in and out crossing the
+            # watermarks, a pause and a resume a few clocks apart.
+            for stream in streams[:2]:
+                yield send(rxclientintf, stream)
+            for stream in streams[2:]:
+                yield send(rxclientintf, stream)
+                frame = []
+                yield rxlocallink.rx(frame)
+            yield clkwait(txflowintf.clk, count=20)
+            assert requests == [0x100, 0] * (len(streams) - 2)
+            raise StopSimulation
+
+        return fifoinst, flowinst, engineclkdriver, clientclkdriver, \
+            txclkdriver, monitor, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=1000000)
+    testInst.quit_sim()
+
+
+def test_convertible():
+
+    @block
+    def test():
+        rxlocallink = RxLocalLinkFIFOInterface()
+        rxclientintf = RxFIFOClientInterface()
+        flowintf = FlowControlInterface()
+        dutinst = rxFIFO(rxlocallink, rxclientintf, flowintf, size=4,
+                         depth=64, txclk=rxlocallink.rxclk)
+        print("Testing Convertibility %s" % dutinst)
+
+        @instance
+        def hostclkdriver():
+            rxlocallink.rxclk.next = 0
+            rxclientintf.clk.next = 0
+            while True:
+                yield delay(5)
+                rxlocallink.rxclk.next = not rxlocallink.rxclk
+                rxclientintf.clk.next = not rxclientintf.clk
+
+        @instance
+        def testlogic():
+            rxlocallink.reset.next = 0
+            yield delay(15)
+            rxlocallink.reset.next = 1
+            yield delay(20)
+            print("Converted! %d" % now())
+            raise StopSimulation
+
+        return dutinst, testlogic, hostclkdriver
+
+    testInst = test()
+    verify.simulator = 'iverilog'
+    assert testInst.verify_convert() == 0
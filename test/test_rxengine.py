@@ -5,6 +5,7 @@ from gemac.intrafaces import RxGMII_Interface, RxFlowInterface
 from gemac.rxEngine import rxengine
 from gemac.interfaces import RxFIFOClientInterface
 import pytest
+import zlib
 
 datastream = [0x12, 0x34, 0x56, 0x78, 0x9A, 0xBC, 0xDE, 0xF0,
               0x12, 0x34, 0x56, 0x78, 0x9A, 0xBC, 0xDE, 0xF0,
@@ -134,6 +135,100 @@ def test_normalreceive(setuptb):
     assert runcheck
 
 
+def wireframe(frame):
+    """ Preamble, SFD, the frame and its frame check sequence. """
+    crc = zlib.crc32(bytes(frame))
+    return [pre] * 7 + [sfd] + frame + \
+        [(crc >> (8 * i)) & 0xFF for i in range(4)]
+
+
+def receive(setuptb, frames, filterval):
+    """ Sends the frames, returns the ones passed on and the strobes. """
+    tb, rxclientintf, rxgmii_intf, rxflowintf, rxconfig0, rxconfig1, \
+        filterconfig, addrtable = setuptb
+    received = []
+    strobes = []
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Receive %s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(rxgmii_intf.clk, count=10)
+            rxconfig1.next = 0x10000000
+            filterconfig.next = filterval
+            for frame in frames:
+                for d in wireframe(frame):
+                    rxgmii_intf.data.next = d
+                    rxgmii_intf.dv.next = True
+                    yield rxgmii_intf.clk.posedge
+                rxgmii_intf.data.next = 0x00
+                rxgmii_intf.dv.next = False
+                yield clkwait(rxgmii_intf.clk, count=12)
+            yield clkwait(rxgmii_intf.clk, count=20)
+            raise StopSimulation
+
+        @instance
+        def monitor():
+            data = []
+            last = dict(good=False, bad=False, filtered=False)
+            while True:
+                yield rxgmii_intf.clk.posedge
+                if rxclientintf.dv:
+                    data.append(int(rxclientintf.data))
+                for strobe in last:
+                    level = bool(getattr(rxclientintf, strobe))
+                    if level and not last[strobe]:
+                        strobes.append(strobe)
+                        if strobe == 'good':
+                            received.append(data)
+                        data = []
+                    last[strobe] = level
+
+        return tbinst, tbstim, monitor
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=20000)
+    testInst.quit_sim()
+    return received, strobes
+
+
+def test_typeframe(setuptb):
+    # A type field in place of the length, length checks on.
+    frame = destaddr + srcaddr + [0x08, 0x00] + datastream
+    received, strobes = receive(setuptb, [frame], 0x80000000)
+    assert received == [frame]
+    assert strobes == ['good']
+
+
+def test_paddingremoval(setuptb):
+    # 20 data bytes padded up to the 46 byte minimum.
+    frame = destaddr + srcaddr + [0x00, 20] + datastream[:20]
+    received, strobes = receive(setuptb, [frame + [0x00] * 26], 0x80000000)
+    assert received == [frame]
+    assert strobes == ['good']
+
+
+def test_broadcast(setuptb):
+    # Taken with the address filter on and no address set.
+    frame = [0xFF] * 6 + srcaddr + [0x08, 0x00] + datastream
+    received, strobes = receive(setuptb, [frame], 0x00000000)
+    assert received == [frame]
+    assert strobes == ['good']
+
+
+def test_filteredframe(setuptb):
+    # Dropped once, without a bad frame strobe, and the next one taken.
+    frame = destaddr + srcaddr + [0x08, 0x00] + datastream
+    bcast = [0xFF] * 6 + srcaddr + [0x08, 0x00] + datastream
+    received, strobes = receive(setuptb, [frame, bcast], 0x00000000)
+    assert received == [bcast]
+    assert strobes == ['filtered', 'good']
+
+
 def test_convertible():
 
     @block
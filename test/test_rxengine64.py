@@ -0,0 +1,345 @@
+from myhdl import block, instance, delay, ResetSignal, Signal, intbv,\
+    StopSimulation, now
+from myhdl.conversion import verify
+from gemac.intrafaces import RxXGMII_Interface, RxFlowInterface
+from gemac.rxEngine64 import rxengine64
+from gemac.interfaces import RxFIFOClientInterface
+from random import randrange
+import pytest
+import zlib
+
+destaddr = [0xAB, 0xCD, 0x12, 0x34, 0x56, 0xEF]
+srcaddr = [0x45, 0x6E, 0xFA, 0xBC, 0xD1, 0x23]
+
+
+def clkwait(clk, count=1):
+    while count:
+        yield clk.posedge
+        count -= 1
+
+
+def xgmiiwords(frame, badcrc=False):
+    """ Frames bytes as XGMII (data, ctrl) words, lane 0 least significant.
+
+    Adds start, preamble, SFD, frame check sequence and terminate, and fills
+    up the last word with idles.
+
+    """
+    crc = zlib.crc32(bytes(frame)) ^ (0xFF if badcrc else 0)
+    lanes = [(0xFB, 1)] + [(0x55, 0)] * 6 + [(0xD5, 0)]
+    lanes += [(d, 0) for d in frame]
+    lanes += [((crc >> (8 * i)) & 0xFF, 0) for i in range(4)]
+    lanes += [(0xFD, 1)]
+    lanes += [(0x07, 1)] * (-len(lanes) % 8)
+    words = []
+    for i in range(0, len(lanes), 8):
+        data = ctrl = 0
+        for l, (d, c) in enumerate(lanes[i:i+8]):
+            data |= d << (8 * l)
+            ctrl |= c << l
+        words.append((data, ctrl))
+    return words
+
+
+@pytest.fixture()
+def setuptb():
+    rxclientintf = RxFIFOClientInterface(width=64)
+    rxxgmii_intf = RxXGMII_Interface()
+    rxflowintf = RxFlowInterface()
+    rxconfig0 = Signal(intbv(0)[32:])
+    rxconfig1 = Signal(intbv(0)[32:])
+    filterconfig = Signal(intbv(0)[32:])
+    addrtable = [Signal(intbv(0)[48:]) for _ in range(4)]
+    reset = ResetSignal(1, active=0, async=True)
+    received = []
+
+    @block
+    def testbench():
+        dutinst = rxengine64(rxclientintf, rxxgmii_intf, rxflowintf,
+                             rxconfig0, rxconfig1, filterconfig, addrtable,
+                             reset)
+
+        @instance
+        def hostclkdriver():
+            while True:
+                rxxgmii_intf.clk.next = not rxxgmii_intf.clk
+                yield delay(5)
+
+        @instance
+        def resetonstart():
+            reset.next = 0
+            yield clkwait(rxxgmii_intf.clk, count=2)
+            reset.next = 1
+            yield clkwait(rxxgmii_intf.clk, count=2)
+
+        @instance
+        def monitor():
+            frame = []
+            while True:
+                yield rxxgmii_intf.clk.posedge
+                if rxclientintf.dv:
+                    for l in range(8):
+                        if rxclientintf.keep[l]:
+                            frame.append(int(rxclientintf.data[8*l+8:8*l]))
+                if rxclientintf.good or rxclientintf.bad:
+                    received.append((frame, bool(rxclientintf.good)))
+                    frame = []
+                elif rxclientintf.filtered:
+                    received.append((frame, None))
+                    frame = []
+
+        return dutinst, hostclkdriver, resetonstart, monitor
+
+    def send(words):
+        for data, ctrl in words:
+            rxxgmii_intf.data.next = data
+            rxxgmii_intf.ctrl.next = ctrl
+            yield rxxgmii_intf.clk.posedge
+        rxxgmii_intf.data.next = 0x0707070707070707
+        rxxgmii_intf.ctrl.next = 0xFF
+
+    return testbench, send, rxxgmii_intf, rxconfig1, filterconfig, \
+        addrtable, rxflowintf, received
+
+
+def randframe(length, dest=destaddr):
+    return dest + srcaddr + [0x08, 0x00] + \
+        [randrange(256) for _ in range(length)]
+
+
+def test_normalreceive(setuptb):
+    tb, send, rxxgmii_intf, rxconfig1, filterconfig, addrtable, rxflowintf, \
+        received = setuptb
+    frames = [randframe(length)
+              for length in (46, 47, 49, 50, 51, 52, 53, 100, 1500)]
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Normal Receive Operation %s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(rxxgmii_intf.clk, count=10)
+            rxconfig1.next = 0x10000000
+            addrtable[1].next = 0xABCD123456EF
+            yield clkwait(rxxgmii_intf.clk, count=2)
+            for frame in frames:
+                yield send(xgmiiwords(frame))
+            yield clkwait(rxxgmii_intf.clk, count=5)
+            assert received == [(frame, True) for frame in frames]
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=20000)
+    testInst.quit_sim()
+
+
+def test_paddingremoval(setuptb):
+    tb, send, rxxgmii_intf, rxconfig1, filterconfig, addrtable, rxflowintf, \
+        received = setuptb
+    frames = [destaddr + srcaddr + [0x00, length] +
+              [randrange(256) for _ in range(length)]
+              for length in (1, 7, 20, 37, 41, 45)]
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Padding Removal %s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(rxxgmii_intf.clk, count=10)
+            rxconfig1.next = 0x10000000
+            addrtable[1].next = 0xABCD123456EF
+            yield clkwait(rxxgmii_intf.clk, count=2)
+            for frame in frames:
+                yield send(xgmiiwords(frame + [0x00] * (60 - len(frame))))
+            yield clkwait(rxxgmii_intf.clk, count=5)
+            assert received == [(frame, True) for frame in frames]
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=20000)
+    testInst.quit_sim()
+
+
+def test_inbandfcs(setuptb):
+    tb, send, rxxgmii_intf, rxconfig1, filterconfig, addrtable, rxflowintf, \
+        received = setuptb
+    frame = randframe(61)
+    crc = zlib.crc32(bytes(frame))
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing In-band FCS %s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(rxxgmii_intf.clk, count=10)
+            rxconfig1.next = 0x30000000
+            filterconfig.next = 0x80000000
+            yield clkwait(rxxgmii_intf.clk, count=2)
+            yield send(xgmiiwords(frame))
+            yield clkwait(rxxgmii_intf.clk, count=5)
+            assert received == [
+                (frame + [(crc >> (8 * i)) & 0xFF for i in range(4)], True)]
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=2000)
+    testInst.quit_sim()
+
+
+def test_badframes(setuptb):
+    tb, send, rxxgmii_intf, rxconfig1, filterconfig, addrtable, rxflowintf, \
+        received = setuptb
+    goodframe = randframe(80)
+    badcrcframe = randframe(80)
+    runtframe = randframe(20)
+    lengthframe = destaddr + srcaddr + [0x00, 0x50] + \
+        [randrange(256) for _ in range(60)]
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Bad Frame Detection %s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(rxxgmii_intf.clk, count=10)
+            rxconfig1.next = 0x10000000
+            filterconfig.next = 0x80000000
+            yield clkwait(rxxgmii_intf.clk, count=2)
+            yield send(xgmiiwords(badcrcframe, badcrc=True))
+            yield send(xgmiiwords(runtframe))
+            yield send(xgmiiwords(lengthframe))
+            yield send(xgmiiwords(goodframe))
+            yield clkwait(rxxgmii_intf.clk, count=5)
+            assert [good for frame, good in received] == \
+                [False, False, False, True]
+            assert received[3][0] == goodframe
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=5000)
+    testInst.quit_sim()
+
+
+def test_addressfilter(setuptb):
+    tb, send, rxxgmii_intf, rxconfig1, filterconfig, addrtable, rxflowintf, \
+        received = setuptb
+    frames = [randframe(50, dest=[0xFF] * 6),
+              randframe(50, dest=[0x12, 0x34, 0x56, 0x78, 0x9A, 0xBC]),
+              randframe(50, dest=[0x00, 0x11, 0x22, 0x33, 0x44, 0x55])]
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Address Filter %s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(rxxgmii_intf.clk, count=10)
+            rxconfig1.next = 0x10000000
+            addrtable[3].next = 0x001122334455
+            yield clkwait(rxxgmii_intf.clk, count=2)
+            for frame in frames:
+                yield send(xgmiiwords(frame))
+            yield clkwait(rxxgmii_intf.clk, count=5)
+            assert received == [(frames[0], True), ([], None),
+                                (frames[2], True)]
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=5000)
+    testInst.quit_sim()
+
+
+def test_pausereceive(setuptb):
+    tb, send, rxxgmii_intf, rxconfig1, filterconfig, addrtable, rxflowintf, \
+        received = setuptb
+    pauseframe = [0x01, 0x80, 0xC2, 0x00, 0x00, 0x01] + srcaddr + \
+        [0x88, 0x08, 0x00, 0x01, 0x12, 0x34] + [0] * 42
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Pause Frame Reception %s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(rxxgmii_intf.clk, count=10)
+            rxconfig1.next = 0x10000000
+            rxflowintf.rxflowen.next = True
+            yield clkwait(rxxgmii_intf.clk, count=2)
+            yield send(xgmiiwords(pauseframe))
+            while not rxflowintf.pausereq:
+                yield rxxgmii_intf.clk.posedge
+            assert rxflowintf.pauseval == 0x1234
+            yield clkwait(rxxgmii_intf.clk, count=3)
+            assert [good for frame, good in received] == [None]
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=2000)
+    testInst.quit_sim()
+
+
+def test_convertible():
+
+    @block
+    def test():
+        rxclientintf = RxFIFOClientInterface(width=64)
+        rxxgmii_intf = RxXGMII_Interface()
+        rxflowintf = RxFlowInterface()
+        rxconfig0 = Signal(intbv(0)[32:])
+        rxconfig1 = Signal(intbv(0)[32:])
+        filterconfig = Signal(intbv(0)[32:])
+        addrtable = [Signal(intbv(0)[48:]) for _ in range(4)]
+        reset = ResetSignal(1, active=0, async=True)
+        dutinst = rxengine64(rxclientintf, rxxgmii_intf, rxflowintf,
+                             rxconfig0, rxconfig1, filterconfig, addrtable,
+                             reset)
+        print("Testing Convertibility %s" % dutinst)
+
+        @instance
+        def hostclkdriver():
+            rxxgmii_intf.clk.next = 0
+            while True:
+                yield delay(5)
+                rxxgmii_intf.clk.next = not rxxgmii_intf.clk
+
+        @instance
+        def testlogic():
+            reset.next = 0
+            yield delay(15)
+            reset.next = 1
+            yield delay(20)
+            print("Converted! %d" % now())
+            raise StopSimulation
+
+        return dutinst, testlogic, hostclkdriver
+
+    testInst = test()
+    verify.simulator = 'iverilog'
+    assert testInst.verify_convert() == 0
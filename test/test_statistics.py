@@ -0,0 +1,318 @@
+from myhdl import block, instance, delay, ResetSignal, Signal, intbv, \
+    StopSimulation, now
+from myhdl.conversion import verify
+from gemac.intrafaces import TxStatsInterface, RxStatsInterface, \
+    StatsInterface, TxFlowInterface, RxFlowInterface
+from gemac.interfaces import HostManagementInterface, MDIOInterface, \
+    FlowControlInterface
+from gemac.management import management, reserved
+from gemac.flowControl import flowcontrol
+from gemac.statistics import statistics, counters, rxbytes, txbytes, \
+    rxframes, txframes, rxfcserr, rxlenerr, rxbad, rxpause, rxfiltered, \
+    txpause, txbad, rx64, tx64, txpaused, histbounds
+from bisect import bisect_right
+from random import randrange, choice
+import pytest
+
+
+def clkwait(clk, count=1):
+    while count:
+        yield clk.posedge
+        count -= 1
+
+
+def txvector(txstatsintf, expected, kind, length):
+    """ Drives a transmit statistics vector, counting it in 'expected'. """
+    txstatsintf.valid.next = True
+    txstatsintf.good.next = kind != 'bad'
+    txstatsintf.pause.next = kind == 'pause'
+    txstatsintf.length.next = length
+    yield txstatsintf.clk.posedge
+    txstatsintf.valid.next = False
+    if kind == 'bad':
+        expected[txbad] += 1
+    else:
+        expected[txframes] += 1
+        expected[txbytes] += length
+        expected[tx64 + bisect_right(histbounds, length)] += 1
+        if kind == 'pause':
+            expected[txpause] += 1
+
+
+def rxvector(rxstatsintf, expected, kind, length):
+    """ Drives a receive statistics vector, counting it in 'expected'. """
+    rxstatsintf.valid.next = True
+    rxstatsintf.good.next = kind in ('good', 'pause')
+    rxstatsintf.fcserr.next = kind == 'fcserr'
+    rxstatsintf.lenerr.next = kind == 'lenerr'
+    rxstatsintf.pause.next = kind == 'pause'
+    rxstatsintf.filtered.next = kind == 'filtered'
+    rxstatsintf.length.next = length
+    yield rxstatsintf.clk.posedge
+    rxstatsintf.valid.next = False
+    if kind in ('good', 'pause'):
+        expected[rxframes] += 1
+        expected[rxbytes] += length
+        expected[rx64 + bisect_right(histbounds, length)] += 1
+        if kind == 'pause':
+            expected[rxpause] += 1
+    elif kind == 'filtered':
+        expected[rxfiltered] += 1
+    else:
+        expected[rxbad] += 1
+        if kind == 'fcserr':
+            expected[rxfcserr] += 1
+        elif kind == 'lenerr':
+            expected[rxlenerr] += 1
+
+
+@pytest.fixture()
+def setuptb():
+    hostintf = HostManagementInterface()
+    mdiointf = MDIOInterface()
+    txstatsintf = TxStatsInterface()
+    rxstatsintf = RxStatsInterface()
+    statsintf = StatsInterface()
+    configregs = [Signal(intbv(0)[32:]) for _ in range(reserved)]
+    addrtable = [Signal(intbv(0)[48:]) for _ in range(4)]
+    reset = ResetSignal(1, active=0, async=True)
+
+    @block
+    def testbench():
+        managementinst = management(hostintf, mdiointf, configregs,
+                                    addrtable, reset, statsintf=statsintf)
+        statsinst = statistics(txstatsintf, rxstatsintf, statsintf, reset)
+
+        @instance
+        def hostclkdriver():
+            while True:
+                hostintf.clk.next = not hostintf.clk
+                yield delay(5)
+
+        @instance
+        def txclkdriver():
+            while True:
+                txstatsintf.clk.next = not txstatsintf.clk
+                yield delay(4)
+
+        @instance
+        def rxclkdriver():
+            while True:
+                rxstatsintf.clk.next = not rxstatsintf.clk
+                yield delay(3)
+
+        @instance
+        def resetonstart():
+            reset.next = 0
+            yield clkwait(hostintf.clk, count=2)
+            reset.next = 1
+
+        return managementinst, statsinst, hostclkdriver, txclkdriver, \
+            rxclkdriver, resetonstart
+
+    return testbench, hostintf, txstatsintf, rxstatsintf
+
+
+def readstatistics(hostintf, snapshots):
+    """ Snapshot-and-clear over management, counters read into 'snapshots'.
+    """
+    yield hostintf.writeconfig(0x1FC, 0x80000000)
+    yield hostintf.readconfig(0x1FC)
+    while hostintf.rddata[31]:
+        yield hostintf.readconfig(0x1FC)
+    for n in range(counters):
+        yield hostintf.readconfig(8 * n)
+        low = int(hostintf.rddata)
+        yield hostintf.readconfig(8 * n + 4)
+        snapshots.append((int(hostintf.rddata) << 32) | low)
+
+
+def test_counters(setuptb):
+    tb, hostintf, txstatsintf, rxstatsintf = setuptb
+    lengths = [60, 64, 65, 127, 128, 255, 256, 511, 512, 1023, 1024, 1518,
+               1519, 9000]
+    txvectors = [(choice(['good', 'good', 'pause', 'bad']),
+                  choice(lengths + [randrange(64, 9000)]))
+                 for _ in range(100)]
+    rxvectors = [(choice(['good', 'good', 'pause', 'fcserr', 'lenerr',
+                          'bad', 'filtered']),
+                  choice(lengths + [randrange(64, 9000)]))
+                 for _ in range(100)]
+    expected = [0] * counters
+    snapshots = []
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Statistics Counters %s" % tbinst)
+
+        @instance
+        def txstim():
+            yield clkwait(txstatsintf.clk, count=10)
+            for kind, length in txvectors:
+                yield txvector(txstatsintf, expected, kind, length)
+                yield clkwait(txstatsintf.clk, count=randrange(3))
+
+        @instance
+        def rxstim():
+            yield clkwait(rxstatsintf.clk, count=10)
+            for kind, length in rxvectors:
+                yield rxvector(rxstatsintf, expected, kind, length)
+                yield clkwait(rxstatsintf.clk, count=randrange(3))
+
+        @instance
+        def tbstim():
+            yield clkwait(hostintf.clk, count=200)
+            yield readstatistics(hostintf, snapshots)
+            assert snapshots == expected
+            assert all(snapshots[tx64:tx64 + 7])
+            # Cleared by the snapshot.
+            del snapshots[:]
+            yield readstatistics(hostintf, snapshots)
+            assert snapshots == [0] * counters
+            raise StopSimulation
+
+        return tbinst, txstim, rxstim, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=100000)
+    testInst.quit_sim()
+
+
+def test_snapshotclear(setuptb):
+    tb, hostintf, txstatsintf, rxstatsintf = setuptb
+    expected = [0] * counters
+    totals = [0] * counters
+    done = []
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Snapshot-and-Clear %s" % tbinst)
+
+        @instance
+        def txstim():
+            yield clkwait(txstatsintf.clk, count=10)
+            # Every clock, so some are counted while the snapshot is taken.
+            while not done:
+                yield txvector(txstatsintf, expected, 'good', 64)
+
+        @instance
+        def rxstim():
+            yield clkwait(rxstatsintf.clk, count=10)
+            while not done:
+                yield rxvector(rxstatsintf, expected, 'good', 100)
+
+        @instance
+        def tbstim():
+            for _ in range(5):
+                yield clkwait(hostintf.clk, count=randrange(10, 50))
+                snapshots = []
+                yield readstatistics(hostintf, snapshots)
+                assert snapshots[txframes] and snapshots[rxframes]
+                for n in range(counters):
+                    totals[n] += snapshots[n]
+            done.append(now())
+            yield clkwait(hostintf.clk, count=10)
+            snapshots = []
+            yield readstatistics(hostintf, snapshots)
+            for n in range(counters):
+                totals[n] += snapshots[n]
+            assert totals == expected
+            raise StopSimulation
+
+        return tbinst, txstim, rxstim, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=100000)
+    testInst.quit_sim()
+
+
+def test_pausecycles(setuptb):
+    tb, hostintf, txstatsintf, rxstatsintf = setuptb
+    flowintf = FlowControlInterface()
+    txflowintf = TxFlowInterface()
+    rxflowintf = RxFlowInterface()
+    flowconfig = Signal(intbv(0x20000000)[32:])
+    reset = ResetSignal(1, active=0, async=True)
+    pausevals = [3, 10, 1]
+    snapshots = []
+
+    @block
+    def test():
+        tbinst = tb()
+        flowinst = flowcontrol(flowintf, txflowintf, rxflowintf, flowconfig,
+                               reset, txstatsintf=txstatsintf)
+        print("Testing Pause Accounting %s" % tbinst)
+
+        @instance
+        def flowclkdriver():
+            while True:
+                yield txstatsintf.clk.posedge, txstatsintf.clk.negedge
+                txflowintf.clk.next = txstatsintf.clk
+                rxflowintf.clk.next = txstatsintf.clk
+
+        @instance
+        def tbstim():
+            reset.next = 0
+            yield clkwait(txflowintf.clk, count=2)
+            reset.next = 1
+            yield clkwait(txflowintf.clk, count=10)
+            for pauseval in pausevals:
+                # Pause frame received, transmitter held off its duration.
+                rxflowintf.pauseval.next = pauseval
+                rxflowintf.pausereq.next = True
+                yield rxflowintf.clk.posedge
+                rxflowintf.pausereq.next = False
+                yield txflowintf.pauseapply.negedge
+                yield clkwait(txflowintf.clk, count=10)
+            yield readstatistics(hostintf, snapshots)
+            assert snapshots[txpaused] == sum(pausevals) * 64 + len(pausevals)
+            raise StopSimulation
+
+        return tbinst, flowinst, flowclkdriver, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=100000)
+    testInst.quit_sim()
+
+
+def test_convertible():
+
+    @block
+    def test():
+        txstatsintf = TxStatsInterface()
+        rxstatsintf = RxStatsInterface()
+        statsintf = StatsInterface()
+        reset = ResetSignal(1, active=0, async=True)
+        dutinst = statistics(txstatsintf, rxstatsintf, statsintf, reset)
+        print("Testing Convertibility %s" % dutinst)
+
+        @instance
+        def hostclkdriver():
+            txstatsintf.clk.next = 0
+            rxstatsintf.clk.next = 0
+            statsintf.clk.next = 0
+            while True:
+                yield delay(5)
+                txstatsintf.clk.next = not txstatsintf.clk
+                rxstatsintf.clk.next = not rxstatsintf.clk
+                statsintf.clk.next = not statsintf.clk
+
+        @instance
+        def testlogic():
+            reset.next = 0
+            yield delay(15)
+            reset.next = 1
+            yield delay(20)
+            print("Converted! %d" % now())
+            raise StopSimulation
+
+        return dutinst, testlogic, hostclkdriver
+
+    testInst = test()
+    verify.simulator = 'iverilog'
+    assert testInst.verify_convert() == 0
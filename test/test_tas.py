@@ -0,0 +1,229 @@
+from myhdl import block, instance, delay, ResetSignal, Signal, intbv, \
+    StopSimulation, now
+from myhdl.conversion import verify
+from gemac.intrafaces import TxGMII_Interface, TxFlowInterface
+from gemac.interfaces import TxFIFOClientInterface
+from gemac.txEngine import txengine
+from gemac.txsched import txscheduler, txqueues
+from gemac.tas import gatecontrol, tasgate, tascontrol, cycletime, \
+    basetimelo, guardband
+from gemac.ptpclock import ptpclock
+from random import randrange
+import pytest
+
+period = 10
+""" Nanoseconds a clock."""
+
+
+def clkwait(clk, count=1):
+    while count:
+        yield clk.posedge
+        count -= 1
+
+
+def taggedframe(tag, length):
+    return [tag] + [randrange(256) for _ in range(length - 1)]
+
+
+def gatesat(windows, offset):
+    """ Gates open at 'offset' nanoseconds into the cycle."""
+    for gates, interval in windows:
+        if offset < interval:
+            return gates
+        offset -= interval
+    return windows[-1][0]
+
+
+@pytest.fixture()
+def setuptb():
+    txclientintfs = [TxFIFOClientInterface() for _ in range(2)]
+    txclientintf = TxFIFOClientInterface()
+    txgmii_intf = TxGMII_Interface()
+    txflowintf = TxFlowInterface()
+    txconfig = Signal(intbv(0x10000000)[32:])
+    schedconfig = Signal(intbv(0)[32:])
+    weights = [Signal(intbv(0)[16:]) for _ in range(txqueues)]
+    increment = Signal(intbv(period << 16)[32:])
+    time = Signal(intbv(0)[64:])
+    gcl = [Signal(intbv(0)[32:]) for _ in range(4)]
+    tasparams = [Signal(intbv(0)[32:]) for _ in range(guardband + 1)]
+    gates = Signal(intbv(0xFF)[8:])
+    shaperopen = Signal(bool(1))
+    txgate = Signal(bool(0))
+    txbusy = Signal(bool(0))
+    reset = ResetSignal(1, active=0, async=True)
+    sent = []
+
+    @block
+    def testbench(backlog, scheduled):
+        clockinst = ptpclock(txclientintf.clk, increment, time, reset)
+        gateinst = gatecontrol(txclientintf.clk, time, gcl, tasparams, gates,
+                               reset)
+        if scheduled:
+            clients = txclientintfs
+            schedinst = txscheduler(txclientintfs, txclientintf, schedconfig,
+                                    weights, reset, txbusy=txbusy,
+                                    gates=gates, time=time)
+            gate = Signal(bool(1))
+        else:
+            clients = [txclientintf]
+            schedinst = tasgate(gates, 0, txclientintf.launchtime, time,
+                                shaperopen, txgate)
+            gate = txgate
+        engineinst = txengine(txclientintf, txgmii_intf, txflowintf,
+                              txconfig, reset, txgate=gate, txbusy=txbusy)
+
+        @instance
+        def gtxclkdriver():
+            while True:
+                txclientintf.clk.next = not txclientintf.clk
+                yield delay(period // 2)
+
+        @instance
+        def resetonstart():
+            reset.next = 0
+            yield clkwait(txclientintf.clk, count=2)
+            reset.next = 1
+
+        @instance
+        def monitor():
+            frame = []
+            while True:
+                yield txclientintf.clk.posedge
+                if txgmii_intf.dv:
+                    if not frame:
+                        start = int(time)
+                    frame.append(int(txgmii_intf.data))
+                    end = int(time)
+                elif frame:
+                    # Tag is the first byte after the preamble.
+                    sent.append((frame[8], start, end))
+                    frame = []
+
+        @block
+        def sender(q, frames):
+            @instance
+            def sendqueue():
+                yield clkwait(txclientintf.clk, count=10)
+                for frame, launchtime in frames:
+                    yield clients[q].tx(frame, launchtime=launchtime)
+
+            return sendqueue
+
+        senders = [sender(q, frames) for q, frames in enumerate(backlog)]
+
+        return clockinst, gateinst, schedinst, engineinst, gtxclkdriver, \
+            resetonstart, monitor, senders
+
+    return testbench, txclientintf, gcl, tasparams, sent
+
+
+def test_gatecontrol(setuptb):
+    tb, txclientintf, gcl, tasparams, sent = setuptb
+    base, cycle = 0, 20000
+    # Queue 1 open for 8us, then queue 0 for 7us and both for the rest.
+    windows = [(0b10, 8000), (0b01, 7000), (0b11, 2000)]
+    count = 40
+    backlog = [[(taggedframe(q + 1, randrange(60, 500)), 0)
+                for _ in range(count)] for q in range(2)]
+
+    @block
+    def test():
+        tbinst = tb(backlog, True)
+        print("Testing Time-Aware Shaper Gate Control %s" % tbinst)
+
+        @instance
+        def tbstim():
+            for entry, (gates, interval) in enumerate(windows):
+                gcl[entry].next = gates << 24 | interval
+            tasparams[cycletime].next = cycle
+            tasparams[basetimelo].next = base
+            # Longest frame on the line, preamble to frame check sequence,
+            # and the clocks scanning the entries ahead.
+            tasparams[guardband].next = (8 + 500 + 4 + 10) * period
+            tasparams[tascontrol].next = 0x80000000 | len(windows) - 1
+            while len(sent) < 2 * count:
+                yield txclientintf.clk.posedge
+            for tag, start, end in sent:
+                assert start >= base
+                # Gate of the queue open all along the frame.
+                for t in range(start, end + 1, period):
+                    assert gatesat(windows, (t - base) % cycle) & tag
+            assert any(tag == 1 for tag, _, _ in sent[:count])
+            assert any(tag == 2 for tag, _, _ in sent[:count])
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=2000000)
+    testInst.quit_sim()
+
+
+def test_launchtime(setuptb):
+    tb, txclientintf, gcl, tasparams, sent = setuptb
+    launches = [2000, 9000, 9100, 20000, 20010, 35000]
+    backlog = [[(taggedframe(1, 100), launch) for launch in launches]]
+
+    @block
+    def test():
+        tbinst = tb(backlog, False)
+        print("Testing Launch Time %s" % tbinst)
+
+        @instance
+        def tbstim():
+            while len(sent) < len(launches):
+                yield txclientintf.clk.posedge
+            for i, (launch, (tag, start, end)) in enumerate(zip(launches,
+                                                              sent)):
+                assert start >= launch
+                if i == 0 or sent[i - 1][2] + 20 * period < launch:
+                    # Line free at launch time.
+                    assert start - launch <= 6 * period
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=1000000)
+    testInst.quit_sim()
+
+
+def test_convertible():
+
+    @block
+    def test():
+        clk = Signal(bool(0))
+        time = Signal(intbv(0)[64:])
+        increment = Signal(intbv(period << 16)[32:])
+        gcl = [Signal(intbv(0)[32:]) for _ in range(8)]
+        tasparams = [Signal(intbv(0)[32:]) for _ in range(guardband + 1)]
+        gates = Signal(intbv(0)[8:])
+        reset = ResetSignal(1, active=0, async=True)
+        clockinst = ptpclock(clk, increment, time, reset)
+        dutinst = gatecontrol(clk, time, gcl, tasparams, gates, reset)
+        print("Testing Convertibility %s" % dutinst)
+
+        @instance
+        def hostclkdriver():
+            clk.next = 0
+            while True:
+                yield delay(5)
+                clk.next = not clk
+
+        @instance
+        def testlogic():
+            reset.next = 0
+            yield delay(15)
+            reset.next = 1
+            yield delay(20)
+            print("Converted! %d" % now())
+            raise StopSimulation
+
+        return clockinst, dutinst, testlogic, hostclkdriver
+
+    testInst = test()
+    verify.simulator = 'iverilog'
+    assert testInst.verify_convert() == 0
@@ -0,0 +1,257 @@
+from myhdl import block, instance, delay, ResetSignal, Signal, intbv, \
+    StopSimulation, now
+from myhdl.conversion import verify
+from gemac.intrafaces import TxGMII_Interface, TxFlowInterface, \
+    TxStatsInterface, RxGMII_Interface, RxFlowInterface
+from gemac.interfaces import TxFIFOClientInterface, RxFIFOClientInterface, \
+    TxTimestampInterface
+from gemac.txEngine import txengine
+from gemac.rxEngine import rxengine
+from gemac.timestamp import txtsfifo
+from gemac.ptpclock import ptpclock
+from random import randrange
+import pytest
+
+period = 8
+""" Nanoseconds a clock, 125 MHz."""
+
+
+def clkwait(clk, count=1):
+    while count:
+        yield clk.posedge
+        count -= 1
+
+
+def fcs(frame):
+    crc = 0xFFFFFFFF
+    for d in frame:
+        crc ^= d
+        for _ in range(8):
+            crc = (crc >> 1) ^ (0xEDB88320 if crc & 1 else 0)
+    crc ^= 0xFFFFFFFF
+    return [(crc >> (8 * i)) & 0xFF for i in range(4)]
+
+
+@pytest.fixture()
+def setuptb():
+    txclientintf = TxFIFOClientInterface()
+    txgmii_intf = TxGMII_Interface()
+    txflowintf = TxFlowInterface()
+    txstatsintf = TxStatsInterface()
+    tsintf = TxTimestampInterface()
+    rxclientintf = RxFIFOClientInterface()
+    rxgmii_intf = RxGMII_Interface()
+    rxflowintf = RxFlowInterface()
+    txconfig = Signal(intbv(0x10000000)[32:])
+    rxconfig0 = Signal(intbv(0)[32:])
+    rxconfig1 = Signal(intbv(0x10000000)[32:])
+    filterconfig = Signal(intbv(0x80000000)[32:])
+    addrtable = [Signal(intbv(0)[48:]) for _ in range(4)]
+    increment = Signal(intbv(period << 16)[32:])
+    offset = Signal(intbv(0)[32:])
+    adjust = Signal(bool(0))
+    time = Signal(intbv(0)[64:])
+    reset = ResetSignal(1, active=0, async=True)
+    sfds = []
+
+    @block
+    def testbench():
+        clockinst = ptpclock(txclientintf.clk, increment, time, reset,
+                             offset=offset, adjust=adjust)
+        txinst = txengine(txclientintf, txgmii_intf, txflowintf, txconfig,
+                          reset, txstatsintf=txstatsintf, time=time)
+        fifoinst = txtsfifo(txstatsintf, tsintf, reset, depth=4)
+        rxinst = rxengine(rxclientintf, rxgmii_intf, rxflowintf, rxconfig0,
+                          rxconfig1, filterconfig, addrtable, reset,
+                          time=time)
+
+        @instance
+        def clkdriver():
+            while True:
+                txclientintf.clk.next = not txclientintf.clk
+                rxgmii_intf.clk.next = not rxgmii_intf.clk
+                yield delay(period // 2)
+
+        @instance
+        def resetonstart():
+            reset.next = 0
+            yield clkwait(txclientintf.clk, count=2)
+            reset.next = 1
+
+        @instance
+        def monitor():
+            """ Time the SFD leaves on the GMII. """
+            preamble = False
+            while True:
+                yield txclientintf.clk.posedge
+                if not txgmii_intf.dv:
+                    preamble = True
+                elif preamble and txgmii_intf.data == 0xD5:
+                    preamble = False
+                    sfds.append(int(time))
+
+        return clockinst, txinst, fifoinst, rxinst, clkdriver, \
+            resetonstart, monitor
+
+    return testbench, txclientintf, tsintf, rxclientintf, rxgmii_intf, \
+        offset, adjust, time, sfds
+
+
+def test_txtimestamp(setuptb):
+    tb, txclientintf, tsintf, _, _, _, _, _, sfds = setuptb
+    count = 6
+    timestamps = []
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Transmit Timestamps %s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(txclientintf.clk, count=10)
+            for _ in range(count):
+                frame = [randrange(256) for _ in range(randrange(60, 200))]
+                yield txclientintf.tx(frame)
+                yield clkwait(txclientintf.clk, count=randrange(20, 100))
+
+        @instance
+        def tbcheck():
+            # Read late, so the FIFO fills up.
+            while len(sfds) < 3:
+                yield txclientintf.clk.posedge
+            while len(timestamps) < count:
+                yield tsintf.read(timestamps)
+            assert len(sfds) == count
+            # A fixed latency from the timestamp to the SFD on the GMII.
+            latency = sfds[0] - timestamps[0]
+            assert 0 <= latency <= 2 * period
+            for sfd, ts in zip(sfds, timestamps):
+                assert sfd - ts == latency
+            raise StopSimulation
+
+        return tbinst, tbstim, tbcheck
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=100000)
+    testInst.quit_sim()
+
+
+def test_rxtimestamp(setuptb):
+    tb, _, _, rxclientintf, rxgmii_intf, _, _, time, _ = setuptb
+    count = 4
+    sent = []
+    received = []
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Receive Timestamps %s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(rxgmii_intf.clk, count=10)
+            for _ in range(count):
+                frame = [randrange(256) for _ in range(12)] + [0x08, 0x00] + \
+                    [randrange(256) for _ in range(randrange(46, 200))]
+                rxgmii_intf.data.next = 0x55
+                rxgmii_intf.dv.next = True
+                yield clkwait(rxgmii_intf.clk, count=7)
+                rxgmii_intf.data.next = 0xD5
+                yield rxgmii_intf.clk.posedge
+                sent.append(int(time))
+                for d in frame + fcs(frame):
+                    rxgmii_intf.data.next = d
+                    yield rxgmii_intf.clk.posedge
+                rxgmii_intf.data.next = 0x00
+                rxgmii_intf.dv.next = False
+                yield clkwait(rxgmii_intf.clk, count=randrange(12, 50))
+
+        @instance
+        def tbcheck():
+            while len(received) < count:
+                yield rxgmii_intf.clk.posedge
+                if rxclientintf.good:
+                    received.append(int(rxclientintf.timestamp))
+            latency = sent[0] - received[0]
+            assert 0 <= latency <= 2 * period
+            for s, r in zip(sent, received):
+                assert s - r == latency
+            raise StopSimulation
+
+        return tbinst, tbstim, tbcheck
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=100000)
+    testInst.quit_sim()
+
+
+def test_adjust(setuptb):
+    tb, txclientintf, _, _, _, offset, adjust, time, _ = setuptb
+    steps = [1000000, -5000, 0x7FFFFFFF]
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Time Counter Offset %s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(txclientintf.clk, count=10)
+            for step in steps:
+                offset.next = step & 0xFFFFFFFF
+                adjust.next = not adjust
+                before = int(time)
+                yield clkwait(txclientintf.clk, count=10)
+                # Ten clocks and the one step.
+                assert int(time) - before == step + 10 * period
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=10000)
+    testInst.quit_sim()
+
+
+def test_convertible():
+
+    @block
+    def test():
+        txstatsintf = TxStatsInterface()
+        clk = txstatsintf.clk
+        tsintf = TxTimestampInterface()
+        increment = Signal(intbv(period << 16)[32:])
+        offset = Signal(intbv(0)[32:])
+        adjust = Signal(bool(0))
+        time = Signal(intbv(0)[64:])
+        reset = ResetSignal(1, active=0, async=True)
+        clockinst = ptpclock(clk, increment, time, reset, offset=offset,
+                             adjust=adjust)
+        dutinst = txtsfifo(txstatsintf, tsintf, reset)
+        print("Testing Convertibility %s" % dutinst)
+
+        @instance
+        def clkdriver():
+            clk.next = 0
+            while True:
+                yield delay(5)
+                clk.next = not clk
+
+        @instance
+        def testlogic():
+            reset.next = 0
+            yield delay(15)
+            reset.next = 1
+            yield delay(20)
+            print("Converted! %d" % now())
+            raise StopSimulation
+
+        return clockinst, dutinst, testlogic, clkdriver
+
+    testInst = test()
+    verify.simulator = 'iverilog'
+    assert testInst.verify_convert() == 0
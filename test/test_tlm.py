@@ -0,0 +1,391 @@
+from myhdl import block, instance, delay, ResetSignal, Signal, intbv, \
+    StopSimulation
+from gemac.intrafaces import TxGMII_Interface, RxGMII_Interface, \
+    TxXGMII_Interface, RxXGMII_Interface, TxFlowInterface, RxFlowInterface, \
+    TxStatsInterface, RxStatsInterface, StatsInterface
+from gemac.interfaces import TxFIFOClientInterface, RxFIFOClientInterface, \
+    HostManagementInterface, MDIOInterface
+from gemac.txEngine import txengine
+from gemac.rxEngine import rxengine
+from gemac.txEngine64 import txengine64
+from gemac.rxEngine64 import rxengine64
+from gemac.statistics import statistics, counters
+from gemac.management import management, rx0, rx1, tx, flow, \
+    addrfiltermode, mcasthash, reserved, getregindex, managementreg
+from gemac.tlm import GEMACModel, preamble, bcastaddr, pauseaddr, fcs
+from random import randrange, choice, seed, shuffle
+import pytest
+
+macaddr = 0xABCD123456EF
+tableaddr = 0x001122334455
+mcastaddrs = [0x01005E000000 | (0x1F3D5 * i) for i in range(1, 9)]
+srcaddr = bytes([0x45, 0x6E, 0xFA, 0xBC, 0xD1, 0x23])
+
+
+def clkwait(clk, count=1):
+    while count:
+        yield clk.posedge
+        count -= 1
+
+
+def setupmodel(txconfig=0x10000000, rxconfig1=0x10000000, filterconfig=0):
+    model = GEMACModel()
+    model.writeconfig(0x200, macaddr & 0xFFFFFFFF)
+    model.writeconfig(0x240, rxconfig1 | (macaddr >> 32))
+    model.writeconfig(0x280, txconfig)
+    model.writeconfig(0x2C0, 0x60000000)
+    model.writeconfig(0x390, filterconfig)
+    model.writeaddrtable(2, tableaddr)
+    for addr in mcastaddrs[:4]:
+        hashbin = model.hashbin(addr)
+        model.writeconfig(0x3C0 + 4 * (hashbin // 32),
+                          model.configregs[mcasthash + hashbin // 32] |
+                          1 << (hashbin % 32))
+    return model
+
+
+def randclientframe(maxlen=1514):
+    """ Random typed or length framed client frame up to 'maxlen' bytes. """
+    dest = choice([macaddr, bcastaddr, tableaddr, 0x0123456789AB] +
+                  mcastaddrs)
+    if randrange(2):
+        length = randrange(1, maxlen - 13)
+        header = (0x0800).to_bytes(2, 'big')
+    else:
+        length = randrange(1, min(maxlen - 13, 1501))
+        header = length.to_bytes(2, 'big')
+    return dest.to_bytes(6, 'big') + srcaddr + header + \
+        bytes(randrange(256) for _ in range(length))
+
+
+def sizedframe(size):
+    """ Typed frame of 'size' bytes with the FCS, sent to us. """
+    frame = choice([macaddr, bcastaddr]).to_bytes(6, 'big') + srcaddr + \
+        (0x0800).to_bytes(2, 'big') + \
+        bytes(randrange(256) for _ in range(size - 18))
+    return frame + fcs(frame)
+
+
+def randwireframe(size=None):
+    """ Random wire frame, every fifth with a corrupted byte. Runts, frames
+    about the 1518 and 1522 byte limits and jumbo frames mixed in, or of
+    'size' bytes if given and not corrupted. """
+    if size is not None:
+        return preamble + sizedframe(size)
+    if randrange(4) == 0:
+        size = choice([randrange(20, 64), 1518, 1519, 1522, 1523,
+                       randrange(1524, 9019)])
+        frame = bytearray(sizedframe(size))
+        if randrange(5) == 0:
+            frame[randrange(len(frame))] ^= 1 << randrange(8)
+        return preamble + bytes(frame)
+    if randrange(8) == 0:
+        frame = pauseaddr.to_bytes(6, 'big') + srcaddr + \
+            bytes([0x88, 0x08, 0x00, 0x01, randrange(256), randrange(256)])
+    else:
+        frame = randclientframe(maxlen=1514)
+        if int.from_bytes(frame[12:14], 'big') < 46:
+            frame = frame[:14 + int.from_bytes(frame[12:14], 'big')]
+    frame = frame.ljust(60, b'\x00')
+    frame = bytearray(frame + fcs(frame))
+    if randrange(5) == 0:
+        frame[randrange(len(frame))] ^= 1 << randrange(8)
+    return preamble + bytes(frame)
+
+
+def sendgmii(rxgmii_intf, wire):
+    """ Drives wire frame on GMII followed by inter-frame gap. """
+    for byte in wire:
+        rxgmii_intf.data.next = byte
+        rxgmii_intf.dv.next = True
+        yield rxgmii_intf.clk.posedge
+    rxgmii_intf.dv.next = False
+    rxgmii_intf.data.next = 0
+    yield clkwait(rxgmii_intf.clk, count=12)
+
+
+def readstatistics(statsintf, snapshots):
+    """ Snapshot-and-clear, then reads the counters into 'snapshots'. """
+    statsintf.snapshot.next = not statsintf.snapshot
+    statsintf.index.next = 127
+    yield clkwait(statsintf.clk, count=2)
+    while statsintf.data[31]:
+        yield statsintf.clk.posedge
+    for n in range(counters):
+        statsintf.index.next = 2 * n
+        yield statsintf.clk.posedge
+        low = int(statsintf.data)
+        statsintf.index.next = 2 * n + 1
+        yield statsintf.clk.posedge
+        snapshots.append((int(statsintf.data) << 32) | low)
+
+
+def sendxgmii(rxxgmii_intf, wire):
+    """ Drives wire frame on XGMII, start in lane 0, followed by idles. """
+    lanes = [(0xFB, 1)] + [(b, 0) for b in wire[1:]] + [(0xFD, 1)]
+    lanes += [(0x07, 1)] * (-len(lanes) % 8 + 8)
+    for i in range(0, len(lanes), 8):
+        data = ctrl = 0
+        for l, (byte, isctrl) in enumerate(lanes[i:i+8]):
+            data |= byte << (8 * l)
+            ctrl |= isctrl << l
+        rxxgmii_intf.data.next = data
+        rxxgmii_intf.ctrl.next = ctrl
+        yield rxxgmii_intf.clk.posedge
+
+
+@pytest.mark.parametrize('tablesize', [4, 32])
+def test_registermap(tablesize):
+    seed(3)
+    hostintf = HostManagementInterface()
+    mdiointf = MDIOInterface()
+    configregs = [Signal(intbv(0)[32:]) for _ in range(reserved)]
+    addrtable = [Signal(intbv(0)[48:]) for _ in range(tablesize)]
+    reset = ResetSignal(1, active=0, async=True)
+    model = GEMACModel(addrtablesize=tablesize)
+    writes = [(randrange(0x200, 0x394), randrange(1 << 32) & 0x7F7FFFFF)
+              for _ in range(100)]
+    # MDIO clock divider is left alone, the model has no MDIO.
+    writes = [(addr, data) for addr, data in writes
+              if getregindex(addr) != managementreg]
+
+    @block
+    def test():
+        dutinst = management(hostintf, mdiointf, configregs, addrtable, reset)
+        print("Testing Register Map %s" % dutinst)
+
+        @instance
+        def hostclkdriver():
+            while True:
+                hostintf.clk.next = not hostintf.clk
+                yield delay(5)
+
+        @instance
+        def tbstim():
+            reset.next = 0
+            yield clkwait(hostintf.clk, count=2)
+            reset.next = 1
+            yield clkwait(hostintf.clk, count=2)
+            for addr, data in writes:
+                yield hostintf.writeconfig(addr, data)
+                model.writeconfig(addr, data)
+                yield hostintf.readconfig(addr)
+                if model.readconfig(addr) is not None:
+                    assert hostintf.rddata == model.readconfig(addr)
+                assert [int(reg) for reg in configregs] == model.configregs
+                assert [int(addr) for addr in addrtable] == model.addrtable
+            for loc in range(tablesize):
+                addr = randrange(1 << 48)
+                yield hostintf.writeaddrtable(loc, addr)
+                model.writeaddrtable(loc, addr)
+            yield clkwait(hostintf.clk, count=2)
+            for loc in range(tablesize):
+                assert model.readaddrtable(loc) == addrtable[loc]
+            raise StopSimulation
+
+        return dutinst, hostclkdriver, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=100000)
+    testInst.quit_sim()
+
+
+@pytest.mark.parametrize('speed', [1000, 10000])
+def test_transmit(speed):
+    seed(speed)
+    model = setupmodel(txconfig=0x10000000 | (randrange(2) << 27))
+    maxlen = 1530 if speed == 10000 else 1514
+    frames = [randclientframe(maxlen=maxlen) for _ in range(30)]
+    frames += [frame[:randrange(14, 60)] for frame in frames[:10]]
+    width = 8 if speed == 1000 else 64
+    txclientintf = TxFIFOClientInterface(width=width)
+    txflowintf = TxFlowInterface()
+    txconfig = Signal(intbv(model.configregs[tx])[32:])
+    txstatsintf = TxStatsInterface()
+    rxstatsintf = RxStatsInterface()
+    statsintf = StatsInterface()
+    reset = ResetSignal(1, active=0, async=True)
+    sent = []
+    snapshots = []
+
+    @block
+    def test():
+        if speed == 1000:
+            txgmii_intf = TxGMII_Interface()
+            dutinst = txengine(txclientintf, txgmii_intf, txflowintf,
+                               txconfig, reset, txstatsintf=txstatsintf)
+        else:
+            txgmii_intf = TxXGMII_Interface()
+            dutinst = txengine64(txclientintf, txgmii_intf, txflowintf,
+                                 txconfig, reset, txstatsintf=txstatsintf)
+        statsinst = statistics(txstatsintf, rxstatsintf, statsintf, reset)
+        print("Testing Transmit against model %s" % dutinst)
+
+        @instance
+        def hostclkdriver():
+            while True:
+                txclientintf.clk.next = not txclientintf.clk
+                rxstatsintf.clk.next = not rxstatsintf.clk
+                statsintf.clk.next = not statsintf.clk
+                yield delay(5)
+
+        if speed == 1000:
+            @instance
+            def monitor():
+                lanes = []
+                while True:
+                    yield txclientintf.clk.posedge
+                    if txgmii_intf.dv:
+                        lanes.append(int(txgmii_intf.data))
+                    elif lanes:
+                        sent.append(bytes(lanes))
+                        lanes = []
+        else:
+            @instance
+            def monitor():
+                lanes = None
+                while True:
+                    yield txclientintf.clk.posedge
+                    for l in range(8):
+                        byte = int(txgmii_intf.data[8*l+8:8*l])
+                        if not txgmii_intf.ctrl[l]:
+                            if lanes is not None:
+                                lanes.append(byte)
+                        elif byte == 0xFB:
+                            lanes = [0x55]
+                        elif lanes is not None and byte == 0xFD:
+                            sent.append(bytes(lanes))
+                            lanes = None
+                        elif lanes is not None:
+                            sent.append(None)
+                            lanes = None
+
+        @instance
+        def tbstim():
+            reset.next = 0
+            yield clkwait(txclientintf.clk, count=2)
+            reset.next = 1
+            yield clkwait(txclientintf.clk, count=2)
+            for frame in frames:
+                yield txclientintf.tx(list(frame))
+            txflowintf.macaddr.next = model.macaddr
+            txflowintf.pauseval.next = 0x1234
+            txflowintf.pausereq.next = True
+            yield txclientintf.clk.posedge
+            txflowintf.pausereq.next = False
+            yield clkwait(txclientintf.clk, count=200)
+            assert sent == [model.transmit(frame) for frame in frames] + \
+                [model.transmitpause(0x1234)]
+            yield readstatistics(statsintf, snapshots)
+            assert snapshots == model.statistics
+            raise StopSimulation
+
+        return dutinst, statsinst, hostclkdriver, monitor, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=1000000)
+    testInst.quit_sim()
+
+
+@pytest.mark.parametrize('speed', [1000, 10000])
+@pytest.mark.parametrize('jumbo', [False, True])
+def test_receive(speed, jumbo):
+    seed(speed + jumbo)
+    # Receiver enabled, FCS passed on and VLAN frames enabled at random.
+    model = setupmodel(rxconfig1=0x10000000 | (randrange(2) << 29) |
+                       (randrange(2) << 27) | (jumbo << 30))
+    wires = [randwireframe() for _ in range(40)] + \
+        [randwireframe(size) for size in
+         (63, 64, 1518, 1519, 1522, 1523, randrange(1524, 9019))]
+    shuffle(wires)
+    width = 8 if speed == 1000 else 64
+    rxclientintf = RxFIFOClientInterface(width=width)
+    rxflowintf = RxFlowInterface()
+    rxconfig0 = Signal(intbv(model.configregs[rx0])[32:])
+    rxconfig1 = Signal(intbv(model.configregs[rx1])[32:])
+    filterconfig = Signal(intbv(model.configregs[addrfiltermode])[32:])
+    addrtable = [Signal(intbv(addr)[48:]) for addr in model.addrtable]
+    hashtable = [Signal(intbv(word)[32:])
+                 for word in model.configregs[mcasthash:mcasthash + 2]]
+    txstatsintf = TxStatsInterface()
+    rxstatsintf = RxStatsInterface()
+    statsintf = StatsInterface()
+    reset = ResetSignal(1, active=0, async=True)
+    received = []
+    pausevals = []
+    snapshots = []
+
+    @block
+    def test():
+        if speed == 1000:
+            rxgmii_intf = RxGMII_Interface()
+            dutinst = rxengine(rxclientintf, rxgmii_intf, rxflowintf,
+                               rxconfig0, rxconfig1, filterconfig, addrtable,
+                               reset, hashtable=hashtable,
+                               rxstatsintf=rxstatsintf)
+        else:
+            rxgmii_intf = RxXGMII_Interface()
+            dutinst = rxengine64(rxclientintf, rxgmii_intf, rxflowintf,
+                                 rxconfig0, rxconfig1, filterconfig,
+                                 addrtable, reset, hashtable=hashtable,
+                                 rxstatsintf=rxstatsintf)
+        statsinst = statistics(txstatsintf, rxstatsintf, statsintf, reset)
+        print("Testing Receive against model %s" % dutinst)
+
+        @instance
+        def hostclkdriver():
+            while True:
+                rxgmii_intf.clk.next = not rxgmii_intf.clk
+                txstatsintf.clk.next = not txstatsintf.clk
+                statsintf.clk.next = not statsintf.clk
+                yield delay(5)
+
+        @instance
+        def monitor():
+            frame = []
+            while True:
+                yield rxgmii_intf.clk.posedge
+                if rxclientintf.dv:
+                    for l in range(width // 8):
+                        if speed == 1000 or rxclientintf.keep[l]:
+                            frame.append(int(rxclientintf.data[8*l+8:8*l]))
+                if rxclientintf.good:
+                    received.append(bytes(frame))
+                if rxclientintf.good or rxclientintf.bad or \
+                        rxclientintf.filtered:
+                    frame = []
+                if rxflowintf.pausereq:
+                    pausevals.append(int(rxflowintf.pauseval))
+
+        @instance
+        def tbstim():
+            reset.next = 0
+            yield clkwait(rxgmii_intf.clk, count=2)
+            reset.next = 1
+            yield clkwait(rxgmii_intf.clk, count=2)
+            rxflowintf.rxflowen.next = bool(model.configregs[flow] >> 29 & 1)
+            send = sendgmii if speed == 1000 else sendxgmii
+            for wire in wires:
+                yield send(rxgmii_intf, wire)
+            yield clkwait(rxgmii_intf.clk, count=20)
+            expected = []
+            pauses = []
+            for wire in wires:
+                model.pauseval = None
+                expected.append(model.receive(wire))
+                if model.pauseval is not None:
+                    pauses.append(model.pauseval)
+            assert received == [frame for frame in expected if frame]
+            assert pausevals == pauses
+            yield readstatistics(statsintf, snapshots)
+            assert snapshots == model.statistics
+            raise StopSimulation
+
+        return dutinst, statsinst, hostclkdriver, monitor, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=1000000)
+    testInst.quit_sim()
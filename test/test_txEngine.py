@@ -6,6 +6,7 @@ from gemac.txEngine import txengine
 from gemac.interfaces import TxFIFOClientInterface
 from random import randrange
 import pytest
+import zlib
 
 datastream = [0x12, 0x34, 0x56, 0x78, 0x9A, 0xBC, 0xDE, 0xF0,
               0x12, 0x34, 0x56, 0x78, 0x9A, 0xBC, 0xDE, 0xF0,
@@ -201,14 +202,57 @@ def test_padding(setuptb):
 
         @instance
         def tbcheck():
-            yield clkwait(txclientintf.clk, count=14)
-            yield txclientintf.dv.negedge
-            yield clkwait(txclientintf.clk, count=2)
-            count = 0
-            while txgmii_intf.dv:
+            padded = datastream[:20] + [0] * 40
+            crc = zlib.crc32(bytes(padded))
+            frame = []
+            while not frame or txgmii_intf.dv:
                 yield txclientintf.clk.posedge
-                count += 1
-            assert count + 20 == 64
+                if txgmii_intf.dv:
+                    frame.append(int(txgmii_intf.data))
+            assert frame[8:] == padded + \
+                [(crc >> (8 * i)) & 0xFF for i in range(4)]
+
+        return tbinst, tbstim, tbcheck
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=2000)
+    testInst.quit_sim()
+
+
+def test_pauseframe(setuptb):
+    tb, txclientintf, txgmii_intf, txflowintf, txconfig = setuptb
+    macaddr = [0x0A, 0x0B, 0x0C, 0x0D, 0x0E, 0x0F]
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Pause Frame Transmission %s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(txclientintf.clk, count=10)
+            txconfig.next = 0x10000000
+            txflowintf.macaddr.next = int.from_bytes(bytes(macaddr), 'big')
+            txflowintf.pauseval.next = 0x1234
+            txflowintf.pausereq.next = True
+            yield txclientintf.clk.posedge
+            txflowintf.pausereq.next = False
+
+        @instance
+        def tbcheck():
+            pause = [0x01, 0x80, 0xC2, 0x00, 0x00, 0x01] + macaddr + \
+                [0x88, 0x08, 0x00, 0x01, 0x12, 0x34]
+            pause += [0] * (60 - len(pause))
+            crc = zlib.crc32(bytes(pause))
+            frame = []
+            while not frame or txgmii_intf.dv:
+                yield txclientintf.clk.posedge
+                if txgmii_intf.dv:
+                    frame.append(int(txgmii_intf.data))
+            assert frame[:8] == [0x55] * 7 + [0xD5]
+            assert frame[8:] == pause + \
+                [(crc >> (8 * i)) & 0xFF for i in range(4)]
 
         return tbinst, tbstim, tbcheck
 
@@ -253,6 +297,44 @@ def test_maxframesize(setuptb):
     testInst.quit_sim()
 
 
+@pytest.mark.parametrize('length, toolong', [(1514, False), (1515, True)])
+def test_maxframeboundary(setuptb, length, toolong):
+    tb, txclientintf, txgmii_intf, txflowintf, txconfig = setuptb
+    datastream = [randrange(256) for _ in range(length)]
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Max Permitted Length Boundary %s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(txclientintf.clk, count=10)
+            txconfig.next = 0x10000000
+            yield clkwait(txclientintf.clk, count=2)
+            yield txclientintf.tx(datastream)
+
+        @instance
+        def tbcheck():
+            yield clkwait(txclientintf.clk, count=10)
+            yield txgmii_intf.dv.posedge
+            erred = False
+            while txgmii_intf.dv:
+                yield txclientintf.clk.posedge
+                if txgmii_intf.err:
+                    erred = True
+            # 1518 bytes at most, frame check sequence included.
+            assert erred == toolong
+            raise StopSimulation
+
+        return tbinst, tbstim, tbcheck
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=20000)
+    testInst.quit_sim()
+
+
 def test_jumboframe(setuptb):
     tb, txclientintf, txgmii_intf, txflowintf, txconfig = setuptb
     datastream = [randrange(256) for _ in range(1700)]
@@ -0,0 +1,347 @@
+from myhdl import block, instance, delay, ResetSignal, Signal, intbv,\
+    StopSimulation, now
+from myhdl.conversion import verify
+from gemac.intrafaces import TxXGMII_Interface, TxFlowInterface
+from gemac.txEngine64 import txengine64
+from gemac.interfaces import TxFIFOClientInterface
+from random import randrange
+import pytest
+import zlib
+
+datastream = [0x12, 0x34, 0x56, 0x78, 0x9A, 0xBC, 0xDE, 0xF0,
+              0x12, 0x34, 0x56, 0x78, 0x9A, 0xBC, 0xDE, 0xF0,
+              0x12, 0x34, 0x56, 0x78, 0x9A, 0xBC, 0xDE, 0xF0,
+              0x12, 0x34, 0x56, 0x78, 0x9A, 0xBC, 0xDE, 0xF0,
+              0x12, 0x34, 0x56, 0x78, 0x9A, 0xBC, 0xDE, 0xF0,
+              0x12, 0x34, 0x56, 0x78, 0x9A, 0xBC, 0xDE, 0xF0,
+              0x12, 0x34, 0x56, 0x78, 0x9A, 0xBC, 0xDE, 0xF0,
+              0x12, 0x34, 0x56, 0x78, 0x9A, 0xBC, 0xDE, 0xF0,
+              0x12, 0x34, 0x56, 0x78, 0x9A, 0xBC, 0xDE, 0xF0,
+              0x12, 0x34, 0x56, 0x78, 0x9A, 0xBC, 0xDE, 0xF0]
+preamble = [0x55] * 6 + [0xD5]
+
+
+def clkwait(clk, count=1):
+    while count:
+        yield clk.posedge
+        count -= 1
+
+
+def fcs(frame):
+    crc = zlib.crc32(bytes(frame))
+    return [(crc >> (8 * i)) & 0xFF for i in range(4)]
+
+
+def parseframes(lanes):
+    """ Splits (byte, isctrl) lanes seen on XGMII into frames.
+
+    Returns:
+        list: (frame bytes, idle bytes before the start, error seen)
+
+    """
+    frames = []
+    idles = 0
+    frame = None
+    err = False
+    for byte, ctrl in lanes:
+        if frame is None:
+            if ctrl and byte == 0xFB:
+                frame = []
+                err = False
+            else:
+                idles += 1
+        elif ctrl and byte == 0xFD:
+            frames.append((frame, idles, err))
+            frame = None
+            idles = 1
+        elif ctrl:
+            err = True
+        else:
+            frame.append(byte)
+    return frames
+
+
+@pytest.fixture()
+def setuptb():
+    txclientintf = TxFIFOClientInterface(width=64)
+    txxgmii_intf = TxXGMII_Interface()
+    txflowintf = TxFlowInterface()
+    txconfig = Signal(intbv(0)[32:])
+    reset = ResetSignal(1, active=0, async=True)
+    lanes = []
+
+    @block
+    def testbench():
+        dutinst = txengine64(txclientintf, txxgmii_intf, txflowintf,
+                             txconfig, reset)
+
+        @instance
+        def hostclkdriver():
+            while True:
+                txclientintf.clk.next = not txclientintf.clk
+                yield delay(5)
+
+        @instance
+        def resetonstart():
+            reset.next = 0
+            yield clkwait(txclientintf.clk, count=2)
+            reset.next = 1
+            yield clkwait(txclientintf.clk, count=2)
+
+        @instance
+        def monitor():
+            while True:
+                yield txclientintf.clk.posedge
+                for l in range(8):
+                    lanes.append((int(txxgmii_intf.data[8*l+8:8*l]),
+                                  bool(txxgmii_intf.ctrl[l])))
+
+        return dutinst, hostclkdriver, resetonstart, monitor
+
+    return testbench, txclientintf, txxgmii_intf, txflowintf, txconfig, lanes
+
+
+def test_crc32(setuptb):
+    tb, txclientintf, txxgmii_intf, txflowintf, txconfig, lanes = setuptb
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing CRC-32 Calculation %s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(txclientintf.clk, count=10)
+            txconfig.next = 0x10000000
+            yield clkwait(txclientintf.clk, count=2)
+            yield txclientintf.tx(datastream)
+            yield clkwait(txclientintf.clk, count=10)
+            frames = parseframes(lanes)
+            assert len(frames) == 1
+            assert frames[0][0] == preamble + datastream + fcs(datastream)
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=2000)
+    testInst.quit_sim()
+
+
+@pytest.mark.parametrize('length', [20, 57, 60, 61, 63])
+def test_padding(setuptb, length):
+    tb, txclientintf, txxgmii_intf, txflowintf, txconfig, lanes = setuptb
+    stream = [randrange(256) for _ in range(length)]
+    padded = stream + [0] * (60 - length)
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing padding %s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(txclientintf.clk, count=10)
+            txconfig.next = 0x10000000
+            yield clkwait(txclientintf.clk, count=2)
+            yield txclientintf.tx(stream)
+            yield clkwait(txclientintf.clk, count=10)
+            frames = parseframes(lanes)
+            assert frames[0][0] == preamble + padded + fcs(padded)
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=2000)
+    testInst.quit_sim()
+
+
+def test_inbandfcs(setuptb):
+    tb, txclientintf, txxgmii_intf, txflowintf, txconfig, lanes = setuptb
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing In-band FCS %s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(txclientintf.clk, count=10)
+            txconfig.next = 0x30000000
+            yield clkwait(txclientintf.clk, count=2)
+            yield txclientintf.tx(datastream[:70])
+            yield clkwait(txclientintf.clk, count=10)
+            frames = parseframes(lanes)
+            assert frames[0][0] == preamble + datastream[:70]
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=2000)
+    testInst.quit_sim()
+
+
+def test_deficitidle(setuptb):
+    tb, txclientintf, txxgmii_intf, txflowintf, txconfig, lanes = setuptb
+    streams = [[randrange(256) for _ in range(randrange(60, 200))]
+               for _ in range(20)]
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Deficit Idle Count %s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(txclientintf.clk, count=10)
+            txconfig.next = 0x10000000
+            yield clkwait(txclientintf.clk, count=2)
+            for stream in streams:
+                yield txclientintf.tx(stream)
+            yield clkwait(txclientintf.clk, count=10)
+            frames = parseframes(lanes)
+            assert [f[0] for f in frames] == \
+                [preamble + s + fcs(s) for s in streams]
+            gaps = [f[1] for f in frames[1:]]
+            assert min(gaps) >= 9
+            assert sum(gaps) >= 12 * len(gaps)
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=20000)
+    testInst.quit_sim()
+
+
+def test_sendpause(setuptb):
+    tb, txclientintf, txxgmii_intf, txflowintf, txconfig, lanes = setuptb
+    pauseframe = [0x01, 0x80, 0xC2, 0x00, 0x00, 0x01,
+                  0xAB, 0xCD, 0x12, 0x34, 0x56, 0xEF,
+                  0x88, 0x08, 0x00, 0x01, 0x12, 0x34] + [0] * 42
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Pause Frame Transmission %s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(txclientintf.clk, count=10)
+            txconfig.next = 0x10000000
+            txflowintf.macaddr.next = 0xABCD123456EF
+            txflowintf.pauseval.next = 0x1234
+            txflowintf.pausereq.next = True
+            yield txclientintf.clk.posedge
+            txflowintf.pausereq.next = False
+            yield clkwait(txclientintf.clk, count=20)
+            frames = parseframes(lanes)
+            assert len(frames) == 1
+            assert frames[0][0] == preamble + pauseframe + fcs(pauseframe)
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=2000)
+    testInst.quit_sim()
+
+
+def test_maxframesize(setuptb):
+    tb, txclientintf, txxgmii_intf, txflowintf, txconfig, lanes = setuptb
+    datastream = [randrange(256) for _ in range(1600)]
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Max Permitted Length Restriction %s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(txclientintf.clk, count=10)
+            txconfig.next = 0x10000000
+            yield clkwait(txclientintf.clk, count=2)
+            yield txclientintf.tx(datastream)
+            yield clkwait(txclientintf.clk, count=10)
+            frames = parseframes(lanes)
+            assert frames[0][2]
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=20000)
+    testInst.quit_sim()
+
+
+def test_jumboframe(setuptb):
+    tb, txclientintf, txxgmii_intf, txflowintf, txconfig, lanes = setuptb
+    datastream = [randrange(256) for _ in range(1700)]
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Jumbo Frames %s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(txclientintf.clk, count=10)
+            txconfig.next = 0x50000000
+            yield clkwait(txclientintf.clk, count=2)
+            yield txclientintf.tx(datastream)
+            yield clkwait(txclientintf.clk, count=10)
+            frames = parseframes(lanes)
+            assert not frames[0][2]
+            assert frames[0][0] == preamble + datastream + fcs(datastream)
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=20000)
+    testInst.quit_sim()
+
+
+def test_convertible():
+
+    @block
+    def test():
+        txclientintf = TxFIFOClientInterface(width=64)
+        txxgmii_intf = TxXGMII_Interface()
+        txflowintf = TxFlowInterface()
+        txconfig = Signal(intbv(0)[32:])
+        reset = ResetSignal(1, active=0, async=True)
+        dutinst = txengine64(txclientintf, txxgmii_intf, txflowintf,
+                             txconfig, reset)
+        print("Testing Convertibility %s" % dutinst)
+
+        @instance
+        def hostclkdriver():
+            txclientintf.clk.next = 0
+            while True:
+                yield delay(5)
+                txclientintf.clk.next = not txclientintf.clk
+
+        @instance
+        def testlogic():
+            reset.next = 0
+            yield delay(15)
+            reset.next = 1
+            yield delay(20)
+            print("Converted! %d" % now())
+            raise StopSimulation
+
+        return dutinst, testlogic, hostclkdriver
+
+    testInst = test()
+    verify.simulator = 'iverilog'
+    assert testInst.verify_convert() == 0
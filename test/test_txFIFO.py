@@ -0,0 +1,417 @@
+from myhdl import block, instance, delay, ResetSignal, Signal, intbv, \
+    StopSimulation, now
+from myhdl.conversion import verify
+from gemac.intrafaces import TxGMII_Interface, TxFlowInterface
+from gemac.interfaces import TxFIFOClientInterface, TxLocalLinkFIFOInterface
+from gemac.txEngine import txengine
+from gemac.txFIFO import txFIFO
+from gemac.tlm import GEMACModel, insertchecksums, checksumflags
+from random import randrange
+import pytest
+
+
+def clkwait(clk, count=1):
+    while count:
+        yield clk.posedge
+        count -= 1
+
+
+def randframe(length):
+    return [randrange(256) for _ in range(length)]
+
+
+def ipframe(proto, paylen, vlan=False, options=0, fragment=False):
+    """ Client frame carrying an IPv4 datagram, checksum fields random. """
+    if proto == 6:
+        segment = [0x12, 0x34, 0x00, 0x50] + randframe(8) + \
+            [0x50, 0x18, 0x01, 0x00] + randframe(4)
+    elif proto == 17:
+        segment = [0x12, 0x34, 0x00, 0x35] + \
+            list((8 + paylen).to_bytes(2, 'big')) + randframe(2)
+    else:
+        segment = []
+    segment += randframe(paylen)
+    totlen = 20 + 4 * options + len(segment)
+    header = [0x45 + options, 0x00] + list(totlen.to_bytes(2, 'big')) + \
+        [0x12, 0x34, 0x20 if fragment else 0x40, 0x00, 64, proto] + \
+        randframe(2) + [192, 168, 1, 10, 10, 0, 0, 254] + \
+        randframe(4 * options)
+    tag = [0x81, 0x00, 0x00, 0x05] if vlan else []
+    return [0xAB, 0xCD, 0x12, 0x34, 0x56, 0xEF] + \
+        [0x45, 0x6E, 0xFA, 0xBC, 0xD1, 0x23] + tag + [0x08, 0x00] + \
+        header + segment
+
+
+@pytest.fixture(params=[(4096, 16), (128, 2)])
+def setuptb(request):
+    depth, frames = request.param
+    txlocallink = TxLocalLinkFIFOInterface()
+    txclientintf = TxFIFOClientInterface()
+    txgmii_intf = TxGMII_Interface()
+    txflowintf = TxFlowInterface()
+    txconfig = Signal(intbv(0)[32:])
+    fifoconfig = Signal(intbv(0)[32:])
+    reset = ResetSignal(1, active=0, async=True)
+    sent = []
+    gaps = []
+
+    @block
+    def testbench():
+        fifoinst = txFIFO(txlocallink, txclientintf, depth=depth,
+                          frames=frames, fifoconfig=fifoconfig)
+        engineinst = txengine(txclientintf, txgmii_intf, txflowintf,
+                              txconfig, reset)
+
+        @instance
+        def clientclkdriver():
+            while True:
+                txlocallink.txclk.next = not txlocallink.txclk
+                yield delay(3)
+
+        @instance
+        def gtxclkdriver():
+            while True:
+                txclientintf.clk.next = not txclientintf.clk
+                yield delay(5)
+
+        @instance
+        def resetonstart():
+            txlocallink.reset.next = 0
+            reset.next = 0
+            yield clkwait(txclientintf.clk, count=2)
+            txlocallink.reset.next = 1
+            reset.next = 1
+
+        @instance
+        def monitor():
+            frame = []
+            gap = 0
+            while True:
+                yield txclientintf.clk.posedge
+                if txgmii_intf.dv:
+                    if not frame and sent:
+                        gaps.append(gap)
+                    frame.append(int(txgmii_intf.data))
+                    gap = 0
+                else:
+                    if frame:
+                        sent.append(bytes(frame))
+                    frame = []
+                    gap += 1
+
+        return fifoinst, engineinst, clientclkdriver, gtxclkdriver, \
+            resetonstart, monitor
+
+    return testbench, txlocallink, txclientintf, txconfig, fifoconfig, \
+        depth, frames, sent, gaps
+
+
+def test_backtoback(setuptb):
+    tb, txlocallink, txclientintf, txconfig, fifoconfig, depth, frames, \
+        sent, gaps = setuptb
+    streams = [randframe(randrange(60, min(depth // 2, 300)))
+               for _ in range(12)]
+    model = GEMACModel()
+    model.writeconfig(0x280, 0x10000000)
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Back-to-back Frames %s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(txlocallink.txclk, count=10)
+            for i, stream in enumerate(streams):
+                if i == min(frames, 4):
+                    txconfig.next = 0x10000000
+                yield txlocallink.tx(stream)
+                # Bursty client, idles a while between frames.
+                yield clkwait(txlocallink.txclk, count=randrange(20))
+            while len(sent) < len(streams):
+                yield txlocallink.txclk.posedge
+            assert sent == [model.transmit(bytes(s)) for s in streams]
+            assert max(gaps) == min(gaps)
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=500000)
+    testInst.quit_sim()
+
+
+def test_fifostatus(setuptb):
+    tb, txlocallink, txclientintf, txconfig, fifoconfig, depth, frames, \
+        sent, gaps = setuptb
+    streams = [randframe(depth // 4) for _ in range(8)]
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing FIFO Status %s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(txlocallink.txclk, count=10)
+            txconfig.next = 0x10000000
+            status = []
+            for stream in streams:
+                yield txlocallink.tx(stream)
+                status.append(int(txlocallink.fifostatus))
+            assert max(status) >= 4
+            while len(sent) < len(streams):
+                yield txlocallink.txclk.posedge
+            yield clkwait(txlocallink.txclk, count=10)
+            assert txlocallink.fifostatus == 0
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=500000)
+    testInst.quit_sim()
+
+
+def test_overflow(setuptb):
+    tb, txlocallink, txclientintf, txconfig, fifoconfig, depth, frames, \
+        sent, gaps = setuptb
+    overflows = []
+    streams = [randframe(depth + 10), randframe(20), randframe(60),
+               randframe(70)]
+    model = GEMACModel()
+    model.writeconfig(0x280, 0x10000000)
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Frame Drop %s" % tbinst)
+
+        @instance
+        def overflowmonitor():
+            yield txlocallink.overflow.posedge
+            overflows.append(now())
+
+        @instance
+        def tbstim():
+            yield clkwait(txlocallink.txclk, count=10)
+            txconfig.next = 0x10000000
+            yield txlocallink.tx(streams[0])
+            # Client gives up on a partial frame and starts a new one.
+            for i, d in enumerate(streams[1]):
+                txlocallink.txd.next = d
+                txlocallink.sof.next = i == 0
+                txlocallink.src_rdy.next = True
+                yield txlocallink.txclk.posedge
+            yield txlocallink.tx(streams[2])
+            yield txlocallink.tx(streams[3])
+            while len(sent) < 2:
+                yield txlocallink.txclk.posedge
+            yield clkwait(txlocallink.txclk, count=200)
+            assert len(overflows) == 1
+            assert sent == [model.transmit(bytes(s)) for s in streams[2:]]
+            raise StopSimulation
+
+        return tbinst, overflowmonitor, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=500000)
+    testInst.quit_sim()
+
+
+def test_cutthrough(setuptb):
+    tb, txlocallink, txclientintf, txconfig, fifoconfig, depth, frames, \
+        sent, gaps = setuptb
+    streams = [randframe(min(3 * depth, 9000)), randframe(60),
+               randframe(depth // 2)]
+    underruns = []
+    starts = []
+    model = GEMACModel()
+    model.writeconfig(0x280, 0x50000000)
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Cut-through %s" % tbinst)
+
+        @instance
+        def underrunmonitor():
+            while True:
+                yield txclientintf.underrun.posedge
+                underruns.append(now())
+
+        @instance
+        def startmonitor():
+            while True:
+                yield txclientintf.ack.posedge
+                starts.append(now())
+
+        @instance
+        def tbstim():
+            fifoconfig.next = 32
+            txconfig.next = 0x50000000
+            yield clkwait(txlocallink.txclk, count=10)
+            for stream in streams:
+                yield txlocallink.tx(stream)
+                # Frame already on its way before the client is done.
+                assert starts and starts[-1] < now()
+            while len(sent) < len(streams):
+                yield txlocallink.txclk.posedge
+            assert sent == [model.transmit(bytes(s)) for s in streams]
+            assert not underruns
+            raise StopSimulation
+
+        return tbinst, underrunmonitor, startmonitor, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=500000)
+    testInst.quit_sim()
+
+
+def test_underrun(setuptb):
+    tb, txlocallink, txclientintf, txconfig, fifoconfig, depth, frames, \
+        sent, gaps = setuptb
+    streams = [randframe(100), randframe(80), randframe(100), randframe(70)]
+    underruns = []
+    model = GEMACModel()
+    model.writeconfig(0x280, 0x10000000)
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Underrun %s" % tbinst)
+
+        @instance
+        def underrunmonitor():
+            while True:
+                yield txclientintf.underrun.posedge
+                underruns.append(now())
+
+        def partial(stream, count):
+            for i, d in enumerate(stream[:count]):
+                txlocallink.txd.next = d
+                txlocallink.sof.next = i == 0
+                txlocallink.src_rdy.next = True
+                yield txlocallink.txclk.posedge
+            txlocallink.src_rdy.next = False
+
+        @instance
+        def tbstim():
+            fifoconfig.next = 16
+            txconfig.next = 0x10000000
+            yield clkwait(txlocallink.txclk, count=10)
+            # Client stalls mid-frame.
+            yield partial(streams[0], 40)
+            yield clkwait(txlocallink.txclk, count=100)
+            assert len(underruns) == 1
+            for i, d in enumerate(streams[0][40:]):
+                txlocallink.txd.next = d
+                txlocallink.sof.next = False
+                txlocallink.eof.next = i == len(streams[0]) - 41
+                txlocallink.src_rdy.next = True
+                yield txlocallink.txclk.posedge
+            txlocallink.src_rdy.next = False
+            txlocallink.eof.next = False
+            yield txlocallink.tx(streams[1])
+            # Client gives up on a partial frame and starts a new one.
+            yield partial(streams[2], 40)
+            yield txlocallink.tx(streams[3])
+            while len(sent) < 4:
+                yield txlocallink.txclk.posedge
+            yield clkwait(txlocallink.txclk, count=100)
+            assert len(underruns) == 2
+            assert len(sent) == 4
+            assert sent[1] == model.transmit(bytes(streams[1]))
+            assert sent[3] == model.transmit(bytes(streams[3]))
+            raise StopSimulation
+
+        return tbinst, underrunmonitor, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=500000)
+    testInst.quit_sim()
+
+
+def test_checksuminsert(setuptb):
+    tb, txlocallink, txclientintf, txconfig, fifoconfig, depth, frames, \
+        sent, gaps = setuptb
+    paylen = min(depth - 80, 200)
+    streams = [
+        (ipframe(6, paylen), True, True),
+        (ipframe(17, paylen - 1, vlan=True, options=2), True, True),
+        (ipframe(17, 0), True, True),
+        (ipframe(6, 1), False, True),
+        (ipframe(17, 5), True, False),
+        (ipframe(6, 10, fragment=True), True, True),
+        (ipframe(1, 30), True, True),
+        (randframe(70), True, True),
+        (ipframe(6, 20), False, False),
+    ]
+    model = GEMACModel()
+    model.writeconfig(0x280, 0x10000000)
+
+    @block
+    def test():
+        tbinst = tb()
+        print("Testing Checksum Insertion %s" % tbinst)
+
+        @instance
+        def tbstim():
+            yield clkwait(txlocallink.txclk, count=10)
+            txconfig.next = 0x10000000
+            for stream, ipcsins, l4csins in streams:
+                yield txlocallink.tx(stream, ipcsins, l4csins)
+            while len(sent) < len(streams):
+                yield txlocallink.txclk.posedge
+            assert sent == [model.transmit(insertchecksums(bytes(s), ip, l4))
+                            for s, ip, l4 in streams]
+            for wire in sent[:3]:
+                assert checksumflags(wire[8:]) == (True, True)
+            assert checksumflags(sent[4][8:]) == (True, False)
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=500000)
+    testInst.quit_sim()
+
+
+def test_convertible():
+
+    @block
+    def test():
+        txlocallink = TxLocalLinkFIFOInterface()
+        txclientintf = TxFIFOClientInterface()
+        dutinst = txFIFO(txlocallink, txclientintf, depth=64, frames=4)
+        print("Testing Convertibility %s" % dutinst)
+
+        @instance
+        def hostclkdriver():
+            txlocallink.txclk.next = 0
+            txclientintf.clk.next = 0
+            while True:
+                yield delay(5)
+                txlocallink.txclk.next = not txlocallink.txclk
+                txclientintf.clk.next = not txclientintf.clk
+
+        @instance
+        def testlogic():
+            txlocallink.reset.next = 0
+            yield delay(15)
+            txlocallink.reset.next = 1
+            yield delay(20)
+            print("Converted! %d" % now())
+            raise StopSimulation
+
+        return dutinst, testlogic, hostclkdriver
+
+    testInst = test()
+    verify.simulator = 'iverilog'
+    assert testInst.verify_convert() == 0
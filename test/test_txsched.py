@@ -0,0 +1,191 @@
+from myhdl import block, instance, delay, ResetSignal, Signal, intbv, \
+    StopSimulation, now
+from myhdl.conversion import verify
+from gemac.intrafaces import TxGMII_Interface, TxFlowInterface
+from gemac.interfaces import TxFIFOClientInterface
+from gemac.txEngine import txengine
+from gemac.txsched import txscheduler, txqueues
+from gemac.tlm import GEMACModel
+from random import randrange
+import pytest
+
+
+def clkwait(clk, count=1):
+    while count:
+        yield clk.posedge
+        count -= 1
+
+
+def randframe(length):
+    return [randrange(256) for _ in range(length)]
+
+
+@pytest.fixture()
+def setuptb():
+    queues = 4
+    txclientintfs = [TxFIFOClientInterface() for _ in range(queues)]
+    txclientintf = TxFIFOClientInterface()
+    txgmii_intf = TxGMII_Interface()
+    txflowintf = TxFlowInterface()
+    txconfig = Signal(intbv(0x10000000)[32:])
+    schedconfig = Signal(intbv(0)[32:])
+    weights = [Signal(intbv(0)[16:]) for _ in range(txqueues)]
+    reset = ResetSignal(1, active=0, async=True)
+    sent = []
+
+    @block
+    def testbench(backlog):
+        schedinst = txscheduler(txclientintfs, txclientintf, schedconfig,
+                                weights, reset)
+        engineinst = txengine(txclientintf, txgmii_intf, txflowintf,
+                              txconfig, reset)
+
+        @instance
+        def gtxclkdriver():
+            while True:
+                txclientintf.clk.next = not txclientintf.clk
+                yield delay(5)
+
+        @instance
+        def resetonstart():
+            reset.next = 0
+            yield clkwait(txclientintf.clk, count=2)
+            reset.next = 1
+
+        @instance
+        def monitor():
+            frame = []
+            while True:
+                yield txclientintf.clk.posedge
+                if txgmii_intf.dv:
+                    frame.append(int(txgmii_intf.data))
+                elif frame:
+                    sent.append(bytes(frame))
+                    frame = []
+
+        @block
+        def sender(q, frames):
+            @instance
+            def sendqueue():
+                for frame in frames:
+                    yield txclientintfs[q].tx(frame)
+
+            return sendqueue
+
+        senders = [sender(q, frames) for q, frames in enumerate(backlog)]
+
+        return schedinst, engineinst, gtxclkdriver, resetonstart, monitor, \
+            senders
+
+    return testbench, txclientintf, schedconfig, weights, sent
+
+
+def test_strictpriority(setuptb):
+    tb, txclientintf, schedconfig, weights, sent = setuptb
+    backlog = [[randframe(1500) for _ in range(3)],
+               [randframe(randrange(60, 1500)) for _ in range(4)],
+               [],
+               [randframe(64) for _ in range(5)]]
+    model = GEMACModel()
+    model.writeconfig(0x280, 0x10000000)
+    order = model.schedule(backlog)
+    expected = [model.transmit(bytes(frame)) for q, frame in order]
+    assert [q for q, frame in order] == [3] * 5 + [1] * 4 + [0] * 3
+
+    @block
+    def test():
+        tbinst = tb(backlog)
+        print("Testing Strict Priority Scheduling %s" % tbinst)
+
+        @instance
+        def tbstim():
+            while len(sent) < len(expected):
+                yield txclientintf.clk.posedge
+            yield clkwait(txclientintf.clk, count=100)
+            assert sent == expected
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=1000000)
+    testInst.quit_sim()
+
+
+def test_weightedroundrobin(setuptb):
+    tb, txclientintf, schedconfig, weights, sent = setuptb
+    backlog = [[randframe(randrange(60, 1500)) for _ in range(8)],
+               [randframe(randrange(60, 200)) for _ in range(30)],
+               [randframe(1500) for _ in range(4)],
+               [randframe(randrange(60, 1500)) for _ in range(6)]]
+    quanta = [1000, 3000, 1500, 0]
+    model = GEMACModel()
+    model.writeconfig(0x280, 0x10000000)
+    model.writeconfig(0x320, 0x80000000)
+    for q, quantum in enumerate(quanta):
+        model.writetxweight(q, quantum)
+    assert model.readtxweight(1) == 3000
+    order = model.schedule(backlog)
+    expected = [model.transmit(bytes(frame)) for q, frame in order]
+    # Queue of weight 0 left waiting.
+    assert len(order) == sum(len(frames) for frames in backlog[:3])
+
+    @block
+    def test():
+        tbinst = tb(backlog)
+        print("Testing Weighted Round Robin Scheduling %s" % tbinst)
+
+        @instance
+        def tbstim():
+            schedconfig.next = 0x80000000
+            for q, quantum in enumerate(quanta):
+                weights[q].next = quantum
+            while len(sent) < len(expected):
+                yield txclientintf.clk.posedge
+            yield clkwait(txclientintf.clk, count=2000)
+            assert sent == expected
+            raise StopSimulation
+
+        return tbinst, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=2000000)
+    testInst.quit_sim()
+
+
+def test_convertible():
+
+    @block
+    def test():
+        txclientintfs = [TxFIFOClientInterface() for _ in range(4)]
+        txclientintf = TxFIFOClientInterface()
+        schedconfig = Signal(intbv(0x80000000)[32:])
+        weights = [Signal(intbv(0)[16:]) for _ in range(txqueues)]
+        reset = ResetSignal(1, active=0, async=True)
+        dutinst = txscheduler(txclientintfs, txclientintf, schedconfig,
+                              weights, reset)
+        print("Testing Convertibility %s" % dutinst)
+
+        @instance
+        def hostclkdriver():
+            txclientintf.clk.next = 0
+            while True:
+                yield delay(5)
+                txclientintf.clk.next = not txclientintf.clk
+
+        @instance
+        def testlogic():
+            reset.next = 0
+            yield delay(15)
+            reset.next = 1
+            yield delay(20)
+            print("Converted! %d" % now())
+            raise StopSimulation
+
+        return dutinst, testlogic, hostclkdriver
+
+    testInst = test()
+    verify.simulator = 'iverilog'
+    assert testInst.verify_convert() == 0
@@ -0,0 +1,174 @@
+from myhdl import block, instance, delay, ResetSignal, Signal, intbv, \
+    StopSimulation
+from gemac.intrafaces import TxGMII_Interface, TxFlowInterface, \
+    RxGMII_Interface, RxFlowInterface
+from gemac.interfaces import TxFIFOClientInterface, RxFIFOClientInterface
+from gemac.txEngine import txengine
+from gemac.rxEngine import rxengine
+from gemac.tlm import GEMACModel, preamble, fcs
+from random import randrange, choice
+import pytest
+
+srcaddr = bytes([0x45, 0x6E, 0xFA, 0xBC, 0xD1, 0x23])
+
+
+def clkwait(clk, count=1):
+    while count:
+        yield clk.posedge
+        count -= 1
+
+
+def randframe(tag=None):
+    """ Client frame, typed or length framed, short ones included, tagged
+    with 'tag' unless None. """
+    if randrange(2):
+        length = randrange(1, 200)
+        header = (0x0800).to_bytes(2, 'big')
+    else:
+        length = randrange(1, 60)
+        header = length.to_bytes(2, 'big')
+    if tag is not None:
+        header = bytes([0x81, 0x00]) + tag.to_bytes(2, 'big') + header
+    return (0xFFFFFFFFFFFF).to_bytes(6, 'big') + srcaddr + header + \
+        bytes(randrange(256) for _ in range(length))
+
+
+@pytest.mark.parametrize('default', [None, 0x6005])
+def test_insert(default):
+    txconfig = 0x10000000 | (0 if default is None else 1 << 23 | default)
+    model = GEMACModel()
+    model.writeconfig(0x280, txconfig)
+    tags = [choice([None, randrange(2**16)]) for _ in range(20)]
+    frames = [randframe() for _ in tags]
+    txclientintf = TxFIFOClientInterface()
+    txgmii_intf = TxGMII_Interface()
+    txflowintf = TxFlowInterface()
+    txconfigreg = Signal(intbv(txconfig)[32:])
+    reset = ResetSignal(1, active=0, async=True)
+    sent = []
+
+    @block
+    def test():
+        dutinst = txengine(txclientintf, txgmii_intf, txflowintf,
+                           txconfigreg, reset)
+        print("Testing VLAN Tag Insertion %s" % dutinst)
+
+        @instance
+        def clkdriver():
+            while True:
+                txclientintf.clk.next = not txclientintf.clk
+                yield delay(5)
+
+        @instance
+        def monitor():
+            lanes = []
+            while True:
+                yield txclientintf.clk.posedge
+                if txgmii_intf.dv:
+                    lanes.append(int(txgmii_intf.data))
+                elif lanes:
+                    sent.append(bytes(lanes))
+                    lanes = []
+
+        @instance
+        def tbstim():
+            reset.next = 0
+            yield clkwait(txclientintf.clk, count=2)
+            reset.next = 1
+            yield clkwait(txclientintf.clk, count=2)
+            for frame, tag in zip(frames, tags):
+                yield txclientintf.tx(list(frame), vlantag=tag)
+            yield clkwait(txclientintf.clk, count=100)
+            assert sent == [model.transmit(frame, vlantag=tag)
+                            for frame, tag in zip(frames, tags)]
+            for wire, tag in zip(sent, tags):
+                if tag is not None or default is not None:
+                    assert wire[20:22] == bytes([0x81, 0x00])
+                    assert len(wire) >= 8 + 64
+            raise StopSimulation
+
+        return dutinst, clkdriver, monitor, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=1000000)
+    testInst.quit_sim()
+
+
+@pytest.mark.parametrize('strip', [False, True])
+def test_strip(strip):
+    rxconfig1 = 0x10000000 | (strip << 23)
+    model = GEMACModel()
+    model.writeconfig(0x240, rxconfig1)
+    model.writeconfig(0x390, 0x80000000)
+    tags = [choice([None, randrange(2**16)]) for _ in range(20)]
+    wires = []
+    for tag in tags:
+        frame = randframe(tag).ljust(60, b'\x00')
+        wires.append(preamble + frame + fcs(frame))
+    rxclientintf = RxFIFOClientInterface()
+    rxgmii_intf = RxGMII_Interface()
+    rxflowintf = RxFlowInterface()
+    rxconfig0 = Signal(intbv(0)[32:])
+    rxconfig1reg = Signal(intbv(rxconfig1)[32:])
+    filterconfig = Signal(intbv(0x80000000)[32:])
+    addrtable = [Signal(intbv(0)[48:]) for _ in range(4)]
+    reset = ResetSignal(1, active=0, async=True)
+    received = []
+
+    @block
+    def test():
+        dutinst = rxengine(rxclientintf, rxgmii_intf, rxflowintf, rxconfig0,
+                           rxconfig1reg, filterconfig, addrtable, reset)
+        print("Testing VLAN Tag Stripping %s" % dutinst)
+
+        @instance
+        def clkdriver():
+            while True:
+                rxgmii_intf.clk.next = not rxgmii_intf.clk
+                yield delay(5)
+
+        @instance
+        def monitor():
+            frame = []
+            while True:
+                yield rxgmii_intf.clk.posedge
+                if rxclientintf.dv:
+                    frame.append(int(rxclientintf.data))
+                if rxclientintf.good:
+                    received.append((bytes(frame),
+                                     int(rxclientintf.vlantag)
+                                     if rxclientintf.vlan else None))
+                if rxclientintf.good or rxclientintf.bad or \
+                        rxclientintf.filtered:
+                    frame = []
+
+        @instance
+        def tbstim():
+            reset.next = 0
+            yield clkwait(rxgmii_intf.clk, count=2)
+            reset.next = 1
+            yield clkwait(rxgmii_intf.clk, count=2)
+            expected = []
+            for wire in wires:
+                for byte in wire:
+                    rxgmii_intf.data.next = byte
+                    rxgmii_intf.dv.next = True
+                    yield rxgmii_intf.clk.posedge
+                rxgmii_intf.dv.next = False
+                rxgmii_intf.data.next = 0
+                yield clkwait(rxgmii_intf.clk, count=12)
+                frame = model.receive(wire)
+                expected.append((frame, model.vlantag))
+            yield clkwait(rxgmii_intf.clk, count=20)
+            assert received == expected
+            for (frame, vlantag), tag in zip(received, tags):
+                assert vlantag == (tag if strip else None)
+            raise StopSimulation
+
+        return dutinst, clkdriver, monitor, tbstim
+
+    testInst = test()
+    testInst.config_sim(trace=False)
+    testInst.run_sim(duration=1000000)
+    testInst.quit_sim()